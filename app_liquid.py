@@ -5,14 +5,20 @@ Tema: Liquid iPhone - Premium UI/UX
 import streamlit as st
 import pandas as pd
 import folium
+from folium.plugins import HeatMap
 from streamlit_folium import st_folium
 import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
+from typing import Optional, Tuple
+import json
+import math
 import os
+import sqlite3
 from dotenv import load_dotenv
 
 from src.services.database import DatabaseManager
+from src.services import geohash
 from src.models import OrderStatus
 
 load_dotenv()
@@ -169,67 +175,318 @@ def get_db_manager():
     return DatabaseManager(os.getenv('DATABASE_PATH', 'data/taxi_orders.db'))
 
 
-def format_datetime(dt):
-    """Formata datetime para exibição."""
-    if dt is None:
-        return "-"
-    try:
-        import pytz
-        br_tz = pytz.timezone('America/Sao_Paulo')
-        # Se for string, tenta converter
-        if isinstance(dt, str):
-            from datetime import datetime
-            # Suporta ISO 8601 com ou sem timezone
-            if dt.endswith('Z'):
-                dt = datetime.fromisoformat(dt.replace('Z', '+00:00'))
-            else:
-                dt = datetime.fromisoformat(dt)
-        # Se não tem tzinfo, assume UTC
-        if dt.tzinfo is None:
-            import pytz
-            dt = pytz.utc.localize(dt)
-        # Converte para horário de Brasília
-        dt_br = dt.astimezone(br_tz)
-        return dt_br.strftime("%d/%m/%Y %H:%M")
-    except Exception:
-        return str(dt)
-
-
-def create_map(orders):
+@st.cache_resource
+def get_reprocessor():
+    """Reprocessador compartilhado entre reruns (os jobs rodam em thread de fundo)."""
+    from reprocess_failed_orders import OrderReprocessor
+    
+    return OrderReprocessor()
+
+
+# Janelas do filtro de período (None = sem limite)
+DATE_RANGES = {
+    "Últimas 24h": timedelta(hours=24),
+    "Últimos 7 dias": timedelta(days=7),
+    "Últimos 30 dias": timedelta(days=30),
+    "Todos": None
+}
+
+# Limite de linhas carregadas por consulta (mantém o dashboard independente do tamanho da tabela)
+DASHBOARD_MAX_ROWS = int(os.getenv('DASHBOARD_MAX_ROWS', 1000))
+
+ORDER_COLUMNS = (
+    "id, passenger_name, phone, pickup_address, dropoff_address, "
+    "pickup_lat, pickup_lng, pickup_time, status, created_at, error_message"
+)
+
+BR_TIMEZONE = 'America/Sao_Paulo'
+
+DEFAULT_MAP_CENTER = (-19.9191, -43.9386)
+
+
+def get_change_token() -> tuple:
+    """
+    Token de mudança do banco (COUNT/MAX(id)/MAX(updated_at)).
+    Passado como argumento para as funções em cache: quando o banco muda,
+    o token muda e o Streamlit recalcula apenas as consultas afetadas.
+    """
+    return get_db_manager().get_change_token()
+
+
+def get_since(date_range: str) -> Optional[str]:
+    """Converte o filtro de período em limite inferior ISO para created_at."""
+    delta = DATE_RANGES.get(date_range)
+    if delta is None:
+        return None
+    # Arredonda para o minuto para que reruns consecutivos reutilizem o cache
+    since = datetime.now().replace(second=0, microsecond=0) - delta
+    return since.isoformat()
+
+
+@st.cache_data(show_spinner=False)
+def load_statistics(token: tuple) -> dict:
+    """Estatísticas por status (recalculadas apenas quando o token muda)."""
+    return get_db_manager().get_statistics()
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def load_rollups(token: tuple, grain: str, dimension: str, since: Optional[str]) -> pd.DataFrame:
+    """Rollups pré-agregados (hora/dia x empresa/centro de custo) para os gráficos."""
+    rows = get_db_manager().get_rollups(grain=grain, dimension=dimension, since=since)
+    return pd.DataFrame(rows, columns=['bucket', 'dim_value', 'status', 'count'])
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def load_orders_df(
+    token: tuple,
+    since: Optional[str] = None,
+    statuses: Optional[Tuple[str, ...]] = None,
+    limit: int = DASHBOARD_MAX_ROWS
+) -> pd.DataFrame:
+    """
+    Carrega pedidos direto do SQLite para um DataFrame.
+    
+    Filtros de período e status são aplicados no SQL (usando os índices
+    de created_at e status) em vez de filtrar objetos Order em Python.
+    """
+    query = f"SELECT {ORDER_COLUMNS} FROM orders"
+    conditions = []
+    params = []
+    if since:
+        conditions.append("created_at >= ?")
+        params.append(since)
+    if statuses:
+        conditions.append(f"status IN ({', '.join('?' for _ in statuses)})")
+        params.extend(statuses)
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    query += " ORDER BY created_at DESC LIMIT ?"
+    params.append(limit)
+    
+    with sqlite3.connect(get_db_manager().db_path) as conn:
+        return pd.read_sql(query, conn, params=params)
+
+
+def format_datetime_series(series: pd.Series) -> pd.Series:
+    """Formata uma coluna de datas ISO para exibição (horário de Brasília)."""
+    dt = pd.to_datetime(series, utc=True, errors='coerce', format='ISO8601')
+    return dt.dt.tz_convert(BR_TIMEZONE).dt.strftime("%d/%m/%Y %H:%M").fillna("-")
+
+
+STATUS_MARKER_COLORS = {
+    OrderStatus.DISPATCHED.value: 'green',
+    OrderStatus.GEOCODED.value: 'blue',
+    OrderStatus.FAILED.value: 'red',
+    OrderStatus.MANUAL_REVIEW.value: 'orange'
+}
+
+
+def create_map(orders: pd.DataFrame):
     """Cria mapa interativo com marcadores de pedidos."""
-    center_lat, center_lng = -19.9191, -43.9386
-    if orders and orders[0].pickup_lat:
-        center_lat, center_lng = orders[0].pickup_lat, orders[0].pickup_lng
+    center_lat, center_lng = DEFAULT_MAP_CENTER
+    if not orders.empty:
+        center_lat, center_lng = orders.iloc[0]['pickup_lat'], orders.iloc[0]['pickup_lng']
     
     m = folium.Map(location=[center_lat, center_lng], zoom_start=12)
     
-    for order in orders:
-        if order.pickup_lat and order.pickup_lng:
-            color = {
-                OrderStatus.DISPATCHED: 'green',
-                OrderStatus.GEOCODED: 'blue',
-                OrderStatus.FAILED: 'red',
-                OrderStatus.MANUAL_REVIEW: 'orange'
-            }.get(order.status, 'gray')
-            
-            popup_html = f"""
-            <b>Pedido #{order.id}</b><br>
-            <b>Passageiro:</b> {order.passenger_name}<br>
-            <b>Telefone:</b> {order.phone}<br>
-            <b>Endereço:</b> {order.pickup_address}<br>
-            <b>Horário:</b> {format_datetime(order.pickup_time)}<br>
-            <b>Status:</b> {order.status.value}
-            """
-            
-            folium.Marker(
-                [order.pickup_lat, order.pickup_lng],
-                popup=folium.Popup(popup_html, max_width=300),
-                icon=folium.Icon(color=color, icon='taxi', prefix='fa')
-            ).add_to(m)
+    pickup_times = format_datetime_series(orders['pickup_time'])
+    for order, pickup_time in zip(orders.itertuples(index=False), pickup_times):
+        color = STATUS_MARKER_COLORS.get(order.status, 'gray')
+        
+        popup_html = f"""
+        <b>Pedido #{order.id}</b><br>
+        <b>Passageiro:</b> {order.passenger_name}<br>
+        <b>Telefone:</b> {order.phone}<br>
+        <b>Endereço:</b> {order.pickup_address}<br>
+        <b>Horário:</b> {pickup_time}<br>
+        <b>Status:</b> {order.status}
+        """
+        
+        folium.Marker(
+            [order.pickup_lat, order.pickup_lng],
+            popup=folium.Popup(popup_html, max_width=300),
+            icon=folium.Icon(color=color, icon='taxi', prefix='fa')
+        ).add_to(m)
     
     return m
 
 
+# Modos de visualização do mapa
+MAP_MODES = {
+    "🔵 Agrupado (geohash)": "cluster",
+    "🔥 Mapa de calor": "heatmap",
+    "📍 Marcadores individuais": "markers"
+}
+
+# Máximo de rotas (polylines) desenhadas por mapa
+MAP_MAX_ROUTES = int(os.getenv('DASHBOARD_MAX_ROUTES', 200))
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def load_map_points(token: tuple, since: Optional[str]) -> pd.DataFrame:
+    """Carrega apenas as colunas necessárias para agregação no mapa (sem limite de linhas)."""
+    query = (
+        "SELECT id, pickup_lat, pickup_lng, status FROM orders "
+        "WHERE pickup_lat IS NOT NULL AND pickup_lng IS NOT NULL"
+    )
+    params = []
+    if since:
+        query += " AND created_at >= ?"
+        params.append(since)
+    
+    with sqlite3.connect(get_db_manager().db_path) as conn:
+        return pd.read_sql(query, conn, params=params)
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def aggregate_by_geohash(token: tuple, since: Optional[str], precision: int) -> pd.DataFrame:
+    """
+    Agrega as coletas por célula geohash no servidor.
+    
+    O navegador recebe um ponto por célula (com contagens por status)
+    em vez de um marcador por pedido.
+    """
+    points = load_map_points(token, since)
+    if points.empty:
+        return pd.DataFrame(columns=['cell', 'count', 'lat', 'lng'])
+    
+    points = points.assign(
+        cell=geohash.encode_many(points['pickup_lat'], points['pickup_lng'], precision)
+    )
+    cells = points.groupby('cell').agg(
+        count=('id', 'size'),
+        lat=('pickup_lat', 'mean'),
+        lng=('pickup_lng', 'mean')
+    )
+    by_status = pd.crosstab(points['cell'], points['status'])
+    return cells.join(by_status).reset_index()
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def load_routes(token: tuple, since: Optional[str], limit: int = MAP_MAX_ROUTES) -> list:
+    """
+    Carrega rotas multi-paradas (coordenadas dos passageiros + destino).
+    
+    Returns:
+        Lista de dicts {id, status, points} com pelo menos dois pontos.
+    """
+    query = (
+        "SELECT id, status, passengers, dropoff_lat, dropoff_lng FROM orders "
+        "WHERE passengers IS NOT NULL"
+    )
+    params = []
+    if since:
+        query += " AND created_at >= ?"
+        params.append(since)
+    query += " ORDER BY created_at DESC LIMIT ?"
+    params.append(limit)
+    
+    with sqlite3.connect(get_db_manager().db_path) as conn:
+        rows = conn.execute(query, params).fetchall()
+    
+    routes = []
+    for order_id, status, passengers_json, dropoff_lat, dropoff_lng in rows:
+        try:
+            passengers = json.loads(passengers_json)
+        except (TypeError, ValueError):
+            continue
+        points = [
+            (p['lat'], p['lng']) for p in passengers
+            if isinstance(p, dict) and p.get('lat') is not None and p.get('lng') is not None
+        ]
+        if dropoff_lat is not None and dropoff_lng is not None:
+            points.append((dropoff_lat, dropoff_lng))
+        if len(points) >= 2:
+            routes.append({'id': order_id, 'status': status, 'points': points})
+    return routes
+
+
+def add_routes(m: folium.Map, routes: list):
+    """Desenha as rotas multi-paradas como polylines numeradas."""
+    for route in routes:
+        color = STATUS_MARKER_COLORS.get(route['status'], 'gray')
+        folium.PolyLine(
+            route['points'],
+            color=color,
+            weight=3,
+            opacity=0.7,
+            tooltip=f"Pedido #{route['id']} - {len(route['points']) - 1} paradas"
+        ).add_to(m)
+        # Destino final destacado
+        folium.CircleMarker(
+            route['points'][-1],
+            radius=5,
+            color=color,
+            fill=True,
+            fill_opacity=1.0,
+            tooltip=f"Destino do pedido #{route['id']}"
+        ).add_to(m)
+
+
+def create_cluster_map(cells: pd.DataFrame) -> folium.Map:
+    """Mapa com um círculo por célula geohash, dimensionado pela contagem."""
+    m = folium.Map(location=[cells['lat'].mean(), cells['lng'].mean()], zoom_start=11)
+    status_columns = [s.value for s in OrderStatus if s.value in cells.columns]
+    
+    for cell in cells.to_dict('records'):
+        counts = {status: int(cell[status]) for status in status_columns if cell[status]}
+        dominant = max(counts, key=counts.get) if counts else None
+        breakdown = "<br>".join(f"{status}: {count}" for status, count in counts.items())
+        folium.CircleMarker(
+            [cell['lat'], cell['lng']],
+            radius=6 + 4 * math.log2(cell['count']),
+            color=STATUS_MARKER_COLORS.get(dominant, 'gray'),
+            fill=True,
+            fill_opacity=0.6,
+            popup=folium.Popup(
+                f"<b>{cell['count']} coletas</b> (célula {cell['cell']})<br>{breakdown}",
+                max_width=250
+            )
+        ).add_to(m)
+    return m
+
+
+def create_heatmap(cells: pd.DataFrame) -> folium.Map:
+    """Mapa de calor ponderado pelas contagens já agregadas por célula."""
+    m = folium.Map(location=[cells['lat'].mean(), cells['lng'].mean()], zoom_start=11)
+    HeatMap(
+        cells[['lat', 'lng', 'count']].values.tolist(),
+        radius=18,
+        blur=15
+    ).add_to(m)
+    return m
+
+
+@st.cache_resource(show_spinner=False, max_entries=8)
+def build_cached_map(
+    token: tuple,
+    since: Optional[str],
+    mode: str = "cluster",
+    precision: int = 6,
+    show_routes: bool = False
+):
+    """Constrói o mapa apenas quando o banco, o período ou as opções mudam."""
+    if mode == "markers":
+        orders = load_orders_df(token, since).dropna(subset=['pickup_lat', 'pickup_lng'])
+        m = create_map(orders) if not orders.empty else None
+    else:
+        cells = aggregate_by_geohash(token, since, precision)
+        if cells.empty:
+            m = None
+        elif mode == "heatmap":
+            m = create_heatmap(cells)
+        else:
+            m = create_cluster_map(cells)
+    
+    if show_routes:
+        routes = load_routes(token, since)
+        if routes:
+            if m is None:
+                m = folium.Map(location=list(routes[0]['points'][0]), zoom_start=11)
+            add_routes(m, routes)
+    return m
+
+
 def render_header():
     """Renderiza o cabeçalho premium da aplicação com filtros integrados."""
     st.markdown("""
@@ -361,6 +618,26 @@ def render_kpi_cards(stats):
             """, unsafe_allow_html=True)
 
 
+def render_reprocess_job(job: dict, stale: bool):
+    """Mostra o progresso do último job de reprocessamento."""
+    counts = job['counts']
+    done = job['total'] - counts['pending']
+    labels = {
+        'pending': "⏳ Na fila", 'running': "🔄 Em andamento",
+        'paused': "⏸️ Pausado", 'completed': "✅ Concluído"
+    }
+    status = "⚠️ Interrompido" if stale else labels.get(job['status'], job['status'])
+    
+    st.markdown(f"**Job #{job['id']}** — {status}")
+    st.progress(done / job['total'] if job['total'] else 1.0, text=f"{done}/{job['total']} pedidos")
+    st.caption(
+        f"✅ {counts['succeeded']} enviados · ❌ {counts['failed']} falhas · "
+        f"⏭️ {counts['skipped']} pulados (não recuperáveis)"
+    )
+    if job['message']:
+        st.caption(f"Motivo: {job['message']}")
+
+
 def main():
     """Função principal da aplicação."""
     
@@ -369,12 +646,14 @@ def main():
     
     # Atualiza cache se botão pressionado
     if refresh_btn:
+        st.cache_data.clear()
         st.cache_resource.clear()
         st.rerun()
     
-    # Database
-    db = get_db_manager()
-    stats = db.get_statistics()
+    # Database: token barato decide se as consultas em cache ainda valem
+    token = get_change_token()
+    since = get_since(date_range)
+    stats = load_statistics(token)
     
     # KPI Cards
     render_kpi_cards(stats)
@@ -412,15 +691,16 @@ def main():
         with col2:
             # Timeline (placeholder)
             st.markdown("#### ⏱️ Timeline Recente")
-            orders = db.get_all_orders(limit=10)
+            recent = load_orders_df(token, limit=5)
             
-            if orders:
-                for order in orders[:5]:
+            if not recent.empty:
+                created = format_datetime_series(recent['created_at'])
+                for order, created_at in zip(recent.itertuples(index=False), created):
                     status_color = {
-                        OrderStatus.DISPATCHED: '#10B981',
-                        OrderStatus.FAILED: '#EF4444',
-                        OrderStatus.GEOCODED: '#3B82F6',
-                        OrderStatus.MANUAL_REVIEW: '#F59E0B'
+                        OrderStatus.DISPATCHED.value: '#10B981',
+                        OrderStatus.FAILED.value: '#EF4444',
+                        OrderStatus.GEOCODED.value: '#3B82F6',
+                        OrderStatus.MANUAL_REVIEW.value: '#F59E0B'
                     }.get(order.status, '#6B7280')
                     
                     st.markdown(f"""
@@ -429,50 +709,100 @@ def main():
                                     padding: 1rem; margin-bottom: 0.5rem; border-radius: 12px;'>
                             <p style='margin: 0; color: white; font-weight: 600;'>{order.passenger_name}</p>
                             <p style='margin: 0; color: rgba(255,255,255,0.7); font-size: 0.9rem;'>
-                                {format_datetime(order.created_at)} - {order.status.value}
+                                {created_at} - {order.status}
                             </p>
                         </div>
                     """, unsafe_allow_html=True)
             else:
                 st.info("📭 Nenhum pedido recente")
+        
+        # Gráficos a partir dos rollups mantidos pelo banco (sem varrer orders)
+        grain = 'hour' if date_range == "Últimas 24h" else 'day'
+        col1, col2 = st.columns([3, 2])
+        
+        with col1:
+            st.markdown("#### 📅 Pedidos por Período")
+            timeline = load_rollups(token, grain, 'all', since)
+            if not timeline.empty:
+                fig = px.bar(
+                    timeline, x='bucket', y='count', color='status',
+                    labels={'bucket': 'Período', 'count': 'Pedidos', 'status': 'Status'},
+                    color_discrete_sequence=px.colors.qualitative.Set3
+                )
+                fig.update_layout(
+                    paper_bgcolor='rgba(0,0,0,0)',
+                    plot_bgcolor='rgba(0,0,0,0)',
+                    font=dict(color='white', size=14)
+                )
+                st.plotly_chart(fig, width='stretch')
+            else:
+                st.info("📭 Nenhum pedido no período")
+        
+        with col2:
+            st.markdown("#### 🏢 Pedidos por Empresa")
+            companies = load_rollups(token, grain, 'company_code', since)
+            if not companies.empty:
+                per_company = (
+                    companies.assign(dim_value=companies['dim_value'].replace('', 'Sem código'))
+                    .groupby('dim_value', as_index=False)['count'].sum()
+                    .sort_values('count', ascending=False)
+                )
+                fig = px.bar(
+                    per_company, x='dim_value', y='count',
+                    labels={'dim_value': 'Empresa', 'count': 'Pedidos'},
+                    color_discrete_sequence=px.colors.qualitative.Set3
+                )
+                fig.update_layout(
+                    paper_bgcolor='rgba(0,0,0,0)',
+                    plot_bgcolor='rgba(0,0,0,0)',
+                    font=dict(color='white', size=14)
+                )
+                st.plotly_chart(fig, width='stretch')
+            else:
+                st.info("📭 Nenhum pedido no período")
     
     with tab2:
         st.markdown("### 🗺️ Mapa de Coletas")
         
-        orders = db.get_all_orders()
-        orders_with_coords = [o for o in orders if o.pickup_lat and o.pickup_lng]
+        col1, col2, col3 = st.columns([3, 2, 1])
+        with col1:
+            mode_label = st.radio("Visualização", list(MAP_MODES), horizontal=True, key="map_mode")
+        with col2:
+            precision = st.select_slider(
+                "Precisão do agrupamento (geohash)",
+                options=[4, 5, 6, 7],
+                value=6,
+                key="map_precision",
+                disabled=MAP_MODES[mode_label] == "markers"
+            )
+        with col3:
+            show_routes = st.checkbox("Mostrar rotas", value=False, key="map_routes")
+        
+        m = build_cached_map(token, since, MAP_MODES[mode_label], precision, show_routes)
         
-        if orders_with_coords:
-            m = create_map(orders_with_coords)
-            st_folium(m, width=1200, height=600)
+        if m is not None:
+            st_folium(m, width=1200, height=600, returned_objects=[])
         else:
             st.info("🗺️ Nenhum pedido com coordenadas disponível")
     
     with tab3:
         st.markdown("### 📋 Todos os Pedidos")
         
-        orders = db.get_all_orders()
+        # Filtros de período e status aplicados direto no SQL
+        orders = load_orders_df(token, since, tuple(status_filter) if status_filter else None)
         
-        if orders:
-            data = []
-            for order in orders:
-                data.append({
-                    'ID': order.id,
-                    'Passageiro': order.passenger_name,
-                    'Telefone': order.phone,
-                    'Endereço': order.pickup_address,
-                    'Horário': format_datetime(order.pickup_time),
-                    'Status': order.status.value,
-                    'Criado': format_datetime(order.created_at)
-                })
+        if not orders.empty:
+            df = pd.DataFrame({
+                'ID': orders['id'],
+                'Passageiro': orders['passenger_name'],
+                'Telefone': orders['phone'],
+                'Endereço': orders['pickup_address'],
+                'Horário': format_datetime_series(orders['pickup_time']),
+                'Status': orders['status'],
+                'Criado': format_datetime_series(orders['created_at'])
+            })
             
-            df = pd.DataFrame(data)
-            
-            # Filtro por status
-            if status_filter:
-                df = df[df['Status'].isin(status_filter)]
-            
-                st.dataframe(df, width='stretch', hide_index=True)
+            st.dataframe(df, width='stretch', hide_index=True)
             
             # Botão de export
             csv = df.to_csv(index=False).encode('utf-8')
@@ -501,22 +831,23 @@ def main():
         """, unsafe_allow_html=True)
         
         # Mostrar pedidos falhados
-        failed_orders = [o for o in db.get_all_orders() if o.status == OrderStatus.FAILED]
+        failed_count = stats.get(OrderStatus.FAILED.value, 0)
+        failed_orders = load_orders_df(token, statuses=(OrderStatus.FAILED.value,), limit=5)
         
         col1, col2 = st.columns([2, 1])
         
         with col1:
-            st.metric("❌ Pedidos Falhados", len(failed_orders))
+            st.metric("❌ Pedidos Falhados", failed_count)
             
-            if failed_orders:
+            if not failed_orders.empty:
                 st.markdown("**Últimas falhas:**")
-                for order in failed_orders[:5]:
+                for order in failed_orders.itertuples(index=False):
                     st.markdown(f"""
                         <div style='background: rgba(255,255,255,0.05); padding: 0.8rem; 
                                     border-radius: 12px; margin-bottom: 0.5rem;'>
                             <b>ID {order.id}:</b> {order.passenger_name}<br>
                             <small style='color: rgba(255,255,255,0.6);'>
-                                Erro: {order.error_message[:80] if order.error_message else 'N/A'}
+                                Erro: {order.error_message[:80] if isinstance(order.error_message, str) else 'N/A'}
                             </small>
                         </div>
                     """, unsafe_allow_html=True)
@@ -524,25 +855,30 @@ def main():
         with col2:
             st.markdown("<br>", unsafe_allow_html=True)
             
-            if st.button("🔄 Reprocessar Todos", type="primary", disabled=len(failed_orders)==0):
-                with st.spinner("Reprocessando pedidos..."):
-                    try:
-                        from reprocess_failed_orders import OrderReprocessor
-                        
-                        reprocessor = OrderReprocessor()
-                        success_count, fail_count = reprocessor.reprocess_all()
-                        
-                        st.success(f"✅ Reprocessamento concluído!\n\n"
-                                 f"- Sucesso: {success_count}\n"
-                                 f"- Falhas: {fail_count}")
-                        
-                        # Aguardar 2 segundos e recarregar
-                        import time
-                        time.sleep(2)
+            from src.services.reprocessing import ReprocessingEngine
+            
+            job = get_db_manager().get_reprocess_job()
+            stale = job is not None and ReprocessingEngine(get_db_manager(), dispatch=None).is_stale(job)
+            unfinished = job is not None and job['status'] != 'completed' and job['counts']['pending'] > 0
+            in_progress = unfinished and job['status'] in ('pending', 'running') and not stale
+            
+            # Job pausado ou interrompido: o mesmo botão retoma só os pendentes
+            label = "▶️ Retomar Reprocessamento" if unfinished and not in_progress else "🔄 Reprocessar Todos"
+            if st.button(label, type="primary", disabled=in_progress or (failed_count == 0 and not unfinished)):
+                try:
+                    job_id = get_reprocessor().start_background()
+                    if job_id is None:
+                        st.info("Nenhum pedido falhado para reprocessar")
+                    else:
                         st.rerun()
                         
-                    except Exception as e:
-                        st.error(f"❌ Erro ao reprocessar: {str(e)}")
+                except Exception as e:
+                    st.error(f"❌ Erro ao reprocessar: {str(e)}")
+            
+            if job is not None:
+                render_reprocess_job(job, stale)
+                if in_progress and st.button("🔁 Atualizar progresso"):
+                    st.rerun()
         
         # Seção de logs
         st.markdown("<br>", unsafe_allow_html=True)
@@ -0,0 +1,71 @@
+"""
+Benchmark da matriz de distâncias vetorizada contra geopy.geodesic por par.
+
+Uso:
+    python benchmarks/bench_distance_matrix.py [--sizes 10 50 100 300]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+import numpy as np
+from geopy.distance import geodesic
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.services.distance import distance_matrix
+
+# Acima deste tamanho a versão geodesic é estimada a partir de uma amostra
+GEODESIC_SAMPLE_PAIRS = 5000
+
+
+def random_points(n, rng):
+    return [(-19.9 + rng.uniform(-1, 1), -43.9 + rng.uniform(-1, 1)) for _ in range(n)]
+
+
+def time_geodesic(points):
+    """Tempo (s) da matriz completa via geodesic, extrapolado se necessário."""
+    pairs = [(a, b) for i, a in enumerate(points) for b in points[i + 1:]]
+    sample = pairs[:GEODESIC_SAMPLE_PAIRS]
+    start = time.perf_counter()
+    for a, b in sample:
+        geodesic(a, b).kilometers
+    elapsed = time.perf_counter() - start
+    return elapsed * len(pairs) / max(len(sample), 1), len(sample) < len(pairs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 50, 100, 300, 1000])
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    print(f"{'points':>6} {'geodesic ms':>12} {'haversine ms':>13} {'equirect ms':>12} {'speedup':>9} {'max err %':>10}")
+    for n in args.sizes:
+        points = random_points(n, rng)
+        geodesic_s, estimated = time_geodesic(points)
+
+        start = time.perf_counter()
+        matrix = distance_matrix(points)
+        haversine_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        distance_matrix(points, method='equirectangular')
+        equirect_s = time.perf_counter() - start
+
+        sample = points[:30]
+        reference = np.array([[geodesic(a, b).kilometers for b in sample] for a in sample])
+        mask = ~np.eye(len(sample), dtype=bool)
+        error = (np.abs(matrix[:30, :30] - reference)[mask] / reference[mask]).max() * 100
+
+        flag = '*' if estimated else ' '
+        print(f"{n:>6} {geodesic_s * 1000:>11.1f}{flag} {haversine_s * 1000:>13.2f} {equirect_s * 1000:>12.2f} "
+              f"{geodesic_s / haversine_s:>8.0f}x {error:>10.3f}")
+    print("* tempo geodesic extrapolado a partir de uma amostra de pares")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,263 @@
+"""
+Benchmark de precisão e velocidade dos extratores de pedido sobre um corpus com extração esperada.
+
+Compara, no mesmo corpus (gerado por benchmarks/corpus.py ou lido de uma pasta
+.eml + .json), o LLMExtractor completo, o LLMExtractor._fallback_parse e
+qualquer parser extra informado em --parser módulo:função. Para cada extrator
+mostra a taxa de acerto por campo, a taxa de pedidos 100% corretos (por formato)
+e a latência por e-mail.
+
+Sem --openai-base-url o LLMExtractor fala com o stand-in local da OpenAI, que
+devolve a própria extração esperada: a linha "llm" mede então o custo do
+cliente + pós-processamento e o quanto o pós-processamento preserva a
+resposta. Para medir o modelo de verdade, aponte --openai-base-url para a API
+(chave em OPENAI_API_KEY) e gere o corpus na hora (os horários "hoje"/"amanhã"
+são relativos à data do e-mail e o extrator usa o relógio atual).
+
+Uso:
+    python benchmarks/bench_extraction.py [--emails 200] [--styles csn_tabela csn_texto]
+    python benchmarks/bench_extraction.py --corpus data/corpus_csn --extractors fallback
+    python benchmarks/bench_extraction.py --parser meu_modulo:parse_email
+"""
+import argparse
+import importlib
+import json
+import logging
+import os
+import platform
+import re
+import sys
+import time
+import unicodedata
+from collections import defaultdict
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from dateutil import parser as date_parser
+
+from benchmarks.bench_pipeline import git_commit, percentiles
+from benchmarks.corpus import CSN_STYLES, STYLES, csn_corpus, load_corpus, pipeline_corpus
+from benchmarks.fakes import fake_openai
+from src.services.llm_extractor import LLMExtractor
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), 'results')
+FIELDS = ('passenger_name', 'phone', 'passenger_re', 'pickup_address', 'dropoff_address', 'pickup_time',
+          'company_code', 'cost_center', 'has_return', 'return_time', 'passengers')
+
+# Palavras que não distinguem um endereço de outro
+_ADDRESS_STOPWORDS = {'mg', 'rua', 'r', 'avenida', 'av', 'n', 'no', 'numero', 'bairro', 'de', 'da', 'do',
+                      'dos', 'das', 'e'}
+
+Extractor = Callable[[str], Optional[Dict]]
+
+
+def _tokens(text) -> List[str]:
+    folded = unicodedata.normalize('NFKD', str(text or '')).lower()
+    folded = ''.join(c for c in folded if not unicodedata.combining(c))
+    return re.findall(r'\w+', folded)
+
+
+def _digits(text) -> str:
+    digits = re.sub(r'\D', '', str(text or ''))
+    return digits[2:] if len(digits) > 11 and digits.startswith('55') else digits
+
+
+def _same_time(expected, actual) -> bool:
+    if not expected:
+        return not actual
+    try:
+        return abs((date_parser.parse(str(actual)) - date_parser.parse(expected)).total_seconds()) < 60
+    except (ValueError, TypeError, OverflowError):
+        return False
+
+
+def _same_address(expected, actual) -> bool:
+    wanted = {t for t in _tokens(expected) if t not in _ADDRESS_STOPWORDS}
+    return wanted <= set(_tokens(actual)) if wanted else not actual
+
+
+def _same_name(expected, actual) -> bool:
+    # "passenger_name" pode vir com todos os nomes separados por vírgula
+    return _tokens(expected) == _tokens(str(actual or '').split(',')[0])
+
+
+def score(truth: Dict, extracted: Optional[Dict]) -> Dict[str, bool]:
+    """
+    Compara uma extração com a esperada, campo a campo.
+
+    Nomes e endereços são comparados sem acentos/caixa (o endereço esperado
+    precisa estar contido no extraído), telefones e matrículas pelos dígitos,
+    horários com tolerância de 1 minuto e passageiros pela quantidade.
+
+    Args:
+        truth: Extração esperada.
+        extracted: Dicionário devolvido pelo extrator (None = falha).
+
+    Returns:
+        Dicionário campo -> acertou.
+    """
+    if not extracted:
+        return {name: False for name in FIELDS}
+    return {
+        'passenger_name': _same_name(truth['passenger_name'], extracted.get('passenger_name')),
+        'phone': _digits(truth['phone']) == _digits(extracted.get('phone')),
+        'passenger_re': _digits(truth['passenger_re']) == _digits(extracted.get('passenger_re')),
+        'pickup_address': _same_address(truth['pickup_address'], extracted.get('pickup_address')),
+        'dropoff_address': _same_address(truth['dropoff_address'], extracted.get('dropoff_address')),
+        'pickup_time': _same_time(truth['pickup_time'], extracted.get('pickup_time')),
+        'company_code': str(truth.get('company_code') or '') == str(extracted.get('company_code') or '').strip(),
+        'cost_center': str(truth.get('cost_center') or '') == str(extracted.get('cost_center') or '').strip(),
+        'has_return': bool(truth.get('has_return')) == bool(extracted.get('has_return')),
+        'return_time': _same_time(truth.get('return_time'), extracted.get('return_time')),
+        'passengers': len(truth.get('passengers') or []) == len(extracted.get('passengers') or []),
+    }
+
+
+def load_parser(spec: str) -> Extractor:
+    """Importa um parser extra no formato 'pacote.modulo:funcao' (função corpo -> dict)."""
+    module, _, name = spec.partition(':')
+    return getattr(importlib.import_module(module), name)
+
+
+def build_extractors(args, corpus) -> Tuple[Dict[str, Extractor], list]:
+    """Monta {nome: extrator} conforme --extractors/--parser e os servidores a encerrar."""
+    extractors, servers = {}, []
+    if 'fallback' in args.extractors:
+        extractors['fallback'] = LLMExtractor(api_key='bench')._fallback_parse
+    if 'llm' in args.extractors:
+        base_url = args.openai_base_url
+        if not base_url:
+            server, base_url = fake_openai.start_server(
+                responder=fake_openai.answers_responder({mail.body: mail.truth for mail in corpus}),
+                latency=args.llm_latency_ms / 1000
+            )
+            servers.append(server)
+        api_key = os.getenv('OPENAI_API_KEY', 'sk-fake') if args.openai_base_url else 'sk-fake'
+        extractors['llm'] = LLMExtractor(api_key=api_key, model=args.model, base_url=base_url).extract_order_data
+    for spec in args.parser:
+        extractors[spec] = load_parser(spec)
+    return extractors, servers
+
+
+def evaluate(name: str, extract: Extractor, corpus) -> Dict:
+    """Roda um extrator sobre o corpus e agrega acertos e latências."""
+    hits = defaultdict(int)
+    by_style = defaultdict(lambda: {'emails': 0, 'complete': 0})
+    latencies, failures, complete = [], 0, 0
+    for mail in corpus:
+        start = time.perf_counter()
+        try:
+            extracted = extract(mail.body)
+        except Exception as e:
+            logging.getLogger(__name__).debug(f"{name} raised {e!r}")
+            extracted = None
+        latencies.append(time.perf_counter() - start)
+        failures += not extracted
+        fields = score(mail.truth, extracted)
+        for field_name, ok in fields.items():
+            hits[field_name] += ok
+        ok_all = all(fields.values())
+        complete += ok_all
+        by_style[mail.style]['emails'] += 1
+        by_style[mail.style]['complete'] += ok_all
+
+    total = len(corpus) or 1
+    elapsed = sum(latencies)
+    return {
+        'extractor': name,
+        'emails': len(corpus),
+        'failures': failures,
+        'complete_rate': complete / total,
+        'fields': {field_name: hits[field_name] / total for field_name in FIELDS},
+        'styles': {style: dict(s, complete_rate=s['complete'] / s['emails']) for style, s in by_style.items()},
+        'latency': percentiles(latencies),
+        'emails_per_second': len(corpus) / elapsed if elapsed else 0.0,
+    }
+
+
+def run(args):
+    """Gera/lê o corpus, roda cada extrator e retorna o dicionário de resultados."""
+    if args.corpus:
+        corpus = load_corpus(args.corpus)
+    else:
+        csn = [s for s in args.styles if s in CSN_STYLES]
+        other = [s for s in args.styles if s in STYLES]
+        n_csn = round(args.emails * len(csn) / len(args.styles))
+        corpus = (csn_corpus(n_csn, args.seed, args.max_passengers, csn) if csn else []) + \
+            (pipeline_corpus(args.emails - n_csn, args.seed, args.max_passengers, other) if other else [])
+
+    extractors, servers = build_extractors(args, corpus)
+    try:
+        results = [evaluate(name, extract, corpus) for name, extract in extractors.items()]
+    finally:
+        for server in servers:
+            server.shutdown()
+
+    styles = defaultdict(int)
+    for mail in corpus:
+        styles[mail.style] += 1
+    return {
+        'benchmark': 'extraction',
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'git_commit': git_commit(),
+        'python': platform.python_version(),
+        'config': vars(args),
+        'corpus': {'emails': len(corpus), 'styles': dict(styles),
+                   'passengers_max': max((len(m.truth['passengers']) or 1 for m in corpus), default=0)},
+        'extractors': results,
+    }
+
+
+def print_report(results):
+    corpus = results['corpus']
+    print(f"\ncorpus: {corpus['emails']} emails {corpus['styles']} (up to {corpus['passengers_max']} passengers)")
+    names = [r['extractor'] for r in results['extractors']]
+    width = max([16] + [len(n) + 2 for n in names])
+    print(f"\n{'field':<16}" + ''.join(f"{n:>{width}}" for n in names))
+    for field_name in FIELDS:
+        print(f"{field_name:<16}" + ''.join(f"{r['fields'][field_name]:>{width}.1%}" for r in results['extractors']))
+    print(f"{'COMPLETE':<16}" + ''.join(f"{r['complete_rate']:>{width}.1%}" for r in results['extractors']))
+    for style in corpus['styles']:
+        print(f"{'  ' + style:<16}" + ''.join(
+            f"{r['styles'].get(style, {}).get('complete_rate', 0):>{width}.1%}" for r in results['extractors']))
+    print(f"{'failures':<16}" + ''.join(f"{r['failures']:>{width}}" for r in results['extractors']))
+    print(f"{'p50 ms':<16}" + ''.join(f"{r['latency']['p50_ms']:>{width}.2f}" for r in results['extractors']))
+    print(f"{'p95 ms':<16}" + ''.join(f"{r['latency']['p95_ms']:>{width}.2f}" for r in results['extractors']))
+    print(f"{'emails/s':<16}" + ''.join(f"{r['emails_per_second']:>{width}.1f}" for r in results['extractors']))
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Benchmark de precisão/velocidade dos extratores de pedido")
+    parser.add_argument('--emails', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--max-passengers', type=int, default=20)
+    parser.add_argument('--styles', nargs='+', default=list(CSN_STYLES), choices=STYLES + CSN_STYLES)
+    parser.add_argument('--corpus', help="Pasta com .eml + .json (benchmarks/corpus.py --out) em vez de gerar")
+    parser.add_argument('--extractors', nargs='+', default=['fallback', 'llm'], choices=['fallback', 'llm'])
+    parser.add_argument('--parser', action='append', default=[], help="Parser extra 'modulo:funcao' (repetível)")
+    parser.add_argument('--llm-latency-ms', type=float, default=0.0, help="Latência do stand-in da OpenAI")
+    parser.add_argument('--openai-base-url', help="API real/compatível em vez do stand-in (chave em OPENAI_API_KEY)")
+    parser.add_argument('--model', default=os.getenv('OPENAI_MODEL', 'gpt-4o'))
+    parser.add_argument('--log-level', default='CRITICAL')
+    parser.add_argument('--output', help="Arquivo JSON do resultado (padrão: benchmarks/results/extraction-<data>.json)")
+    return parser
+
+
+def main():
+    args = build_parser().parse_args()
+    logging.basicConfig(level=getattr(logging, args.log_level.upper(), logging.CRITICAL))
+
+    results = run(args)
+    print_report(results)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"extraction-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2, ensure_ascii=False, default=str)
+    print(f"\nresults saved to {output}")
+
+
+if __name__ == '__main__':
+    main()
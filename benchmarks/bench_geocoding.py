@@ -0,0 +1,81 @@
+"""
+Benchmark de throughput do GeocodingService contra o stand-in local do Nominatim.
+
+Sobe benchmarks/fakes/fake_nominatim.py em uma thread, geocodifica endereços
+sintéticos (parte deles locais conhecidos do gazetteer) e mostra o throughput
+e as métricas de cada backend da cadeia.
+
+Uso:
+    python benchmarks/bench_geocoding.py [--addresses 200] [--latency-ms 50] [--workers 1 4 16]
+"""
+import argparse
+import logging
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from benchmarks.fakes.fake_nominatim import start_server
+from src.services.geocoding_service import GeocodingService
+
+STREETS = ['Rua da Bahia', 'Av. Afonso Pena', 'Rua Piauí', 'Av. Amazonas', 'Rua Espírito Santo', 'Av. Brasil']
+KNOWN = ['CSN Mineração, Congonhas, MG', 'BH', 'Delp Engenharia Vespasiano', 'Mariana, MG']
+
+
+def synthetic_addresses(n, known_ratio, repeat_ratio, rng):
+    """Endereços sintéticos com parte de locais conhecidos e repetições."""
+    addresses = []
+    for i in range(n):
+        roll = rng.random()
+        if roll < known_ratio:
+            addresses.append(rng.choice(KNOWN))
+        elif addresses and roll < known_ratio + repeat_ratio:
+            addresses.append(rng.choice(addresses))
+        else:
+            addresses.append(f"{rng.choice(STREETS)}, {rng.randint(1, 3000)}, Belo Horizonte")
+    return addresses
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--addresses', type=int, default=200)
+    parser.add_argument('--latency-ms', type=float, default=50.0)
+    parser.add_argument('--miss-rate', type=float, default=0.05)
+    parser.add_argument('--known-ratio', type=float, default=0.4)
+    parser.add_argument('--repeat-ratio', type=float, default=0.2)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4, 16])
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    server, domain = start_server(latency=args.latency_ms / 1000, miss_rate=args.miss_rate)
+    print(f"fake nominatim at {domain}, latency {args.latency_ms:.0f} ms, miss rate {args.miss_rate:.0%}")
+
+    for workers in args.workers:
+        rng = random.Random(args.seed)
+        addresses = synthetic_addresses(args.addresses, args.known_ratio, args.repeat_ratio, rng)
+        service = GeocodingService(
+            nominatim_domain=domain, nominatim_scheme='http',
+            nominatim_min_interval=0, nominatim_max_concurrency=workers
+        )
+
+        start = time.perf_counter()
+        batch = service.geocode_batch(addresses, delay=0, max_workers=workers)
+        elapsed = time.perf_counter() - start
+        results = [batch[a] for a in addresses]
+
+        ok = sum(1 for r in results if r)
+        print(f"\nworkers={workers}: {len(addresses)} addresses in {elapsed:.2f}s "
+              f"({len(addresses) / elapsed:.1f} addr/s), {ok} resolved")
+        print(f"  {'backend':<10} {'calls':>6} {'hits':>6} {'errors':>6} {'hit%':>6} {'p50 ms':>8} {'p95 ms':>8}")
+        for name, m in service.get_backend_metrics().items():
+            print(f"  {name:<10} {m['calls']:>6} {m['hits']:>6} {m['errors']:>6} "
+                  f"{m['hit_rate'] * 100:>5.0f}% {m['p50_ms']:>8.2f} {m['p95_ms']:>8.2f}")
+
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,294 @@
+"""
+Benchmark ponta a ponta do TaxiOrderProcessor com stand-ins locais de todos os serviços externos.
+
+Sobe IMAP, OpenAI, Nominatim, MinasTaxi e Evolution falsos (latência e taxa de
+erro configuráveis), carrega a caixa IMAP com um corpus sintético
+(benchmarks/corpus.py) e executa um ciclo de process_new_orders. Mostra
+e-mails/s, p50/p95/p99 por estágio e memória, e salva o resultado em JSON
+para comparação com execuções anteriores (--baseline).
+
+Uso:
+    python benchmarks/bench_pipeline.py [--emails 50] [--llm-latency-ms 800] [--geo-latency-ms 50]
+    python benchmarks/bench_pipeline.py --baseline benchmarks/results/pipeline-20260101-120000.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import defaultdict
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from benchmarks.corpus import pipeline_corpus
+from benchmarks.fakes import fake_evolution, fake_imap, fake_minastaxi, fake_nominatim, fake_openai
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), 'results')
+STAGES = ('fetch', 'extract', 'geocode', 'dispatch', 'notify', 'email')
+
+
+def percentiles(values):
+    """Média e percentis (nearest-rank) em milissegundos."""
+    if not values:
+        return {'count': 0, 'mean_ms': 0.0, 'p50_ms': 0.0, 'p95_ms': 0.0, 'p99_ms': 0.0}
+    ordered = sorted(values)
+
+    def rank(p):
+        return ordered[min(len(ordered) - 1, int(p * len(ordered)))] * 1000
+
+    return {
+        'count': len(ordered),
+        'mean_ms': sum(ordered) / len(ordered) * 1000,
+        'p50_ms': rank(0.50),
+        'p95_ms': rank(0.95),
+        'p99_ms': rank(0.99),
+    }
+
+
+def peak_rss_mb():
+    """Pico de memória residente do processo (None fora de Unix)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reporta em KiB, macOS em bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+            cwd=os.path.dirname(__file__), timeout=5
+        ).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def start_fakes(args, corpus):
+    """Sobe os stand-ins e retorna {nome: server} e as variáveis de ambiente do processador."""
+    truth = {mail.body: mail.truth for mail in corpus}
+    imap, (imap_host, imap_port) = fake_imap.start_server(
+        latency=args.imap_latency_ms / 1000, error_rate=args.imap_error_rate, seed=args.seed
+    )
+    openai, openai_url = fake_openai.start_server(
+        responder=fake_openai.answers_responder(truth),
+        latency=args.llm_latency_ms / 1000, jitter=args.llm_jitter_ms / 1000,
+        error_rate=args.llm_error_rate, seed=args.seed
+    )
+    nominatim, nominatim_domain = fake_nominatim.start_server(
+        latency=args.geo_latency_ms / 1000, miss_rate=args.geo_miss_rate
+    )
+    minastaxi, minastaxi_url = fake_minastaxi.start_server(
+        latency=args.minastaxi_latency_ms / 1000, error_rate=args.minastaxi_error_rate, seed=args.seed
+    )
+    evolution, evolution_url = fake_evolution.start_server(
+        latency=args.evolution_latency_ms / 1000, error_rate=args.evolution_error_rate, seed=args.seed
+    )
+    env = {
+        'EMAIL_HOST': imap_host, 'EMAIL_PORT': str(imap_port), 'EMAIL_USE_SSL': 'false',
+        'EMAIL_USER': 'bench', 'EMAIL_PASSWORD': 'bench', 'EMAIL_FOLDER': 'INBOX',
+        'EMAIL_SUBJECT_FILTER': 'PROGRAMAÇÃO',
+        'OPENAI_BASE_URL': openai_url, 'OPENAI_API_KEY': 'sk-fake', 'OPENAI_MODEL': 'fake-model',
+        'NOMINATIM_DOMAIN': nominatim_domain, 'NOMINATIM_SCHEME': 'http', 'NOMINATIM_MIN_INTERVAL': '0',
+        'USE_GOOGLE_MAPS': 'false', 'DISABLE_GEOCODING': 'false',
+        'MINASTAXI_API_URL': minastaxi_url, 'MINASTAXI_USER_ID': 'bench', 'MINASTAXI_PASSWORD': 'bench',
+        'EVOLUTION_API_URL': evolution_url, 'EVOLUTION_API_KEY': 'fake', 'EVOLUTION_INSTANCE_NAME': 'bench',
+        'EVOLUTION_BACKUP_INSTANCE_NAME': '',
+        'ENABLE_WHATSAPP_NOTIFICATIONS': 'true' if args.whatsapp else 'false',
+        'ENABLE_RIDE_POOLING': 'false',
+        'SCHEDULER_DEFER_HOURS': str(args.defer_hours),
+        'JOB_CLAIM_BATCH': '0',  # um ciclo processa o corpus inteiro
+    }
+    servers = {'imap': imap, 'openai': openai, 'nominatim': nominatim, 'minastaxi': minastaxi, 'evolution': evolution}
+    return servers, env
+
+
+def run(args):
+    """Executa o benchmark e retorna o dicionário de resultados."""
+    corpus = pipeline_corpus(args.emails, seed=args.seed, max_passengers=args.max_passengers)
+    servers, env = start_fakes(args, corpus)
+    for mail in corpus:
+        servers['imap'].mailbox.add(mail.to_bytes())
+
+    workdir = tempfile.mkdtemp(prefix='bench_pipeline_')
+    env.update({
+        'DATABASE_PATH': os.path.join(workdir, 'orders.db'),
+        'GAZETTEER_PATH': os.path.join(workdir, 'gazetteer.json'),
+        'LOG_FILE': os.path.join(workdir, 'pipeline.log'),
+        'LOG_LEVEL': args.log_level,
+    })
+    os.environ.update(env)
+
+    if args.tracemalloc:
+        tracemalloc.start()
+    rss_before = peak_rss_mb()
+
+    # Importado só depois do ambiente: o módulo configura logging na importação
+    from src.processor import TaxiOrderProcessor
+
+    processor = TaxiOrderProcessor()
+
+    # Guarda cada observação (o histograma só tem buckets) para percentis exatos
+    samples = defaultdict(list)
+    observe = processor.stage_seconds.observe
+
+    def recording_observe(value, **labels):
+        samples[labels['stage']].append(value)
+        observe(value, **labels)
+
+    processor.stage_seconds.observe = recording_observe
+    # Tempo por e-mail = extração + conclusão (fases separadas pelo escalonador)
+    email_seconds = defaultdict(float)
+
+    def timed_phase(method, uid_of):
+        def wrapper(item):
+            start = time.perf_counter()
+            try:
+                return method(item)
+            finally:
+                email_seconds[uid_of(item)] += time.perf_counter() - start
+        return wrapper
+
+    processor._extract_order = timed_phase(processor._extract_order, lambda email: email.uid)
+    processor._complete_order = timed_phase(processor._complete_order, lambda job: job.email.uid)
+
+    start = time.perf_counter()
+    stats = processor.process_new_orders(days_back=7)
+    elapsed = time.perf_counter() - start
+    samples['email'] = list(email_seconds.values())
+
+    memory = {'peak_rss_mb': peak_rss_mb(), 'rss_before_mb': rss_before}
+    if args.tracemalloc:
+        memory['python_heap_peak_mb'] = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+        tracemalloc.stop()
+
+    stages = {}
+    for stage in STAGES:
+        stages[stage] = percentiles(samples.get(stage, []))
+        if stage != 'email':
+            stages[stage]['errors'] = processor.stage_errors.value(stage=stage)
+
+    for server in servers.values():
+        server.shutdown()
+
+    return {
+        'benchmark': 'pipeline',
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'git_commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'config': vars(args),
+        'emails': stats['emails_fetched'],
+        'elapsed_seconds': elapsed,
+        'emails_per_second': stats['emails_fetched'] / elapsed if elapsed else 0.0,
+        'stats': stats,
+        'database': processor.get_statistics(),
+        'stages': stages,
+        'memory': memory,
+        'fakes': {name: dict(getattr(server, 'stats', None) or server.RequestHandlerClass.stats)
+                  for name, server in servers.items()},
+    }
+
+
+def compare(results, baseline, tolerance, floor_ms=5.0):
+    """
+    Compara com uma execução anterior.
+
+    Args:
+        results: Resultado atual.
+        baseline: Resultado salvo anteriormente.
+        tolerance: Piora relativa aceita (0.2 = 20%).
+        floor_ms: Diferenças de p95 abaixo disso são ignoradas (ruído).
+
+    Returns:
+        Lista de mensagens de regressão (vazia se nenhuma).
+    """
+    regressions = []
+    old_rate, new_rate = baseline.get('emails_per_second', 0), results['emails_per_second']
+    if old_rate and new_rate < old_rate * (1 - tolerance):
+        regressions.append(f"throughput {old_rate:.2f} -> {new_rate:.2f} emails/s")
+    for stage, current in results['stages'].items():
+        old = baseline.get('stages', {}).get(stage)
+        if not old or not old.get('count') or not current['count']:
+            continue
+        if current['p95_ms'] > old['p95_ms'] * (1 + tolerance) and current['p95_ms'] - old['p95_ms'] > floor_ms:
+            regressions.append(f"{stage} p95 {old['p95_ms']:.1f} -> {current['p95_ms']:.1f} ms")
+    return regressions
+
+
+def print_report(results):
+    print(f"\n{results['emails']} emails in {results['elapsed_seconds']:.2f}s "
+          f"-> {results['emails_per_second']:.2f} emails/s")
+    print(f"stats: {results['stats']}")
+    print(f"\n{'stage':<10}{'count':>7}{'mean':>10}{'p50':>10}{'p95':>10}{'p99':>10}{'errors':>8}")
+    for stage, s in results['stages'].items():
+        print(f"{stage:<10}{s['count']:>7}{s['mean_ms']:>8.1f}ms{s['p50_ms']:>8.1f}ms"
+              f"{s['p95_ms']:>8.1f}ms{s['p99_ms']:>8.1f}ms{int(s.get('errors', 0)):>8}")
+    memory = results['memory']
+    line = f"\nmemory: peak RSS {memory['peak_rss_mb']:.1f} MB" if memory['peak_rss_mb'] else "\nmemory: n/a"
+    if 'python_heap_peak_mb' in memory:
+        line += f", Python heap peak {memory['python_heap_peak_mb']:.1f} MB"
+    print(line)
+    print(f"fake servers: {results['fakes']}")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--emails', type=int, default=50)
+    parser.add_argument('--max-passengers', type=int, default=4)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--imap-latency-ms', type=float, default=5.0)
+    parser.add_argument('--imap-error-rate', type=float, default=0.0)
+    parser.add_argument('--llm-latency-ms', type=float, default=800.0)
+    parser.add_argument('--llm-jitter-ms', type=float, default=400.0)
+    parser.add_argument('--llm-error-rate', type=float, default=0.0)
+    parser.add_argument('--geo-latency-ms', type=float, default=50.0)
+    parser.add_argument('--geo-miss-rate', type=float, default=0.0)
+    parser.add_argument('--minastaxi-latency-ms', type=float, default=200.0)
+    parser.add_argument('--minastaxi-error-rate', type=float, default=0.0)
+    parser.add_argument('--evolution-latency-ms', type=float, default=100.0)
+    parser.add_argument('--evolution-error-rate', type=float, default=0.0)
+    parser.add_argument('--defer-hours', type=float, default=0.0,
+                        help="SCHEDULER_DEFER_HOURS (0: todos os pedidos são concluídos no ciclo)")
+    parser.add_argument('--no-whatsapp', dest='whatsapp', action='store_false')
+    parser.add_argument('--tracemalloc', action='store_true', help="Mede o pico do heap Python (mais lento)")
+    parser.add_argument('--log-level', default='ERROR')
+    parser.add_argument('--output', help="Arquivo JSON do resultado (padrão: benchmarks/results/pipeline-<data>.json)")
+    parser.add_argument('--baseline', help="Resultado anterior para comparação")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="Piora relativa aceita na comparação")
+    return parser
+
+
+def main():
+    args = build_parser().parse_args()
+
+    results = run(args)
+    print_report(results)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"pipeline-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2, ensure_ascii=False, default=str)
+    print(f"\nresults saved to {output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\nREGRESSIONS vs {args.baseline} (tolerance {args.tolerance:.0%}):")
+            for line in regressions:
+                print(f"  - {line}")
+            sys.exit(1)
+        print(f"\nno regressions vs {args.baseline} (tolerance {args.tolerance:.0%})")
+
+
+if __name__ == '__main__':
+    main()
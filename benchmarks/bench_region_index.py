@@ -0,0 +1,84 @@
+"""
+Benchmark do índice de regiões contra as checagens antigas (bounding box e varredura linear).
+
+Mede a acurácia em cidades de divisa rotuladas e o tempo por consulta de
+in_minas_gerais e da detecção de cidades da RMBH em endereços.
+
+Uso:
+    python benchmarks/bench_region_index.py [--points 200000] [--addresses 50000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.config.regions import BH_METRO_CITIES
+from src.services.region_index import get_region_index
+from tests.test_region_index import INSIDE_MG, OUTSIDE_MG
+
+
+def bbox_in_mg(lat, lng):
+    """Checagem antiga de _is_in_minas_gerais."""
+    return (-20.2 <= lat <= -19.4 and -44.2 <= lng <= -43.7) or \
+        (-22.9 <= lat <= -14.2 and -51.0 <= lng <= -39.8)
+
+
+def linear_has_city(address):
+    """Checagem antiga de _normalize_address."""
+    lower = address.lower()
+    return any(city in lower for city in BH_METRO_CITIES)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--points', type=int, default=200000)
+    parser.add_argument('--addresses', type=int, default=50000)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    index = get_region_index()
+    print(f"index build: {(time.perf_counter() - start) * 1000:.1f} ms "
+          f"(state grid {index.state.rows}x{index.state.cols})")
+
+    labeled = [(c, True) for c in INSIDE_MG.values()] + [(c, False) for c in OUTSIDE_MG.values()]
+    for name, check in (('bbox', bbox_in_mg), ('polygon', index.in_minas_gerais)):
+        correct = sum(check(lat, lng) == expected for (lat, lng), expected in labeled)
+        print(f"{name:<8} accuracy on border cities: {correct}/{len(labeled)}")
+
+    rng = np.random.default_rng(1)
+    lats = rng.uniform(-23.0, -14.0, args.points).tolist()
+    lngs = rng.uniform(-51.0, -39.5, args.points).tolist()
+    for name, check in (('bbox', bbox_in_mg), ('polygon', index.in_minas_gerais)):
+        start = time.perf_counter()
+        for lat, lng in zip(lats, lngs):
+            check(lat, lng)
+        elapsed = time.perf_counter() - start
+        print(f"{name:<8} {elapsed / args.points * 1e6:.2f} µs/point")
+
+    start = time.perf_counter()
+    index.state.contains_many(lats, lngs)
+    print(f"{'vector':<8} {(time.perf_counter() - start) / args.points * 1e6:.3f} µs/point")
+
+    r = random.Random(1)
+    cities = BH_METRO_CITIES + ['Congonhas', 'Ouro Preto', 'Mariana', 'Itabirito']
+    # Metade dos endereços sem cidade (o pior caso da varredura linear)
+    addresses = [
+        f"Rua {r.choice(['das Flores', 'Piauí', 'Grão Mogol'])}, {r.randint(1, 2000)}, Bairro Centro"
+        + (f", {r.choice(cities).title()} - MG" if r.random() < 0.5 else "")
+        for _ in range(args.addresses)
+    ]
+    for name, check in (('linear', linear_has_city), ('trie', index.mentions_bh_metro_city)):
+        start = time.perf_counter()
+        for address in addresses:
+            check(address)
+        elapsed = time.perf_counter() - start
+        print(f"{name:<8} {elapsed / args.addresses * 1e6:.2f} µs/address")
+
+
+if __name__ == '__main__':
+    main()
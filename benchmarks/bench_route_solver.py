@@ -0,0 +1,61 @@
+"""
+Benchmark do solver de rota de coleta (Held-Karp / 2-opt + Or-opt).
+
+Compara tempo e distância total contra a ordenação antiga
+(mais distante do destino primeiro) para 2 a 50 paradas.
+
+Uso:
+    python benchmarks/bench_route_solver.py [--repeat 5] [--seed 1]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.services.route_optimizer import RouteOptimizer, HELD_KARP_MAX_STOPS
+
+DESTINATION = (-20.5033, -43.8569)  # CSN Congonhas
+STOP_COUNTS = [2, 3, 4, 6, 8, 10, 12, 15, 20, 30, 40, 50]
+
+
+def random_points(n, rng):
+    """Paradas aleatórias na região metropolitana de BH."""
+    return [(-19.9 + rng.uniform(-0.4, 0.4), -43.95 + rng.uniform(-0.4, 0.4)) for _ in range(n)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    print(f"{'stops':>5} {'solver':>10} {'matrix ms':>10} {'solve ms':>10} {'km':>9} {'old km':>9} {'gain %':>7}")
+    for n in STOP_COUNTS:
+        matrix_ms = solve_ms = km = old_km = 0.0
+        for _ in range(args.repeat):
+            points = random_points(n, rng) + [DESTINATION]
+
+            start = time.perf_counter()
+            matrix = RouteOptimizer.build_distance_matrix(points)
+            matrix_ms += (time.perf_counter() - start) * 1000
+
+            start = time.perf_counter()
+            _, total = RouteOptimizer.solve_open_path(matrix)
+            solve_ms += (time.perf_counter() - start) * 1000
+
+            farthest_first = sorted(range(n), key=lambda k: -matrix[k, n])
+            km += total
+            old_km += RouteOptimizer.path_length(matrix, farthest_first)
+
+        solver = 'held-karp' if n <= HELD_KARP_MAX_STOPS else 'heuristic'
+        gain = (1 - km / old_km) * 100 if old_km else 0.0
+        print(f"{n:>5} {solver:>10} {matrix_ms / args.repeat:>10.2f} {solve_ms / args.repeat:>10.2f} "
+              f"{km / args.repeat:>9.1f} {old_km / args.repeat:>9.1f} {gain:>7.1f}")
+
+
+if __name__ == '__main__':
+    main()
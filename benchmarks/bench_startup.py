@@ -0,0 +1,242 @@
+"""
+Benchmark de inicialização: tempo de importação e partida a frio até o primeiro fetch IMAP.
+
+Roda cada alvo em um interpretador novo com `python -X importtime`, soma o
+tempo por pacote de topo e lista os módulos mais caros. Depois sobe o IMAP
+falso (benchmarks/fakes/fake_imap.py) e mede, em outro interpretador novo,
+importação + construção do TaxiOrderProcessor + primeiro fetch. SDKs pesados
+(openai, geopy) não devem ser carregados antes do primeiro pedido.
+
+Uso:
+    python benchmarks/bench_startup.py [--runs 5] [--top 15]
+    python benchmarks/bench_startup.py --budget-ms 400     # sai com 1 se a partida a frio estourar
+"""
+import argparse
+import json
+import os
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+from benchmarks.bench_pipeline import git_commit
+from benchmarks.fakes import fake_imap
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), 'results')
+
+# Módulos importados pelo processador e pelos scripts auxiliares
+TARGETS = ('src.processor', 'src.services.database', 'src.services.metrics', 'src.services.email_reader')
+
+# Não podem aparecer em sys.modules antes do primeiro pedido ser extraído/geocodificado
+HEAVY_MODULES = ('openai', 'geopy', 'aiohttp', 'numpy')
+
+_IMPORTTIME_RE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+
+# Executado no interpretador filho: imprime uma linha JSON com as fases
+_COLD_START = """
+import json, sys, time
+start = time.perf_counter()
+from src.processor import TaxiOrderProcessor
+imported = time.perf_counter()
+processor = TaxiOrderProcessor()
+constructed = time.perf_counter()
+emails = processor.email_reader.fetch_new_orders(days_back=1)
+fetched = time.perf_counter()
+print(json.dumps({
+    'import_ms': (imported - start) * 1000,
+    'construct_ms': (constructed - imported) * 1000,
+    'first_fetch_ms': (fetched - constructed) * 1000,
+    'in_process_ms': (fetched - start) * 1000,
+    'emails': len(emails),
+    'heavy_loaded': sorted(m for m in %r if m in sys.modules),
+}))
+"""
+
+
+def parse_importtime(stderr: str):
+    """
+    Interpreta a saída de `-X importtime`.
+
+    Returns:
+        (módulos, total_us): lista de {module, self_us, cumulative_us, depth} e o
+        tempo total de importação (soma dos cumulativos de nível zero).
+    """
+    modules = []
+    for line in stderr.splitlines():
+        match = _IMPORTTIME_RE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        modules.append({
+            'module': name,
+            'self_us': int(self_us),
+            'cumulative_us': int(cumulative_us),
+            'depth': (len(indent) - 1) // 2,
+        })
+    total = sum(m['cumulative_us'] for m in modules if m['depth'] == 0)
+    return modules, total
+
+
+def by_package(modules):
+    """Tempo próprio somado por pacote de topo (ex: 'openai', 'src'), em ms."""
+    totals = defaultdict(int)
+    for item in modules:
+        totals[item['module'].split('.')[0]] += item['self_us']
+    return {name: us / 1000 for name, us in sorted(totals.items(), key=lambda kv: kv[1], reverse=True)}
+
+
+def _child_env(extra=None):
+    env = dict(os.environ)
+    env.setdefault('OPENAI_API_KEY', 'sk-fake')
+    env.setdefault('MINASTAXI_USER_ID', 'bench')
+    env.update(extra or {})
+    return env
+
+
+def measure_import(target: str, runs: int, top: int):
+    """Importa `target` em `runs` interpretadores novos; devolve a mediana e o perfil da mais rápida."""
+    samples, best = [], None
+    for _ in range(runs):
+        proc = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', f'import {target}'],
+            cwd=ROOT, env=_child_env(), capture_output=True, text=True, timeout=120
+        )
+        if proc.returncode != 0:
+            raise RuntimeError(f"import {target} failed:\n{proc.stderr[-2000:]}")
+        modules, total = parse_importtime(proc.stderr)
+        samples.append(total / 1000)
+        if best is None or total < best[1]:
+            best = (modules, total)
+    modules, _ = best
+    loaded = {m['module'] for m in modules}
+    return {
+        'target': target,
+        'median_ms': statistics.median(samples),
+        'min_ms': min(samples),
+        'modules': len(modules),
+        'heavy_loaded': [name for name in HEAVY_MODULES if name in loaded],
+        'packages_ms': dict(list(by_package(modules).items())[:top]),
+        'slowest': [
+            {'module': m['module'], 'cumulative_ms': m['cumulative_us'] / 1000, 'self_ms': m['self_us'] / 1000}
+            for m in sorted(modules, key=lambda m: m['cumulative_us'], reverse=True)[:top]
+        ],
+    }
+
+
+def measure_cold_start(runs: int):
+    """Partida a frio até o primeiro fetch contra o IMAP falso (caixa vazia)."""
+    server, (host, port) = fake_imap.start_server()
+    workdir = tempfile.mkdtemp(prefix='bench_startup_')
+    env = _child_env({
+        'EMAIL_HOST': host, 'EMAIL_PORT': str(port), 'EMAIL_USE_SSL': 'false',
+        'EMAIL_USER': 'bench', 'EMAIL_PASSWORD': 'bench', 'EMAIL_FOLDER': 'INBOX',
+        'DATABASE_PATH': os.path.join(workdir, 'orders.db'),
+        'LOG_FILE': os.path.join(workdir, 'startup.log'),
+        'LOG_LEVEL': 'ERROR', 'TRACE_FILE': '',
+    })
+    phases = []
+    try:
+        for _ in range(runs):
+            start = time.perf_counter()
+            proc = subprocess.run(
+                [sys.executable, '-c', _COLD_START % (HEAVY_MODULES,)],
+                cwd=ROOT, env=env, capture_output=True, text=True, timeout=120
+            )
+            wall_ms = (time.perf_counter() - start) * 1000
+            if proc.returncode != 0:
+                raise RuntimeError(f"cold start failed:\n{proc.stderr[-2000:]}")
+            result = json.loads(proc.stdout.strip().splitlines()[-1])
+            result['wall_ms'] = wall_ms
+            phases.append(result)
+    finally:
+        server.shutdown()
+
+    summary = {key: statistics.median(p[key] for p in phases)
+               for key in ('wall_ms', 'in_process_ms', 'import_ms', 'construct_ms', 'first_fetch_ms')}
+    summary['runs'] = runs
+    summary['heavy_loaded'] = sorted({name for p in phases for name in p['heavy_loaded']})
+    return summary
+
+
+def run(args):
+    """Executa o benchmark e retorna o dicionário de resultados."""
+    return {
+        'benchmark': 'startup',
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'git_commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'config': vars(args),
+        'imports': [measure_import(target, args.runs, args.top) for target in args.targets],
+        'cold_start': measure_cold_start(args.runs),
+    }
+
+
+def print_report(results):
+    for item in results['imports']:
+        heavy = ', '.join(item['heavy_loaded']) or 'none'
+        print(f"\nimport {item['target']}: median {item['median_ms']:.1f} ms (min {item['min_ms']:.1f}), "
+              f"{item['modules']} modules, heavy: {heavy}")
+        print("  by package (self): " + ', '.join(f"{name} {ms:.1f}" for name, ms in item['packages_ms'].items()))
+        print(f"  {'cumulative':>12} {'self':>9}  module")
+        for row in item['slowest']:
+            print(f"  {row['cumulative_ms']:>9.1f} ms {row['self_ms']:>6.1f} ms  {row['module']}")
+
+    cold = results['cold_start']
+    print(f"\ncold start to first IMAP fetch (median of {cold['runs']}): {cold['wall_ms']:.1f} ms wall, "
+          f"{cold['in_process_ms']:.1f} ms in-process (import {cold['import_ms']:.1f}, "
+          f"construct {cold['construct_ms']:.1f}, fetch {cold['first_fetch_ms']:.1f})")
+    print(f"heavy modules before first order: {', '.join(cold['heavy_loaded']) or 'none'}")
+
+
+def check_budget(results, budget_ms):
+    """Violações do orçamento de partida (lista vazia quando tudo ok)."""
+    problems = []
+    cold = results['cold_start']
+    if budget_ms is not None and cold['in_process_ms'] > budget_ms:
+        problems.append(f"cold start {cold['in_process_ms']:.1f} ms > budget {budget_ms:.1f} ms")
+    if cold['heavy_loaded']:
+        problems.append(f"heavy modules loaded before first order: {', '.join(cold['heavy_loaded'])}")
+    return problems
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5, help="Interpretadores novos por medida (mediana)")
+    parser.add_argument('--top', type=int, default=15, help="Módulos listados por alvo")
+    parser.add_argument('--targets', nargs='+', default=list(TARGETS))
+    parser.add_argument('--budget-ms', type=float, help="Orçamento da partida a frio (import + init + fetch)")
+    parser.add_argument('--output', help="Arquivo JSON do resultado (padrão: benchmarks/results/startup-<data>.json)")
+    return parser
+
+
+def main():
+    args = build_parser().parse_args()
+
+    results = run(args)
+    print_report(results)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"startup-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2, ensure_ascii=False, default=str)
+    print(f"\nresults saved to {output}")
+
+    problems = check_budget(results, args.budget_ms)
+    if problems:
+        print("\nSTARTUP BUDGET EXCEEDED:")
+        for line in problems:
+            print(f"  - {line}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
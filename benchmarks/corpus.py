@@ -0,0 +1,490 @@
+"""
+Corpus sintético de e-mails de pedido com a extração esperada (ground truth).
+
+Os formatos seguem os exemplos de email_samples/:
+- 'programacao': blocos numerados Passageiro/Telefone/Pickup/Destino/Horário
+  (test_email_2_passageiros.eml);
+- 'delp': blocos Fone/Nome/Origem/Destino/Centro de Custo/Agendamento/
+  Horário de Chegada (test_email_6_passageiros.eml).
+
+E os da CSN Mineração (docs/EMAIL_FORMAT_CSN.md, email_samples/test_email_novo.txt):
+- 'csn_tabela': tabela │/┌ com nome, matrícula MIN/MIO/MIP, telefone, origem e
+  destino em siglas (CSN, BH, MARIANA...);
+- 'csn_enderecos': tabela com o endereço de cada passageiro e a cidade de destino;
+- 'csn_texto': texto livre com "*Empresa: 284 - Delp*", "C.Custo:" e lista de passageiros.
+Os horários vêm como "amanhã 16:00H", "hoje 04:30h" ou data explícita, relativos
+à data do e-mail (CorpusEmail.date), com RETORNO opcional e 1-20 passageiros.
+
+A extração esperada tem o mesmo formato do JSON devolvido pelo LLMExtractor
+e alimenta o stand-in da OpenAI nos benchmarks.
+
+Uso (grava .eml + .json com a extração esperada lado a lado):
+    python benchmarks/corpus.py --count 500 --out data/corpus_csn --styles csn_tabela csn_enderecos csn_texto
+"""
+import argparse
+import glob
+import json
+import os
+import random
+import sys
+import unicodedata
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from email import policy
+from email.message import EmailMessage
+from email.parser import BytesParser
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Dict, List, Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.config.company_mapping import COMPANY_CODE_TO_CNPJ
+
+BRT = timezone(timedelta(hours=-3))
+
+FIRST_NAMES = ['João', 'Maria', 'Gasparino', 'Timoteo', 'Brendo', 'Sergio', 'Ricardo', 'Kleber', 'Ellen',
+               'Patricia', 'Carlos', 'Ana', 'Luiz', 'Fernanda', 'Rodrigo', 'Juliana']
+LAST_NAMES = ['Silva', 'Souza', 'Rodrigues', 'Almeida', 'Santos', 'Pacheco', 'Martins', 'Amorim', 'Mendes',
+              'Oliveira', 'Pereira', 'Costa', 'Gonçalves', 'Batalha']
+STREETS = [('RUA', 'Jorge Dias de Oliva', 'Jardim Itaú', 'Vespasiano'),
+           ('RUA', 'Ceará', 'Celvia', 'Vespasiano'),
+           ('AVENIDA', 'Alcino Gonçalves Cota', 'Bom Jesus', 'Matozinhos'),
+           ('RUA', 'Efigênio Salles', 'Bonsucesso', 'Belo Horizonte'),
+           ('RUA', 'Armindas dos Reis', 'Jardim Industrial', 'Contagem'),
+           ('AVENIDA', 'Afonso Pena', 'Centro', 'Belo Horizonte'),
+           ('RUA', 'dos Tupis', 'Centro', 'Belo Horizonte'),
+           ('RUA', 'Piauí', 'Funcionários', 'Belo Horizonte'),
+           ('AVENIDA', 'João César de Oliveira', 'Eldorado', 'Contagem'),
+           ('RUA', 'Rio Grande do Norte', 'Savassi', 'Belo Horizonte')]
+DESTINATIONS = ['Delp Engenharia Vespasiano (Av. das Nações, 999 - Distrito Industrial, Vespasiano - MG, 33201-003)',
+                'CSN Mineração, Congonhas, MG', 'Aeroporto Confins', 'Hotel Central, Belo Horizonte, MG']
+COST_CENTERS = ['1.07002.07.004', '1.07001.03.003', '1.07001.03.001', '20095', '20086']
+
+STYLES = ('programacao', 'delp')
+CSN_STYLES = ('csn_tabela', 'csn_enderecos', 'csn_texto')
+
+# Siglas usadas nos e-mails da CSN e a expansão pedida no prompt do LLMExtractor
+CSN_PLACES = {
+    'CSN': 'CSN Mineração, Congonhas, MG',
+    'BH': 'Belo Horizonte, MG',
+    'MARIANA': 'Mariana, MG',
+    'LAFAIETE': 'Conselheiro Lafaiete, MG',
+    'CONGONHAS': 'Congonhas, MG',
+}
+CSN_COST_CENTERS = ['20049', '20063', '20086', '20095', '20381']
+CSN_REGISTRATION_PREFIXES = ['MIN', 'MIO', 'MIP', 'MNC']
+
+
+@dataclass
+class CorpusEmail:
+    """E-mail sintético e a extração esperada."""
+    subject: str
+    body: str
+    truth: Dict
+    style: str
+    sender: str = 'operacional@minastaxi.com.br'
+    headers: Dict[str, str] = field(default_factory=dict)
+    date: Optional[datetime] = None
+
+    def to_bytes(self, date: Optional[datetime] = None) -> bytes:
+        """Mensagem RFC 822 (UTF-8) pronta para a caixa IMAP."""
+        msg = EmailMessage()
+        msg['Subject'] = self.subject
+        msg['From'] = self.sender
+        msg['To'] = 'agendamento@minastaxi.com.br'
+        msg['Date'] = format_datetime(date or self.date or datetime.now(BRT))
+        for name, value in self.headers.items():
+            msg[name] = value
+        msg.set_content(self.body)
+        return bytes(msg)
+
+
+def _passenger(rng: random.Random) -> Dict:
+    kind, street, district, city = rng.choice(STREETS)
+    number = rng.randint(10, 2500)
+    return {
+        'name': f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {rng.choice(LAST_NAMES)}",
+        'phone': f"319{rng.randint(80000000, 99999999)}",
+        'street': (kind, street, number, district, city),
+        'address': f"{kind.title()} {street}, {number} - {district}, {city} - MG",
+    }
+
+
+def _format_phone(phone: str) -> str:
+    return f"({phone[:2]}) {phone[2:7]}-{phone[7:]}"
+
+
+def _truth(passengers: List[Dict], dropoff: str, pickup_time: datetime, **extra) -> Dict:
+    first = passengers[0]
+    truth = {
+        'passenger_name': first['name'],
+        'phone': first['phone'],
+        'passenger_re': '',
+        'pickup_address': first['address'],
+        'dropoff_address': dropoff,
+        'pickup_time': pickup_time.isoformat(),
+        'notes': '',
+        'company_code': '',
+        'cost_center': '',
+        'payment_type': '',
+        'passengers': [],
+        'has_return': False,
+        'return_time': None,
+        'arrival_time': None,
+    }
+    if len(passengers) > 1:
+        truth['passengers'] = [
+            {'name': p['name'], 'phone': p['phone'], 'passenger_re': '', 'address': p['address'],
+             'cost_center': p.get('cost_center', '')}
+            for p in passengers
+        ]
+    truth.update(extra)
+    return truth
+
+
+def _programacao(rng: random.Random, passengers: List[Dict], dropoff: str, when: datetime) -> CorpusEmail:
+    blocks = []
+    for i, p in enumerate(passengers, 1):
+        pickup = when + timedelta(minutes=10 * (i - 1))
+        blocks.append(
+            f"{i}) Passageiro: {p['name']}\n"
+            f"Telefone: {_format_phone(p['phone'])}\n"
+            f"Pickup: {p['address']}\n"
+            f"Destino: {dropoff}\n"
+            f"Horário: {pickup.strftime('%d/%m/%Y %H:%M')}\n"
+        )
+    body = (
+        "Olá,\n\n"
+        f"Segue programação de transporte com {len(passengers)} passageiro(s):\n\n"
+        + "\n".join(blocks)
+        + "\nObservações: Confirmar por WhatsApp.\n\nAtenciosamente,\nCentral de Agendamentos\n"
+    )
+    truth = _truth(passengers, dropoff, when, notes='Confirmar por WhatsApp.')
+    return CorpusEmail(f"PROGRAMAÇÃO - {len(passengers)} passageiro(s)", body, truth, 'programacao')
+
+
+def _delp(rng: random.Random, passengers: List[Dict], dropoff: str, when: datetime) -> CorpusEmail:
+    arrival = when
+    blocks = []
+    for p in passengers:
+        kind, street, number, district, city = p['street']
+        p['cost_center'] = rng.choice(COST_CENTERS)
+        blocks.append(
+            f"Fone: 31 {p['phone'][2:]}\n"
+            f"Nome: {p['name']}\n"
+            f"Origem: {kind} – {street} – Número: {number} – BAIRRO {district} – {city} – MG\n"
+            f"Destino: {dropoff}\n"
+            f"Centro de Custo: {p['cost_center']}\n"
+            f"Agendamento: {arrival.strftime('%d/%m/%y')}\n"
+            f"Horário de Chegada: {arrival.strftime('%H:%M')} hs\n"
+        )
+    body = (
+        "Gentileza programar táxis para os passageiros abaixo. \n\n"
+        + "\n".join(blocks)
+        + "\n\n--\n\nJúlio César / Gerencia Operacional\noperacional@minastaxi.com.br / 31 9 9999-9926\n"
+    )
+    truth = _truth(
+        passengers, dropoff, arrival - timedelta(minutes=30),
+        arrival_time=arrival.isoformat(), cost_center=passengers[0]['cost_center']
+    )
+    return CorpusEmail("PROGRAMAÇÃO", body, truth, 'delp')
+
+
+def pipeline_corpus(
+    n: int,
+    seed: int = 1,
+    max_passengers: int = 4,
+    styles=STYLES,
+    start: Optional[datetime] = None
+) -> List[CorpusEmail]:
+    """
+    Gera `n` e-mails sintéticos com a extração esperada.
+
+    Args:
+        n: Quantidade de e-mails.
+        seed: Semente (mesmo seed = mesmo corpus).
+        max_passengers: Máximo de passageiros por e-mail.
+        styles: Formatos sorteados (ver STYLES).
+        start: Referência dos horários (padrão: agora); as coletas ficam 1-7 dias depois.
+
+    Returns:
+        Lista de CorpusEmail.
+    """
+    rng = random.Random(seed)
+    base = (start or datetime.now(BRT)).replace(second=0, microsecond=0)
+    corpus = []
+    for _ in range(n):
+        passengers = [_passenger(rng) for _ in range(rng.randint(1, max_passengers))]
+        when = (base + timedelta(days=rng.randint(1, 7))).replace(hour=rng.randint(5, 22), minute=rng.choice([0, 15, 30, 45]))
+        dropoff = rng.choice(DESTINATIONS)
+        build = _programacao if rng.choice(styles) == 'programacao' else _delp
+        corpus.append(build(rng, passengers, dropoff, when))
+    return corpus
+
+
+def _ascii_upper(text: str) -> str:
+    return ''.join(c for c in unicodedata.normalize('NFKD', text) if not unicodedata.combining(c)).upper()
+
+
+def _csn_passenger(rng: random.Random) -> Dict:
+    kind, street, district, city = rng.choice(STREETS)
+    number = rng.randint(10, 2500)
+    prefix = rng.choice(CSN_REGISTRATION_PREFIXES)
+    digits = f"{rng.randint(0, 9999):04d}"
+    return {
+        'name': _ascii_upper(f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {rng.choice(LAST_NAMES)}"),
+        'phone': f"{rng.choice(['31', '37'])}9{rng.randint(80000000, 99999999)}",
+        'registration': f"{prefix} {digits}" if rng.random() < 0.1 else f"{prefix}{digits}",
+        'street_cell': _ascii_upper(f"{kind} {street}, {number} - {district}, {city}"),
+        'address': f"{kind.title()} {street}, {number} - {district}, {city} - MG",
+    }
+
+
+def _csn_phone(rng: random.Random, phone: str) -> str:
+    return rng.choice([f"({phone[:2]}){phone[2:]}", phone, f"({phone[:2]}) {phone[2:7]}-{phone[7:]}"])
+
+
+def _box_table(rows: List[List[str]]) -> str:
+    """Tabela com bordas │/┌ como a colada pelo Outlook da CSN."""
+    widths = [max(len(row[i]) for row in rows) + 2 for i in range(len(rows[0]))]
+    lines = ['┌' + '┬'.join('─' * w for w in widths) + '┐']
+    for row in rows:
+        lines.append('│' + '│'.join(f" {cell}".ljust(w) for cell, w in zip(row, widths)) + '│')
+    lines.append('└' + '┴'.join('─' * w for w in widths) + '┘')
+    return '\n'.join(lines)
+
+
+def _csn_schedule(rng: random.Random, reference: datetime):
+    """Sorteia o horário de coleta e a forma de escrevê-lo (hoje/amanhã/data)."""
+    minute = rng.choice([0, 15, 30, 45])
+    if reference.hour < 20 and rng.random() < 0.25:
+        when = reference.replace(hour=rng.randint(reference.hour + 1, 23), minute=minute)
+        day_word = rng.choice(['hoje', 'HOJE'])
+    else:
+        offset = 1 if rng.random() < 0.7 else rng.randint(2, 6)
+        when = (reference + timedelta(days=offset)).replace(hour=rng.randint(4, 22), minute=minute)
+        day_word = 'amanhã' if offset == 1 else ''
+    clock = f"{when:%H:%M}{rng.choice(['H', 'h'])}"
+    subject_when = f"{day_word} {clock}" if day_word else f"{when:%d/%m} {clock}"
+    # No corpo a data explícita é frequente mesmo com "amanhã"
+    if not day_word or (day_word == 'amanhã' and rng.random() < 0.5):
+        body_when = f"{day_word} {when:%d/%m/%Y} {clock}".strip()
+    else:
+        body_when = subject_when
+    return when, subject_when, body_when
+
+
+def _csn_return(rng: random.Random, when: datetime):
+    """RETORNO no mesmo dia em ~30% dos pedidos: (linha do e-mail, horário) ou ('', None)."""
+    hours = rng.randint(2, 10)
+    back = when + timedelta(hours=hours)
+    if rng.random() >= 0.3 or back.date() != when.date():
+        return '', None
+    return rng.choice([f"RETORNO {back:%H:%M}H", f"RETORNO: {back:%H:%M}h", f"Horário de retorno: {back:%H:%M}"]), back
+
+
+def _csn_company(rng: random.Random):
+    """Código de empresa em um dos formatos aceitos pelo prompt (ou ausente)."""
+    if rng.random() < 0.2:
+        return '', ''
+    code = rng.choice(list(COMPANY_CODE_TO_CNPJ))
+    line = rng.choice([f"Empresa: {code}", f"*Empresa: {code} - Delp*", f"Emp. {code}", f"Código Empresa: {code}"])
+    return code, line
+
+
+def _csn_greeting(reference: datetime) -> str:
+    return 'bom dia' if reference.hour < 12 else ('boa tarde' if reference.hour < 18 else 'boa noite')
+
+
+def _csn_truth(passengers: List[Dict], pickup: str, dropoff: str, when: datetime, addresses: List[str],
+               **extra) -> Dict:
+    first = passengers[0]
+    truth = _truth(
+        [{'name': p['name'], 'phone': p['phone'], 'address': a} for p, a in zip(passengers, addresses)],
+        dropoff, when, **extra
+    )
+    truth.update(passenger_re=first['registration'], pickup_address=pickup)
+    for item, p in zip(truth['passengers'], passengers):
+        item['passenger_re'] = p['registration']
+    return truth
+
+
+def _csn_common(rng: random.Random, passengers: List[Dict], reference: datetime):
+    """Partes compartilhadas pelos formatos CSN: telefones omitidos, horário, empresa, CC e retorno."""
+    for i, p in enumerate(passengers):
+        if rng.random() < (0.1 if i == 0 else 0.3):
+            p['phone'] = ''
+    when, subject_when, body_when = _csn_schedule(rng, reference)
+    company, company_line = _csn_company(rng)
+    cost_center = rng.choice(CSN_COST_CENTERS)
+    return_line, back = _csn_return(rng, when)
+    extra = {
+        'company_code': company, 'cost_center': cost_center,
+        'has_return': back is not None, 'return_time': back.isoformat() if back else None,
+    }
+    return when, subject_when, body_when, company_line, cost_center, return_line, extra
+
+
+def _csn_footer(*lines: str) -> str:
+    extra = ''.join(f"{line}\n\n" for line in lines if line)
+    return f"{extra}Att,\nSetor de Transporte\nCSN Mineração\n"
+
+
+def _csn_tabela(rng: random.Random, passengers: List[Dict], reference: datetime) -> CorpusEmail:
+    when, subject_when, body_when, company_line, cc, return_line, extra = _csn_common(rng, passengers, reference)
+    origin, destination = rng.sample(list(CSN_PLACES), 2)
+    rows = []
+    for i, p in enumerate(passengers):
+        phone = _csn_phone(rng, p['phone']) if p['phone'] else ''
+        rows.append([p['name'], p['registration'], phone, origin if i == 0 else '', destination if i == 0 else ''])
+    vehicle = rng.choice(['TAXI', 'TAXI', 'CARRO'])
+    body = (
+        f"Prezados, {_csn_greeting(reference)}!\n\n"
+        f"Gentileza programar um {vehicle} {body_when}\n\n"
+        f"{origin} {rng.choice(['DESTINO', 'DESTINHO'])} {destination}\n\n"
+        f"CC:{cc}\n\n"
+        f"{_box_table(rows)}\n\n"
+        + _csn_footer(return_line, company_line)
+    )
+    pickup = CSN_PLACES[origin]
+    truth = _csn_truth(passengers, pickup, CSN_PLACES[destination], when, [pickup] * len(passengers), **extra)
+    return CorpusEmail(f"PROGRAMAÇÃO DE {vehicle} {subject_when}", body, truth, 'csn_tabela', date=reference)
+
+
+def _csn_enderecos(rng: random.Random, passengers: List[Dict], reference: datetime) -> CorpusEmail:
+    when, subject_when, body_when, company_line, cc, return_line, extra = _csn_common(rng, passengers, reference)
+    destination = rng.choice(list(CSN_PLACES))
+    destination_cell = 'CONSELHEIRO LAFAIETE' if destination == 'LAFAIETE' else destination
+    rows = [[p['name'], p['registration'], p['street_cell'], destination_cell if i == 0 or rng.random() < 0.5 else '']
+            for i, p in enumerate(passengers)]
+    phones = [f"{p['name'].split()[0]}: {_csn_phone(rng, p['phone'])}" for p in passengers if p['phone']]
+    body = (
+        f"Prezados, {_csn_greeting(reference)}!\n\n"
+        f"Gentileza programar CARRO {body_when} DESTINO {destination_cell}\n\n"
+        f"CC:{cc}\n\n"
+        f"{_box_table(rows)}\n\n"
+        + (f"Telefones: {'; '.join(phones)}\n\n" if phones else '')
+        + _csn_footer(return_line, company_line)
+    )
+    addresses = [p['address'] for p in passengers]
+    truth = _csn_truth(passengers, addresses[0], CSN_PLACES[destination], when, addresses, **extra)
+    return CorpusEmail(f"PROGRAMAÇÃO DE CARRO {subject_when}", body, truth, 'csn_enderecos', date=reference)
+
+
+def _csn_texto(rng: random.Random, passengers: List[Dict], reference: datetime) -> CorpusEmail:
+    when, subject_when, body_when, company_line, cc, return_line, extra = _csn_common(rng, passengers, reference)
+    origin = rng.choice(list(CSN_PLACES))
+    destination = rng.choice([place for place in CSN_PLACES if place != origin])
+    lines = []
+    for i, p in enumerate(passengers, 1):
+        phone = f" - {_csn_phone(rng, p['phone'])}" if p['phone'] else ''
+        lines.append(f"{i}) {p['name']} - {p['registration']}{phone}")
+    body = (
+        f"Bom dia,\n\n"
+        f"{company_line or 'Empresa: (não informada)'}\n"
+        f"{rng.choice(['C.Custo', 'Centro de Custo', 'CC'])}: {cc}\n\n"
+        f"Solicito táxi {body_when}\n\n"
+        f"Passageiros:\n" + '\n'.join(lines) + "\n\n"
+        f"Origem: {origin}\n"
+        f"Destino: {destination}\n\n"
+        + _csn_footer(return_line)
+    )
+    pickup = CSN_PLACES[origin]
+    truth = _csn_truth(passengers, pickup, CSN_PLACES[destination], when, [pickup] * len(passengers), **extra)
+    return CorpusEmail(f"PROGRAMAÇÃO DE TAXI {subject_when}", body, truth, 'csn_texto', date=reference)
+
+
+_CSN_BUILDERS = {'csn_tabela': _csn_tabela, 'csn_enderecos': _csn_enderecos, 'csn_texto': _csn_texto}
+
+
+def csn_corpus(
+    n: int,
+    seed: int = 1,
+    max_passengers: int = 20,
+    styles=CSN_STYLES,
+    reference: Optional[datetime] = None
+) -> List[CorpusEmail]:
+    """
+    Gera `n` e-mails no formato da CSN Mineração com a extração esperada.
+
+    Args:
+        n: Quantidade de e-mails.
+        seed: Semente (mesmo seed e referência = mesmo corpus).
+        max_passengers: Máximo de passageiros por e-mail (1-20 nos pedidos reais).
+        styles: Formatos sorteados (ver CSN_STYLES).
+        reference: Data de envio dos e-mails (padrão: agora); "hoje"/"amanhã" são relativos a ela.
+
+    Returns:
+        Lista de CorpusEmail (com date = reference).
+    """
+    rng = random.Random(seed)
+    reference = (reference or datetime.now(BRT)).replace(second=0, microsecond=0)
+    corpus = []
+    for _ in range(n):
+        # Pedidos grandes são raros: metade com 1 passageiro, cauda até max_passengers
+        count = 1 if rng.random() < 0.5 else min(max_passengers, 1 + int(rng.expovariate(1 / 3)))
+        passengers = [_csn_passenger(rng) for _ in range(max(1, count))]
+        corpus.append(_CSN_BUILDERS[rng.choice(styles)](rng, passengers, reference))
+    return corpus
+
+
+def write_corpus(corpus: List[CorpusEmail], directory: str) -> List[str]:
+    """
+    Grava cada e-mail como <n>.eml e a extração esperada como <n>.json ao lado.
+
+    Args:
+        corpus: E-mails gerados.
+        directory: Pasta de saída (criada se não existir).
+
+    Returns:
+        Caminhos dos .eml gravados.
+    """
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for i, mail in enumerate(corpus, 1):
+        path = os.path.join(directory, f"{i:05d}.eml")
+        with open(path, 'wb') as f:
+            f.write(mail.to_bytes())
+        with open(path[:-4] + '.json', 'w', encoding='utf-8') as f:
+            json.dump({'style': mail.style, 'subject': mail.subject, 'truth': mail.truth}, f,
+                      indent=2, ensure_ascii=False)
+        paths.append(path)
+    return paths
+
+
+def load_corpus(directory: str) -> List[CorpusEmail]:
+    """Lê um corpus gravado por write_corpus (.eml + .json)."""
+    corpus = []
+    for path in sorted(glob.glob(os.path.join(directory, '*.eml'))):
+        with open(path, 'rb') as f:
+            msg = BytesParser(policy=policy.default).parse(f)
+        with open(path[:-4] + '.json', encoding='utf-8') as f:
+            meta = json.load(f)
+        corpus.append(CorpusEmail(
+            subject=str(msg['Subject']), body=msg.get_content(), truth=meta['truth'], style=meta['style'],
+            sender=str(msg['From']), date=parsedate_to_datetime(msg['Date']) if msg['Date'] else None
+        ))
+    return corpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera corpus sintético de e-mails de pedido (.eml + .json)")
+    parser.add_argument('--count', type=int, default=100)
+    parser.add_argument('--out', required=True, help="Pasta de saída")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--max-passengers', type=int, default=20)
+    parser.add_argument('--styles', nargs='+', default=list(CSN_STYLES), choices=STYLES + CSN_STYLES)
+    args = parser.parse_args()
+
+    csn = [s for s in args.styles if s in CSN_STYLES]
+    other = [s for s in args.styles if s in STYLES]
+    share = len(csn) / len(args.styles)
+    n_csn = round(args.count * share)
+    corpus = (csn_corpus(n_csn, args.seed, args.max_passengers, csn) if csn else []) + \
+        (pipeline_corpus(args.count - n_csn, args.seed, args.max_passengers, other) if other else [])
+    paths = write_corpus(corpus, args.out)
+    print(f"{len(paths)} e-mails gravados em {args.out}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""
+Stand-in local da Evolution API (WhatsApp) para benchmarks e testes sem rede.
+
+Responde whatsappNumbers (todo número existe), sendText e connectionState.
+Erros injetados respondem 500 no sendText.
+
+Uso:
+    python benchmarks/fakes/fake_evolution.py --port 8090 --latency-ms 100
+    EVOLUTION_API_URL=http://127.0.0.1:8090 ENABLE_WHATSAPP_NOTIFICATIONS=true python run_processor.py
+"""
+import argparse
+import itertools
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from benchmarks.fakes.http_fake import FaultProfile, JSONHandler, serve
+
+
+class FakeEvolutionHandler(JSONHandler):
+    _message_ids = itertools.count(1)
+
+    def do_POST(self):
+        self.profile.wait()
+        payload = self.read_json()
+
+        if self.path.startswith('/chat/whatsappNumbers/'):
+            self.count('whatsappNumbers')
+            return self.send_json([{'exists': True, 'jid': f"{n}@s.whatsapp.net", 'number': n}
+                                   for n in payload.get('numbers', [])])
+
+        if self.path.startswith('/message/sendText/'):
+            self.count('sendText')
+            if self.profile.should_fail():
+                self.count('errors')
+                return self.send_json({'error': 'injected failure'}, status=500)
+            message_id = f"FAKEMSG{next(self._message_ids):06d}"
+            return self.send_json({'key': {'id': message_id, 'remoteJid': payload.get('number')},
+                                   'status': 'PENDING'}, status=201)
+
+        self.send_json({'error': 'not found'}, status=404)
+
+    def do_GET(self):
+        self.profile.wait()
+        if self.path.startswith('/instance/connectionState/'):
+            self.count('connectionState')
+            return self.send_json({'instance': {'state': 'open'}})
+        self.send_json({'error': 'not found'}, status=404)
+
+
+def start_server(port: int = 0, latency: float = 0.0, error_rate: float = 0.0, seed: int = 0):
+    """
+    Sobe o servidor em uma thread daemon.
+
+    Args:
+        port: Porta (0 = escolhe uma livre).
+        latency: Latência artificial por requisição, em segundos.
+        error_rate: Fração de sendText respondidos com 500.
+        seed: Semente da injeção de erros.
+
+    Returns:
+        Tupla (server, base_url) onde base_url serve para EVOLUTION_API_URL.
+    """
+    return serve(FakeEvolutionHandler, port, FaultProfile(latency, error_rate=error_rate, seed=seed))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stand-in local da Evolution API")
+    parser.add_argument('--port', type=int, default=8090)
+    parser.add_argument('--latency-ms', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    args = parser.parse_args()
+
+    server, url = start_server(args.port, args.latency_ms / 1000, args.error_rate)
+    print(f"Fake Evolution API listening on {url} (EVOLUTION_API_URL={url})")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,220 @@
+"""
+Stand-in local de um servidor IMAP (sem TLS) para benchmarks e testes sem rede.
+
+Implementa o subconjunto do IMAP4rev1 usado pelo imap_tools/EmailReader:
+CAPABILITY, LOGIN, SELECT, UID SEARCH (ALL/UNSEEN/SEEN), UID FETCH,
+UID STORE (\\Seen), NOOP e LOGOUT. As mensagens ficam em memória.
+
+Uso:
+    python benchmarks/fakes/fake_imap.py --port 1143 --eml email_samples/*.eml
+    EMAIL_HOST=127.0.0.1 EMAIL_PORT=1143 EMAIL_USE_SSL=false python run_processor.py
+"""
+import argparse
+import glob
+import os
+import re
+import socketserver
+import sys
+import threading
+import time
+from typing import Iterable, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from benchmarks.fakes.http_fake import FaultProfile
+
+_COMMAND_RE = re.compile(rb'^(\S+) (\S+)(?: (.*))?$')
+
+
+class FakeMailbox:
+    """Caixa de entrada em memória com UIDs crescentes e flag \\Seen."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._messages = []  # [uid, raw, seen]
+        self._next_uid = 1
+
+    def add(self, raw: bytes, seen: bool = False) -> int:
+        """Adiciona uma mensagem RFC 822 e retorna o UID."""
+        with self._lock:
+            uid = self._next_uid
+            self._next_uid += 1
+            self._messages.append([uid, raw, seen])
+            return uid
+
+    def __len__(self):
+        with self._lock:
+            return len(self._messages)
+
+    def search(self, unseen: bool = None) -> List[int]:
+        with self._lock:
+            return [m[0] for m in self._messages if unseen is None or m[2] != unseen]
+
+    def get(self, uids: Iterable[int]):
+        wanted = set(uids)
+        with self._lock:
+            return [(i + 1, m) for i, m in enumerate(self._messages) if m[0] in wanted]
+
+    def mark_seen(self, uids: Iterable[int], seen: bool = True):
+        wanted = set(uids)
+        with self._lock:
+            for m in self._messages:
+                if m[0] in wanted:
+                    m[2] = seen
+
+
+def _parse_uid_set(text: str, max_uid: int) -> List[int]:
+    uids = []
+    for part in text.split(','):
+        if ':' in part:
+            lo, hi = part.split(':', 1)
+            lo = max_uid if lo == '*' else int(lo)
+            hi = max_uid if hi == '*' else int(hi)
+            uids.extend(range(min(lo, hi), max(lo, hi) + 1))
+        else:
+            uids.append(max_uid if part == '*' else int(part))
+    return uids
+
+
+class FakeIMAPHandler(socketserver.StreamRequestHandler):
+    mailbox: FakeMailbox = None
+    profile: FaultProfile = None
+    stats = None
+
+    def send(self, line: str):
+        self.wfile.write(line.encode('utf-8') + b'\r\n')
+
+    def count(self, key: str):
+        with self.server.stats_lock:
+            self.stats[key] = self.stats.get(key, 0) + 1
+
+    def handle(self):
+        self.send('* OK [CAPABILITY IMAP4rev1 LOGIN] fake IMAP ready')
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            match = _COMMAND_RE.match(line.rstrip(b'\r\n'))
+            if not match:
+                self.send('* BAD invalid command')
+                continue
+            tag, command, args = match.group(1).decode(), match.group(2).decode().upper(), (match.group(3) or b'').decode()
+            self.profile.wait()
+            self.count(command)
+            if command == 'LOGOUT':
+                self.send('* BYE fake IMAP closing')
+                self.send(f'{tag} OK LOGOUT completed')
+                return
+            handler = getattr(self, f'cmd_{command.lower()}', None)
+            if handler is None:
+                self.send(f'{tag} BAD unsupported command {command}')
+                continue
+            handler(tag, args)
+
+    def cmd_capability(self, tag, args):
+        self.send('* CAPABILITY IMAP4rev1 LOGIN')
+        self.send(f'{tag} OK CAPABILITY completed')
+
+    def cmd_login(self, tag, args):
+        self.send(f'{tag} OK LOGIN completed')
+
+    def cmd_noop(self, tag, args):
+        self.send(f'{tag} OK NOOP completed')
+
+    def cmd_select(self, tag, args):
+        self.send(f'* {len(self.mailbox)} EXISTS')
+        self.send('* 0 RECENT')
+        self.send('* OK [UIDVALIDITY 1] UIDs valid')
+        self.send('* FLAGS (\\Seen)')
+        self.send(f'{tag} OK [READ-WRITE] SELECT completed')
+
+    cmd_examine = cmd_select
+
+    def cmd_uid(self, tag, args):
+        sub, _, rest = args.partition(' ')
+        sub = sub.upper()
+        if sub == 'SEARCH':
+            criteria = rest.upper().replace('(', ' ').replace(')', ' ').split()
+            unseen = True if 'UNSEEN' in criteria else (False if 'SEEN' in criteria else None)
+            uids = self.mailbox.search(unseen)
+            self.send('* SEARCH' + ''.join(f' {u}' for u in uids))
+            self.send(f'{tag} OK SEARCH completed')
+        elif sub == 'FETCH':
+            uid_set, _, parts = rest.partition(' ')
+            all_uids = self.mailbox.search()
+            uids = _parse_uid_set(uid_set, max(all_uids, default=0))
+            if self.profile.should_fail():
+                self.count('errors')
+                self.send(f'{tag} NO [UNAVAILABLE] injected failure')
+                return
+            mark = 'BODY[' in parts.upper() and 'PEEK' not in parts.upper()
+            for seq, (uid, raw, seen) in self.mailbox.get(uids):
+                flags = '\\Seen' if seen or mark else ''
+                header = f'* {seq} FETCH (UID {uid} FLAGS ({flags}) RFC822.SIZE {len(raw)} BODY[] {{{len(raw)}}}'
+                self.wfile.write(header.encode('utf-8') + b'\r\n' + raw + b')\r\n')
+            if mark:
+                self.mailbox.mark_seen(uids)
+            self.send(f'{tag} OK FETCH completed')
+        elif sub == 'STORE':
+            uid_set, _, change = rest.partition(' ')
+            if '\\SEEN' in change.upper():
+                uids = _parse_uid_set(uid_set, max(self.mailbox.search(), default=0))
+                self.mailbox.mark_seen(uids, seen=not change.lstrip().startswith('-'))
+            self.send(f'{tag} OK STORE completed')
+        else:
+            self.send(f'{tag} BAD unsupported UID {sub}')
+
+
+def start_server(port: int = 0, mailbox: FakeMailbox = None, latency: float = 0.0, error_rate: float = 0.0,
+                 seed: int = 0):
+    """
+    Sobe o servidor em uma thread daemon.
+
+    Args:
+        port: Porta (0 = escolhe uma livre).
+        mailbox: Caixa de entrada compartilhada (uma nova se None).
+        latency: Latência artificial por comando, em segundos.
+        error_rate: Fração de UID FETCH respondidos com NO.
+        seed: Semente da injeção de erros.
+
+    Returns:
+        Tupla (server, (host, port)); a caixa fica em server.mailbox.
+    """
+    mailbox = mailbox or FakeMailbox()
+    stats = {}
+    handler = type('FakeIMAPHandler', (FakeIMAPHandler,), {
+        'mailbox': mailbox, 'profile': FaultProfile(latency, error_rate=error_rate, seed=seed), 'stats': stats
+    })
+    server = socketserver.ThreadingTCPServer(('127.0.0.1', port), handler)
+    server.daemon_threads = True
+    server.mailbox = mailbox
+    server.stats = stats
+    server.stats_lock = threading.Lock()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, server.server_address[:2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stand-in local de servidor IMAP")
+    parser.add_argument('--port', type=int, default=1143)
+    parser.add_argument('--latency-ms', type=float, default=0.0)
+    parser.add_argument('--eml', nargs='*', default=[], help="Arquivos .eml carregados na caixa")
+    args = parser.parse_args()
+
+    mailbox = FakeMailbox()
+    for pattern in args.eml:
+        for path in glob.glob(pattern):
+            with open(path, 'rb') as f:
+                mailbox.add(f.read())
+    server, (host, port) = start_server(args.port, mailbox, args.latency_ms / 1000)
+    print(f"Fake IMAP listening on {host}:{port} with {len(mailbox)} messages "
+          f"(EMAIL_HOST={host} EMAIL_PORT={port} EMAIL_USE_SSL=false)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
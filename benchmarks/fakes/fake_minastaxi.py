@@ -0,0 +1,87 @@
+"""
+Stand-in local da API MinasTaxi (rideCreate) para benchmarks e testes sem rede.
+
+Aceita o payload do rideCreate e responde como a API real
+(accepted_and_looking_for_driver + ride_id). Erros injetados respondem 500.
+
+Uso:
+    python benchmarks/fakes/fake_minastaxi.py --port 8089 --latency-ms 200
+    MINASTAXI_API_URL=http://127.0.0.1:8089 python run_processor.py
+"""
+import argparse
+import itertools
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from benchmarks.fakes.http_fake import FaultProfile, JSONHandler, serve
+
+
+class FakeMinasTaxiHandler(JSONHandler):
+    _ride_ids = itertools.count(1)
+    payloads = None
+
+    def do_POST(self):
+        self.profile.wait()
+        payload = self.read_json()
+        route = self.path.rstrip('/').rsplit('/', 1)[-1]
+        self.count(route)
+
+        if route == 'rideCreate':
+            if self.profile.should_fail():
+                self.count('errors')
+                return self.send_json({'error': 'injected failure'}, status=500)
+            if self.payloads is not None:
+                self.payloads.append(payload)
+            ride_id = f"FAKE{next(self._ride_ids):06d}"
+            return self.send_json({'accepted_and_looking_for_driver': True, 'ride_id': ride_id})
+
+        if route in ('rideDetails', 'rideCancel', 'driverMessage'):
+            return self.send_json({'success': True, 'ride_id': payload.get('ride_id')})
+
+        self.send_json({'error': 'not found'}, status=404)
+
+
+def start_server(port: int = 0, latency: float = 0.0, error_rate: float = 0.0, keep_payloads: bool = False,
+                 seed: int = 0):
+    """
+    Sobe o servidor em uma thread daemon.
+
+    Args:
+        port: Porta (0 = escolhe uma livre).
+        latency: Latência artificial por requisição, em segundos.
+        error_rate: Fração de rideCreate respondidos com 500.
+        keep_payloads: Guarda os payloads recebidos em server.payloads.
+        seed: Semente da injeção de erros.
+
+    Returns:
+        Tupla (server, base_url) onde base_url serve para MINASTAXI_API_URL.
+    """
+    payloads = [] if keep_payloads else None
+    server, url = serve(
+        FakeMinasTaxiHandler, port, FaultProfile(latency, error_rate=error_rate, seed=seed), payloads=payloads
+    )
+    server.payloads = payloads
+    return server, url
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stand-in local da API MinasTaxi")
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--latency-ms', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    args = parser.parse_args()
+
+    server, url = start_server(args.port, args.latency_ms / 1000, args.error_rate)
+    print(f"Fake MinasTaxi listening on {url} (MINASTAXI_API_URL={url})")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
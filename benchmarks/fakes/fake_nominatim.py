@@ -0,0 +1,140 @@
+"""
+Stand-in local do Nominatim para benchmarks e testes sem rede.
+
+Responde /search e /reverse no formato JSON do Nominatim com coordenadas
+determinísticas (hash da consulta) dentro da região metropolitana de BH.
+
+Uso:
+    python benchmarks/fakes/fake_nominatim.py --port 8088 --latency-ms 150
+    NOMINATIM_DOMAIN=localhost:8088 NOMINATIM_SCHEME=http NOMINATIM_MIN_INTERVAL=0 python run_processor.py
+"""
+import argparse
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# Caixa onde os resultados falsos são gerados (RMBH)
+LAT_RANGE = (-20.10, -19.75)
+LNG_RANGE = (-44.10, -43.85)
+
+
+def fake_coordinates(query: str):
+    """Coordenadas determinísticas para uma consulta."""
+    digest = hashlib.sha1(query.strip().lower().encode('utf-8')).digest()
+    a = int.from_bytes(digest[:4], 'big') / 0xFFFFFFFF
+    b = int.from_bytes(digest[4:8], 'big') / 0xFFFFFFFF
+    lat = LAT_RANGE[0] + a * (LAT_RANGE[1] - LAT_RANGE[0])
+    lng = LNG_RANGE[0] + b * (LNG_RANGE[1] - LNG_RANGE[0])
+    return lat, lng, digest[8] / 255
+
+
+def _place(query: str, lat: float, lng: float, place_id: int) -> dict:
+    return {
+        'place_id': place_id,
+        'licence': 'fake',
+        'lat': f"{lat:.7f}",
+        'lon': f"{lng:.7f}",
+        'display_name': f"{query}, Belo Horizonte, Minas Gerais, Brasil",
+        'class': 'place',
+        'type': 'house',
+        'importance': 0.5,
+        'boundingbox': [f"{lat - 0.001:.7f}", f"{lat + 0.001:.7f}", f"{lng - 0.001:.7f}", f"{lng + 0.001:.7f}"],
+        'address': {
+            'city': 'Belo Horizonte',
+            'state': 'Minas Gerais',
+            'country': 'Brasil',
+            'country_code': 'br',
+        },
+    }
+
+
+def make_handler(latency: float = 0.0, miss_rate: float = 0.0):
+    """Cria a classe de handler com latência e taxa de "não encontrado" configuráveis."""
+
+    class FakeNominatimHandler(BaseHTTPRequestHandler):
+        stats = {'search': 0, 'reverse': 0}
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send_json(self, payload, status=200):
+            body = json.dumps(payload).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if latency:
+                time.sleep(latency)
+            url = urlparse(self.path)
+            params = {k: v[0] for k, v in parse_qs(url.query).items()}
+
+            if url.path.rstrip('/') == '/search':
+                self.stats['search'] += 1
+                query = params.get('q', '')
+                lat, lng, roll = fake_coordinates(query)
+                if not query or roll < miss_rate:
+                    return self._send_json([])
+                limit = int(params.get('limit', 1))
+                results = [
+                    _place(query, lat + i * 0.0005, lng + i * 0.0005, 1000 + i)
+                    for i in range(max(1, min(limit, 3)))
+                ]
+                return self._send_json(results)
+
+            if url.path.rstrip('/') == '/reverse':
+                self.stats['reverse'] += 1
+                lat = float(params.get('lat', 0))
+                lng = float(params.get('lon', 0))
+                return self._send_json(_place(f"{lat:.5f},{lng:.5f}", lat, lng, 1))
+
+            if url.path.rstrip('/') == '/status':
+                return self._send_json({'status': 0, 'message': 'OK', **self.stats})
+
+            self._send_json({'error': 'not found'}, status=404)
+
+    return FakeNominatimHandler
+
+
+def start_server(port: int = 0, latency: float = 0.0, miss_rate: float = 0.0):
+    """
+    Sobe o servidor em uma thread daemon.
+
+    Args:
+        port: Porta (0 = escolhe uma livre).
+        latency: Latência artificial por requisição, em segundos.
+        miss_rate: Fração de consultas respondidas sem resultados.
+
+    Returns:
+        Tupla (server, domain) onde domain é "host:porta" para NOMINATIM_DOMAIN.
+    """
+    server = ThreadingHTTPServer(('127.0.0.1', port), make_handler(latency, miss_rate))
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    host, bound_port = server.server_address[:2]
+    return server, f"{host}:{bound_port}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stand-in local do Nominatim")
+    parser.add_argument('--port', type=int, default=8088)
+    parser.add_argument('--latency-ms', type=float, default=0.0)
+    parser.add_argument('--miss-rate', type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(('127.0.0.1', args.port), make_handler(args.latency_ms / 1000, args.miss_rate))
+    print(f"Fake Nominatim listening on http://127.0.0.1:{args.port} (NOMINATIM_DOMAIN=127.0.0.1:{args.port})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
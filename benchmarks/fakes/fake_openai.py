@@ -0,0 +1,119 @@
+"""
+Stand-in local da API OpenAI (chat.completions) para benchmarks e testes sem rede.
+
+Responde no formato do SDK oficial. O conteúdo da resposta vem de um
+"responder" que recebe o corpo do e-mail (a mensagem do usuário sem o prefixo
+"E-mail do pedido:") e devolve o JSON de extração; sem resposta conhecida,
+devolve um JSON vazio (o extrator trata como falha de extração).
+
+Uso:
+    python benchmarks/fakes/fake_openai.py --port 8091 --latency-ms 800
+    OPENAI_BASE_URL=http://127.0.0.1:8091/v1 OPENAI_API_KEY=fake python run_processor.py
+"""
+import argparse
+import itertools
+import json
+import os
+import sys
+import time
+from typing import Callable, Dict, Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from benchmarks.fakes.http_fake import FaultProfile, JSONHandler, serve
+
+Responder = Callable[[str], Optional[Dict]]
+
+_USER_PREFIX = 'E-mail do pedido:'
+
+
+def body_key(text: str) -> str:
+    """Chave do corpo do e-mail insensível a quebras de linha e espaços."""
+    return ' '.join(text.split())
+
+
+def answers_responder(answers: Dict[str, Dict]) -> Responder:
+    """Responder que busca a extração esperada pelo corpo do e-mail (ver body_key)."""
+    indexed = {body_key(body): data for body, data in answers.items()}
+    return lambda body: indexed.get(body_key(body))
+
+
+class FakeOpenAIHandler(JSONHandler):
+    _ids = itertools.count(1)
+    responder: Responder = staticmethod(lambda body: None)
+
+    def do_POST(self):
+        self.profile.wait()
+        request = self.read_json()
+        if not self.path.rstrip('/').endswith('/chat/completions'):
+            return self.send_json({'error': {'message': 'not found'}}, status=404)
+
+        self.count('chat.completions')
+        if self.profile.should_fail():
+            self.count('errors')
+            return self.send_json({'error': {'message': 'injected failure', 'type': 'server_error'}}, status=500)
+
+        user = next((m['content'] for m in request.get('messages', []) if m.get('role') == 'user'), '')
+        body = user.split(_USER_PREFIX, 1)[-1].strip()
+        data = self.responder(body)
+        if data is None:
+            self.count('unknown')
+        content = json.dumps(data or {}, ensure_ascii=False)
+        completion_id = next(self._ids)
+        self.send_json({
+            'id': f'chatcmpl-fake{completion_id}',
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': request.get('model', 'fake'),
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': content},
+                'finish_reason': 'stop',
+            }],
+            'usage': {
+                'prompt_tokens': len(user) // 4,
+                'completion_tokens': len(content) // 4,
+                'total_tokens': (len(user) + len(content)) // 4,
+            },
+        })
+
+
+def start_server(port: int = 0, responder: Optional[Responder] = None, latency: float = 0.0,
+                 jitter: float = 0.0, error_rate: float = 0.0, seed: int = 0):
+    """
+    Sobe o servidor em uma thread daemon.
+
+    Args:
+        port: Porta (0 = escolhe uma livre).
+        responder: Função corpo do e-mail -> dict de extração (None = desconhecido).
+        latency: Latência artificial por requisição, em segundos.
+        jitter: Variação adicional da latência, em segundos.
+        error_rate: Fração de requisições respondidas com 500.
+        seed: Semente da injeção de erros/jitter.
+
+    Returns:
+        Tupla (server, base_url) onde base_url (já com /v1) serve para OPENAI_BASE_URL.
+    """
+    attrs = {'responder': staticmethod(responder)} if responder else {}
+    server, url = serve(FakeOpenAIHandler, port, FaultProfile(latency, jitter, error_rate, seed), **attrs)
+    return server, f"{url}/v1"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stand-in local da API OpenAI")
+    parser.add_argument('--port', type=int, default=8091)
+    parser.add_argument('--latency-ms', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    args = parser.parse_args()
+
+    server, url = start_server(args.port, latency=args.latency_ms / 1000, error_rate=args.error_rate)
+    print(f"Fake OpenAI listening on {url} (OPENAI_BASE_URL={url})")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
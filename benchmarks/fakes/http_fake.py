@@ -0,0 +1,96 @@
+"""
+Base comum dos stand-ins HTTP: latência configurável, injeção de erros e servidor em thread.
+"""
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FaultProfile:
+    """Latência (com jitter) e taxa de erro de um serviço falso."""
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0, seed: int = 0):
+        """
+        Args:
+            latency: Latência base por requisição, em segundos.
+            jitter: Variação uniforme adicional (0..jitter), em segundos.
+            error_rate: Fração de requisições respondidas com erro.
+            seed: Semente do sorteio de erros/jitter (execuções reprodutíveis).
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def wait(self):
+        """Dorme a latência configurada."""
+        with self._lock:
+            extra = self._rng.uniform(0, self.jitter) if self.jitter else 0.0
+        if self.latency or extra:
+            time.sleep(self.latency + extra)
+
+    def should_fail(self) -> bool:
+        """Sorteia se a requisição atual deve falhar."""
+        if not self.error_rate:
+            return False
+        with self._lock:
+            return self._rng.random() < self.error_rate
+
+
+class JSONHandler(BaseHTTPRequestHandler):
+    """Handler base: JSON de entrada/saída e contadores por rota."""
+
+    profile = FaultProfile()
+    stats = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def count(self, key: str):
+        with self.server.stats_lock:
+            self.stats[key] = self.stats.get(key, 0) + 1
+
+    def read_json(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        raw = self.rfile.read(length) if length else b''
+        try:
+            return json.loads(raw or b'{}')
+        except ValueError:
+            return {}
+
+    def send_json(self, payload, status: int = 200):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def serve(handler_cls, port: int = 0, profile: FaultProfile = None, **attrs):
+    """
+    Sobe um handler em uma thread daemon.
+
+    Args:
+        handler_cls: Subclasse de JSONHandler.
+        port: Porta (0 = escolhe uma livre).
+        profile: Latência/erros do serviço.
+        **attrs: Atributos extras copiados para a classe do handler.
+
+    Returns:
+        Tupla (server, base_url). Contadores em server.stats.
+    """
+    stats = {}
+    handler = type(handler_cls.__name__, (handler_cls,), {
+        'profile': profile or FaultProfile(), 'stats': stats, **attrs
+    })
+    server = ThreadingHTTPServer(('127.0.0.1', port), handler)
+    server.daemon_threads = True
+    server.stats = stats
+    server.stats_lock = threading.Lock()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, bound_port = server.server_address[:2]
+    return server, f"http://{host}:{bound_port}"
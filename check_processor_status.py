@@ -33,7 +33,8 @@ def check_environment():
     optional_vars = [
         'PROCESSOR_INTERVAL_MINUTES',
         'EMAIL_DAYS_BACK',
-        'ENABLE_WHATSAPP_NOTIFICATIONS'
+        'ENABLE_WHATSAPP_NOTIFICATIONS',
+        'METRICS_PORT'
     ]
     
     print("\n✓ Variáveis Obrigatórias:")
@@ -62,6 +63,8 @@ def check_environment():
                 value = "7 (padrão)"
             elif var == 'ENABLE_WHATSAPP_NOTIFICATIONS':
                 value = "false (padrão)"
+            elif var == 'METRICS_PORT':
+                value = "9108 (padrão)"
         print(f"  • {var}: {value}")
     
     return all_ok
@@ -162,6 +165,63 @@ def check_processor_config():
         print("    ✓ Janela de busca adequada")
 
 
+def check_metrics():
+    """Lê o endpoint de métricas do processador em execução."""
+    print("\n" + "=" * 60)
+    print("MÉTRICAS DO PROCESSADOR")
+    print("=" * 60)
+    
+    port = int(os.getenv('METRICS_PORT', 9108))
+    if not port:
+        print("  • Endpoint de métricas desabilitado (METRICS_PORT=0)")
+        return True
+    
+    url = os.getenv('METRICS_URL', f"http://localhost:{port}/metrics")
+    try:
+        from urllib.request import urlopen
+        from src.services.metrics import parse_prometheus_text
+        with urlopen(url, timeout=5) as response:
+            samples = parse_prometheus_text(response.read().decode('utf-8'))
+    except Exception as e:
+        print(f"  ⚠️  Não foi possível ler {url}: {e}")
+        print("  (O processador está rodando?)")
+        return False
+    
+    print(f"  ✓ Endpoint: {url}")
+    
+    # Latência média por estágio (_sum / _count do histograma)
+    sums = {l['stage']: v for n, l, v in samples if n == 'taxi_stage_duration_seconds_sum'}
+    counts = {l['stage']: v for n, l, v in samples if n == 'taxi_stage_duration_seconds_count'}
+    errors = {l['stage']: v for n, l, v in samples if n == 'taxi_stage_errors_total'}
+    if counts:
+        print("\n  ⏱️  Estágios:")
+        for stage in ('fetch', 'extract', 'geocode', 'dispatch', 'notify'):
+            if stage in counts:
+                avg_ms = sums[stage] / counts[stage] * 1000 if counts[stage] else 0.0
+                print(f"    • {stage:<9} {int(counts[stage]):>6} chamadas, média {avg_ms:8.1f} ms, "
+                      f"{int(errors.get(stage, 0))} erros")
+    
+    outcomes = {l['outcome']: v for n, l, v in samples if n == 'taxi_orders_total'}
+    if outcomes:
+        print("\n  📦 Pedidos: " + ", ".join(f"{k}={int(v)}" for k, v in sorted(outcomes.items())))
+    
+    queues = {l['queue']: v for n, l, v in samples if n == 'taxi_queue_depth'}
+    if queues:
+        print("  📥 Filas: " + ", ".join(f"{k}={int(v)}" for k, v in sorted(queues.items())))
+    
+    hit_ratio = {l['backend']: v for n, l, v in samples if n == 'taxi_geocoding_hit_ratio'}
+    if hit_ratio:
+        print("  🗺️  Geocoding (taxa de acerto): " +
+              ", ".join(f"{k}={v:.0%}" for k, v in sorted(hit_ratio.items())))
+    
+    last_cycle = [v for n, _, v in samples if n == 'taxi_last_cycle_timestamp_seconds']
+    if last_cycle and last_cycle[0]:
+        age = time.time() - last_cycle[0]
+        print(f"  🔄 Último ciclo há {age / 60:.1f} minutos")
+    
+    return True
+
+
 def test_connection():
     """Testa conexão com serviços externos."""
     print("\n" + "=" * 60)
@@ -215,6 +275,7 @@ def main():
     results.append(("Banco de Dados", check_database()))
     results.append(("Arquivos de Log", check_logs()))
     check_processor_config()
+    check_metrics()
     test_connection()
     
     # Resumo
@@ -51,8 +51,10 @@ def inspect_failed_orders():
         
         print(f"\n📄 E-mail Original (primeiras 300 chars):")
         print("-" * 80)
-        if order.raw_email_body:
-            print(order.raw_email_body[:300] + "...")
+        # Corpo comprimido em email_blobs, carregado apenas aqui
+        raw_email_body = db.load_raw_email_body(order)
+        if raw_email_body:
+            print(raw_email_body[:300] + "...")
         else:
             print("(não disponível)")
     
@@ -0,0 +1,31 @@
+"""Script de migração para mover corpos de e-mail antigos para email_blobs.
+
+Pedidos gravados antes da tabela email_blobs guardam o HTML do e-mail inline em
+orders.raw_email_body. Eles continuam legíveis, mas deixam as linhas de orders
+grandes. Mover esses corpos percorre a tabela inteira, por isso não roda na
+inicialização: execute este script uma vez após a atualização.
+
+Uso:
+    python migrate_email_blobs.py
+"""
+import os
+import logging
+
+from src.services.database import DatabaseManager
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+def main():
+    db_path = os.getenv('DATABASE_PATH', 'data/taxi_orders.db')
+    db = DatabaseManager(db_path)
+    logger.info(f'Banco {db_path}: movendo corpos de e-mail inline para email_blobs...')
+
+    moved = db.move_inline_email_bodies()
+    if not moved:
+        logger.info('Nenhum corpo inline encontrado, nada a fazer.')
+        return
+    logger.info(f'Migração concluída ({moved} corpos movidos).')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,32 @@
+"""Script de migração para converter o banco para auto_vacuum=INCREMENTAL.
+
+Bancos criados antes dessa configuração só devolvem espaço ao sistema (limpeza
+diária com PRAGMA incremental_vacuum) depois de um VACUUM completo, que
+reescreve o arquivo inteiro. Por isso a conversão não roda na inicialização:
+execute este script uma vez, com o processador e o dashboard parados.
+
+Uso:
+    python migrate_incremental_vacuum.py
+"""
+import os
+import logging
+
+from src.services.database import DatabaseManager
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+def main():
+    db_path = os.getenv('DATABASE_PATH', 'data/taxi_orders.db')
+    db = DatabaseManager(db_path)
+    size_mb = os.path.getsize(db_path) / 1024 / 1024
+    logger.info(f'Banco {db_path} ({size_mb:.1f} MB)')
+
+    if not db.convert_to_incremental_vacuum():
+        logger.info('Banco já está em auto_vacuum=INCREMENTAL, nada a fazer.')
+        return
+    size_mb = os.path.getsize(db_path) / 1024 / 1024
+    logger.info(f'Migração concluída ({size_mb:.1f} MB após o VACUUM).')
+
+if __name__ == '__main__':
+    main()
@@ -3,14 +3,17 @@
 Reprocessador de orders falhadas no banco de dados.
 Pega orders com status FAILED e tenta reenviar para API MinasTaxi
 usando as correções SSL implementadas.
+
+O reenvio roda como job (src/services/reprocessing.py): REPROCESS_CONCURRENCY
+orders em paralelo, progresso salvo no banco e retomado se interrompido.
 """
 import os
 import logging
 from dotenv import load_dotenv
-from datetime import datetime
 
 from src.services.database import DatabaseManager
-from src.services.minastaxi_client import MinasTaxiClient, MinasTaxiAPIError
+from src.services.minastaxi_client import MinasTaxiClient
+from src.services.reprocessing import ReprocessingEngine
 from src.services.whatsapp_notifier import WhatsAppNotifier
 from src.models import Order, OrderStatus
 
@@ -36,7 +39,7 @@ class OrderReprocessor:
         logger.info("Inicializando reprocessador de orders...")
         
         # Database
-        self.db = DatabaseManager()
+        self.db = DatabaseManager(os.getenv('DATABASE_PATH', 'data/taxi_orders.db'))
         
         # MinasTaxi Client (com correções SSL)
         self.minastaxi_client = MinasTaxiClient(
@@ -60,6 +63,13 @@ class OrderReprocessor:
         else:
             self.whatsapp_notifier = None
             logger.info("WhatsApp notifications disabled")
+        
+        # Jobs em lote: paralelismo limitado, checkpoint no banco e skip de falhas não recuperáveis
+        self.engine = ReprocessingEngine.from_env(
+            self.db,
+            dispatch=self.minastaxi_client.dispatch_order,
+            notify=self._notify_success
+        )
     
     def get_failed_orders(self):
         """
@@ -82,6 +92,21 @@ class OrderReprocessor:
             traceback.print_exc()
             return []
     
+    def _notify_success(self, order: Order):
+        """Envia o WhatsApp de sucesso do reprocessamento (se habilitado)."""
+        if not (self.whatsapp_enabled and self.whatsapp_notifier and order.phone):
+            return
+        whatsapp_response = self.whatsapp_notifier.send_message(
+            name=order.passenger_name or "Cliente",
+            phone=order.phone,
+            destination=order.dropoff_address or order.pickup_address or "destino",
+            status="Sucesso - Reprocessado"
+        )
+        order.whatsapp_sent = True
+        order.whatsapp_message_id = whatsapp_response.get('message_id')
+        self.db.update_order(order)
+        logger.info(f"📱 WhatsApp enviado para order {order.id}")
+    
     def reprocess_order(self, order: Order):
         """
         Reprocessa uma order falhada.
@@ -93,103 +118,49 @@ class OrderReprocessor:
             bool: True se reprocessamento foi bem-sucedido.
         """
         logger.info(f"Reprocessando order {order.id}: {order.passenger_name}")
+        state, _ = self.engine.reprocess_order(order)
+        return state == 'succeeded'
+    
+    def start_background(self):
+        """
+        Inicia (ou retoma) o job de reprocessamento em uma thread de fundo.
         
-        try:
-            # Tenta dispatch para MinasTaxi com SSL corrigido
-            response = self.minastaxi_client.dispatch_order(order)
-            
-            # Sucesso - atualiza status
-            order.status = OrderStatus.DISPATCHED
-            order.minastaxi_order_id = response.get('order_id')
-            order.error_message = None  # Limpa erro anterior
-            
-            # Atualiza no banco
-            self.db.update_order(order)
-            
-            logger.info(f"✅ Order {order.id} reprocessada com sucesso! Ride ID: {response.get('ride_id')}")
-            
-            # Envia WhatsApp se habilitado
-            if self.whatsapp_enabled and self.whatsapp_notifier and order.phone:
-                try:
-                    whatsapp_response = self.whatsapp_notifier.send_message(
-                        name=order.passenger_name or "Cliente",
-                        phone=order.phone,
-                        destination=order.dropoff_address or order.pickup_address or "destino",
-                        status="Sucesso - Reprocessado"
-                    )
-                    order.whatsapp_sent = True
-                    order.whatsapp_message_id = whatsapp_response.get('message_id')
-                    self.db.update_order(order)
-                    logger.info(f"📱 WhatsApp enviado para order {order.id}")
-                except Exception as e:
-                    logger.warning(f"Falha ao enviar WhatsApp para order {order.id}: {e}")
-            
-            return True
-            
-        except MinasTaxiAPIError as e:
-            logger.error(f"❌ Falha API MinasTaxi para order {order.id}: {e}")
-            
-            # Atualiza erro no banco
-            order.error_message = f"Reprocessamento falhou: {str(e)}"
-            self.db.update_order(order)
-            
-            return False
-            
-        except Exception as e:
-            logger.error(f"❌ Erro geral reprocessando order {order.id}: {e}")
-            
-            # Atualiza erro no banco
-            order.error_message = f"Erro reprocessamento: {str(e)}"
-            self.db.update_order(order)
-            
-            return False
+        Returns:
+            Optional[int]: ID do job, ou None se não houver orders falhadas.
+        """
+        job_id = self.engine.create_job()
+        if job_id is not None:
+            self.engine.start(job_id)
+        return job_id
     
     def reprocess_all_failed(self):
         """
         Reprocessa todas as orders falhadas.
         
+        Retoma o último job se ele foi interrompido; orders já concluídas
+        pelo job não são reenviadas.
+        
         Returns:
             Dict: Estatísticas do reprocessamento.
         """
         logger.info("🔄 INICIANDO REPROCESSAMENTO DE ORDERS FALHADAS")
         logger.info("=" * 60)
         
-        # Busca orders falhadas
-        failed_orders = self.get_failed_orders()
+        job_id = self.engine.create_job()
         
-        if not failed_orders:
+        if job_id is None:
             logger.info("✅ Nenhuma order falhada encontrada")
-            return {'total': 0, 'success': 0, 'failed': 0}
-        
-        success_count = 0
-        failed_count = 0
-        
-        # Reprocessa cada order
-        for i, order in enumerate(failed_orders, 1):
-            logger.info(f"🔄 Reprocessando {i}/{len(failed_orders)}: Order {order.id}")
-            logger.info(f"📧 Email ID: {order.email_id}")
-            logger.info(f"👤 Passageiro: {order.passenger_name}")
-            logger.info(f"📞 Telefone: {order.phone}")
-            logger.info(f"📍 Origem: {order.pickup_address}")
-            logger.info(f"🎯 Destino: {order.dropoff_address}")
-            logger.info(f"❌ Erro anterior: {order.error_message}")
-            
-            success = self.reprocess_order(order)
-            
-            if success:
-                success_count += 1
-                logger.info(f"✅ Order {order.id} reprocessada com sucesso!")
-            else:
-                failed_count += 1
-                logger.info(f"❌ Falha ao reprocessar order {order.id}")
-            
-            logger.info("-" * 40)
+            return {'total': 0, 'success': 0, 'failed': 0, 'skipped': 0}
+        
+        job = self.engine.run(job_id)
+        counts = job['counts']
         
         # Estatísticas finais
         stats = {
-            'total': len(failed_orders),
-            'success': success_count,
-            'failed': failed_count
+            'total': job['total'],
+            'success': counts['succeeded'],
+            'failed': counts['failed'] + counts['pending'],
+            'skipped': counts['skipped']
         }
         
         logger.info("=" * 60)
@@ -198,9 +169,13 @@ class OrderReprocessor:
         logger.info(f"📋 Total orders: {stats['total']}")
         logger.info(f"✅ Sucessos: {stats['success']}")
         logger.info(f"❌ Falhas: {stats['failed']}")
+        logger.info(f"⏭️ Pulados (não recuperáveis): {stats['skipped']}")
         logger.info(f"🎯 Taxa sucesso: {(stats['success']/stats['total']*100):.1f}%" if stats['total'] > 0 else "🎯 Taxa sucesso: 0%")
         
-        if stats['success'] > 0:
+        if job['status'] == 'paused':
+            logger.warning(f"\n⏸️ JOB {job_id} PAUSADO: {job['message']}")
+            logger.warning(f"🔁 {counts['pending']} orders pendentes; execute novamente para retomar")
+        elif stats['success'] > 0:
             logger.info("\n🎉 REPROCESSAMENTO CONCLUÍDO COM SUCESSOS!")
             logger.info("🚕 Orders enviadas para MinasTaxi API")
             logger.info("💾 Status atualizado no banco para DISPATCHED")
@@ -213,7 +188,7 @@ class OrderReprocessor:
 
     def reprocess_all(self):
         """
-        Método simplificado para retornar apenas sucesso/falha (para dashboard).
+        Método simplificado para retornar apenas sucesso/falha.
         
         Returns:
             Tuple[int, int]: (success_count, fail_count)
@@ -4,6 +4,9 @@ Lê e-mails periodicamente conforme intervalo configurado.
 """
 import sys
 import os
+import multiprocessing
+import signal
+import threading
 import time
 import logging
 from datetime import datetime
@@ -13,6 +16,8 @@ import pytz
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from src.processor import TaxiOrderProcessor
+from src.services.metrics import start_metrics_server
+from src.services.poll_interval import PollInterval
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -48,13 +53,50 @@ sys.stderr.reconfigure(line_buffering=True) if hasattr(sys.stderr, 'reconfigure'
 
 logger = logging.getLogger(__name__)
 
+def start_cleanup_thread(db, days_to_keep: int, interval_seconds: float, archive_dir=None,
+                         initial_delay_seconds: float = 60, should_run=None) -> threading.Thread:
+    """
+    Limpeza periódica do banco em uma thread daemon, fora do ciclo de pedidos.
+    
+    A primeira execução espera `initial_delay_seconds` para não disputar o
+    banco com o primeiro ciclo após o deploy. Com vários processos,
+    `should_run` (ex: é o líder?) evita que todos limpem o mesmo banco.
+    """
+    def cleanup_loop():
+        delay = min(initial_delay_seconds, interval_seconds)
+        while True:
+            time.sleep(delay)
+            delay = interval_seconds
+            if should_run is not None and not should_run():
+                continue
+            try:
+                logger.info("Running scheduled database cleanup...")
+                deleted_count = db.cleanup_old_orders(
+                    days_to_keep=days_to_keep,
+                    archive_dir=archive_dir
+                )
+                if deleted_count > 0:
+                    logger.info(f"Database cleanup completed: {deleted_count} old orders removed")
+                db.purge_finished_jobs(days_to_keep=days_to_keep)
+            except Exception as cleanup_error:
+                logger.error(f"Database cleanup failed: {cleanup_error}")
+    
+    thread = threading.Thread(target=cleanup_loop, name='db-cleanup', daemon=True)
+    thread.start()
+    return thread
+
 def main_loop():
     """
-    Executa processador em loop contínuo com intervalo configurável.
+    Executa processador em loop contínuo com intervalo adaptativo.
+    
+    O intervalo base (PROCESSOR_INTERVAL_MINUTES) encurta no horário comercial
+    e após rajadas, cresce exponencialmente em erros seguidos e é zerado quando
+    o ciclo atinge EMAIL_FETCH_LIMIT ou deixa jobs prontos na fila
+    (ver src/services/poll_interval.py).
     """
-    # Intervalo entre execuções (em minutos)
-    interval_minutes = int(os.getenv('PROCESSOR_INTERVAL_MINUTES', 1))
-    interval_seconds = interval_minutes * 60
+    poll = PollInterval.from_env(os.environ)
+    # Processos que não são o líder só consomem a fila: verificam com mais frequência
+    worker_poll_seconds = float(os.getenv('WORKER_POLL_SECONDS', 5))
     
     # Dias para buscar e-mails
     days_back = int(os.getenv('EMAIL_DAYS_BACK', 7))
@@ -62,12 +104,14 @@ def main_loop():
     # Configuração de limpeza automática do banco
     db_cleanup_days = int(os.getenv('DATABASE_CLEANUP_DAYS', 30))
     db_cleanup_interval_hours = int(os.getenv('DATABASE_CLEANUP_INTERVAL_HOURS', 24))
-    db_cleanup_interval_seconds = db_cleanup_interval_hours * 3600
-    last_cleanup_time = 0  # Timestamp da última limpeza
+    db_archive_dir = os.getenv('DATABASE_ARCHIVE_DIR') or None
     
     logger.info("=" * 80)
     logger.info("CONTINUOUS TAXI ORDER PROCESSOR STARTED")
-    logger.info(f"Checking for new emails every {interval_minutes} minutes")
+    logger.info(
+        f"Polling every {poll.base_seconds:.0f}s ({poll.business_seconds:.0f}s in business hours, "
+        f"{poll.min_seconds:.0f}s after bursts, backoff up to {poll.max_backoff_seconds:.0f}s on errors)"
+    )
     logger.info(f"Email search window: last {days_back} days")
     logger.info(f"Database auto-cleanup: every {db_cleanup_interval_hours}h, keeping last {db_cleanup_days} days")
     logger.info("=" * 80)
@@ -80,10 +124,35 @@ def main_loop():
         logger.critical(f"Failed to initialize processor: {e}")
         return
     
+    poll_interval = processor.metrics.gauge(
+        'taxi_poll_interval_seconds', 'Espera até o próximo ciclo', labels=('reason',)
+    )
+    state = {'cycle': 0, 'next_poll_seconds': None, 'reason': None, 'role': processor.role}
+    
+    # Endpoint de métricas (Prometheus) - METRICS_PORT=0 desabilita
+    metrics_port = int(os.getenv('METRICS_PORT', 9108))
+    if metrics_port:
+        try:
+            start_metrics_server(
+                processor.metrics,
+                port=metrics_port,
+                host=os.getenv('METRICS_HOST', '0.0.0.0'),
+                health=lambda: dict(state)
+            )
+        except OSError as e:
+            logger.error(f"Failed to start metrics endpoint on port {metrics_port}: {e}")
+    
+    # Limpeza do banco em segundo plano (não atrasa os ciclos)
+    start_cleanup_thread(
+        processor.db, db_cleanup_days, db_cleanup_interval_hours * 3600, db_archive_dir,
+        should_run=lambda: processor.role != 'worker' and (processor.leader is None or processor.leader.is_leader)
+    )
+    
     # Loop infinito
     cycle_count = 0
     while True:
         cycle_count += 1
+        state['cycle'] = cycle_count
         
         try:
             logger.info(f"\n{'='*60}")
@@ -99,39 +168,113 @@ def main_loop():
             db_stats = processor.get_statistics()
             logger.info(f"Database Statistics: {db_stats}")
             
-            # Limpeza automática do banco de dados (se necessário)
-            current_time = time.time()
-            if current_time - last_cleanup_time >= db_cleanup_interval_seconds:
-                try:
-                    logger.info("Running scheduled database cleanup...")
-                    deleted_count = processor.db.cleanup_old_orders(days_to_keep=db_cleanup_days)
-                    if deleted_count > 0:
-                        logger.info(f"Database cleanup completed: {deleted_count} old orders removed")
-                    last_cleanup_time = current_time
-                except Exception as cleanup_error:
-                    logger.error(f"Database cleanup failed: {cleanup_error}")
-            
-            # Próxima execução
-            next_run = datetime.now(BRAZIL_TZ).timestamp() + interval_seconds
-            next_run_str = datetime.fromtimestamp(next_run, tz=BRAZIL_TZ).strftime('%Y-%m-%d %H:%M:%S')
-            
-            logger.info(f"\nCycle #{cycle_count} complete. Next check at {next_run_str}")
-            logger.info(f"Sleeping for {interval_minutes} minutes...\n")
-            
-            # Aguarda intervalo
-            time.sleep(interval_seconds)
+            delay, reason = poll.next_delay(stats, when=datetime.now(BRAZIL_TZ))
+            state['role'] = stats.get('role', processor.role)
+            if state['role'] == 'worker' and reason not in ('backoff', 'fetch_limit', 'backlog'):
+                delay, reason = min(delay, worker_poll_seconds), 'worker'
             
         except KeyboardInterrupt:
             logger.info("\nProcessor stopped by user (Ctrl+C)")
             break
         except Exception as e:
             logger.error(f"Error in processing cycle #{cycle_count}: {e}", exc_info=True)
-            logger.warning(f"Waiting {interval_minutes} minutes before retry...")
-            time.sleep(interval_seconds)
+            delay, reason = poll.next_delay(error=True)
+        
+        state.update(next_poll_seconds=delay, reason=reason)
+        poll_interval.set(delay, reason=reason)
+        if reason in ('fetch_limit', 'backlog'):
+            logger.info(f"Cycle #{cycle_count} left work queued ({reason}), starting next cycle immediately")
+            continue
+        
+        # Próxima execução
+        next_run_str = datetime.fromtimestamp(time.time() + delay, tz=BRAZIL_TZ).strftime('%Y-%m-%d %H:%M:%S')
+        if reason == 'backoff':
+            logger.warning(f"{poll.consecutive_errors} consecutive failed cycles, retrying at {next_run_str}")
+        else:
+            logger.info(f"\nCycle #{cycle_count} complete. Next check at {next_run_str}")
+        logger.info(f"Sleeping for {delay:.0f}s ({reason})...\n")
+        
+        # Aguarda intervalo
+        try:
+            time.sleep(delay)
+        except KeyboardInterrupt:
+            logger.info("\nProcessor stopped by user (Ctrl+C)")
+            break
+    
+    # Liberar o lease de líder permite failover imediato para outro processo
+    if processor.leader is not None:
+        processor.leader.release()
 
-if __name__ == "__main__":
+def _raise_keyboard_interrupt(signum, frame):
+    """SIGTERM (deploy/restart) encerra como Ctrl+C, liberando o lease de líder."""
+    raise KeyboardInterrupt
+
+
+def _worker_main(index: int, role: str, metrics_port: int):
+    """Entrada de cada processo filho de run_workers()."""
+    signal.signal(signal.SIGTERM, _raise_keyboard_interrupt)
+    os.environ['PROCESSOR_ROLE'] = role
+    os.environ['METRICS_PORT'] = str(metrics_port)
     try:
         main_loop()
+    except KeyboardInterrupt:
+        pass
+
+def run_workers(count: int, restart_delay_seconds: float = 5):
+    """
+    Executa `count` processos do processador no mesmo host (PROCESSOR_WORKERS).
+    
+    Cada processo roda main_loop() com PROCESSOR_ROLE=auto (ou worker, se
+    configurado): um deles é eleito líder e lê o IMAP, todos processam a fila.
+    Processos que terminam são reiniciados; cada um expõe métricas em
+    METRICS_PORT + índice.
+    """
+    role = os.getenv('PROCESSOR_ROLE', 'auto')
+    if role == 'single':
+        role = 'auto'
+    base_port = int(os.getenv('METRICS_PORT', 9108))
+    processes = {}
+    started = {}
+    
+    def spawn(index):
+        process = multiprocessing.Process(
+            target=_worker_main,
+            args=(index, role, base_port + index if base_port else 0),
+            name=f'processor-{index}'
+        )
+        process.start()
+        processes[index] = process
+        started[index] = time.time()
+        logger.info(f"Started processor process #{index} (pid {process.pid}, role {role})")
+    
+    logger.info(f"Starting {count} processor processes (role {role})")
+    for index in range(count):
+        spawn(index)
+    
+    try:
+        while True:
+            time.sleep(1)
+            for index, process in list(processes.items()):
+                if process.is_alive() or time.time() - started[index] < restart_delay_seconds:
+                    continue
+                logger.warning(f"Processor process #{index} exited with code {process.exitcode}, restarting")
+                spawn(index)
+    except KeyboardInterrupt:
+        logger.info("\nStopping processor processes...")
+    finally:
+        for process in processes.values():
+            process.terminate()
+        for process in processes.values():
+            process.join(timeout=30)
+
+if __name__ == "__main__":
+    signal.signal(signal.SIGTERM, _raise_keyboard_interrupt)
+    workers = int(os.getenv('PROCESSOR_WORKERS', 1))
+    try:
+        if workers > 1:
+            run_workers(workers)
+        else:
+            main_loop()
     except KeyboardInterrupt:
         logger.info("\nProcessor terminated by user")
     except Exception as e:
@@ -0,0 +1,93 @@
+"""
+Locais conhecidos usados pelo gazetteer offline.
+Cada local tem nome canônico, apelidos (como aparecem nos e-mails) e coordenadas.
+
+kind:
+- "site": local específico (empresa, aeroporto). Basta o endereço conter o apelido;
+  apelidos de uma palavra (siglas) só valem se o resto do endereço for do próprio site.
+- "city": centro da cidade. Só casa quando o endereço é apenas a cidade
+  (ex: "BH", "Mariana, MG"); endereços com rua seguem para o geocoder.
+"""
+
+KNOWN_PLACES = [
+    {
+        "name": "CSN Mineração",
+        "kind": "site",
+        "address": "CSN Mineração, Congonhas, MG, Brasil",
+        "aliases": ["CSN", "CSN Mineração", "CSN Mineracao Congonhas", "Mina Casa de Pedra"],
+        "lat": -20.5033,
+        "lng": -43.8569,
+    },
+    {
+        "name": "Delp Engenharia",
+        "kind": "site",
+        "address": "Av. das Nações, 999, Distrito Industrial, Vespasiano, MG, Brasil",
+        "aliases": ["Delp Engenharia", "Delp Engenharia Vespasiano", "Delp Vespasiano"],
+        "lat": -19.6886,
+        "lng": -43.9235,
+    },
+    {
+        "name": "Aeroporto Internacional de Confins",
+        "kind": "site",
+        "address": "Aeroporto Internacional Tancredo Neves - Confins, MG, Brasil",
+        "aliases": ["Aeroporto Confins", "Aeroporto de Confins", "Aeroporto Tancredo Neves", "CNF"],
+        "lat": -19.6244,
+        "lng": -43.9719,
+    },
+    {
+        "name": "Belo Horizonte",
+        "kind": "city",
+        "address": "Belo Horizonte, MG, Brasil",
+        "aliases": ["Belo Horizonte", "BH", "Belo Horizonte Centro"],
+        "lat": -19.9191,
+        "lng": -43.9386,
+    },
+    {
+        "name": "Congonhas",
+        "kind": "city",
+        "address": "Congonhas, MG, Brasil",
+        "aliases": ["Congonhas"],
+        "lat": -20.4997,
+        "lng": -43.8578,
+    },
+    {
+        "name": "Mariana",
+        "kind": "city",
+        "address": "Mariana, MG, Brasil",
+        "aliases": ["Mariana"],
+        "lat": -20.3778,
+        "lng": -43.4167,
+    },
+    {
+        "name": "Conselheiro Lafaiete",
+        "kind": "city",
+        "address": "Conselheiro Lafaiete, MG, Brasil",
+        "aliases": ["Conselheiro Lafaiete", "Lafaiete", "C. Lafaiete"],
+        "lat": -20.6603,
+        "lng": -43.7861,
+    },
+    {
+        "name": "Ouro Preto",
+        "kind": "city",
+        "address": "Ouro Preto, MG, Brasil",
+        "aliases": ["Ouro Preto"],
+        "lat": -20.3856,
+        "lng": -43.5035,
+    },
+    {
+        "name": "Ouro Branco",
+        "kind": "city",
+        "address": "Ouro Branco, MG, Brasil",
+        "aliases": ["Ouro Branco"],
+        "lat": -20.5211,
+        "lng": -43.6922,
+    },
+    {
+        "name": "Vespasiano",
+        "kind": "city",
+        "address": "Vespasiano, MG, Brasil",
+        "aliases": ["Vespasiano"],
+        "lat": -19.6919,
+        "lng": -43.9233,
+    },
+]
@@ -0,0 +1,61 @@
+"""
+Polígonos simplificados usados na validação geográfica dos resultados de geocoding.
+Vértices (lat, lng) traçados a partir das cidades de divisa; erro típico de poucos km,
+suficiente para descartar resultados em outros estados.
+"""
+
+# Divisa de Minas Gerais (sentido horário a partir do Triângulo Mineiro)
+MINAS_GERAIS_POLYGON = [
+    (-20.00, -47.50), (-20.00, -47.77), (-20.06, -48.00), (-20.10, -48.30), (-20.15, -48.72),
+    (-20.31, -49.20), (-19.97, -49.40), (-19.93, -49.65), (-19.90, -49.90), (-19.88, -50.30),
+    (-19.88, -50.60), (-19.95, -50.90), (-20.00, -51.00), (-19.55, -50.98), (-19.20, -50.70),
+    (-18.95, -50.35), (-18.72, -50.10), (-18.60, -49.95), (-18.50, -49.48), (-18.42, -49.20),
+    (-18.35, -48.95), (-18.35, -48.65), (-18.40, -48.20), (-18.42, -47.80), (-18.30, -47.50),
+    (-18.10, -47.35), (-17.70, -47.35), (-17.30, -47.35), (-16.80, -47.42), (-16.05, -47.35),
+    (-15.92, -46.95), (-15.20, -46.50), (-14.87, -46.30), (-14.88, -45.95), (-14.23, -44.25),
+    (-14.35, -43.85), (-14.50, -43.80), (-14.65, -43.45), (-14.80, -43.10), (-14.85, -42.85),
+    (-15.08, -42.40), (-15.20, -41.95), (-15.50, -41.45), (-15.67, -41.20), (-15.62, -40.95),
+    (-15.62, -40.60), (-15.65, -40.35), (-15.78, -40.05), (-15.92, -39.86), (-16.10, -39.86),
+    (-16.30, -40.05), (-16.60, -40.20), (-16.85, -40.30), (-17.10, -40.45), (-17.40, -40.42),
+    (-17.62, -40.42), (-17.75, -40.20), (-17.95, -40.15), (-18.05, -40.45), (-18.30, -40.70),
+    (-18.35, -40.90), (-18.75, -40.93), (-19.10, -41.05), (-19.48, -41.04), (-19.85, -41.25),
+    (-20.20, -41.57), (-20.40, -41.80), (-20.68, -41.875), (-20.90, -41.93), (-20.94, -42.10),
+    (-21.20, -42.20), (-21.40, -42.26), (-21.60, -42.28), (-21.75, -42.45), (-21.90, -42.68),
+    (-22.00, -42.95), (-22.03, -43.25), (-22.05, -43.60), (-22.15, -43.85), (-22.20, -44.15),
+    (-22.30, -44.40), (-22.38, -44.65), (-22.45, -44.88), (-22.50, -45.00), (-22.55, -45.25),
+    (-22.60, -45.40), (-22.72, -45.62), (-22.80, -45.75), (-22.85, -46.05), (-22.90, -46.25),
+    (-22.92, -46.40), (-22.75, -46.47), (-22.60, -46.45), (-22.45, -46.60), (-22.25, -46.68),
+    (-22.05, -46.66), (-21.90, -46.67), (-21.65, -46.67), (-21.53, -46.60), (-21.42, -46.82),
+    (-21.42, -46.98), (-21.25, -47.08), (-21.05, -47.12), (-20.80, -47.15), (-20.60, -47.15),
+    (-20.47, -47.33), (-20.12, -47.33),
+]
+
+# Região Metropolitana de Belo Horizonte (contorno dos municípios da RMBH)
+BH_METRO_POLYGON = [
+    (-19.25, -44.05), (-19.28, -43.85), (-19.45, -43.60), (-19.65, -43.50), (-19.85, -43.55),
+    (-20.05, -43.65), (-20.20, -43.80), (-20.30, -44.05), (-20.45, -44.45), (-20.30, -44.60),
+    (-20.10, -44.55), (-19.85, -44.50), (-19.60, -44.35), (-19.40, -44.25),
+]
+
+# Cidades da região metropolitana de BH (e colar metropolitano) reconhecidas nos endereços
+BH_METRO_CITIES = [
+    'belo horizonte', 'belo-horizonte', 'betim', 'contagem', 'nova lima',
+    'ribeirão das neves', 'sabará', 'santa luzia', 'vespasiano',
+    'ibirité', 'lagoa santa', 'pedro leopoldo', 'sete lagoas', 'brumadinho',
+    'esmeraldas', 'florestal', 'igarapé', 'mateus leme', 'rio acima',
+    'confins', 'matozinhos', 'raposos', 'nova união', 'taquaraçu de minas',
+    'itaguara', 'juatuba', 'mário campos', 'são joaquim de bicas',
+    'itatiaiuçu', 'fortuna de minas', 'prudente de morais', 'funilândia',
+    'capim branco', 'jaboticatubas', 'baldim'
+]
+
+# Unidades federativas: nome (minúsculo, sem acento) -> sigla
+BRAZIL_STATES = {
+    'acre': 'AC', 'alagoas': 'AL', 'amapa': 'AP', 'amazonas': 'AM', 'bahia': 'BA',
+    'ceara': 'CE', 'distrito federal': 'DF', 'espirito santo': 'ES', 'goias': 'GO',
+    'maranhao': 'MA', 'mato grosso': 'MT', 'mato grosso do sul': 'MS', 'minas gerais': 'MG',
+    'para': 'PA', 'paraiba': 'PB', 'parana': 'PR', 'pernambuco': 'PE', 'piaui': 'PI',
+    'rio de janeiro': 'RJ', 'rio grande do norte': 'RN', 'rio grande do sul': 'RS',
+    'rondonia': 'RO', 'roraima': 'RR', 'santa catarina': 'SC', 'sao paulo': 'SP',
+    'sergipe': 'SE', 'tocantins': 'TO',
+}
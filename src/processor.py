@@ -4,20 +4,33 @@ Main processor orchestrating the entire taxi automation pipeline.
 import logging
 import os
 import re
-from datetime import datetime
-from typing import List
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from functools import cached_property
+from typing import TYPE_CHECKING, List, Optional, Union
 from dotenv import load_dotenv
 
+# Só o necessário até a primeira leitura do IMAP; os demais serviços (OpenAI,
+# geopy, requests, numpy) são importados na primeira vez que são usados.
 from .services.email_reader import EmailReader, EmailMessage
-from .services.llm_extractor import LLMExtractor
-from .services.geocoding_service import GeocodingService
-from .services.minastaxi_client import MinasTaxiClient, MinasTaxiAPIError
-from .services.whatsapp_notifier import WhatsAppNotifier, WhatsAppNotifierWithFallback
 from .services.database import DatabaseManager
-from .services.route_optimizer import RouteOptimizer
+from .services.job_queue import Job, JobQueue
+from .services.leader_election import LeaderElection
+from .services.metrics import MetricsRegistry
+from .services.order_scheduler import LANES, SLACK_BUCKETS, OrderScheduler, ScheduledOrder, parse_hour_window
+from .services.reprocessing import ReprocessingEngine
+from .services import tracing
 from .models import Order, OrderStatus
 from .config.company_mapping import get_cnpj_from_company_code
 
+if TYPE_CHECKING:
+    from .services.geocoding_service import GeocodingService
+    from .services.llm_extractor import LLMExtractor
+    from .services.minastaxi_client import MinasTaxiClient
+    from .services.ride_pooling import RidePoolingEngine
+    from .services.route_planner import RoutePlanner
+
 # Carrega variáveis de ambiente
 load_dotenv()
 
@@ -34,6 +47,10 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+class EmailClaimedError(Exception):
+    """Outro processo criou o pedido deste e-mail primeiro (UNIQUE em email_id)."""
+
+
 class TaxiOrderProcessor:
     """
     Processador principal que orquestra todo o fluxo de automação.
@@ -50,6 +67,12 @@ class TaxiOrderProcessor:
         """Inicializa todos os serviços necessários."""
         logger.info("Initializing Taxi Order Processor...")
         
+        # Credenciais obrigatórias: os clientes OpenAI/MinasTaxi são criados sob
+        # demanda, então a falta delas só apareceria no primeiro pedido
+        missing = [name for name in ('OPENAI_API_KEY', 'MINASTAXI_USER_ID') if not os.getenv(name)]
+        if missing:
+            raise ValueError(f"Missing required environment variables: {', '.join(missing)}")
+        
         # Database
         self.db = DatabaseManager(os.getenv('DATABASE_PATH', 'data/taxi_orders.db'))
         
@@ -60,84 +83,271 @@ class TaxiOrderProcessor:
             user=os.getenv('EMAIL_USER'),
             password=os.getenv('EMAIL_PASSWORD'),
             folder=os.getenv('EMAIL_FOLDER', 'INBOX'),
-            subject_filter=os.getenv('EMAIL_SUBJECT_FILTER', 'Novo Agendamento')
+            subject_filter=os.getenv('EMAIL_SUBJECT_FILTER', 'Novo Agendamento'),
+            use_ssl=os.getenv('EMAIL_USE_SSL', 'true').lower() == 'true'
         )
+        # Máximo de e-mails novos por ciclo (0 = sem limite); o restante fica para o ciclo seguinte
+        self.fetch_limit = int(os.getenv('EMAIL_FETCH_LIMIT', 0))
         
-        # LLM Extractor
-        self.llm_extractor = LLMExtractor(
-            api_key=os.getenv('OPENAI_API_KEY'),
-            model=os.getenv('OPENAI_MODEL', 'gpt-4-turbo-preview')
+        # Fila durável: e-mails lidos viram jobs antes de processados (ver job_queue.py)
+        self.job_queue = JobQueue.from_env(self.db)
+        # Jobs reservados por ciclo (0 = todos); com vários processos, cada um pega um lote
+        self.claim_batch = int(os.getenv('JOB_CLAIM_BATCH', 20))
+        
+        # Vários processos no mesmo banco (PROCESSOR_ROLE): single = tudo neste processo;
+        # auto = disputa o lease de líder (só o líder lê o IMAP); worker = só processa a fila
+        self.role = os.getenv('PROCESSOR_ROLE', 'single').lower()
+        if self.role not in ('single', 'auto', 'worker'):
+            raise ValueError(f"Invalid PROCESSOR_ROLE: {self.role}")
+        self.leader = None
+        if self.role == 'auto':
+            self.leader = LeaderElection(
+                self.db,
+                owner=self.job_queue.owner,
+                ttl_seconds=float(os.getenv('LEADER_LEASE_SECONDS', 120))
+            )
+        logger.info(f"Processor role: {self.role} (owner {self.job_queue.owner})")
+        
+        # Serviços externos (LLM, geocoding, MinasTaxi, WhatsApp) e de rotas são
+        # criados no primeiro uso (ver propriedades abaixo)
+        self.whatsapp_enabled = os.getenv('ENABLE_WHATSAPP_NOTIFICATIONS', 'false').lower() == 'true'
+        logger.info(f"WhatsApp notifications {'enabled' if self.whatsapp_enabled else 'disabled'}")
+        
+        # Ride pooling (agrupa pedidos compatíveis antes do dispatch). Flag própria:
+        # ENABLE_CLUSTERING já aparece como true nos guias de deploy e nunca teve efeito
+        self.pooling_enabled = os.getenv('ENABLE_RIDE_POOLING', 'false').lower() == 'true'
+        self.pooling_merge = os.getenv('RIDE_POOLING_MERGE', 'true').lower() == 'true'
+        self.pooling_lead_minutes = int(os.getenv('RIDE_POOLING_DISPATCH_LEAD_MINUTES', 0))
+        if self.pooling_enabled:
+            logger.info("Ride pooling enabled")
+        
+        # Métricas por estágio (exportadas em /metrics pelo run_processor.py)
+        self.metrics = MetricsRegistry()
+        self.stage_seconds = self.metrics.histogram(
+            'taxi_stage_duration_seconds', 'Duração de cada estágio do pipeline', labels=('stage',)
+        )
+        self.stage_errors = self.metrics.counter(
+            'taxi_stage_errors_total', 'Exceções por estágio do pipeline', labels=('stage',)
+        )
+        self.order_outcomes = self.metrics.counter(
+            'taxi_orders_total', 'Pedidos processados por status final', labels=('outcome',)
+        )
+        self.emails_fetched = self.metrics.counter('taxi_emails_fetched_total', 'E-mails lidos do IMAP')
+        self.queue_depth = self.metrics.gauge(
+            'taxi_queue_depth', 'Itens aguardando processamento', labels=('queue',)
+        )
+        self.last_cycle = self.metrics.gauge(
+            'taxi_last_cycle_timestamp_seconds', 'Fim do último ciclo (epoch)'
+        )
+        self.metrics.add_collector(self._collect_geocoding_metrics)
+        
+        # Escalonamento por urgência da coleta; coletas distantes ficam para fora do pico
+        self.scheduler = OrderScheduler(
+            expedite_minutes=float(os.getenv('SCHEDULER_EXPEDITE_MINUTES', 120)),
+            defer_hours=float(os.getenv('SCHEDULER_DEFER_HOURS', 24)),
+            off_peak_hours=parse_hour_window(os.getenv('SCHEDULER_OFF_PEAK_HOURS', '20-6'))
         )
+        self.scheduler_timezone = os.getenv('SCHEDULER_TIMEZONE', 'America/Sao_Paulo')
+        self.order_slack = self.metrics.histogram(
+            'taxi_order_slack_seconds', 'Folga esperada (pickup_time - conclusão prevista) por pedido',
+            labels=('lane',), buckets=SLACK_BUCKETS
+        )
+        
+        # Tracing por pedido (JSONL); vazio = desligado
+        tracing.configure(os.getenv('TRACE_FILE') or None)
         
-        # Geocoding Service
+        logger.info("All services initialized successfully")
+    
+    @cached_property
+    def llm_extractor(self) -> 'LLMExtractor':
+        """Extrator LLM (o SDK da OpenAI sozinho leva ~1 s para importar)."""
+        from .services.llm_extractor import LLMExtractor
+        return LLMExtractor(
+            api_key=os.getenv('OPENAI_API_KEY'),
+            model=os.getenv('OPENAI_MODEL', 'gpt-4-turbo-preview'),
+            base_url=os.getenv('OPENAI_BASE_URL') or None
+        )
+    
+    @cached_property
+    def geocoder(self) -> 'GeocodingService':
+        """Serviço de geocoding (geopy/aiohttp, gazetteer e índice regional)."""
+        from .services.gazetteer import Gazetteer
+        from .services.geocoding_service import GeocodingService
         use_google = os.getenv('USE_GOOGLE_MAPS', 'false').lower() == 'true'
-        self.geocoder = GeocodingService(
+        return GeocodingService(
             use_google=use_google,
-            google_api_key=os.getenv('GOOGLE_MAPS_API_KEY')
+            google_api_key=os.getenv('GOOGLE_MAPS_API_KEY'),
+            gazetteer=Gazetteer(
+                path=os.getenv('GAZETTEER_PATH', 'data/gazetteer.json'),
+                save_interval_seconds=float(os.getenv('GAZETTEER_SAVE_INTERVAL_SECONDS', 60))
+            ),
+            nominatim_domain=os.getenv('NOMINATIM_DOMAIN') or None,
+            nominatim_scheme=os.getenv('NOMINATIM_SCHEME') or None,
+            nominatim_min_interval=float(os.getenv('NOMINATIM_MIN_INTERVAL', 1.0)),
+            address_budget_seconds=float(os.getenv('GEOCODING_ADDRESS_BUDGET_SECONDS', 8.0)),
+            variant_concurrency=int(os.getenv('GEOCODING_VARIANT_CONCURRENCY', 2))
         )
-        
-        # MinasTaxi Client
-        self.minastaxi_client = MinasTaxiClient(
+    
+    @cached_property
+    def minastaxi_client(self) -> 'MinasTaxiClient':
+        """Cliente da API MinasTaxi."""
+        from .services.minastaxi_client import MinasTaxiClient
+        # City/UF do payload a partir das coordenadas (reverse geocoding com cache)
+        use_coordinates_city = (
+            os.getenv('PAYLOAD_CITY_FROM_COORDINATES', 'true').lower() == 'true'
+            and os.getenv('DISABLE_GEOCODING', 'false').lower() != 'true'
+        )
+        return MinasTaxiClient(
             api_url=os.getenv('MINASTAXI_API_URL', 'https://vm2c.taxifone.com.br:11048'),
             user_id=os.getenv('MINASTAXI_USER_ID'),
             password=os.getenv('MINASTAXI_PASSWORD'),
             auth_header=os.getenv('MINASTAXI_AUTH_HEADER', 'Basic Original'),
             payment_type=os.getenv('MINASTAXI_PAYMENT_TYPE', 'ONLINE_PAYMENT'),
             timeout=int(os.getenv('MINASTAXI_TIMEOUT', 30)),
-            max_retries=int(os.getenv('MINASTAXI_RETRY_ATTEMPTS', 3))
+            max_retries=int(os.getenv('MINASTAXI_RETRY_ATTEMPTS', 3)),
+            # lambda: o geocoder só é criado quando a primeira cidade for resolvida
+            location_resolver=(lambda lat, lng: self.geocoder.reverse_geocode_city(lat, lng))
+            if use_coordinates_city else None
         )
+    
+    @cached_property
+    def whatsapp_notifier(self):
+        """Notificador WhatsApp (com instância de backup se configurada) ou None se desabilitado."""
+        if not self.whatsapp_enabled:
+            return None
+        from .services.whatsapp_notifier import WhatsAppNotifier, WhatsAppNotifierWithFallback
+        _api_url = os.getenv('EVOLUTION_API_URL', '')
+        _api_key = os.getenv('EVOLUTION_API_KEY', '')
+        _auth_header = os.getenv('EVOLUTION_AUTH_HEADER_NAME', 'apikey')
+        _timeout = int(os.getenv('MINASTAXI_TIMEOUT', 30))
         
-        # WhatsApp Notifier (opcional)
-        self.whatsapp_enabled = os.getenv('ENABLE_WHATSAPP_NOTIFICATIONS', 'false').lower() == 'true'
-        if self.whatsapp_enabled:
-            _api_url = os.getenv('EVOLUTION_API_URL', '')
-            _api_key = os.getenv('EVOLUTION_API_KEY', '')
-            _auth_header = os.getenv('EVOLUTION_AUTH_HEADER_NAME', 'apikey')
-            _timeout = int(os.getenv('MINASTAXI_TIMEOUT', 30))
-
-            primary_notifier = WhatsAppNotifier(
-                api_url=_api_url,
-                api_key=_api_key,
-                instance_name=os.getenv('EVOLUTION_INSTANCE_NAME', 'taxi-bot'),
-                auth_header_name=_auth_header,
-                timeout=_timeout
-            )
-
-            backup_instance = os.getenv('EVOLUTION_BACKUP_INSTANCE_NAME', '')
-            if backup_instance:
-                backup_notifier = WhatsAppNotifier(
-                    api_url=os.getenv('EVOLUTION_BACKUP_API_URL', _api_url),
-                    api_key=os.getenv('EVOLUTION_BACKUP_API_KEY', _api_key),
-                    instance_name=backup_instance,
-                    auth_header_name=os.getenv('EVOLUTION_BACKUP_AUTH_HEADER_NAME', _auth_header),
-                    timeout=_timeout
-                )
-                self.whatsapp_notifier = WhatsAppNotifierWithFallback(
-                    primary=primary_notifier,
-                    backup=backup_notifier,
-                    connection_check_interval=int(
-                        os.getenv('EVOLUTION_BACKUP_CHECK_INTERVAL', 60)
-                    )
-                )
-                logger.info(
-                    f"WhatsApp notifications enabled with backup instance '{backup_instance}'"
-                )
-            else:
-                self.whatsapp_notifier = primary_notifier
-                logger.info("WhatsApp notifications enabled (no backup configured)")
-        else:
-            self.whatsapp_notifier = None
-            logger.info("WhatsApp notifications disabled")
+        primary_notifier = WhatsAppNotifier(
+            api_url=_api_url,
+            api_key=_api_key,
+            instance_name=os.getenv('EVOLUTION_INSTANCE_NAME', 'taxi-bot'),
+            auth_header_name=_auth_header,
+            timeout=_timeout
+        )
         
-        logger.info("All services initialized successfully")
+        backup_instance = os.getenv('EVOLUTION_BACKUP_INSTANCE_NAME', '')
+        if not backup_instance:
+            logger.info("WhatsApp notifier ready (no backup configured)")
+            return primary_notifier
+        
+        backup_notifier = WhatsAppNotifier(
+            api_url=os.getenv('EVOLUTION_BACKUP_API_URL', _api_url),
+            api_key=os.getenv('EVOLUTION_BACKUP_API_KEY', _api_key),
+            instance_name=backup_instance,
+            auth_header_name=os.getenv('EVOLUTION_BACKUP_AUTH_HEADER_NAME', _auth_header),
+            timeout=_timeout
+        )
+        logger.info(f"WhatsApp notifier ready with backup instance '{backup_instance}'")
+        return WhatsAppNotifierWithFallback(
+            primary=primary_notifier,
+            backup=backup_notifier,
+            connection_check_interval=int(os.getenv('EVOLUTION_BACKUP_CHECK_INTERVAL', 60))
+        )
+    
+    @cached_property
+    def route_planner(self) -> 'RoutePlanner':
+        """Horários de coleta por parada (prazo de chegada)."""
+        from .services.route_planner import RoutePlanner
+        return RoutePlanner(arrival_buffer_minutes=float(os.getenv('ROUTE_ARRIVAL_BUFFER_MINUTES', 5)))
+    
+    @cached_property
+    def pooling_engine(self) -> 'RidePoolingEngine':
+        """Agrupamento de pedidos compatíveis (ENABLE_RIDE_POOLING)."""
+        from .services.ride_pooling import RidePoolingEngine
+        return RidePoolingEngine(
+            window_minutes=int(os.getenv('RIDE_POOLING_WINDOW_MINUTES', 30)),
+            pickup_radius_km=float(os.getenv('RIDE_POOLING_PICKUP_RADIUS_KM', 2.0)),
+            destination_radius_km=float(os.getenv('RIDE_POOLING_DESTINATION_RADIUS_KM', 1.0)),
+            max_seats=int(os.getenv('RIDE_POOLING_MAX_SEATS', 4))
+        )
+    
+    @contextmanager
+    def _stage(self, stage: str):
+        """Mede a duração de um estágio (fetch, extract, geocode, dispatch, notify), conta exceções e abre um span."""
+        start = time.perf_counter()
+        try:
+            with tracing.span(stage) as span:
+                yield span
+        except Exception:
+            self.stage_errors.inc(stage=stage)
+            raise
+        finally:
+            self.stage_seconds.observe(time.perf_counter() - start, stage=stage)
+    
+    def _extract(self, email_body: str) -> Optional[dict]:
+        with self._stage('extract'):
+            return self.llm_extractor.extract_with_fallback(email_body)
+    
+    def _geocode(self, address: str) -> Optional[tuple]:
+        with self._stage('geocode'):
+            return self.geocoder.geocode_address(address)
+    
+    def _geocode_fallback(self, address: str) -> Optional[tuple]:
+        with self._stage('geocode'):
+            return self.geocoder.geocode_address_fallback(address)
+    
+    def _send_to_minastaxi(self, order: Order) -> dict:
+        with self._stage('dispatch'):
+            return self.minastaxi_client.dispatch_order(order)
+    
+    def _notify(self, **kwargs) -> dict:
+        with self._stage('notify'):
+            return self.whatsapp_notifier.send_message(**kwargs)
+    
+    def _collect_geocoding_metrics(self):
+        """Copia contadores e taxa de acerto dos backends de geocoding para os gauges."""
+        if 'geocoder' not in self.__dict__:
+            return  # ainda não usado: não força a importação do geopy no scrape
+        hit_ratio = self.metrics.gauge(
+            'taxi_geocoding_hit_ratio', 'Taxa de acerto por backend de geocoding', labels=('backend',)
+        )
+        calls = self.metrics.gauge(
+            'taxi_geocoding_calls', 'Consultas por backend de geocoding', labels=('backend',)
+        )
+        for backend, snapshot in self.geocoder.get_backend_metrics().items():
+            hit_ratio.set(snapshot['hit_rate'], backend=backend)
+            calls.set(snapshot['calls'], backend=backend)
+    
+    def _check_leadership(self) -> bool:
+        """
+        True se este processo lê o IMAP e cuida das tarefas que não podem rodar
+        em paralelo (pedidos adiados, ride pooling). Em PROCESSOR_ROLE=auto
+        adquire ou renova o lease de líder.
+        """
+        if self.role == 'worker':
+            return False
+        if self.leader is None:
+            return True
+        return self.leader.try_acquire()
+    
+    def _renew_leases(self):
+        """Renova os leases dos jobs reservados e, se for o líder, o de liderança."""
+        self.job_queue.renew()
+        if self.leader is not None and self.leader.is_leader:
+            self.leader.try_acquire()
     
     def process_new_orders(self, days_back: int = 7) -> dict:
         """
         Processa todos os novos pedidos de e-mail.
         
+        Os e-mails lidos entram na fila durável (jobs) e um lote da fila é
+        reservado; cada e-mail reservado é extraído (LLM) em ordem de chegada,
+        os pedidos extraídos são então concluídos (geocoding + dispatch) em ordem
+        de urgência da coleta, e os de coleta distante ficam adiados para um
+        ciclo fora do pico. O job só é concluído quando o pedido chega a um
+        estado final; se o processo cair antes, o lease expira e outro ciclo
+        (deste ou de outro processo) o retoma.
+        
+        Com vários processos (PROCESSOR_ROLE), só o líder lê o IMAP, retoma
+        pedidos adiados e faz o ride pooling; os demais só processam a fila.
+        
         Args:
             days_back: Número de dias para trás na busca de e-mails.
-            
+        
         Returns:
             Dicionário com estatísticas do processamento.
         """
@@ -145,135 +355,354 @@ class TaxiOrderProcessor:
             'emails_fetched': 0,
             'orders_created': 0,
             'orders_dispatched': 0,
-            'orders_failed': 0
+            'orders_failed': 0,
+            'orders_deferred': 0,
+            'jobs_claimed': 0,
+            'queue_backlog': 0,
+            'fetch_limit_hit': False
         }
         
         try:
-            # 1. Busca novos e-mails
-            logger.info(f"Fetching new order emails (last {days_back} days)...")
-            emails = self.email_reader.fetch_new_orders(days_back=days_back)
-            stats['emails_fetched'] = len(emails)
-            
-            if not emails:
-                logger.info("No new order emails found")
-                return stats
+            is_leader = self._check_leadership()
+            stats['role'] = 'leader' if is_leader else 'worker'
             
-            logger.info(f"Found {len(emails)} new order emails")
+            # 1. Busca novos e-mails (só o líder; workers só consomem a fila)
+            emails = []
+            if is_leader:
+                emails = self._fetch_emails(days_back)
+                stats['emails_fetched'] = len(emails)
+                stats['fetch_limit_hit'] = bool(self.fetch_limit) and len(emails) >= self.fetch_limit
+                
+                if emails:
+                    logger.info(f"Found {len(emails)} new order emails")
+                else:
+                    logger.info("No new order emails found")
             
-            # 2. Processa cada e-mail
+            # 2. Enfileira (idempotente por UID) e reserva um lote da fila, que inclui
+            #    retentativas e jobs de processos que caíram no meio do ciclo
             for email in emails:
+                self.job_queue.enqueue('email', email.uid, self._email_payload(email))
+            jobs = self.job_queue.claim(('email',), limit=self.claim_batch)
+            stats['jobs_claimed'] = len(jobs)
+            self.queue_depth.set(len(jobs), queue='emails')
+            
+            # 3. Extrai cada e-mail (LLM); pedidos completos seguem para o escalonamento
+            pending = []
+            for job in jobs:
+                email = self._email_from_job(job)
+                self._renew_leases()
+                span = tracing.start_span(
+                    'order', new_trace=True, email_uid=email.uid, body_chars=len(email.body or ''), attempt=job.attempts
+                )
                 try:
-                    order = self._process_single_email(email)
-                    
-                    if order:
-                        stats['orders_created'] += 1
-                        
-                        if order.status == OrderStatus.DISPATCHED:
-                            stats['orders_dispatched'] += 1
-                        elif order.status == OrderStatus.FAILED or order.status == OrderStatus.MANUAL_REVIEW:
-                            stats['orders_failed'] += 1
-                    
+                    with tracing.use_span(span):
+                        result = self._extract_order(email)
                 except Exception as e:
                     logger.error(f"Error processing email {email.uid}: {e}")
                     stats['orders_failed'] += 1
+                    self.order_outcomes.inc(outcome='error')
+                    self.job_queue.fail(job, e)
+                    tracing.end_span(span)
+                    continue
+                finally:
+                    self.queue_depth.dec(queue='emails')
+                
+                if isinstance(result, ScheduledOrder):
+                    result.span = span
+                    result.queue_job = job
+                    pending.append(result)
+                else:
+                    self._record_order(result, stats, span)
+                    self.job_queue.complete(job)
+                    tracing.end_span(span)
+            
+            # 4. Conclui por urgência da coleta (inclui pedidos adiados que venceram)
+            completed = self._run_schedule(pending, stats, resume_deferred=is_leader)
+            
+            # 5. Ride pooling: agrupa e envia os pedidos retidos (também os concluídos pelos workers)
+            if self.pooling_enabled and is_leader and (jobs or completed or self.role != 'single'):
+                self.dispatch_pooled_orders(stats)
+            
+            # Jobs prontos que ficaram para o próximo ciclo (lote cheio)
+            backlog = self.job_queue.counts('email')
+            stats['queue_backlog'] = backlog['ready']
+            self.queue_depth.set(backlog['ready'], queue='jobs')
+            self.queue_depth.set(backlog['dead'], queue='dead_jobs')
             
             # Log final
             logger.info(
                 f"Processing complete: {stats['orders_created']} orders created, "
-                f"{stats['orders_dispatched']} dispatched, {stats['orders_failed']} failed"
+                f"{stats['orders_dispatched']} dispatched, {stats['orders_failed']} failed, "
+                f"{stats['orders_deferred']} deferred"
             )
-            
+        
         except Exception as e:
             logger.error(f"Error in process_new_orders: {e}")
+            stats['error'] = str(e)
+        finally:
+            self.last_cycle.set(time.time())
         
         return stats
     
-    def _process_single_email(self, email: EmailMessage) -> Order:
+    def _fetch_emails(self, days_back: int) -> List[EmailMessage]:
+        """Lê os e-mails de pedido do IMAP (com EMAIL_FETCH_LIMIT, ignora os já conhecidos)."""
+        logger.info(f"Fetching new order emails (last {days_back} days)...")
+        with self._stage('fetch') as span:
+            if self.fetch_limit:
+                # Com limite, e-mails já processados não podem ocupar as vagas do ciclo
+                emails = self.email_reader.fetch_new_orders(
+                    days_back=days_back,
+                    limit=self.fetch_limit,
+                    is_known=lambda uid: (
+                        self.job_queue.contains('email', uid)
+                        or self.db.get_order_by_email_id(uid) is not None
+                    )
+                )
+            else:
+                emails = self.email_reader.fetch_new_orders(days_back=days_back)
+            span.set_attributes(days_back=days_back, emails=len(emails))
+        self.emails_fetched.inc(len(emails))
+        return emails
+    
+    @staticmethod
+    def _email_payload(email: EmailMessage) -> dict:
+        """Serializa o e-mail para o payload do job."""
+        return {
+            'uid': email.uid,
+            'subject': email.subject,
+            'from': email.from_,
+            'date': email.date.isoformat() if email.date else None,
+            'body': email.body
+        }
+    
+    @staticmethod
+    def _email_from_job(job: Job) -> EmailMessage:
+        """Reconstrói o e-mail a partir do payload do job."""
+        payload = job.payload
+        return EmailMessage(
+            uid=payload.get('uid', job.key),
+            subject=payload.get('subject') or '',
+            from_=payload.get('from') or '',
+            date=datetime.fromisoformat(payload['date']) if payload.get('date') else None,
+            body=payload.get('body') or ''
+        )
+    
+    def _record_order(self, order: Order, stats: dict, span):
+        """Contabiliza o status final de um pedido nas estatísticas, métricas e no span."""
+        if not order:
+            return
+        span.set_attributes(order_id=order.id, outcome=order.status.value)
+        stats['orders_created'] += 1
+        self.order_outcomes.inc(outcome=order.status.value)
+        
+        if order.status == OrderStatus.DISPATCHED:
+            stats['orders_dispatched'] += 1
+        elif order.status == OrderStatus.FAILED or order.status == OrderStatus.MANUAL_REVIEW:
+            stats['orders_failed'] += 1
+    
+    def _run_schedule(self, pending: List[ScheduledOrder], stats: dict, resume_deferred: bool = True) -> int:
         """
-        Processa um único e-mail através de todo o pipeline.
+        Escalona os pedidos extraídos e conclui os que não foram adiados.
+        
+        A fila é ordenada por faixa (expedite, normal, deferred fora do pico) e
+        prazo; a folga esperada de cada pedido é registrada em
+        taxi_order_slack_seconds.
         
         Args:
-            email: EmailMessage a ser processado.
+            pending: Pedidos extraídos neste ciclo.
+            stats: Dicionário de estatísticas do ciclo a atualizar.
+            resume_deferred: Retoma também os pedidos adiados (só um processo
+                deve fazê-lo: o líder).
+        
+        Returns:
+            Número de pedidos concluídos.
+        """
+        import pytz
+        now = time.time()
+        off_peak = self.scheduler.is_off_peak(datetime.now(pytz.timezone(self.scheduler_timezone)))
+        resumed, waiting = self._load_deferred_orders(now, off_peak) if resume_deferred else ([], None)
+        queue, deferred = self.scheduler.plan(pending + resumed, now, off_peak=off_peak)
+        
+        for job in deferred:
+            self._defer_order(job, stats)
+        if waiting is not None:
+            self.queue_depth.set(waiting + len(deferred), queue='deferred')
+        self.queue_depth.set(len(queue), queue='scheduled')
+        
+        if queue:
+            lanes = {lane: sum(1 for job in queue if job.lane == lane) for lane in LANES}
+            logger.info(
+                f"Scheduling {len(queue)} orders by pickup urgency "
+                f"({', '.join(f'{n} {lane}' for lane, n in lanes.items() if n)})"
+                + (", off-peak cycle" if off_peak else "")
+            )
+        
+        for job in queue:
+            span = job.span or tracing.start_span(
+                'order', new_trace=True, email_uid=job.order.email_id, resumed=True
+            )
+            span.set_attributes(
+                lane=job.lane, slack_seconds=round(job.slack_seconds, 1) if job.slack_seconds is not None else None
+            )
+            if job.slack_seconds is not None:
+                self.order_slack.observe(job.slack_seconds, lane=job.lane)
+                if job.slack_seconds < 0:
+                    logger.warning(
+                        f"Email {job.email.uid}: pickup at {job.order.pickup_time.isoformat()} is "
+                        f"{-job.slack_seconds / 60:.0f} min before the expected completion"
+                    )
             
+            start = time.perf_counter()
+            self._renew_leases()
+            try:
+                with tracing.use_span(span):
+                    order = self._complete_order(job)
+                self._record_order(order, stats, span)
+                if job.queue_job:
+                    self.job_queue.complete(job.queue_job)
+            except Exception as e:
+                logger.error(f"Error processing email {job.email.uid}: {e}")
+                stats['orders_failed'] += 1
+                self.order_outcomes.inc(outcome='error')
+                if job.queue_job:
+                    self.job_queue.fail(job.queue_job, e)
+            finally:
+                self.scheduler.record_completion(time.perf_counter() - start)
+                tracing.end_span(span)
+                self.queue_depth.dec(queue='scheduled')
+        
+        return len(queue)
+    
+    def _load_deferred_orders(self, now: float, off_peak: bool):
+        """
+        Retoma pedidos adiados (status EXTRACTED) cuja coleta entrou no horizonte.
+        
+        Fora do pico todos são retomados. A extração guardada é reaplicada ao
+        corpo do e-mail, sem nova chamada ao LLM.
+        
+        Args:
+            now: Instante atual (epoch).
+            off_peak: Ciclo fora do pico.
+        
         Returns:
-            Order object com status atualizado.
+            (pedidos retomados, quantidade que continua adiada).
+        """
+        deferred = self.db.get_orders_by_status(OrderStatus.EXTRACTED)
+        resumed = []
+        for stored in deferred:
+            deadline = stored.pickup_time.timestamp() if stored.pickup_time else None
+            if not off_peak and self.scheduler.lane_for(deadline, now) == 'deferred':
+                continue
+            extracted_data = self.db.get_extracted_data(stored.id)
+            if extracted_data is None:
+                logger.warning(f"Deferred order {stored.id} has no stored extraction, skipping")
+                continue
+            
+            body = self.db.load_raw_email_body(stored) or ''
+            email = EmailMessage(uid=stored.email_id, subject='', from_='', date=stored.created_at, body=body)
+            order = Order(
+                id=stored.id,
+                email_id=stored.email_id,
+                raw_email_body=body,
+                created_at=stored.created_at,
+                status=OrderStatus.RECEIVED
+            )
+            arrival_time = self._apply_extracted_data(order, body, extracted_data)
+            order.status = OrderStatus.EXTRACTED
+            logger.info(f"Resuming deferred order {order.id} (pickup {order.pickup_time})")
+            resumed.append(ScheduledOrder(email=email, order=order, extracted_data=extracted_data,
+                                          arrival_time=arrival_time))
+        
+        return resumed, len(deferred) - len(resumed)
+    
+    def _defer_order(self, job: ScheduledOrder, stats: dict):
+        """Salva um pedido distante como EXTRACTED (com a extração) para um ciclo fora do pico."""
+        order = job.order
+        try:
+            self._save_order(order)
+            self.db.save_extracted_data(order.id, job.extracted_data)
+            # Pedido salvo como EXTRACTED: o adiamento já é durável, o job termina aqui
+            if job.queue_job:
+                self.job_queue.complete(job.queue_job)
+            stats['orders_deferred'] += 1
+            logger.info(f"Order {order.id} deferred: pickup at {order.pickup_time.isoformat()} is beyond the horizon")
+            if job.span is not None:
+                job.span.set_attributes(order_id=order.id, outcome='deferred', lane=job.lane)
+        except EmailClaimedError:
+            logger.info(f"Email {job.email.uid} claimed by another process, skipping")
+            if job.queue_job:
+                self.job_queue.complete(job.queue_job)
+        except Exception as e:
+            logger.error(f"Failed to defer order for email {job.email.uid}: {e}")
+            stats['orders_failed'] += 1
+            self.order_outcomes.inc(outcome='error')
+            if job.queue_job:
+                self.job_queue.fail(job.queue_job, e)
+        finally:
+            tracing.end_span(job.span)
+    
+    def _process_single_email(self, email: EmailMessage) -> Optional[Order]:
+        """
+        Processa um único e-mail através de todo o pipeline, sem escalonamento.
+        
+        Args:
+            email: EmailMessage a ser processado.
+        
+        Returns:
+            Order object com status atualizado (None se outro processo reservou o e-mail).
+        """
+        job = self._extract_order(email)
+        if job is None or isinstance(job, Order):
+            return job
+        return self._complete_order(job)
+    
+    def _extract_order(self, email: EmailMessage) -> Optional[Union[Order, ScheduledOrder]]:
+        """
+        Fase de extração: LLM, normalização dos campos e verificação de duplicata.
+        
+        Args:
+            email: EmailMessage a ser processado.
+        
+        Returns:
+            ScheduledOrder pronto para geocoding/dispatch, o Order final quando
+            o e-mail já foi processado, a extração falhou ou é duplicata, ou None
+            quando outro processo reservou o e-mail.
         """
         logger.info(f"Processing email UID={email.uid} from {email.from_}")
         
-        # Verifica se já foi processado (mesmo email UID)
+        # Verifica se já foi processado (mesmo email UID). A reserva do e-mail
+        # entre processos é o lease do job; o pedido só é gravado com a extração
+        # feita, e o UNIQUE em email_id desempata se dois processos chegarem lá.
+        # Um pedido RECEIVED é a reserva gravada por versões anteriores: retoma
         existing_order = self.db.get_order_by_email_id(email.uid)
-        if existing_order:
+        if existing_order and existing_order.status != OrderStatus.RECEIVED:
             logger.info(f"Email {email.uid} already processed, skipping")
             return existing_order
         
-        # Cria novo pedido
-        order = Order(
-            email_id=email.uid,
-            raw_email_body=email.body,
-            status=OrderStatus.RECEIVED
-        )
+        if existing_order:
+            order = existing_order
+            order.raw_email_body = email.body
+            logger.info(f"Resuming email {email.uid} from interrupted attempt (order {order.id})")
+        else:
+            order = Order(
+                email_id=email.uid,
+                raw_email_body=email.body,
+                status=OrderStatus.RECEIVED
+            )
         
         try:
             # FASE 2: Extração com LLM
             logger.info("Extracting data with LLM...")
-            extracted_data = self.llm_extractor.extract_with_fallback(email.body)
+            extracted_data = self._extract(email.body)
             
             if not extracted_data:
                 order.status = OrderStatus.MANUAL_REVIEW
                 order.error_message = "Failed to extract data from email"
-                order.id = self.db.create_order(order)
+                self._save_order(order)
                 logger.warning(f"Order {order.id} requires manual review - extraction failed")
                 return order
             
-            # Atualiza order com dados extraídos
-            order.passenger_name = extracted_data.get('passenger_name')
-            order.phone = extracted_data.get('phone')
-            order.passenger_re = extracted_data.get('passenger_re')
-            order.pickup_address = extracted_data.get('pickup_address')
-            order.dropoff_address = extracted_data.get('dropoff_address')
-            order.notes = extracted_data.get('notes')  # Observações gerais
-            order.company_code = extracted_data.get('company_code')  # Código da empresa extraído do email
-            order.cost_center = extracted_data.get('cost_center')  # Centro de custo extraído diretamente
-            order.payment_type = extracted_data.get('payment_type')  # Pode vir do email (ex: "Pgto: DIN")
-            # Se o email traz um 'Solicitante:' especifico, ele deve prevalecer sobre passenger_name
-            msol = re.search(r"Solicitante\s*[:\-]\s*(.+)", email.body, re.IGNORECASE)
-            if msol:
-                order.passenger_name = msol.group(1).strip()
-                logger.info(f"Override passenger_name from solicitante: {order.passenger_name}")
-            # heurística extra para payment_type: presença de voucher/din no corpo
-            if order.payment_type is None or order.payment_type == "":
-                if re.search(r"voucher", email.body, re.IGNORECASE):
-                    order.payment_type = "VOUCHER"
-                    logger.info("Detected payment_type VOUCHER from email body")
-                elif re.search(r"\bDIN\b", email.body, re.IGNORECASE):
-                    order.payment_type = "DIN"
-                    logger.info("Detected payment_type DIN from email body")
-            
-            # Converte código da empresa para CNPJ
-            if order.company_code:
-                order.company_cnpj = get_cnpj_from_company_code(order.company_code)
-                logger.info(f"Company code {order.company_code} mapped to CNPJ {order.company_cnpj}")
-            else:
-                logger.warning("No company code found in email - will use default CNPJ")
-            
-            # Múltiplos passageiros (novo)
-            order.passengers = extracted_data.get('passengers', [])
-            # Garante RE por passageiro quando vier apenas no nível principal.
-            if order.passengers and order.passenger_re and not order.passengers[0].get('passenger_re'):
-                order.passengers[0]['passenger_re'] = order.passenger_re
-            order.has_return = extracted_data.get('has_return', False)
-            
-            # Fallback para payment_type via variável de ambiente se não houver no email
-            if not order.payment_type:
-                order.payment_type = os.getenv('MINASTAXI_PAYMENT_TYPE', 'ONLINE_PAYMENT')
-            
-            # Parse pickup_time
-            if extracted_data.get('pickup_time'):
-                try:
-                    from dateutil import parser
-                    order.pickup_time = parser.parse(extracted_data['pickup_time'])
-                except:
-                    logger.warning("Failed to parse pickup_time")
+            arrival_time = self._apply_extracted_data(order, email.body, extracted_data)
             
             # Verifica duplicata por conteúdo (mesmo passageiro/endereço/horário)
             if order.pickup_time:
@@ -291,25 +720,119 @@ class TaxiOrderProcessor:
                     )
                     order.status = OrderStatus.MANUAL_REVIEW
                     order.error_message = "Possível pedido duplicado (mesmo passageiro, endereço e horário similar)"
-                    order.id = self.db.create_order(order)
+                    self._save_order(order)
                     logger.info(f"Order {order.id} marked for manual review - possible duplicate")
                     return order
             
-            # Parse return_time se houver
-            if extracted_data.get('return_time'):
-                try:
-                    from dateutil import parser
-                    order.return_time = parser.parse(extracted_data['return_time'])
-                except:
-                    logger.warning("Failed to parse return_time")
-            
             order.status = OrderStatus.EXTRACTED
-            
+            return ScheduledOrder(email=email, order=order, extracted_data=extracted_data, arrival_time=arrival_time)
+        
+        except EmailClaimedError:
+            logger.info(f"Email {email.uid} claimed by another process, skipping")
+            return None
+        except Exception as e:
+            self._fail_order(order, e)
+        
+        return order
+    
+    def _apply_extracted_data(self, order: Order, email_body: str, extracted_data: dict) -> Optional[datetime]:
+        """
+        Preenche o pedido com os dados extraídos e as heurísticas sobre o corpo do e-mail.
+        
+        Args:
+            order: Pedido a preencher.
+            email_body: Corpo original do e-mail.
+            extracted_data: Dicionário retornado pelo extrator.
+        
+        Returns:
+            Horário de chegada (prazo) informado no e-mail, se houver.
+        """
+        order.passenger_name = extracted_data.get('passenger_name')
+        order.phone = extracted_data.get('phone')
+        order.passenger_re = extracted_data.get('passenger_re')
+        order.pickup_address = extracted_data.get('pickup_address')
+        order.dropoff_address = extracted_data.get('dropoff_address')
+        order.notes = extracted_data.get('notes')  # Observações gerais
+        order.company_code = extracted_data.get('company_code')  # Código da empresa extraído do email
+        order.cost_center = extracted_data.get('cost_center')  # Centro de custo extraído diretamente
+        order.payment_type = extracted_data.get('payment_type')  # Pode vir do email (ex: "Pgto: DIN")
+        # Se o email traz um 'Solicitante:' especifico, ele deve prevalecer sobre passenger_name
+        msol = re.search(r"Solicitante\s*[:\-]\s*(.+)", email_body, re.IGNORECASE)
+        if msol:
+            order.passenger_name = msol.group(1).strip()
+            logger.info(f"Override passenger_name from solicitante: {order.passenger_name}")
+        # heurística extra para payment_type: presença de voucher/din no corpo
+        if order.payment_type is None or order.payment_type == "":
+            if re.search(r"voucher", email_body, re.IGNORECASE):
+                order.payment_type = "VOUCHER"
+                logger.info("Detected payment_type VOUCHER from email body")
+            elif re.search(r"\bDIN\b", email_body, re.IGNORECASE):
+                order.payment_type = "DIN"
+                logger.info("Detected payment_type DIN from email body")
+        
+        # Converte código da empresa para CNPJ
+        if order.company_code:
+            order.company_cnpj = get_cnpj_from_company_code(order.company_code)
+            logger.info(f"Company code {order.company_code} mapped to CNPJ {order.company_cnpj}")
+        else:
+            logger.warning("No company code found in email - will use default CNPJ")
+        
+        # Múltiplos passageiros (novo)
+        order.passengers = extracted_data.get('passengers', [])
+        # Garante RE por passageiro quando vier apenas no nível principal.
+        if order.passengers and order.passenger_re and not order.passengers[0].get('passenger_re'):
+            order.passengers[0]['passenger_re'] = order.passenger_re
+        order.has_return = extracted_data.get('has_return', False)
+        
+        # Fallback para payment_type via variável de ambiente se não houver no email
+        if not order.payment_type:
+            order.payment_type = os.getenv('MINASTAXI_PAYMENT_TYPE', 'ONLINE_PAYMENT')
+        
+        # Parse pickup_time
+        if extracted_data.get('pickup_time'):
+            try:
+                from dateutil import parser
+                order.pickup_time = parser.parse(extracted_data['pickup_time'])
+            except:
+                logger.warning("Failed to parse pickup_time")
+        
+        # Horário de chegada (prazo) usado no planejamento das coletas
+        arrival_time = None
+        if extracted_data.get('arrival_time'):
+            try:
+                from dateutil import parser
+                arrival_time = parser.parse(extracted_data['arrival_time'])
+            except:
+                logger.warning("Failed to parse arrival_time")
+        
+        # Parse return_time se houver
+        if extracted_data.get('return_time'):
+            try:
+                from dateutil import parser
+                order.return_time = parser.parse(extracted_data['return_time'])
+            except:
+                logger.warning("Failed to parse return_time")
+        
+        return arrival_time
+    
+    def _complete_order(self, job: ScheduledOrder) -> Optional[Order]:
+        """
+        Fase de conclusão: geocoding, rota de coleta e dispatch de um pedido extraído.
+        
+        Args:
+            job: Pedido extraído (ver _extract_order).
+        
+        Returns:
+            Order object com status atualizado (None se outro processo gravou
+            o pedido deste e-mail primeiro).
+        """
+        email, order, extracted_data, arrival_time = job.email, job.order, job.extracted_data, job.arrival_time
+        
+        try:
             # VERIFICA SE TEM RETORNO - CRIA 2 ORDERS (IDA + VOLTA)
             if order.has_return and order.return_time:
                 logger.info("Order has return trip - will create 2 orders (outbound + return)")
                 return self._process_round_trip(email, order, extracted_data)
-            
             # Continua processamento normal (sem retorno)
             
             # FASE 2.5: Geocoding (pode ser desabilitado via env)
@@ -321,7 +844,7 @@ class TaxiOrderProcessor:
                 # Geocode destino primeiro (CRÍTICO para otimização de rota)
                 destination_coords = None
                 if order.dropoff_address:
-                    dropoff_coords = self.geocoder.geocode_address(order.dropoff_address)
+                    dropoff_coords = self._geocode(order.dropoff_address)
                     if dropoff_coords:
                         order.dropoff_lat, order.dropoff_lng = dropoff_coords
                         destination_coords = dropoff_coords
@@ -330,7 +853,7 @@ class TaxiOrderProcessor:
                         # FALLBACK: tentar geocoding sem restrições de bounds
                         logger.warning(f"Failed to geocode destination with bounds: {order.dropoff_address}")
                         logger.info("Trying fallback geocoding without bounds restrictions...")
-                        dropoff_coords = self.geocoder.geocode_address_fallback(order.dropoff_address)
+                        dropoff_coords = self._geocode_fallback(order.dropoff_address)
                         if dropoff_coords:
                             order.dropoff_lat, order.dropoff_lng = dropoff_coords
                             destination_coords = dropoff_coords
@@ -342,7 +865,7 @@ class TaxiOrderProcessor:
             if order.passengers:
                 logger.info(f"Geocoding {len(order.passengers)} passenger addresses...")
                 for idx, passenger in enumerate(order.passengers):
-                    coords = self.geocoder.geocode_address(passenger.get('address', ''))
+                    coords = self._geocode(passenger.get('address', ''))
                     if coords:
                         passenger['lat'] = coords[0]
                         passenger['lng'] = coords[1]
@@ -350,10 +873,13 @@ class TaxiOrderProcessor:
                 
                 # Otimizar rota de coleta
                 logger.info("Optimizing pickup route...")
-                optimized_passengers = RouteOptimizer.optimize_pickup_sequence(
+                from .services.route_optimizer import RouteOptimizer
+                optimized_passengers, route_km = RouteOptimizer.solve_pickup_route(
                     order.passengers, destination_coords
                 )
                 order.passengers = optimized_passengers
+                if destination_coords:
+                    self._plan_pickup_times(order, destination_coords, arrival_time)
                 
                 # Usar primeiro passageiro como referência
                 if order.passengers and 'lat' in order.passengers[0]:
@@ -362,24 +888,25 @@ class TaxiOrderProcessor:
                     # Atualizar pickup_address para múltiplas paradas
                     addresses = [p['address'] for p in order.passengers[:2]]
                     order.pickup_address = f"Múltiplas paradas: {' → '.join(addresses)}" + ("..." if len(order.passengers) > 2 else "")
-                    logger.info(f"Route optimized: {len(order.passengers)} stops")
+                    route_info = f", {route_km:.1f} km" if route_km is not None else ""
+                    logger.info(f"Route optimized: {len(order.passengers)} stops{route_info}")
                 else:
                     # Fallback para geocoding do endereço original
-                    pickup_coords = self.geocoder.geocode_address(order.pickup_address)
+                    pickup_coords = self._geocode(order.pickup_address)
                     if not pickup_coords:
                         order.status = OrderStatus.MANUAL_REVIEW
                         order.error_message = "Failed to geocode pickup address"
-                        order.id = self.db.create_order(order)
+                        self._save_order(order)
                         logger.warning(f"Order {order.id} requires manual review - geocoding failed")
                         return order
                     order.pickup_lat, order.pickup_lng = pickup_coords
             else:
                 # Passageiro único - geocoding tradicional
-                pickup_coords = self.geocoder.geocode_address(order.pickup_address)
+                pickup_coords = self._geocode(order.pickup_address)
                 if not pickup_coords:
                     order.status = OrderStatus.MANUAL_REVIEW
                     order.error_message = "Failed to geocode pickup address"
-                    order.id = self.db.create_order(order)
+                    self._save_order(order)
                     logger.warning(f"Order {order.id} requires manual review - geocoding failed")
                     return order
                 order.pickup_lat, order.pickup_lng = pickup_coords
@@ -387,152 +914,240 @@ class TaxiOrderProcessor:
             order.status = OrderStatus.GEOCODED
             
             # Salva no banco antes de dispatch
-            order.id = self.db.create_order(order)
+            self._save_order(order)
             logger.info(f"Order {order.id} created in database")
             
+            # Ride pooling: pedido fica GEOCODED até o estágio de agrupamento.
+            # A extração vai junto: RE e retorno não têm coluna em orders
+            if self.pooling_enabled:
+                self.db.save_extracted_data(order.id, extracted_data)
+                self.db.hold_for_pooling(order.id)
+                logger.info(f"Order {order.id} held for ride pooling")
+                return order
+            
             # FASE 3: Dispatch para MinasTaxi
-            logger.info(f"Dispatching order {order.id} to MinasTaxi...")
+            self._dispatch_order(order)
             
-            try:
-                response = self.minastaxi_client.dispatch_order(order)
+        except EmailClaimedError:
+            logger.info(f"Email {email.uid} claimed by another process, skipping")
+            return None
+        except Exception as e:
+            self._fail_order(order, e)
+        
+        return order
+    
+    def _save_order(self, order: Order):
+        """
+        Cria o pedido no banco ou, se já existe (ex: pedido adiado retomado), atualiza.
+        
+        Raises:
+            EmailClaimedError: Outro processo já gravou o pedido deste e-mail.
+        """
+        if order.id:
+            self.db.update_order(order)
+            return
+        order.id = self.db.claim_email_order(order)
+        if order.id is None:
+            raise EmailClaimedError(order.email_id)
+    
+    def _fail_order(self, order: Order, error: Exception):
+        """Marca o pedido como FAILED e persiste o erro."""
+        order.status = OrderStatus.FAILED
+        order.error_message = f"Processing error: {str(error)}"
+        
+        try:
+            self._save_order(order)
+        except EmailClaimedError:
+            logger.info(f"Email {order.email_id} claimed by another process, not recording the failure")
+            return
+        
+        logger.error(f"Error processing order: {error}")
+    
+    def _plan_pickup_times(self, order: Order, destination_coords: tuple, arrival_time: Optional[datetime] = None):
+        """
+        Calcula o horário de cada coleta de uma rota com várias paradas.
+        
+        Com prazo de chegada, antecipa a primeira coleta pela soma dos trechos
+        (nunca atrasa o pickup_time extraído). Anota cada passageiro com
+        `pickup_offset_minutes` e `pickup_time`.
+        
+        Args:
+            order: Pedido com passageiros já na ordem de coleta.
+            destination_coords: Coordenadas do destino.
+            arrival_time: Horário limite de chegada, se informado no e-mail.
+        """
+        try:
+            plan = self.route_planner.plan_passengers(
+                order.passengers, destination_coords, deadline=arrival_time, start_time=order.pickup_time
+            )
+            if arrival_time and plan.first_pickup_time:
+                if order.pickup_time and plan.first_pickup_time > order.pickup_time:
+                    plan = self.route_planner.plan_passengers(
+                        order.passengers, destination_coords, start_time=order.pickup_time
+                    )
+                else:
+                    logger.info(
+                        f"First pickup moved to {plan.first_pickup_time.isoformat()} "
+                        f"to arrive by {arrival_time.isoformat()} ({plan.total_minutes:.0f} min route)"
+                    )
+                    order.pickup_time = plan.first_pickup_time
+        except Exception as e:
+            logger.warning(f"Failed to plan pickup times: {e}")
+    
+    def _dispatch_order(self, order: Order, members: Optional[List[Order]] = None):
+        """
+        Envia o pedido para a MinasTaxi e notifica os passageiros.
+        
+        Args:
+            order: Pedido a enviar (pode ser um pedido combinado do ride pooling).
+            members: Pedidos persistidos representados por `order`; se None,
+                o próprio `order` é atualizado no banco.
+        """
+        from .services.minastaxi_client import MinasTaxiAPIError
+        # Pedido combinado do ride pooling não tem id próprio: usa o do grupo
+        order_ref = order.id or order.cluster_id
+        logger.info(f"Dispatching order {order_ref} to MinasTaxi...")
+        
+        try:
+            response = self._send_to_minastaxi(order)
+            
+            # Sucesso
+            order.status = OrderStatus.DISPATCHED
+            order.minastaxi_order_id = response.get('order_id')
+            self._save_dispatch_result(order, members)
+            
+            logger.info(f"Order {order_ref} successfully dispatched to MinasTaxi")
+            
+            # FASE 4: Notificação WhatsApp (se habilitada)
+            if self.whatsapp_enabled and self.whatsapp_notifier:
+                # Lista de passageiros para notificar
+                passengers_to_notify = []
                 
-                # Sucesso
-                order.status = OrderStatus.DISPATCHED
-                order.minastaxi_order_id = response.get('order_id')
-                self.db.update_order(order)
+                # Se houver múltiplos passageiros, usa APENAS a lista individualizada
+                if order.passengers:
+                    for passenger in order.passengers:
+                        if passenger.get('phone'):
+                            passengers_to_notify.append({
+                                'name': passenger.get('name', 'Cliente'),
+                                'phone': passenger['phone']
+                            })
+                # Senão, usa o passageiro principal (passageiro único)
+                elif order.phone:
+                    passengers_to_notify.append({
+                        'name': order.passenger_name or "Cliente",
+                        'phone': order.phone
+                    })
                 
-                logger.info(f"Order {order.id} successfully dispatched to MinasTaxi")
+                # Envia mensagem para cada passageiro
+                whatsapp_sent_count = 0
                 
-                # FASE 4: Notificação WhatsApp (se habilitada)
-                if self.whatsapp_enabled and self.whatsapp_notifier:
-                    # Lista de passageiros para notificar
-                    passengers_to_notify = []
-                    
-                    # Se houver múltiplos passageiros, usa APENAS a lista individualizada
-                    if order.passengers:
-                        for passenger in order.passengers:
-                            if passenger.get('phone'):
-                                passengers_to_notify.append({
-                                    'name': passenger.get('name', 'Cliente'),
-                                    'phone': passenger['phone']
-                                })
-                    # Senão, usa o passageiro principal (passageiro único)
-                    elif order.phone:
-                        passengers_to_notify.append({
-                            'name': order.passenger_name or "Cliente",
-                            'phone': order.phone
-                        })
-                    
-                    # Envia mensagem para cada passageiro
-                    whatsapp_sent_count = 0
-                    
-                    # Formata data/hora do agendamento
-                    pickup_time_formatted = None
-                    if order.pickup_time:
-                        try:
-                            # Converte para timezone de Brasília
-                            import pytz
-                            from datetime import datetime
-                            
-                            if isinstance(order.pickup_time, str):
-                                pickup_dt = datetime.fromisoformat(order.pickup_time.replace('Z', '+00:00'))
-                            else:
-                                pickup_dt = order.pickup_time
-                            
-                            # Garante timezone Brasil
-                            br_tz = pytz.timezone('America/Sao_Paulo')
-                            if pickup_dt.tzinfo is None:
-                                pickup_dt = br_tz.localize(pickup_dt)
-                            else:
-                                pickup_dt = pickup_dt.astimezone(br_tz)
-                            
-                            # Formata: "Segunda-feira, 06/01/2026 às 14:00"
-                            dias_semana = ['Segunda-feira', 'Terça-feira', 'Quarta-feira', 'Quinta-feira', 
-                                          'Sexta-feira', 'Sábado', 'Domingo']
-                            dia_semana = dias_semana[pickup_dt.weekday()]
-                            pickup_time_formatted = f"{dia_semana}, {pickup_dt.strftime('%d/%m/%Y às %H:%M')}"
-                        except Exception as e:
-                            logger.warning(f"Failed to format pickup_time: {e}")
-                    
-                    for passenger in passengers_to_notify:
-                        try:
-                            whatsapp_response = self.whatsapp_notifier.send_message(
-                                name=passenger['name'],
-                                phone=passenger['phone'],
-                                destination=order.dropoff_address or order.pickup_address or "destino",
-                                status="Sucesso",
-                                pickup_time=pickup_time_formatted
-                            )
-                            whatsapp_sent_count += 1
-                            
-                            # Armazena o message_id do primeiro envio
-                            if whatsapp_sent_count == 1:
-                                order.whatsapp_message_id = whatsapp_response.get('message_id')
-                            
-                        except Exception as whatsapp_error:
-                            logger.warning(f"Failed to send WhatsApp to {passenger['name']} ({passenger['phone']}): {whatsapp_error}")
-                    
-                    # Marca como enviado se pelo menos uma mensagem foi enviada
-                    if whatsapp_sent_count > 0:
-                        order.whatsapp_sent = True
-                        self.db.update_order(order)
-                        logger.info(f"✅ WhatsApp sent to {whatsapp_sent_count}/{len(passengers_to_notify)} passengers for order {order.id}")
-                    else:
-                        logger.warning(f"⚠️ No WhatsApp messages sent for order {order.id}")
+                # Formata data/hora do agendamento
+                pickup_time_formatted = None
+                if order.pickup_time:
+                    try:
+                        # Converte para timezone de Brasília
+                        import pytz
+                        from datetime import datetime
+                        
+                        if isinstance(order.pickup_time, str):
+                            pickup_dt = datetime.fromisoformat(order.pickup_time.replace('Z', '+00:00'))
+                        else:
+                            pickup_dt = order.pickup_time
+                        
+                        # Garante timezone Brasil
+                        br_tz = pytz.timezone('America/Sao_Paulo')
+                        if pickup_dt.tzinfo is None:
+                            pickup_dt = br_tz.localize(pickup_dt)
+                        else:
+                            pickup_dt = pickup_dt.astimezone(br_tz)
+                        
+                        # Formata: "Segunda-feira, 06/01/2026 às 14:00"
+                        dias_semana = ['Segunda-feira', 'Terça-feira', 'Quarta-feira', 'Quinta-feira', 
+                                      'Sexta-feira', 'Sábado', 'Domingo']
+                        dia_semana = dias_semana[pickup_dt.weekday()]
+                        pickup_time_formatted = f"{dia_semana}, {pickup_dt.strftime('%d/%m/%Y às %H:%M')}"
+                    except Exception as e:
+                        logger.warning(f"Failed to format pickup_time: {e}")
                 
-            except MinasTaxiAPIError as e:
-                order.status = OrderStatus.FAILED
-                order.error_message = f"MinasTaxi API error: {str(e)}"
-                self.db.update_order(order)
-                logger.error(f"Failed to dispatch order {order.id}: {e}")
+                for passenger in passengers_to_notify:
+                    try:
+                        whatsapp_response = self._notify(
+                            name=passenger['name'],
+                            phone=passenger['phone'],
+                            destination=order.dropoff_address or order.pickup_address or "destino",
+                            status="Sucesso",
+                            pickup_time=pickup_time_formatted
+                        )
+                        whatsapp_sent_count += 1
+                        
+                        # Armazena o message_id do primeiro envio
+                        if whatsapp_sent_count == 1:
+                            order.whatsapp_message_id = whatsapp_response.get('message_id')
+                        
+                    except Exception as whatsapp_error:
+                        logger.warning(f"Failed to send WhatsApp to {passenger['name']} ({passenger['phone']}): {whatsapp_error}")
                 
-                # Notifica erro via WhatsApp (se habilitado)
-                if self.whatsapp_enabled and self.whatsapp_notifier:
-                    # Lista de passageiros para notificar
-                    passengers_to_notify = []
-                    
-                    # Se houver múltiplos passageiros, usa APENAS a lista individualizada
-                    if order.passengers:
-                        for passenger in order.passengers:
-                            if passenger.get('phone'):
-                                passengers_to_notify.append({
-                                    'name': passenger.get('name', 'Cliente'),
-                                    'phone': passenger['phone']
-                                })
-                    # Senão, usa o passageiro principal (passageiro único)
-                    elif order.phone:
-                        passengers_to_notify.append({
-                            'name': order.passenger_name or "Cliente",
-                            'phone': order.phone
-                        })
-                    
-                    # Envia notificação de erro para cada passageiro
-                    for passenger in passengers_to_notify:
-                        try:
-                            self.whatsapp_notifier.send_message(
-                                name=passenger['name'],
-                                phone=passenger['phone'],
-                                destination=order.dropoff_address or order.pickup_address or "destino",
-                                status="Erro"
-                            )
-                        except Exception as whatsapp_error:
-                            logger.warning(f"Failed to send error WhatsApp to {passenger['name']}: {whatsapp_error}")
-                    
-                    if passengers_to_notify:
-                        logger.info(f"Error notifications sent via WhatsApp for order {order.id}")
+                # Marca como enviado se pelo menos uma mensagem foi enviada
+                if whatsapp_sent_count > 0:
+                    order.whatsapp_sent = True
+                    self._save_dispatch_result(order, members)
+                    logger.info(f"✅ WhatsApp sent to {whatsapp_sent_count}/{len(passengers_to_notify)} passengers for order {order_ref}")
+                else:
+                    logger.warning(f"⚠️ No WhatsApp messages sent for order {order_ref}")
             
-        except Exception as e:
+        except MinasTaxiAPIError as e:
             order.status = OrderStatus.FAILED
-            order.error_message = f"Processing error: {str(e)}"
+            order.error_message = f"MinasTaxi API error: {str(e)}"
+            self._save_dispatch_result(order, members)
+            logger.error(f"Failed to dispatch order {order_ref}: {e}")
             
-            if order.id:
-                self.db.update_order(order)
-            else:
-                order.id = self.db.create_order(order)
-            
-            logger.error(f"Error processing order: {e}")
-        
-        return order
+            # Notifica erro via WhatsApp (se habilitado)
+            if self.whatsapp_enabled and self.whatsapp_notifier:
+                # Lista de passageiros para notificar
+                passengers_to_notify = []
+                
+                # Se houver múltiplos passageiros, usa APENAS a lista individualizada
+                if order.passengers:
+                    for passenger in order.passengers:
+                        if passenger.get('phone'):
+                            passengers_to_notify.append({
+                                'name': passenger.get('name', 'Cliente'),
+                                'phone': passenger['phone']
+                            })
+                # Senão, usa o passageiro principal (passageiro único)
+                elif order.phone:
+                    passengers_to_notify.append({
+                        'name': order.passenger_name or "Cliente",
+                        'phone': order.phone
+                    })
+                
+                # Envia notificação de erro para cada passageiro
+                for passenger in passengers_to_notify:
+                    try:
+                        self._notify(
+                            name=passenger['name'],
+                            phone=passenger['phone'],
+                            destination=order.dropoff_address or order.pickup_address or "destino",
+                            status="Erro"
+                        )
+                    except Exception as whatsapp_error:
+                        logger.warning(f"Failed to send error WhatsApp to {passenger['name']}: {whatsapp_error}")
+                
+                if passengers_to_notify:
+                    logger.info(f"Error notifications sent via WhatsApp for order {order_ref}")
+    
+    def _save_dispatch_result(self, order: Order, members: Optional[List[Order]] = None):
+        """Persiste o resultado do dispatch no pedido ou em todos os membros do grupo."""
+        if members is None:
+            self.db.update_order(order)
+            return
+        for member in members:
+            member.status = order.status
+            member.minastaxi_order_id = order.minastaxi_order_id
+            member.error_message = order.error_message
+            member.whatsapp_sent = order.whatsapp_sent
+            member.whatsapp_message_id = order.whatsapp_message_id
+            self.db.update_order(member)
     
     def _process_round_trip(self, email: EmailMessage, base_order: Order, extracted_data: dict) -> Order:
         """
@@ -557,14 +1172,14 @@ class TaxiOrderProcessor:
         # Geocoding e otimização para IDA
         destination_coords = None
         if outbound_order.dropoff_address:
-            dropoff_coords = self.geocoder.geocode_address(outbound_order.dropoff_address)
+            dropoff_coords = self._geocode(outbound_order.dropoff_address)
             if dropoff_coords:
                 outbound_order.dropoff_lat, outbound_order.dropoff_lng = dropoff_coords
                 destination_coords = dropoff_coords
             else:
                 # FALLBACK: tentar sem restrições para otimização de rota
                 logger.warning(f"Failed to geocode outbound destination with bounds")
-                dropoff_coords = self.geocoder.geocode_address_fallback(outbound_order.dropoff_address)
+                dropoff_coords = self._geocode_fallback(outbound_order.dropoff_address)
                 if dropoff_coords:
                     outbound_order.dropoff_lat, outbound_order.dropoff_lng = dropoff_coords
                     destination_coords = dropoff_coords
@@ -573,37 +1188,47 @@ class TaxiOrderProcessor:
         # Geocoding múltiplos passageiros se houver
         if outbound_order.passengers:
             for passenger in outbound_order.passengers:
-                coords = self.geocoder.geocode_address(passenger.get('address', ''))
+                coords = self._geocode(passenger.get('address', ''))
                 if coords:
                     passenger['lat'] = coords[0]
                     passenger['lng'] = coords[1]
 
             # Otimizar rota para IDA
+            from .services.route_optimizer import RouteOptimizer
             optimized_passengers = RouteOptimizer.optimize_pickup_sequence(
                 outbound_order.passengers, destination_coords
             )
             outbound_order.passengers = optimized_passengers
+            if destination_coords:
+                arrival_time = None
+                if extracted_data.get('arrival_time'):
+                    try:
+                        from dateutil import parser
+                        arrival_time = parser.parse(extracted_data['arrival_time'])
+                    except:
+                        logger.warning("Failed to parse arrival_time")
+                self._plan_pickup_times(outbound_order, destination_coords, arrival_time)
 
             if outbound_order.passengers and 'lat' in outbound_order.passengers[0]:
                 outbound_order.pickup_lat = outbound_order.passengers[0]['lat']
                 outbound_order.pickup_lng = outbound_order.passengers[0]['lng']
                 pickup_coords = None  # Não será usada abaixo
             else:
-                pickup_coords = self.geocoder.geocode_address(outbound_order.pickup_address)
+                pickup_coords = self._geocode(outbound_order.pickup_address)
                 if not pickup_coords:
                     outbound_order.status = OrderStatus.MANUAL_REVIEW
                     outbound_order.error_message = "Failed to geocode pickup address (outbound)"
-                    outbound_order.id = self.db.create_order(outbound_order)
+                    self._save_order(outbound_order)
                     logger.warning(f"Outbound order {outbound_order.id} requires manual review")
                     return outbound_order
                 outbound_order.pickup_lat, outbound_order.pickup_lng = pickup_coords
         else:
             # Passageiro único
-            pickup_coords = self.geocoder.geocode_address(outbound_order.pickup_address)
+            pickup_coords = self._geocode(outbound_order.pickup_address)
             if not pickup_coords:
                 outbound_order.status = OrderStatus.MANUAL_REVIEW
                 outbound_order.error_message = "Failed to geocode pickup address (outbound)"
-                outbound_order.id = self.db.create_order(outbound_order)
+                self._save_order(outbound_order)
                 logger.warning(f"Outbound order {outbound_order.id} requires manual review")
                 return outbound_order
             outbound_order.pickup_lat, outbound_order.pickup_lng = pickup_coords
@@ -612,17 +1237,17 @@ class TaxiOrderProcessor:
         
         # Geocoding dropoff (destino - DELP, etc)
         if outbound_order.dropoff_address:
-            dropoff_coords = self.geocoder.geocode_address(outbound_order.dropoff_address)
+            dropoff_coords = self._geocode(outbound_order.dropoff_address)
             if dropoff_coords:
                 outbound_order.dropoff_lat, outbound_order.dropoff_lng = dropoff_coords
         
         outbound_order.status = OrderStatus.GEOCODED
-        outbound_order.id = self.db.create_order(outbound_order)
+        self._save_order(outbound_order)
         logger.info(f"Outbound order {outbound_order.id} created")
         
         # Dispatch IDA
         try:
-            response = self.minastaxi_client.dispatch_order(outbound_order)
+            response = self._send_to_minastaxi(outbound_order)
             outbound_order.status = OrderStatus.DISPATCHED
             outbound_order.minastaxi_order_id = response.get('order_id')
             self.db.update_order(outbound_order)
@@ -661,7 +1286,7 @@ class TaxiOrderProcessor:
         
         # Dispatch VOLTA
         try:
-            response = self.minastaxi_client.dispatch_order(return_order)
+            response = self._send_to_minastaxi(return_order)
             return_order.status = OrderStatus.DISPATCHED
             return_order.minastaxi_order_id = response.get('order_id')
             self.db.update_order(return_order)
@@ -675,7 +1300,7 @@ class TaxiOrderProcessor:
         # Notificação WhatsApp para ambas as viagens
         if self.whatsapp_enabled and self.whatsapp_notifier and base_order.phone:
             try:
-                self.whatsapp_notifier.send_message(
+                self._notify(
                     name=base_order.passenger_name or "Cliente",
                     phone=base_order.phone,
                     destination=f"IDA: {outbound_order.dropoff_address}, VOLTA: {return_order.dropoff_address}",
@@ -688,31 +1313,136 @@ class TaxiOrderProcessor:
         logger.info(f"Round trip processed: Outbound={outbound_order.id}, Return={return_order.id}")
         return outbound_order
     
-    def reprocess_failed_orders(self):
+    def dispatch_pooled_orders(self, stats: Optional[dict] = None) -> int:
         """
-        Tenta reprocessar pedidos que falharam.
+        Agrupa os pedidos retidos pelo ride pooling e envia uma corrida por grupo.
+        
+        Só entram pedidos que este estágio reteve (hold_for_pooling); os
+        retidos cuja coleta já passou vão para revisão manual em vez de serem
+        enviados. Grupos com mais de um pedido recebem `cluster_id`; com
+        RIDE_POOLING_MERGE são enviados como um único rideCreate
+        multi-passageiro. Com RIDE_POOLING_DISPATCH_LEAD_MINUTES > 0, grupos
+        cuja coleta ainda está distante ficam retidos para o próximo ciclo.
+        
+        Args:
+            stats: Dicionário de estatísticas do ciclo a atualizar.
+            
+        Returns:
+            Número de corridas enviadas.
         """
-        logger.info("Reprocessing failed orders...")
+        pending = []
+        for order in self.db.get_pooling_orders():
+            if order.pickup_time and order.pickup_time < datetime.now(order.pickup_time.tzinfo):
+                order.status = OrderStatus.MANUAL_REVIEW
+                order.error_message = "Coleta passou antes do envio pelo ride pooling"
+                self.db.update_order(order)
+                logger.warning(f"Order {order.id} held for pooling past its pickup time, moved to manual review")
+                if stats is not None:
+                    stats['orders_failed'] += 1
+                continue
+            pending.append(order)
+        self.queue_depth.set(len(pending), queue='pooling')
+        if not pending:
+            return 0
+        for order in pending:
+            self._restore_extracted_fields(order)
         
-        failed_orders = self.db.get_orders_by_status(OrderStatus.FAILED)
+        # Grupos com coleta mais próxima primeiro
+        groups = sorted(self.pooling_engine.cluster(pending), key=lambda group: min(
+            (o.pickup_time.timestamp() for o in group if o.pickup_time), default=float('inf')
+        ))
         
-        for order in failed_orders:
-            logger.info(f"Retrying order {order.id}...")
+        rides = 0
+        for group in groups:
+            if len(group) > 1:
+                for member in group:
+                    self.db.update_order(member)
+            
+            pickup_time = min((o.pickup_time for o in group if o.pickup_time), default=None)
+            if self.pooling_lead_minutes > 0 and pickup_time:
+                now = datetime.now(pickup_time.tzinfo)
+                if pickup_time - now > timedelta(minutes=self.pooling_lead_minutes):
+                    continue
             
             try:
-                # Tenta dispatch novamente se já tem coordenadas
-                if order.pickup_lat and order.pickup_lng:
-                    response = self.minastaxi_client.dispatch_order(order)
-                    
-                    order.status = OrderStatus.DISPATCHED
-                    order.minastaxi_order_id = response.get('order_id')
-                    order.error_message = None
-                    self.db.update_order(order)
-                    
-                    logger.info(f"Order {order.id} successfully retried")
-                    
+                with tracing.start_trace(
+                    'pool_dispatch', email_uids=[o.email_id for o in group], orders=len(group)
+                ):
+                    if len(group) > 1 and self.pooling_merge:
+                        from .services.ride_pooling import RidePoolingEngine
+                        ride = RidePoolingEngine.merge_orders(group)
+                        if ride.dropoff_lat is not None:
+                            self._plan_pickup_times(ride, (ride.dropoff_lat, ride.dropoff_lng))
+                        logger.info(f"Dispatching cluster {ride.cluster_id} ({len(group)} orders, {len(ride.passengers)} passengers)")
+                        self._dispatch_order(ride, members=group)
+                        dispatched = [ride]
+                    else:
+                        for order in group:
+                            self.db.load_raw_email_body(order)
+                            self._dispatch_order(order)
+                        dispatched = group
             except Exception as e:
-                logger.error(f"Retry failed for order {order.id}: {e}")
+                logger.error(f"Error dispatching pooled group {[o.id for o in group]}: {e}")
+                for order in group:
+                    order.status = OrderStatus.FAILED
+                    order.error_message = f"Processing error: {str(e)}"
+                    self.db.update_order(order)
+                self.order_outcomes.inc(len(group), outcome='error')
+                if stats is not None:
+                    stats['orders_failed'] += len(group)
+                continue
+            
+            rides += len(dispatched)
+            for order in group:
+                self.order_outcomes.inc(outcome=order.status.value)
+            if stats is not None:
+                for order in group:
+                    if order.status == OrderStatus.DISPATCHED:
+                        stats['orders_dispatched'] += 1
+                    elif order.status == OrderStatus.FAILED:
+                        stats['orders_failed'] += 1
+        
+        logger.info(f"Ride pooling dispatched {rides} rides")
+        return rides
+    
+    def _restore_extracted_fields(self, order: Order):
+        """
+        Repõe num pedido lido do banco os campos que só existem na extração
+        guardada (RE do passageiro, retorno), como na retomada de adiados.
+        
+        Args:
+            order: Pedido carregado por get_orders_by_status.
+        """
+        extracted_data = self.db.get_extracted_data(order.id)
+        if not extracted_data:
+            return
+        order.passenger_re = extracted_data.get('passenger_re')
+        order.has_return = extracted_data.get('has_return', False)
+        if extracted_data.get('return_time'):
+            try:
+                from dateutil import parser
+                order.return_time = parser.parse(extracted_data['return_time'])
+            except (TypeError, ValueError, OverflowError):
+                logger.warning(f"Failed to parse stored return_time for order {order.id}")
+    
+    def reprocess_failed_orders(self) -> dict:
+        """
+        Tenta reprocessar pedidos que falharam.
+        
+        Roda (ou retoma) um job de reprocessamento: envios em paralelo até
+        REPROCESS_CONCURRENCY, pulando falhas não recuperáveis.
+        
+        Returns:
+            Contagem de pedidos por estado (pending, succeeded, failed, skipped).
+        """
+        logger.info("Reprocessing failed orders...")
+        
+        engine = ReprocessingEngine.from_env(self.db, self._send_to_minastaxi)
+        job_id = engine.create_job()
+        if job_id is None:
+            return {'pending': 0, 'succeeded': 0, 'failed': 0, 'skipped': 0}
+        
+        return engine.run(job_id)['counts']
     
     def get_statistics(self) -> dict:
         """
@@ -1,18 +1,33 @@
 """
 Services package initialization.
+
+Os serviços são importados sob demanda (PEP 562): `from src.services import X`
+carrega apenas o módulo de X, e `import src.services.database` não arrasta
+OpenAI, geopy e requests junto.
 """
-from .email_reader import EmailReader, EmailMessage
-from .llm_extractor import LLMExtractor
-from .geocoding_service import GeocodingService
-from .minastaxi_client import MinasTaxiClient, MinasTaxiAPIError
-from .database import DatabaseManager
+import importlib
+
+_EXPORTS = {
+    'EmailReader': 'email_reader',
+    'EmailMessage': 'email_reader',
+    'LLMExtractor': 'llm_extractor',
+    'GeocodingService': 'geocoding_service',
+    'MinasTaxiClient': 'minastaxi_client',
+    'MinasTaxiAPIError': 'minastaxi_client',
+    'DatabaseManager': 'database',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
 
-__all__ = [
-    'EmailReader',
-    'EmailMessage',
-    'LLMExtractor',
-    'GeocodingService',
-    'MinasTaxiClient',
-    'MinasTaxiAPIError',
-    'DatabaseManager'
-]
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -1,16 +1,34 @@
 """
 Database manager for SQLite operations.
 """
+import gzip
+import hashlib
+import json
 import sqlite3
 import logging
+import time
+import zlib
 from typing import List, Optional
-from datetime import datetime
+from datetime import datetime, timedelta
 from pathlib import Path
 
 from ..models import Order, OrderStatus
 
 logger = logging.getLogger(__name__)
 
+# Granularidades dos rollups: nome -> tamanho do prefixo ISO de created_at
+ROLLUP_GRAINS = {
+    'hour': 13,  # 2026-01-04T14
+    'day': 10    # 2026-01-04
+}
+
+# Dimensões dos rollups: nome -> expressão SQL (use {row} para NEW/OLD)
+ROLLUP_DIMENSIONS = {
+    'all': "''",
+    'company_code': "COALESCE({row}.company_code, '')",
+    'cost_center': "COALESCE({row}.cost_center, '')"
+}
+
 
 class DatabaseManager:
     """Gerencia todas as operações de banco de dados SQLite."""
@@ -30,6 +48,7 @@ class DatabaseManager:
     def _init_database(self):
         """Cria as tabelas necessárias se não existirem."""
         with sqlite3.connect(self.db_path) as conn:
+            self._configure_storage(conn)
             cursor = conn.cursor()
             
             # Verifica se a tabela já existe
@@ -63,7 +82,11 @@ class DatabaseManager:
                         notes TEXT,
                         cost_center TEXT,
                         company_code TEXT,
-                        payment_type TEXT
+                        payment_type TEXT,
+                        passengers TEXT,
+                        raw_email_hash TEXT,
+                        extracted_data TEXT,
+                        pooling_held_at TEXT
                     )
                 """)
                 logger.info(f"Created new orders table at {self.db_path}")
@@ -82,6 +105,11 @@ class DatabaseManager:
                     CREATE INDEX IF NOT EXISTS idx_created_at 
                     ON orders(created_at DESC)
                 """)
+                # Usado pelo token de mudança do dashboard (MAX(updated_at) via índice)
+                cursor.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_updated_at 
+                    ON orders(updated_at)
+                """)
             except sqlite3.OperationalError as e:
                 logger.warning(f"Could not create index (column may not exist yet): {e}")
             
@@ -90,6 +118,78 @@ class DatabaseManager:
             
             # Executa migrações automáticas
             self._run_migrations()
+            
+            # Corpos de e-mail comprimidos fora da tabela quente
+            self._init_email_blobs()
+            
+            # Contadores e rollups mantidos por triggers
+            self._init_aggregates()
+            
+            # Jobs de reprocessamento em lote (progresso retomável)
+            self._init_reprocess_jobs()
+            
+            # Fila de trabalho durável do pipeline (claim atômico com lease)
+            self._init_job_queue()
+            
+            # Leases nomeados (eleição do processo que lê o IMAP)
+            self._init_leases()
+    
+    def _configure_storage(self, conn: sqlite3.Connection):
+        """
+        Configura o arquivo SQLite para manutenção sem bloqueios longos.
+        
+        - auto_vacuum=INCREMENTAL: páginas liberadas por exclusões podem ser
+          devolvidas aos poucos com PRAGMA incremental_vacuum, em vez de um
+          VACUUM completo que reescreve o arquivo inteiro. Só vale de graça
+          para bancos novos; um banco existente precisa de um VACUUM, feito
+          pela migração migrate_incremental_vacuum.py e nunca aqui (todo
+          processo cria um DatabaseManager ao iniciar).
+        - journal_mode=WAL: leitores (dashboard) não bloqueiam o processador.
+        
+        Args:
+            conn: Conexão SQLite sem transação aberta.
+        """
+        cursor = conn.cursor()
+        try:
+            cursor.execute("PRAGMA auto_vacuum")
+            if cursor.fetchone()[0] != 2:
+                cursor.execute("SELECT COUNT(*) FROM sqlite_master")
+                if cursor.fetchone()[0] == 0:
+                    cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
+                else:
+                    logger.info(
+                        "Database is not in auto_vacuum=INCREMENTAL mode; cleanup cannot return free pages "
+                        "until `python migrate_incremental_vacuum.py` is run"
+                    )
+            cursor.execute("PRAGMA journal_mode = WAL")
+        except sqlite3.OperationalError as e:
+            logger.warning(f"Could not configure database storage pragmas: {e}")
+    
+    def convert_to_incremental_vacuum(self, busy_timeout: float = 60) -> bool:
+        """
+        Converte um banco existente para auto_vacuum=INCREMENTAL (VACUUM completo).
+        
+        Reescreve o arquivo inteiro e precisa de acesso exclusivo: rode com o
+        processador e o dashboard parados (ver migrate_incremental_vacuum.py).
+        
+        Args:
+            busy_timeout: Segundos esperando outros processos liberarem o banco.
+        
+        Returns:
+            True se converteu, False se o banco já estava no modo incremental.
+        """
+        with sqlite3.connect(self.db_path, timeout=busy_timeout) as conn:
+            cursor = conn.cursor()
+            cursor.execute("PRAGMA auto_vacuum")
+            if cursor.fetchone()[0] == 2:
+                return False
+            logger.info("Converting database to auto_vacuum=INCREMENTAL (full VACUUM)...")
+            cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            cursor.execute("VACUUM")
+            cursor.execute("PRAGMA auto_vacuum")
+            converted = cursor.fetchone()[0] == 2
+        logger.info(f"auto_vacuum conversion {'completed' if converted else 'did not take effect'}")
+        return converted
     
     def _run_migrations(self):
         """
@@ -110,7 +210,11 @@ class DatabaseManager:
                     'cost_center': 'TEXT',
                     'company_code': 'TEXT',
                     'company_cnpj': 'TEXT',
-                    'payment_type': 'TEXT'
+                    'payment_type': 'TEXT',
+                    'passengers': 'TEXT',  # JSON com paradas (nome, endereço, lat/lng)
+                    'raw_email_hash': 'TEXT',  # Chave do corpo do e-mail em email_blobs
+                    'extracted_data': 'TEXT',  # JSON da extração (pedidos adiados pelo scheduler)
+                    'pooling_held_at': 'TEXT'  # Retido pelo estágio de ride pooling (ISO)
                 }
                 
                 # Adiciona colunas que faltam
@@ -137,6 +241,303 @@ class DatabaseManager:
             # Não falha a inicialização se migração falhar
             # (tabela pode já ter as colunas ou ser primeira execução)
     
+    def _init_email_blobs(self):
+        """
+        Cria a tabela email_blobs (corpos de e-mail comprimidos com zlib,
+        endereçados pelo SHA-256 do conteúdo).
+        
+        Mantém as linhas de orders pequenas: consultas de pedidos não
+        carregam o HTML do e-mail, que só é lido sob demanda. Corpos antigos
+        ainda gravados em orders.raw_email_body continuam legíveis e são
+        movidos por migrate_email_blobs.py (move_inline_email_bodies).
+        """
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS email_blobs (
+                    hash TEXT PRIMARY KEY,
+                    codec TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    data BLOB NOT NULL
+                )
+            """)
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_raw_email_hash
+                ON orders(raw_email_hash)
+            """)
+            conn.commit()
+    
+    def move_inline_email_bodies(self, batch_size: int = 500) -> int:
+        """
+        Move para email_blobs os corpos gravados inline em orders.raw_email_body
+        (pedidos anteriores à tabela email_blobs).
+        
+        Percorre a tabela orders inteira, por isso não roda na inicialização:
+        use migrate_email_blobs.py uma vez após a atualização.
+        
+        Args:
+            batch_size: Pedidos migrados por transação.
+        
+        Returns:
+            Número de corpos movidos.
+        """
+        moved = 0
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            while True:
+                cursor.execute(
+                    "SELECT id, raw_email_body FROM orders WHERE raw_email_body IS NOT NULL LIMIT ?",
+                    (batch_size,)
+                )
+                rows = cursor.fetchall()
+                if not rows:
+                    break
+                for order_id, body in rows:
+                    body_hash = self._store_email_blob(cursor, body)
+                    cursor.execute(
+                        "UPDATE orders SET raw_email_hash = ?, raw_email_body = NULL WHERE id = ?",
+                        (body_hash, order_id)
+                    )
+                conn.commit()
+                moved += len(rows)
+        
+        if moved:
+            logger.info(f"✅ Moved {moved} raw email bodies to compressed email_blobs table")
+        return moved
+    
+    @staticmethod
+    def _store_email_blob(cursor, body: Optional[str]) -> Optional[str]:
+        """
+        Grava o corpo do e-mail comprimido (deduplicado pelo hash).
+        
+        Args:
+            cursor: Cursor SQLite ativo (o chamador faz o commit).
+            body: Corpo do e-mail.
+            
+        Returns:
+            SHA-256 do conteúdo ou None se não houver corpo.
+        """
+        if body is None:
+            return None
+        raw = body.encode('utf-8')
+        body_hash = hashlib.sha256(raw).hexdigest()
+        cursor.execute(
+            "INSERT OR IGNORE INTO email_blobs (hash, codec, size, data) VALUES (?, ?, ?, ?)",
+            (body_hash, 'zlib', len(raw), zlib.compress(raw, 6))
+        )
+        return body_hash
+    
+    @staticmethod
+    def _decode_email_blob(codec: str, data: bytes) -> str:
+        """Descomprime um corpo de e-mail de email_blobs."""
+        if codec == 'zlib':
+            return zlib.decompress(data).decode('utf-8')
+        raise ValueError(f"Unsupported email blob codec: {codec}")
+    
+    def get_raw_email_body(self, order_id: int) -> Optional[str]:
+        """
+        Carrega o corpo original do e-mail de um pedido.
+        
+        Args:
+            order_id: ID do pedido.
+            
+        Returns:
+            Corpo do e-mail ou None se não disponível.
+        """
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT o.raw_email_body, b.codec, b.data
+                FROM orders o
+                LEFT JOIN email_blobs b ON b.hash = o.raw_email_hash
+                WHERE o.id = ?
+            """, (order_id,))
+            row = cursor.fetchone()
+        
+        if not row:
+            return None
+        inline_body, codec, data = row
+        if inline_body is not None:
+            return inline_body
+        if data is None:
+            return None
+        return self._decode_email_blob(codec, data)
+    
+    def load_raw_email_body(self, order: Order) -> Optional[str]:
+        """
+        Preenche order.raw_email_body sob demanda (reprocessamento, inspeção).
+        
+        Args:
+            order: Pedido carregado do banco (deve ter ID).
+            
+        Returns:
+            Corpo do e-mail ou None se não disponível.
+        """
+        if order.raw_email_body is None and order.id:
+            order.raw_email_body = self.get_raw_email_body(order.id)
+        return order.raw_email_body
+    
+    def save_extracted_data(self, order_id: int, extracted_data: dict):
+        """
+        Guarda a saída da extração de um pedido adiado (retomado sem nova chamada ao LLM).
+        
+        Args:
+            order_id: ID do pedido.
+            extracted_data: Dicionário retornado pelo extrator.
+        """
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute(
+                "UPDATE orders SET extracted_data = ? WHERE id = ?",
+                (json.dumps(extracted_data, ensure_ascii=False, default=str), order_id)
+            )
+            conn.commit()
+    
+    def get_extracted_data(self, order_id: int) -> Optional[dict]:
+        """
+        Carrega a extração guardada por save_extracted_data.
+        
+        Args:
+            order_id: ID do pedido.
+        
+        Returns:
+            Dicionário da extração ou None se não houver.
+        """
+        with sqlite3.connect(self.db_path) as conn:
+            row = conn.execute("SELECT extracted_data FROM orders WHERE id = ?", (order_id,)).fetchone()
+        if not row or not row[0]:
+            return None
+        try:
+            return json.loads(row[0])
+        except json.JSONDecodeError:
+            logger.warning(f"Invalid extracted_data for order {order_id}")
+            return None
+    
+    def _init_aggregates(self):
+        """
+        Cria as tabelas de contadores (por status) e rollups (por hora/dia,
+        empresa e centro de custo), mantidas por triggers na tabela orders.
+        
+        Os triggers rodam na mesma transação do INSERT/UPDATE/DELETE, então
+        os contadores nunca divergem dos pedidos e get_statistics() vira uma
+        leitura de poucas linhas em vez de GROUP BY na tabela inteira.
+        """
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute(
+                "SELECT name FROM sqlite_master WHERE type='table' AND name='order_status_counts'"
+            )
+            needs_backfill = cursor.fetchone() is None
+            
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS order_status_counts (
+                    status TEXT PRIMARY KEY,
+                    count INTEGER NOT NULL DEFAULT 0
+                ) WITHOUT ROWID
+            """)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS order_rollups (
+                    grain TEXT NOT NULL,
+                    bucket TEXT NOT NULL,
+                    dimension TEXT NOT NULL,
+                    dim_value TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    count INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (grain, bucket, dimension, dim_value, status)
+                ) WITHOUT ROWID
+            """)
+            
+            insert_body = self._aggregate_statements('NEW', 1)
+            delete_body = self._aggregate_statements('OLD', -1)
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_orders_aggregates_insert
+                AFTER INSERT ON orders
+                BEGIN
+                    {insert_body}
+                END
+            """)
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_orders_aggregates_delete
+                AFTER DELETE ON orders
+                BEGIN
+                    {delete_body}
+                END
+            """)
+            # update_order() sempre reescreve essas colunas; o WHEN evita trabalho
+            # quando nenhuma delas mudou de fato
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_orders_aggregates_update
+                AFTER UPDATE OF status, created_at, company_code, cost_center ON orders
+                WHEN OLD.status IS NOT NEW.status
+                    OR OLD.created_at IS NOT NEW.created_at
+                    OR OLD.company_code IS NOT NEW.company_code
+                    OR OLD.cost_center IS NOT NEW.cost_center
+                BEGIN
+                    {delete_body}
+                    {insert_body}
+                END
+            """)
+            
+            if needs_backfill:
+                self._rebuild_aggregates(cursor)
+            
+            conn.commit()
+    
+    @staticmethod
+    def _aggregate_statements(row: str, delta: int) -> str:
+        """
+        Gera os UPSERTs que aplicam `delta` aos contadores e rollups da linha.
+        
+        Args:
+            row: Alias da linha no trigger ('NEW' ou 'OLD').
+            delta: +1 (entrada da linha) ou -1 (saída da linha).
+        """
+        statements = [
+            f"INSERT INTO order_status_counts (status, count) VALUES ({row}.status, {delta}) "
+            f"ON CONFLICT(status) DO UPDATE SET count = count + ({delta});"
+        ]
+        for grain, prefix_len in ROLLUP_GRAINS.items():
+            for dimension, expression in ROLLUP_DIMENSIONS.items():
+                statements.append(
+                    "INSERT INTO order_rollups (grain, bucket, dimension, dim_value, status, count) "
+                    f"VALUES ('{grain}', substr({row}.created_at, 1, {prefix_len}), '{dimension}', "
+                    f"{expression.format(row=row)}, {row}.status, {delta}) "
+                    "ON CONFLICT(grain, bucket, dimension, dim_value, status) "
+                    f"DO UPDATE SET count = count + ({delta});"
+                )
+        return "\n".join(statements)
+    
+    def _rebuild_aggregates(self, cursor):
+        """
+        Recalcula contadores e rollups a partir da tabela orders.
+        
+        Args:
+            cursor: Cursor SQLite ativo (o chamador faz o commit).
+        """
+        cursor.execute("DELETE FROM order_status_counts")
+        cursor.execute("DELETE FROM order_rollups")
+        cursor.execute("""
+            INSERT INTO order_status_counts (status, count)
+            SELECT status, COUNT(*) FROM orders GROUP BY status
+        """)
+        for grain, prefix_len in ROLLUP_GRAINS.items():
+            for dimension, expression in ROLLUP_DIMENSIONS.items():
+                dim_value = expression.format(row='orders')
+                cursor.execute(f"""
+                    INSERT INTO order_rollups (grain, bucket, dimension, dim_value, status, count)
+                    SELECT '{grain}', substr(created_at, 1, {prefix_len}), '{dimension}',
+                           {dim_value}, status, COUNT(*)
+                    FROM orders
+                    GROUP BY 2, 4, 5
+                """)
+        logger.info("Order counters and rollups rebuilt from orders table")
+    
+    def rebuild_aggregates(self):
+        """Recalcula contadores e rollups (útil após manutenção manual no banco)."""
+        with sqlite3.connect(self.db_path) as conn:
+            self._rebuild_aggregates(conn.cursor())
+            conn.commit()
+    
     def _populate_company_cnpj(self, cursor):
         """
         Popula o campo company_cnpj baseado no company_code existente.
@@ -187,14 +588,17 @@ class DatabaseManager:
         """
         with sqlite3.connect(self.db_path) as conn:
             cursor = conn.cursor()
+            # Corpo do e-mail vai comprimido para email_blobs (mesma transação)
+            raw_email_hash = self._store_email_blob(cursor, order.raw_email_body)
             cursor.execute("""
                 INSERT INTO orders (
                     email_id, passenger_name, phone, pickup_address, 
                     dropoff_address, pickup_lat, pickup_lng, dropoff_lat, 
                     dropoff_lng, pickup_time, status, created_at, updated_at,
                     raw_email_body, error_message, minastaxi_order_id, cluster_id,
-                    whatsapp_sent, whatsapp_message_id, notes, cost_center, company_code, company_cnpj, payment_type
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    whatsapp_sent, whatsapp_message_id, notes, cost_center, company_code, company_cnpj, payment_type,
+                    passengers, raw_email_hash
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             """, (
                 order.email_id,
                 order.passenger_name,
@@ -209,7 +613,7 @@ class DatabaseManager:
                 order.status.value,
                 order.created_at.isoformat(),
                 order.updated_at.isoformat(),
-                order.raw_email_body,
+                None,  # raw_email_body fica em email_blobs
                 order.error_message,
                 order.minastaxi_order_id,
                 order.cluster_id,
@@ -219,13 +623,36 @@ class DatabaseManager:
                 order.cost_center,
                 order.company_code,
                 order.company_cnpj,
-                order.payment_type
+                order.payment_type,
+                self._passengers_to_json(order.passengers),
+                raw_email_hash
             ))
             conn.commit()
             order_id = cursor.lastrowid
             logger.info(f"Order created with ID: {order_id}")
             return order_id
     
+    def claim_email_order(self, order: Order) -> Optional[int]:
+        """
+        Cria o pedido de um e-mail se nenhum outro processo já o criou.
+        
+        Transforma o conflito do UNIQUE em email_id em uma reserva idempotente:
+        quem insere primeiro fica com o e-mail, os demais recebem None.
+        
+        Args:
+            order: Pedido com email_id.
+        
+        Returns:
+            ID do pedido criado, ou None se o e-mail já tinha pedido.
+        """
+        try:
+            return self.create_order(order)
+        except sqlite3.IntegrityError as e:
+            if 'email_id' not in str(e):
+                raise
+            logger.info(f"Email {order.email_id} already claimed by another order")
+            return None
+    
     def update_order(self, order: Order):
         """
         Atualiza um pedido existente.
@@ -260,7 +687,8 @@ class DatabaseManager:
                     cost_center = ?,
                     company_code = ?,
                     company_cnpj = ?,
-                    payment_type = ?
+                    payment_type = ?,
+                    passengers = ?
                 WHERE id = ?
             """, (
                 order.passenger_name,
@@ -282,6 +710,7 @@ class DatabaseManager:
                 order.company_code,
                 order.company_cnpj,
                 order.payment_type,
+                self._passengers_to_json(order.passengers),
                 order.id
             ))
             conn.commit()
@@ -390,6 +819,39 @@ class DatabaseManager:
             rows = cursor.fetchall()
             return [self._row_to_order(row) for row in rows]
     
+    def hold_for_pooling(self, order_id: int):
+        """
+        Marca um pedido GEOCODED como retido pelo estágio de ride pooling.
+        
+        Args:
+            order_id: ID do pedido.
+        """
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute(
+                "UPDATE orders SET pooling_held_at = ? WHERE id = ?",
+                (datetime.now().isoformat(), order_id)
+            )
+            conn.commit()
+    
+    def get_pooling_orders(self) -> List[Order]:
+        """
+        Busca os pedidos retidos pelo ride pooling que ainda não foram enviados.
+        
+        Pedidos GEOCODED sem a marca (versões anteriores, dispatch interrompido)
+        ficam de fora.
+        
+        Returns:
+            Lista de objetos Order.
+        """
+        with sqlite3.connect(self.db_path) as conn:
+            conn.row_factory = sqlite3.Row
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT * FROM orders WHERE status = ? AND pooling_held_at IS NOT NULL ORDER BY created_at DESC",
+                (OrderStatus.GEOCODED.value,)
+            )
+            return [self._row_to_order(row) for row in cursor.fetchall()]
+    
     def get_all_orders(self, limit: int = 100) -> List[Order]:
         """
         Busca todos os pedidos, ordenados por data de criação.
@@ -414,16 +876,15 @@ class DatabaseManager:
         """
         Retorna estatísticas sobre os pedidos.
         
+        Lê a tabela de contadores mantida por triggers (uma linha por status),
+        sem varrer a tabela orders.
+        
         Returns:
             Dicionário com contagens por status.
         """
         with sqlite3.connect(self.db_path) as conn:
             cursor = conn.cursor()
-            cursor.execute("""
-                SELECT status, COUNT(*) as count 
-                FROM orders 
-                GROUP BY status
-            """)
+            cursor.execute("SELECT status, count FROM order_status_counts")
             rows = cursor.fetchall()
             
             stats = {status.value: 0 for status in OrderStatus}
@@ -435,6 +896,65 @@ class DatabaseManager:
             
             return stats
     
+    def get_rollups(
+        self,
+        grain: str = 'day',
+        dimension: str = 'all',
+        since: Optional[str] = None
+    ) -> List[dict]:
+        """
+        Retorna contagens agregadas por período, dimensão e status.
+        
+        Args:
+            grain: Granularidade ('hour' ou 'day').
+            dimension: 'all', 'company_code' ou 'cost_center'.
+            since: Prefixo ISO mínimo do bucket (ex: '2026-01-01').
+            
+        Returns:
+            Lista de dicts {bucket, dim_value, status, count} com count > 0.
+        """
+        if grain not in ROLLUP_GRAINS:
+            raise ValueError(f"Invalid rollup grain: {grain}")
+        if dimension not in ROLLUP_DIMENSIONS:
+            raise ValueError(f"Invalid rollup dimension: {dimension}")
+        
+        query = """
+            SELECT bucket, dim_value, status, count FROM order_rollups
+            WHERE grain = ? AND dimension = ? AND count > 0
+        """
+        params = [grain, dimension]
+        if since:
+            query += " AND bucket >= ?"
+            params.append(since[:ROLLUP_GRAINS[grain]])
+        query += " ORDER BY bucket"
+        
+        with sqlite3.connect(self.db_path) as conn:
+            conn.row_factory = sqlite3.Row
+            cursor = conn.cursor()
+            cursor.execute(query, params)
+            return [dict(row) for row in cursor.fetchall()]
+    
+    def get_change_token(self) -> tuple:
+        """
+        Retorna um token barato que muda sempre que a tabela orders muda.
+        
+        Usado pelo dashboard para invalidar caches (``st.cache_data``) sem
+        recarregar os pedidos: inserções alteram MAX(id) e COUNT(*),
+        atualizações alteram MAX(updated_at) e exclusões alteram o total.
+        O total vem da tabela de contadores, então nenhuma parte varre orders.
+        
+        Returns:
+            Tupla (total, max_id, max_updated_at).
+        """
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT (SELECT COALESCE(SUM(count), 0) FROM order_status_counts),
+                       (SELECT MAX(id) FROM orders),
+                       (SELECT MAX(updated_at) FROM orders)
+            """)
+            return tuple(cursor.fetchone())
+    
     def delete_order(self, order_id: int) -> bool:
         """
         Deleta um pedido do banco de dados.
@@ -451,13 +971,30 @@ class DatabaseManager:
             conn.commit()
             return cursor.rowcount > 0
     
-    def cleanup_old_orders(self, days_to_keep: int = 30) -> int:
+    def cleanup_old_orders(
+        self,
+        days_to_keep: int = 30,
+        batch_size: int = 500,
+        pause_seconds: float = 0.05,
+        archive_dir: Optional[str] = None,
+        vacuum_pages: int = 1000
+    ) -> int:
         """
         Remove pedidos com mais de X dias do banco de dados para otimizar espaço.
         Mantém apenas pedidos criados nos últimos {days_to_keep} dias.
         
+        A exclusão é feita em lotes pequenos, cada um em sua própria transação,
+        com uma pausa entre lotes para que o dashboard e o processador consigam
+        o lock de escrita. O espaço é devolvido com PRAGMA incremental_vacuum
+        (limitado a `vacuum_pages` páginas) em vez de um VACUUM completo.
+        
         Args:
             days_to_keep: Número de dias de histórico a manter (padrão: 30).
+            batch_size: Pedidos removidos por transação.
+            pause_seconds: Pausa entre lotes.
+            archive_dir: Se informado, grava os pedidos removidos em arquivos
+                mensais comprimidos (orders-AAAA-MM.jsonl.gz) antes de excluir.
+            vacuum_pages: Máximo de páginas livres devolvidas ao sistema.
             
         Returns:
             Número de pedidos deletados.
@@ -467,32 +1004,614 @@ class DatabaseManager:
         cutoff_date = datetime.now() - timedelta(days=days_to_keep)
         cutoff_str = cutoff_date.isoformat()
         
+        if archive_dir:
+            Path(archive_dir).mkdir(parents=True, exist_ok=True)
+        
+        deleted = 0
+        while True:
+            with sqlite3.connect(self.db_path) as conn:
+                conn.row_factory = sqlite3.Row
+                cursor = conn.cursor()
+                cursor.execute(
+                    'SELECT * FROM orders WHERE created_at < ? ORDER BY id LIMIT ?',
+                    (cutoff_str, batch_size)
+                )
+                rows = cursor.fetchall()
+                if not rows:
+                    break
+                
+                # Arquiva antes de excluir: se a escrita falhar, nada é removido
+                if archive_dir:
+                    self._archive_rows(cursor, rows, archive_dir)
+                
+                ids = [row['id'] for row in rows]
+                cursor.execute(
+                    f"DELETE FROM orders WHERE id IN ({', '.join('?' for _ in ids)})",
+                    ids
+                )
+                conn.commit()
+                deleted += len(ids)
+            
+            if len(rows) < batch_size:
+                break
+            time.sleep(pause_seconds)
+        
+        if deleted > 0:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+                # Remove buckets de rollup zerados pela exclusão
+                cursor.execute('DELETE FROM order_rollups WHERE count = 0')
+                # Remove corpos de e-mail que nenhum pedido referencia mais
+                cursor.execute("""
+                    DELETE FROM email_blobs WHERE NOT EXISTS (
+                        SELECT 1 FROM orders WHERE orders.raw_email_hash = email_blobs.hash
+                    )
+                """)
+                conn.commit()
+                
+                # Devolve páginas livres aos poucos (sem reescrever o arquivo)
+                cursor.execute(f'PRAGMA incremental_vacuum({int(vacuum_pages)})')
+                cursor.fetchall()
+            
+            logger.info(f"Database cleanup: removed {deleted} orders older than {days_to_keep} days")
+        else:
+            logger.info(f"Database cleanup: no orders older than {days_to_keep} days found")
+        
+        return deleted
+    
+    def _archive_rows(self, cursor, rows: List[sqlite3.Row], archive_dir: str):
+        """
+        Acrescenta pedidos a arquivos mensais JSONL comprimidos com gzip.
+        O corpo do e-mail é incluído, pois o blob é removido junto com o pedido.
+        
+        Args:
+            cursor: Cursor SQLite ativo.
+            rows: Linhas da tabela orders.
+            archive_dir: Diretório dos arquivos de arquivo morto.
+        """
+        by_month = {}
+        for row in rows:
+            record = dict(row)
+            if record.get('raw_email_body') is None and record.get('raw_email_hash'):
+                cursor.execute(
+                    "SELECT codec, data FROM email_blobs WHERE hash = ?",
+                    (record['raw_email_hash'],)
+                )
+                blob = cursor.fetchone()
+                if blob:
+                    record['raw_email_body'] = self._decode_email_blob(blob[0], blob[1])
+            by_month.setdefault(record['created_at'][:7], []).append(record)
+        
+        for month, records in by_month.items():
+            path = Path(archive_dir) / f"orders-{month}.jsonl.gz"
+            # Modo append cria um novo membro gzip; leitores gzip concatenam membros
+            with gzip.open(path, 'at', encoding='utf-8') as f:
+                for record in records:
+                    f.write(json.dumps(record, ensure_ascii=False) + '\n')
+        logger.debug(f"Archived {len(rows)} orders to {archive_dir}")
+    
+    def _init_job_queue(self):
+        """
+        Cria a fila de trabalho durável (tabela jobs, ver src/services/job_queue.py).
+        
+        Cada job tem estado (queued, running, done, dead), tentativas, horário
+        da próxima execução e um lease (dono + expiração): um job 'running'
+        cujo lease expirou (processo caiu no meio do ciclo) volta a ser
+        elegível no próximo claim, de qualquer processo.
+        """
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    kind TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    payload TEXT,
+                    state TEXT NOT NULL DEFAULT 'queued',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    max_attempts INTEGER NOT NULL,
+                    next_run_at REAL NOT NULL,
+                    lease_owner TEXT,
+                    lease_expires_at REAL,
+                    last_error TEXT,
+                    created_at TEXT NOT NULL,
+                    updated_at TEXT NOT NULL,
+                    UNIQUE (kind, key)
+                )
+            """)
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_jobs_claim
+                ON jobs(kind, state, next_run_at)
+            """)
+            conn.commit()
+    
+    def enqueue_job(self, kind: str, key: str, payload: dict, max_attempts: int,
+                    run_at: Optional[float] = None) -> bool:
+        """
+        Enfileira um job; idempotente por (kind, key).
+        
+        Args:
+            kind: Tipo do job (ex: 'email').
+            key: Chave única dentro do tipo (ex: UID do e-mail).
+            payload: Dados do job (serializados em JSON).
+            max_attempts: Tentativas antes de o job ir para 'dead'.
+            run_at: Epoch mínimo de execução (padrão: agora).
+        
+        Returns:
+            True se o job foi criado, False se já existia.
+        """
+        now = datetime.now().isoformat()
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                INSERT INTO jobs (kind, key, payload, max_attempts, next_run_at, created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (kind, key) DO NOTHING
+            """, (
+                kind, key, json.dumps(payload, ensure_ascii=False, default=str), max_attempts,
+                run_at if run_at is not None else time.time(), now, now
+            ))
+            conn.commit()
+            return cursor.rowcount > 0
+    
+    def has_job(self, kind: str, key: str) -> bool:
+        """True se já existe job (em qualquer estado) para (kind, key)."""
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1 FROM jobs WHERE kind = ? AND key = ?", (kind, key))
+            return cursor.fetchone() is not None
+    
+    def claim_jobs(self, owner: str, lease_seconds: float, kinds: List[str], limit: int = 0) -> List[dict]:
+        """
+        Reserva atomicamente os próximos jobs elegíveis (UPDATE ... RETURNING).
+        
+        Elegíveis: 'queued' com next_run_at vencido, ou 'running' com lease
+        expirado. Um único UPDATE marca, incrementa as tentativas e grava o
+        lease, então dois processos nunca recebem o mesmo job.
+        
+        Args:
+            owner: Identificador do processo que reserva.
+            lease_seconds: Duração do lease.
+            kinds: Tipos de job aceitos.
+            limit: Máximo de jobs (0 = todos os elegíveis).
+        
+        Returns:
+            Lista de dicts {id, kind, key, payload, attempts, max_attempts}, em ordem de id.
+        """
+        now = time.time()
+        placeholders = ', '.join('?' for _ in kinds)
+        with sqlite3.connect(self.db_path) as conn:
+            conn.row_factory = sqlite3.Row
+            cursor = conn.cursor()
+            cursor.execute(f"""
+                UPDATE jobs SET
+                    state = 'running',
+                    attempts = attempts + 1,
+                    lease_owner = ?,
+                    lease_expires_at = ?,
+                    updated_at = ?
+                WHERE id IN (
+                    SELECT id FROM jobs
+                    WHERE kind IN ({placeholders})
+                        AND ((state = 'queued' AND next_run_at <= ?)
+                             OR (state = 'running' AND lease_expires_at < ?))
+                    ORDER BY next_run_at, id
+                    LIMIT ?
+                )
+                RETURNING id, kind, key, payload, attempts, max_attempts
+            """, (owner, now + lease_seconds, datetime.now().isoformat(), *kinds, now, now, limit or -1))
+            rows = [dict(row) for row in cursor.fetchall()]
+            conn.commit()
+        
+        for row in rows:
+            row['payload'] = json.loads(row['payload']) if row['payload'] else {}
+        return sorted(rows, key=lambda row: row['id'])
+    
+    def renew_job_leases(self, owner: str, lease_seconds: float) -> int:
+        """
+        Renova o lease de todos os jobs em execução de um dono.
+        
+        Returns:
+            Número de jobs renovados.
+        """
         with sqlite3.connect(self.db_path) as conn:
             cursor = conn.cursor()
-            
-            # Conta quantos serão deletados
             cursor.execute(
-                'SELECT COUNT(*) FROM orders WHERE created_at < ?',
-                (cutoff_str,)
+                "UPDATE jobs SET lease_expires_at = ? WHERE lease_owner = ? AND state = 'running'",
+                (time.time() + lease_seconds, owner)
             )
-            count = cursor.fetchone()[0]
-            
-            if count > 0:
-                # Deleta pedidos antigos
-                cursor.execute(
-                    'DELETE FROM orders WHERE created_at < ?',
-                    (cutoff_str,)
+            conn.commit()
+            return cursor.rowcount
+    
+    def finish_job(self, job_id: int, owner: str, state: str, error: Optional[str] = None,
+                   run_at: Optional[float] = None) -> bool:
+        """
+        Encerra a execução de um job reservado.
+        
+        Args:
+            job_id: ID do job.
+            owner: Dono do lease; se o lease já foi retomado por outro processo nada muda.
+            state: 'done', 'queued' (nova tentativa em run_at) ou 'dead'.
+            error: Erro da tentativa (em last_error).
+            run_at: Epoch da próxima tentativa (state='queued').
+        
+        Returns:
+            False se o job não estava mais reservado por `owner`.
+        """
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                UPDATE jobs SET
+                    state = ?,
+                    last_error = COALESCE(?, last_error),
+                    next_run_at = COALESCE(?, next_run_at),
+                    lease_owner = NULL,
+                    lease_expires_at = NULL,
+                    updated_at = ?
+                WHERE id = ? AND lease_owner = ? AND state = 'running'
+            """, (state, error, run_at, datetime.now().isoformat(), job_id, owner))
+            conn.commit()
+            return cursor.rowcount > 0
+    
+    def get_job_counts(self, kind: Optional[str] = None) -> dict:
+        """
+        Conta jobs por estado.
+        
+        Returns:
+            Dict {queued, running, done, dead, ready}; ready = queued com
+            next_run_at vencido (pode ser reservado agora).
+        """
+        query = """
+            SELECT state, COUNT(*), SUM(CASE WHEN next_run_at <= ? THEN 1 ELSE 0 END)
+            FROM jobs
+        """
+        params = [time.time()]
+        if kind:
+            query += " WHERE kind = ?"
+            params.append(kind)
+        query += " GROUP BY state"
+        
+        counts = {'queued': 0, 'running': 0, 'done': 0, 'dead': 0, 'ready': 0}
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, params)
+            for state, count, ready in cursor.fetchall():
+                counts[state] = count
+                if state == 'queued':
+                    counts['ready'] = ready
+        return counts
+    
+    def purge_finished_jobs(self, days_to_keep: int = 30) -> int:
+        """
+        Remove jobs concluídos ('done') atualizados há mais de X dias.
+        Jobs 'dead' ficam para inspeção.
+        
+        Returns:
+            Número de jobs removidos.
+        """
+        cutoff = (datetime.now() - timedelta(days=days_to_keep)).isoformat()
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM jobs WHERE state = 'done' AND updated_at < ?", (cutoff,))
+            conn.commit()
+            if cursor.rowcount:
+                logger.info(f"Job queue cleanup: removed {cursor.rowcount} finished jobs")
+            return cursor.rowcount
+    
+    def _init_leases(self):
+        """
+        Cria a tabela de leases nomeados (eleição de líder entre processos,
+        ver src/services/leader_election.py).
+        """
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS leases (
+                    name TEXT PRIMARY KEY,
+                    owner TEXT NOT NULL,
+                    expires_at REAL NOT NULL,
+                    acquired_at TEXT NOT NULL,
+                    updated_at TEXT NOT NULL
+                ) WITHOUT ROWID
+            """)
+            conn.commit()
+    
+    def acquire_lease(self, name: str, owner: str, ttl_seconds: float) -> bool:
+        """
+        Adquire ou renova um lease nomeado em uma única instrução (upsert).
+        
+        O lease só muda de dono se o atual tiver expirado; o dono atual
+        renova a expiração a cada chamada.
+        
+        Args:
+            name: Nome do lease (ex: 'imap-poller').
+            owner: Identificador do processo.
+            ttl_seconds: Validade a partir de agora.
+        
+        Returns:
+            True se `owner` detém o lease após a chamada.
+        """
+        now = time.time()
+        iso_now = datetime.now().isoformat()
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                INSERT INTO leases (name, owner, expires_at, acquired_at, updated_at)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (name) DO UPDATE SET
+                    acquired_at = CASE WHEN leases.owner = excluded.owner
+                        THEN leases.acquired_at ELSE excluded.acquired_at END,
+                    owner = excluded.owner,
+                    expires_at = excluded.expires_at,
+                    updated_at = excluded.updated_at
+                WHERE leases.owner = excluded.owner OR leases.expires_at < ?
+            """, (name, owner, now + ttl_seconds, iso_now, iso_now, now))
+            conn.commit()
+            return cursor.rowcount > 0
+    
+    def release_lease(self, name: str, owner: str) -> bool:
+        """Libera o lease se ainda pertencer a `owner` (failover imediato)."""
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM leases WHERE name = ? AND owner = ?", (name, owner))
+            conn.commit()
+            return cursor.rowcount > 0
+    
+    def get_lease(self, name: str) -> Optional[dict]:
+        """Retorna {name, owner, expires_at, acquired_at, updated_at} ou None."""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.row_factory = sqlite3.Row
+            cursor = conn.cursor()
+            cursor.execute("SELECT * FROM leases WHERE name = ?", (name,))
+            row = cursor.fetchone()
+            return dict(row) if row else None
+    
+    def _init_reprocess_jobs(self):
+        """
+        Cria as tabelas dos jobs de reprocessamento em lote (ver
+        src/services/reprocessing.py).
+        
+        Cada job guarda a lista de pedidos no momento da criação e o estado
+        de cada um; o progresso é gravado pedido a pedido, então um job
+        interrompido (deploy, queda do processo) continua de onde parou.
+        Um pedido em envio fica 'in_flight' com lease (dono + expiração), para
+        que dois processos rodando o mesmo job nunca reenviem o mesmo pedido.
+        """
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS reprocess_jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    status TEXT NOT NULL,
+                    concurrency INTEGER NOT NULL,
+                    total INTEGER NOT NULL,
+                    message TEXT,
+                    created_at TEXT NOT NULL,
+                    started_at TEXT,
+                    finished_at TEXT,
+                    updated_at TEXT NOT NULL
                 )
-                conn.commit()
-                
-                # Executa VACUUM para liberar espaço físico
-                cursor.execute('VACUUM')
-                
-                logger.info(f"Database cleanup: removed {count} orders older than {days_to_keep} days")
+            """)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS reprocess_job_items (
+                    job_id INTEGER NOT NULL,
+                    order_id INTEGER NOT NULL,
+                    state TEXT NOT NULL DEFAULT 'pending',
+                    reason TEXT,
+                    updated_at TEXT,
+                    owner TEXT,
+                    lease_expires_at REAL,
+                    PRIMARY KEY (job_id, order_id)
+                ) WITHOUT ROWID
+            """)
+            cursor.execute("PRAGMA table_info(reprocess_job_items)")
+            existing_columns = {col[1] for col in cursor.fetchall()}
+            for col_name, col_type in (('owner', 'TEXT'), ('lease_expires_at', 'REAL')):
+                if col_name not in existing_columns:
+                    cursor.execute(f"ALTER TABLE reprocess_job_items ADD COLUMN {col_name} {col_type}")
+            conn.commit()
+    
+    def create_reprocess_job(self, order_ids: List[int], concurrency: int) -> int:
+        """
+        Cria um job de reprocessamento com os pedidos informados pendentes.
+        
+        Args:
+            order_ids: IDs dos pedidos a reprocessar.
+            concurrency: Máximo de pedidos reprocessados em paralelo.
+        
+        Returns:
+            ID do job.
+        """
+        now = datetime.now().isoformat()
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                INSERT INTO reprocess_jobs (status, concurrency, total, created_at, updated_at)
+                VALUES ('pending', ?, ?, ?, ?)
+            """, (concurrency, len(order_ids), now, now))
+            job_id = cursor.lastrowid
+            cursor.executemany(
+                "INSERT OR IGNORE INTO reprocess_job_items (job_id, order_id) VALUES (?, ?)",
+                [(job_id, order_id) for order_id in order_ids]
+            )
+            conn.commit()
+            logger.info(f"Reprocess job {job_id} created with {len(order_ids)} orders")
+            return job_id
+    
+    def get_reprocess_job(self, job_id: Optional[int] = None) -> Optional[dict]:
+        """
+        Busca um job de reprocessamento com a contagem de pedidos por estado.
+        
+        Args:
+            job_id: ID do job (None = o mais recente).
+        
+        Returns:
+            Dict com as colunas de reprocess_jobs mais `counts`
+            ({pending, succeeded, failed, skipped}; pedidos em envio contam
+            como pending até terem resultado), ou None.
+        """
+        with sqlite3.connect(self.db_path) as conn:
+            conn.row_factory = sqlite3.Row
+            cursor = conn.cursor()
+            if job_id is None:
+                cursor.execute("SELECT * FROM reprocess_jobs ORDER BY id DESC LIMIT 1")
             else:
-                logger.info(f"Database cleanup: no orders older than {days_to_keep} days found")
+                cursor.execute("SELECT * FROM reprocess_jobs WHERE id = ?", (job_id,))
+            row = cursor.fetchone()
+            if not row:
+                return None
             
-            return count
+            job = dict(row)
+            job['counts'] = {'pending': 0, 'succeeded': 0, 'failed': 0, 'skipped': 0}
+            cursor.execute(
+                "SELECT state, COUNT(*) FROM reprocess_job_items WHERE job_id = ? GROUP BY state",
+                (job['id'],)
+            )
+            for state, count in cursor.fetchall():
+                key = 'pending' if state == 'in_flight' else state
+                job['counts'][key] += count
+            return job
+    
+    def get_reprocess_items(self, job_id: int, state: str = 'pending') -> List[int]:
+        """
+        Lista os pedidos de um job em determinado estado.
+        
+        Args:
+            job_id: ID do job.
+            state: pending, succeeded, failed ou skipped.
+        
+        Returns:
+            IDs dos pedidos, em ordem crescente.
+        """
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT order_id FROM reprocess_job_items WHERE job_id = ? AND state = ? ORDER BY order_id",
+                (job_id, state)
+            )
+            return [row[0] for row in cursor.fetchall()]
+    
+    def claim_reprocess_item(self, job_id: int, owner: str, lease_seconds: float) -> Optional[int]:
+        """
+        Reserva atomicamente o próximo pedido do job (UPDATE ... RETURNING).
+        
+        Elegíveis: 'pending', ou 'in_flight' com lease expirado (processo que
+        caiu no meio do envio). Dois processos rodando o mesmo job nunca
+        recebem o mesmo pedido.
+        
+        Args:
+            job_id: ID do job.
+            owner: Identificador do processo que reserva.
+            lease_seconds: Duração do lease (renovado a cada resultado gravado).
+        
+        Returns:
+            ID do pedido reservado, ou None se não houver pedidos elegíveis.
+        """
+        now = time.time()
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                UPDATE reprocess_job_items SET
+                    state = 'in_flight',
+                    owner = ?,
+                    lease_expires_at = ?,
+                    updated_at = ?
+                WHERE job_id = ? AND order_id = (
+                    SELECT order_id FROM reprocess_job_items
+                    WHERE job_id = ?
+                        AND (state = 'pending' OR (state = 'in_flight' AND lease_expires_at < ?))
+                    ORDER BY order_id
+                    LIMIT 1
+                )
+                RETURNING order_id
+            """, (owner, now + lease_seconds, datetime.now().isoformat(), job_id, job_id, now))
+            row = cursor.fetchone()
+            conn.commit()
+        return row[0] if row else None
+    
+    def finish_reprocess_item(self, job_id: int, order_id: int, state: str, reason: Optional[str] = None,
+                              owner: Optional[str] = None, lease_seconds: float = 0) -> bool:
+        """
+        Grava o resultado de um pedido do job (checkpoint) e renova o
+        heartbeat do job.
+        
+        Args:
+            job_id: ID do job.
+            order_id: ID do pedido.
+            state: succeeded, failed ou skipped.
+            reason: Motivo do skip ou erro da falha.
+            owner: Dono da reserva (claim_reprocess_item); se informado, só
+                grava se a reserva ainda é dele e renova o lease dos outros
+                pedidos em envio desse dono.
+            lease_seconds: Nova duração do lease desses pedidos.
+        
+        Returns:
+            False se a reserva já era de outro processo.
+        """
+        now = datetime.now().isoformat()
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            if owner is None:
+                cursor.execute("""
+                    UPDATE reprocess_job_items SET state = ?, reason = ?, updated_at = ?
+                    WHERE job_id = ? AND order_id = ?
+                """, (state, reason, now, job_id, order_id))
+                finished = cursor.rowcount > 0
+            else:
+                cursor.execute("""
+                    UPDATE reprocess_job_items SET state = ?, reason = ?, updated_at = ?, lease_expires_at = NULL
+                    WHERE job_id = ? AND order_id = ? AND owner = ?
+                """, (state, reason, now, job_id, order_id, owner))
+                finished = cursor.rowcount > 0
+                cursor.execute("""
+                    UPDATE reprocess_job_items SET lease_expires_at = ?
+                    WHERE job_id = ? AND owner = ? AND state = 'in_flight'
+                """, (time.time() + lease_seconds, job_id, owner))
+            cursor.execute("UPDATE reprocess_jobs SET updated_at = ? WHERE id = ?", (now, job_id))
+            conn.commit()
+            return finished
+    
+    def set_reprocess_job_status(self, job_id: int, status: str, message: Optional[str] = None):
+        """
+        Atualiza o status de um job de reprocessamento.
+        
+        Args:
+            job_id: ID do job.
+            status: pending, running, paused ou completed.
+            message: Motivo (ex: pausa pelo circuit breaker).
+        """
+        now = datetime.now().isoformat()
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                UPDATE reprocess_jobs SET
+                    status = ?,
+                    message = ?,
+                    updated_at = ?,
+                    started_at = CASE WHEN ? = 'running' THEN COALESCE(started_at, ?) ELSE started_at END,
+                    finished_at = CASE WHEN ? = 'completed' THEN ? ELSE NULL END
+                WHERE id = ?
+            """, (status, message, now, status, now, status, now, job_id))
+            conn.commit()
+    
+    @staticmethod
+    def _passengers_to_json(passengers: list) -> Optional[str]:
+        """Serializa a lista de passageiros (paradas) para a coluna passengers."""
+        if not passengers:
+            return None
+        return json.dumps(passengers, ensure_ascii=False, default=str)
+    
+    @staticmethod
+    def _passengers_from_json(value: Optional[str]) -> list:
+        """Desserializa a coluna passengers; valores inválidos viram lista vazia."""
+        if not value:
+            return []
+        try:
+            passengers = json.loads(value)
+            return passengers if isinstance(passengers, list) else []
+        except (TypeError, ValueError):
+            logger.warning("Invalid passengers JSON in database row")
+            return []
     
     def _row_to_order(self, row: sqlite3.Row) -> Order:
         """Converte uma linha do banco em objeto Order."""
@@ -522,8 +1641,12 @@ class DatabaseManager:
             error_message=row['error_message'],
             minastaxi_order_id=row['minastaxi_order_id'],
             cluster_id=row['cluster_id'],
+            whatsapp_sent=bool(safe_get(row, 'whatsapp_sent')),
+            whatsapp_message_id=safe_get(row, 'whatsapp_message_id'),
             notes=safe_get(row, 'notes'),
             cost_center=safe_get(row, 'cost_center'),
             company_code=safe_get(row, 'company_code'),
-            company_cnpj=safe_get(row, 'company_cnpj')
+            company_cnpj=safe_get(row, 'company_cnpj'),
+            payment_type=safe_get(row, 'payment_type'),
+            passengers=self._passengers_from_json(safe_get(row, 'passengers'))
         )
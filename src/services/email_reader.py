@@ -2,9 +2,9 @@
 Email reader service using IMAP.
 """
 import logging
-from typing import List, Optional
+from typing import Callable, List, Optional
 from dataclasses import dataclass
-from imap_tools import MailBox, AND
+from imap_tools import MailBox, MailBoxUnencrypted, AND
 from datetime import datetime, timedelta
 
 logger = logging.getLogger(__name__)
@@ -33,7 +33,8 @@ class EmailReader:
         user: str,
         password: str,
         folder: str = "INBOX",
-        subject_filter: str = "PROGRAMAÇÃO"
+        subject_filter: str = "PROGRAMAÇÃO",
+        use_ssl: bool = True
     ):
         """
         Inicializa o leitor de e-mails.
@@ -45,6 +46,7 @@ class EmailReader:
             password: Senha ou App Password.
             folder: Pasta a ser monitorada.
             subject_filter: Texto a buscar no assunto (padrão: "PROGRAMAÇÃO" para capturar emails de táxi/carro).
+            use_ssl: False conecta sem TLS (servidores IMAP locais de teste/benchmark).
         """
         self.host = host
         self.port = port
@@ -52,6 +54,7 @@ class EmailReader:
         self.password = password
         self.folder = folder
         self.subject_filter = subject_filter
+        self.use_ssl = use_ssl
         
     def connect(self) -> MailBox:
         """
@@ -61,7 +64,8 @@ class EmailReader:
             Objeto MailBox conectado.
         """
         try:
-            mailbox = MailBox(self.host, self.port)
+            mailbox_class = MailBox if self.use_ssl else MailBoxUnencrypted
+            mailbox = mailbox_class(self.host, self.port)
             mailbox.login(self.user, self.password)
             logger.info(f"Connected to {self.host} as {self.user}")
             return mailbox
@@ -72,7 +76,9 @@ class EmailReader:
     def fetch_new_orders(
         self,
         days_back: int = 7,
-        mark_as_seen: bool = False
+        mark_as_seen: bool = False,
+        limit: Optional[int] = None,
+        is_known: Optional[Callable[[str], bool]] = None
     ) -> List[EmailMessage]:
         """
         Busca e-mails não lidos com o filtro de assunto.
@@ -80,6 +86,9 @@ class EmailReader:
         Args:
             days_back: Número de dias para trás na busca.
             mark_as_seen: Se True, marca os e-mails como lidos.
+            limit: Máximo de e-mails retornados; a busca para ao atingi-lo
+                (o restante fica para o próximo ciclo).
+            is_known: Filtro de UIDs já processados, que não contam no limite.
             
         Returns:
             Lista de EmailMessage com os pedidos encontrados.
@@ -115,6 +124,10 @@ class EmailReader:
                             logger.debug(f"Skipping email with subject '{msg.subject}' - does not match filter '{self.subject_filter}'")
                             continue
                     
+                    if is_known is not None and is_known(msg.uid):
+                        logger.debug(f"Skipping email UID={msg.uid} - already processed")
+                        continue
+                    
                     email_msg = EmailMessage(
                         uid=msg.uid,
                         subject=msg.subject,
@@ -128,6 +141,10 @@ class EmailReader:
                         f"Fetched email UID={msg.uid}, "
                         f"Subject='{msg.subject}', From={msg.from_}"
                     )
+                    
+                    if limit and len(messages) >= limit:
+                        logger.info(f"Fetch limit of {limit} emails reached, remaining emails left for next cycle")
+                        break
                 
                 logger.info(f"Total new order emails found: {len(messages)}")
                 
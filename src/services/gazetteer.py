@@ -0,0 +1,262 @@
+"""
+Offline gazetteer: resolve known places without calling a network geocoder.
+"""
+import atexit
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+from ..config.known_places import KNOWN_PLACES
+
+logger = logging.getLogger(__name__)
+
+# Tokens que não distinguem locais (estado, país, conectivos, tipos genéricos)
+STOPWORDS = frozenset({
+    'mg', 'minas', 'gerais', 'brasil', 'brazil', 'br', 'de', 'da', 'do', 'das', 'dos',
+    'e', 'em', 'na', 'no', 'a', 'o', 'cidade', 'centro',
+})
+
+_NON_ALNUM = re.compile(r'[^a-z0-9]+')
+_COMBINING_MARKS = re.compile('[\u0300-\u036f]')
+
+
+def fold(text: str) -> str:
+    """Minúsculas sem acentos (ex: 'Mineração' -> 'mineracao')."""
+    lowered = text.lower()
+    if lowered.isascii():
+        return lowered
+    return _COMBINING_MARKS.sub('', unicodedata.normalize('NFKD', lowered))
+
+
+def tokenize(text: str) -> FrozenSet[str]:
+    """Conjunto de tokens normalizados, sem stopwords."""
+    return frozenset(t for t in _NON_ALNUM.split(fold(text)) if t and t not in STOPWORDS)
+
+
+@dataclass
+class Place:
+    """Local canônico do gazetteer."""
+    name: str
+    lat: float
+    lng: float
+    kind: str = 'site'  # site | city | learned
+    address: Optional[str] = None
+    aliases: List[str] = field(default_factory=list)
+
+    @property
+    def coords(self) -> Tuple[float, float]:
+        return (self.lat, self.lng)
+
+
+class Gazetteer:
+    """
+    Tabela local de locais conhecidos com índice de tokens.
+
+    - Sites casam quando todos os tokens de um apelido estão no endereço.
+      Apelidos de um só token (siglas como "CSN") são ambíguos dentro de um
+      endereço ("Vila CSN", "CSN Volta Redonda"): só casam se o resto do
+      endereço também pertence ao site (nome, endereço ou outros apelidos).
+    - Cidades e endereços aprendidos casam só com o conjunto exato de tokens.
+
+    Endereços geocodificados com sucesso podem ser aprendidos e persistidos
+    em JSON para que a próxima ocorrência não consulte a rede. A gravação é
+    agrupada (no máximo uma a cada `save_interval_seconds`, e ao encerrar) e
+    mescla o que outros processos gravaram no mesmo arquivo.
+    """
+
+    def __init__(
+        self,
+        places: Optional[List[dict]] = None,
+        path: Optional[str] = None,
+        max_learned: int = 5000,
+        save_interval_seconds: float = 60
+    ):
+        """
+        Inicializa o gazetteer.
+
+        Args:
+            places: Locais semente (padrão: config.known_places.KNOWN_PLACES).
+            path: Arquivo JSON de endereços aprendidos (None = só em memória).
+            max_learned: Limite de endereços aprendidos (descarta os mais antigos).
+            save_interval_seconds: Intervalo mínimo entre gravações do arquivo
+                (0 = grava a cada endereço aprendido).
+        """
+        self.path = path
+        self.max_learned = max_learned
+        self.save_interval_seconds = save_interval_seconds
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._exact: Dict[FrozenSet[str], Place] = {}
+        # (tokens do apelido, local, tokens de todo o local)
+        self._site_aliases: List[Tuple[FrozenSet[str], Place, FrozenSet[str]]] = []
+        self._by_token: Dict[str, List[int]] = {}  # token -> índices em _site_aliases
+        self._learned: "OrderedDict[FrozenSet[str], Place]" = OrderedDict()
+        self._dirty = False
+        self._last_save = time.monotonic()
+
+        for entry in (KNOWN_PLACES if places is None else places):
+            self.add(Place(
+                name=entry['name'],
+                lat=entry['lat'],
+                lng=entry['lng'],
+                kind=entry.get('kind', 'site'),
+                address=entry.get('address'),
+                aliases=list(entry.get('aliases', [])),
+            ))
+        if path:
+            self._load_learned()
+            atexit.register(self.flush)
+
+    def add(self, place: Place):
+        """Adiciona um local (e seus apelidos) ao índice."""
+        names = [place.name] + place.aliases
+        place_tokens = tokenize(' '.join(names + [place.address or '']))
+        for alias in names:
+            tokens = tokenize(alias)
+            if not tokens:
+                continue
+            self._exact.setdefault(tokens, place)
+            if place.kind == 'site':
+                idx = len(self._site_aliases)
+                self._site_aliases.append((tokens, place, place_tokens))
+                for token in tokens:
+                    self._by_token.setdefault(token, []).append(idx)
+
+    def match_site(self, address: str) -> Optional[Place]:
+        """Retorna o site cujo apelido está contido no endereço (o mais específico)."""
+        return self._match_site(tokenize(address))
+
+    def _match_site(self, tokens: FrozenSet[str]) -> Optional[Place]:
+        best: Optional[Tuple[FrozenSet[str], Place]] = None
+        seen = set()
+        for token in tokens:
+            for idx in self._by_token.get(token, ()):
+                if idx in seen:
+                    continue
+                seen.add(idx)
+                alias_tokens, place, place_tokens = self._site_aliases[idx]
+                if not alias_tokens <= tokens:
+                    continue
+                if len(alias_tokens) == 1 and not tokens <= place_tokens:
+                    continue
+                if best is None or len(alias_tokens) > len(best[0]):
+                    best = (alias_tokens, place)
+        return best[1] if best else None
+
+    def lookup(self, address: str) -> Optional[Place]:
+        """
+        Procura um endereço no gazetteer.
+
+        Args:
+            address: Endereço em texto livre.
+
+        Returns:
+            Place encontrado ou None.
+        """
+        if not address:
+            return None
+        tokens = tokenize(address)
+        if not tokens:
+            return None
+        place = self._exact.get(tokens)
+        if place is None:
+            with self._lock:
+                place = self._learned.get(tokens)
+        if place is None:
+            place = self._match_site(tokens)
+        return place
+
+    def learn(self, address: str, coords: Tuple[float, float]):
+        """
+        Registra um endereço geocodificado com sucesso.
+
+        Args:
+            address: Endereço original (como veio no pedido).
+            coords: Coordenadas (lat, lng) obtidas.
+        """
+        tokens = tokenize(address)
+        if not tokens or tokens in self._exact:
+            return
+        with self._lock:
+            self._learned[tokens] = Place(name=address, lat=coords[0], lng=coords[1], kind='learned')
+            self._learned.move_to_end(tokens)
+            while len(self._learned) > self.max_learned:
+                self._learned.popitem(last=False)
+            self._dirty = True
+            due = time.monotonic() - self._last_save >= self.save_interval_seconds
+        if self.path and due:
+            self.flush()
+
+    def flush(self):
+        """Grava os endereços aprendidos pendentes (chamado também ao encerrar o processo)."""
+        if not self.path:
+            return
+        with self._save_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                self._dirty = False
+                self._last_save = time.monotonic()
+            self._save_learned()
+
+    def _read_entries(self) -> List[dict]:
+        with open(self.path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _load_learned(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            for entry in self._read_entries()[-self.max_learned:]:
+                tokens = tokenize(entry['address'])
+                if tokens:
+                    self._learned[tokens] = Place(
+                        name=entry['address'], lat=entry['lat'], lng=entry['lng'], kind='learned'
+                    )
+            logger.info(f"Gazetteer loaded {len(self._learned)} learned addresses from {self.path}")
+        except Exception as e:
+            logger.warning(f"Could not load gazetteer file {self.path}: {e}")
+
+    def _save_learned(self):
+        """
+        Reescreve o arquivo com os endereços deste processo mais os que outros
+        processos gravaram desde a última leitura (os deles entram como mais antigos).
+        """
+        tmp_path = None
+        try:
+            try:
+                on_disk = self._read_entries()
+            except (OSError, ValueError):
+                on_disk = []
+            with self._lock:
+                mine = [{'address': p.name, 'lat': p.lat, 'lng': p.lng} for p in self._learned.values()]
+                known = set(self._learned)
+            others = [e for e in on_disk if tokenize(e.get('address', '')) not in known]
+            entries = (others + mine)[-self.max_learned:]
+
+            directory = os.path.dirname(self.path) or '.'
+            os.makedirs(directory, exist_ok=True)
+            # Nome temporário único: vários processos gravam o mesmo arquivo
+            with tempfile.NamedTemporaryFile(
+                'w', encoding='utf-8', dir=directory, prefix='.gazetteer-', suffix='.tmp', delete=False
+            ) as f:
+                tmp_path = f.name
+                json.dump(entries, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+            tmp_path = None
+        except Exception as e:
+            logger.warning(f"Could not save gazetteer file {self.path}: {e}")
+        finally:
+            if tmp_path and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def __len__(self) -> int:
+        return len(self._exact) + len(self._learned)
@@ -0,0 +1,575 @@
+"""
+Geocoder backends: cache, gazetteer and online providers with per-backend limits and metrics.
+"""
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from geopy.exc import GeocoderServiceError, GeocoderTimedOut
+
+from ..config.regions import BRAZIL_STATES
+from . import tracing
+from .gazetteer import Gazetteer, fold, tokenize
+
+logger = logging.getLogger(__name__)
+
+Coordinates = Tuple[float, float]
+
+# Bounds aproximados de MG para o Google Maps
+MG_BOUNDS = [(-23.0, -51.0), (-14.0, -39.0)]
+
+
+class RateLimiter:
+    """Garante um intervalo mínimo entre chamadas (thread-safe)."""
+
+    def __init__(self, min_interval: float = 0.0):
+        """
+        Args:
+            min_interval: Segundos mínimos entre duas chamadas (0 = sem limite).
+        """
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+
+    def reserve(self) -> float:
+        """
+        Reserva o próximo horário livre sem bloquear.
+
+        Returns:
+            Segundos a esperar antes de fazer a chamada.
+        """
+        if self.min_interval <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.min_interval
+        return slot - now
+
+    def acquire(self):
+        """Bloqueia até a próxima chamada ser permitida."""
+        wait_time = self.reserve()
+        if wait_time > 0:
+            time.sleep(wait_time)
+
+    async def acquire_async(self):
+        """Versão assíncrona de acquire (compartilha os horários com chamadas síncronas)."""
+        wait_time = self.reserve()
+        if wait_time > 0:
+            await asyncio.sleep(wait_time)
+
+
+class BackendMetrics:
+    """Contadores e latências de um backend."""
+
+    def __init__(self, window: int = 1000):
+        """
+        Args:
+            window: Quantidade de latências recentes mantidas para percentis.
+        """
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self.total_seconds = 0.0
+        self._latencies = deque(maxlen=window)
+
+    def record(self, seconds: float, hit: bool = False, error: bool = False):
+        """Registra uma chamada."""
+        with self._lock:
+            self.calls += 1
+            self.total_seconds += seconds
+            self._latencies.append(seconds)
+            if error:
+                self.errors += 1
+            elif hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def snapshot(self) -> Dict[str, float]:
+        """
+        Retorna um resumo das métricas.
+
+        Returns:
+            Dicionário com calls, hits, misses, errors, hit_rate e latências (ms).
+        """
+        with self._lock:
+            latencies = sorted(self._latencies)
+            calls = self.calls
+
+            def percentile(p: float) -> float:
+                if not latencies:
+                    return 0.0
+                return latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000
+
+            return {
+                'calls': calls,
+                'hits': self.hits,
+                'misses': self.misses,
+                'errors': self.errors,
+                'hit_rate': self.hits / calls if calls else 0.0,
+                'avg_ms': self.total_seconds / calls * 1000 if calls else 0.0,
+                'p50_ms': percentile(0.50),
+                'p95_ms': percentile(0.95),
+            }
+
+
+# Variantes que descartam parte do endereço (logradouro + 2ª parte, últimas
+# duas partes): resolvem quase sempre, mas para um ponto mais grosseiro (o
+# centroide de MG, no caso de 'tail'). Ficam fora do ranking, sempre por último.
+COARSE_VARIANTS = ('street_city', 'tail')
+
+
+class VariantStats:
+    """
+    Taxa de sucesso por tipo de variante de endereço.
+
+    Usada para tentar primeiro, entre as variantes que mantêm o endereço
+    inteiro (full, no_paren, simple), as que historicamente resolvem.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._attempts: Dict[str, int] = {}
+        self._successes: Dict[str, int] = {}
+
+    def record(self, kind: str, success: bool):
+        """Registra o resultado de uma tentativa."""
+        with self._lock:
+            self._attempts[kind] = self._attempts.get(kind, 0) + 1
+            if success:
+                self._successes[kind] = self._successes.get(kind, 0) + 1
+
+    def score(self, kind: str) -> float:
+        """Taxa de sucesso suavizada (Laplace); tipos sem histórico valem 0.5."""
+        with self._lock:
+            return (self._successes.get(kind, 0) + 1) / (self._attempts.get(kind, 0) + 2)
+
+    def rank(self, variants: List[Tuple[str, str]]) -> List[Tuple[str, str]]:
+        """
+        Ordena variantes (tipo, consulta) pela taxa de sucesso do tipo.
+
+        Só as variantes específicas são reordenadas; as de COARSE_VARIANTS
+        vêm depois, na ordem de geração, qualquer que seja o histórico delas.
+        Em empate mantém a ordem de geração.
+        """
+        specific = [variant for variant in variants if variant[0] not in COARSE_VARIANTS]
+        coarse = [variant for variant in variants if variant[0] in COARSE_VARIANTS]
+        scores = {kind: self.score(kind) for kind, _ in specific}
+        return sorted(specific, key=lambda variant: -scores[variant[0]]) + coarse
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """Tentativas, sucessos e taxa por tipo."""
+        with self._lock:
+            return {
+                kind: {
+                    'attempts': attempts,
+                    'successes': self._successes.get(kind, 0),
+                    'success_rate': self._successes.get(kind, 0) / attempts,
+                }
+                for kind, attempts in self._attempts.items()
+            }
+
+
+class GeocoderBackend:
+    """Base dos backends: métricas e limite de concorrência."""
+
+    name = 'backend'
+
+    def __init__(self, max_concurrency: int = 0):
+        """
+        Args:
+            max_concurrency: Chamadas simultâneas permitidas (0 = ilimitado).
+        """
+        self.metrics = BackendMetrics()
+        self._semaphore = threading.BoundedSemaphore(max_concurrency) if max_concurrency > 0 else None
+
+    def _acquire(self):
+        if self._semaphore:
+            self._semaphore.acquire()
+
+    def _release(self):
+        if self._semaphore:
+            self._semaphore.release()
+
+
+class MemoryCacheBackend(GeocoderBackend):
+    """
+    Cache em memória de endereços resolvidos.
+
+    Guarda também falhas (None) por um TTL menor, evitando repetir em
+    sequência a busca de endereços que o provedor não encontra.
+    """
+
+    name = 'cache'
+    _MISSING = object()
+
+    def __init__(self, max_entries: int = 10000, ttl_seconds: float = 86400, negative_ttl_seconds: float = 600):
+        """
+        Args:
+            max_entries: Tamanho máximo do cache (LRU).
+            ttl_seconds: Validade de resultados positivos.
+            negative_ttl_seconds: Validade de endereços não encontrados.
+        """
+        super().__init__()
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[frozenset, Tuple[float, Optional[Coordinates]]]" = OrderedDict()
+
+    def get(self, address: str) -> Any:
+        """
+        Consulta o cache.
+
+        Returns:
+            Coordenadas, None (falha recente em cache) ou MemoryCacheBackend._MISSING.
+        """
+        start = time.perf_counter()
+        key = tokenize(address)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] < time.monotonic():
+                del self._entries[key]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+        self.metrics.record(time.perf_counter() - start, hit=entry is not None)
+        return entry[1] if entry is not None else self._MISSING
+
+    def put(self, address: str, coords: Optional[Coordinates]):
+        """Armazena um resultado (None = endereço não encontrado)."""
+        ttl = self.ttl_seconds if coords else self.negative_ttl_seconds
+        key = tokenize(address)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, coords)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+def city_state_from_raw(raw: Optional[dict]) -> Optional[Tuple[str, str]]:
+    """
+    Extrai (cidade, UF) do JSON bruto de um resultado do Nominatim ou do Google.
+
+    Args:
+        raw: location.raw do geopy.
+
+    Returns:
+        Tupla (cidade, sigla do estado) ou None se faltar algum dos dois.
+    """
+    if not raw:
+        return None
+    city = state = None
+
+    address = raw.get('address')
+    if isinstance(address, dict):
+        # Nominatim (addressdetails=1)
+        city = (address.get('city') or address.get('town') or address.get('municipality')
+                or address.get('village'))
+        iso = address.get('ISO3166-2-lvl4', '')
+        state = iso[3:] if iso.startswith('BR-') else BRAZIL_STATES.get(fold(address.get('state', '')))
+    elif raw.get('address_components'):
+        # Google: administrative_area_level_2 = município, level_1 = UF
+        for component in raw['address_components']:
+            types = component.get('types', [])
+            if 'administrative_area_level_2' in types or ('locality' in types and not city):
+                city = component.get('long_name')
+            elif 'administrative_area_level_1' in types:
+                state = component.get('short_name')
+
+    if city and state:
+        return city, state.upper()
+    return None
+
+
+class ReverseCityCache(GeocoderBackend):
+    """
+    Cache de (cidade, UF) por célula de coordenadas arredondadas.
+
+    Pontos a menos de ~1 km caem na mesma chave, então uma consulta de
+    reverse geocoding serve para todos os endereços vizinhos.
+    """
+
+    name = 'reverse_cache'
+
+    def __init__(self, cell_deg: float = 0.01, max_entries: int = 20000):
+        """
+        Args:
+            cell_deg: Tamanho da célula em graus (0.01 ≈ 1.1 km).
+            max_entries: Tamanho máximo do cache (LRU).
+        """
+        super().__init__()
+        self.cell_deg = cell_deg
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[int, int], Tuple[str, str]]" = OrderedDict()
+
+    def key(self, lat: float, lng: float) -> Tuple[int, int]:
+        """Chave da célula que contém o ponto."""
+        return (int(lat // self.cell_deg), int(lng // self.cell_deg))
+
+    def get(self, lat: float, lng: float) -> Optional[Tuple[str, str]]:
+        """Retorna (cidade, UF) da célula ou None se ainda não conhecida."""
+        start = time.perf_counter()
+        key = self.key(lat, lng)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+        self.metrics.record(time.perf_counter() - start, hit=entry is not None)
+        return entry
+
+    def put(self, lat: float, lng: float, city_state: Tuple[str, str]):
+        """Armazena o resultado de uma célula."""
+        key = self.key(lat, lng)
+        with self._lock:
+            self._entries[key] = city_state
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class GazetteerBackend(GeocoderBackend):
+    """Locais conhecidos e endereços aprendidos (sem rede)."""
+
+    name = 'gazetteer'
+
+    def __init__(self, gazetteer: Gazetteer):
+        super().__init__()
+        self.gazetteer = gazetteer
+
+    def lookup(self, address: str):
+        """Retorna o Place encontrado ou None."""
+        start = time.perf_counter()
+        place = self.gazetteer.lookup(address)
+        self.metrics.record(time.perf_counter() - start, hit=place is not None)
+        return place
+
+
+class GeopyBackend(GeocoderBackend):
+    """
+    Provedor online via geopy (Nominatim ou Google) com rate limit,
+    timeout, concorrência e retry por backend.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        geolocator,
+        timeout: float = 10,
+        min_interval: float = 0.0,
+        max_concurrency: int = 1,
+        max_retries: int = 3,
+        backoff_seconds: float = 1.0,
+        async_geolocator_factory: Optional[Callable[[], Any]] = None
+    ):
+        """
+        Args:
+            name: Nome do backend (ex: 'nominatim', 'google').
+            geolocator: Instância geopy.
+            timeout: Timeout por requisição em segundos.
+            min_interval: Intervalo mínimo entre requisições (política do provedor).
+            max_concurrency: Requisições simultâneas permitidas.
+            max_retries: Tentativas em caso de timeout.
+            backoff_seconds: Base do backoff exponencial entre tentativas.
+            async_geolocator_factory: Cria o equivalente assíncrono do geolocator
+                (geopy com AioHTTPAdapter); None = chamadas síncronas em thread.
+        """
+        super().__init__(max_concurrency)
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.async_geolocator_factory = async_geolocator_factory
+        self.geolocator = geolocator
+        self.timeout = timeout
+        self.rate_limiter = RateLimiter(min_interval)
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+
+    @property
+    def is_google(self) -> bool:
+        return self.name == 'google'
+
+    def _call(
+        self,
+        query,
+        max_retries: Optional[int] = None,
+        deadline: Optional[float] = None,
+        operation: str = 'geocode',
+        **kwargs
+    ):
+        max_retries = max_retries or self.max_retries
+        with tracing.span(f"{self.name}.{operation}", query_chars=len(str(query))) as span:
+            for attempt in range(max_retries):
+                span.set_attribute('retries', attempt)
+                self._acquire()
+                try:
+                    self.rate_limiter.acquire()
+                    start = time.perf_counter()
+                    try:
+                        result = getattr(self.geolocator, operation)(query, timeout=self.timeout, **kwargs)
+                    except GeocoderTimedOut:
+                        self.metrics.record(time.perf_counter() - start, error=True)
+                        wait_time = self.backoff_seconds * 2 ** attempt
+                        if deadline is not None and time.monotonic() + wait_time >= deadline:
+                            logger.warning(f"{self.name} timeout for '{query}', no time budget left for retries")
+                            return None
+                        if attempt < max_retries - 1:
+                            logger.warning(
+                                f"{self.name} timeout for '{query}', retrying in {wait_time}s... "
+                                f"(attempt {attempt + 1}/{max_retries})"
+                            )
+                        else:
+                            logger.error(f"{self.name} failed after {max_retries} attempts for: {query}")
+                            return None
+                    except GeocoderServiceError as e:
+                        self.metrics.record(time.perf_counter() - start, error=True)
+                        logger.error(f"{self.name} service error for '{query}': {e}")
+                        return None
+                    except Exception as e:
+                        self.metrics.record(time.perf_counter() - start, error=True)
+                        logger.error(f"Unexpected {self.name} error for '{query}': {e}")
+                        return None
+                    else:
+                        self.metrics.record(time.perf_counter() - start, hit=bool(result))
+                        span.set_attribute('hit', bool(result))
+                        return result
+                finally:
+                    self._release()
+                time.sleep(wait_time)
+            return None
+
+    def search(self, query: str, max_retries: Optional[int] = None, deadline: Optional[float] = None) -> List[Any]:
+        """
+        Busca candidatos restritos/priorizados para MG.
+
+        Args:
+            query: Endereço a buscar.
+            max_retries: Sobrescreve o número de tentativas do backend.
+            deadline: Instante (time.monotonic) após o qual não há novas tentativas.
+
+        Returns:
+            Lista de localizações geopy (pode ser vazia).
+        """
+        if self.is_google:
+            results = self._call(query, max_retries, deadline, exactly_one=False, bounds=MG_BOUNDS, region='br')
+        else:
+            results = self._call(query, max_retries, deadline, exactly_one=False, limit=5, addressdetails=True)
+        return list(results or [])
+
+    def search_unbounded(self, query: str, max_retries: Optional[int] = None, deadline: Optional[float] = None):
+        """Busca sem restrição de região; retorna a melhor localização ou None."""
+        if self.is_google:
+            return self._call(query, max_retries, deadline, region='br')
+        return self._call(query, max_retries, deadline, exactly_one=True, addressdetails=True)
+
+    def reverse(self, lat: float, lng: float, max_retries: Optional[int] = None, deadline: Optional[float] = None):
+        """Reverse geocoding com o mesmo rate limit e retry das buscas; retorna a localização ou None."""
+        if self.is_google:
+            return self._call((lat, lng), max_retries, deadline, operation='reverse', exactly_one=True)
+        return self._call((lat, lng), max_retries, deadline, operation='reverse', exactly_one=True, addressdetails=True)
+
+
+class AsyncGeopyBackend:
+    """
+    Versão asyncio de um GeopyBackend (geopy + AioHTTPAdapter).
+
+    Compartilha nome, rate limiter, timeout, retries e métricas com o backend
+    síncrono; a concorrência é limitada por um asyncio.Semaphore próprio.
+    Backends sem fábrica assíncrona rodam a busca síncrona em uma thread.
+
+    Deve ser criado dentro do event loop que vai usá-lo (a sessão aiohttp
+    fica presa ao loop).
+    """
+
+    def __init__(self, backend: GeopyBackend):
+        """
+        Args:
+            backend: Backend síncrono de referência.
+        """
+        self.backend = backend
+        self.name = backend.name
+        self.metrics = backend.metrics
+        factory = backend.async_geolocator_factory
+        self.geolocator = factory() if factory else None
+        self._semaphore = asyncio.Semaphore(backend.max_concurrency if backend.max_concurrency > 0 else 1000)
+
+    @property
+    def is_google(self) -> bool:
+        return self.backend.is_google
+
+    async def aclose(self):
+        """Fecha a sessão HTTP do geolocator."""
+        if self.geolocator is not None:
+            await self.geolocator.__aexit__(None, None, None)
+
+    async def _call(self, query: str, max_retries: Optional[int] = None, deadline: Optional[float] = None, **kwargs):
+        backend = self.backend
+        max_retries = max_retries or backend.max_retries
+        with tracing.span(f"{self.name}.geocode", query_chars=len(str(query))) as span:
+            for attempt in range(max_retries):
+                span.set_attribute('retries', attempt)
+                async with self._semaphore:
+                    await backend.rate_limiter.acquire_async()
+                    start = time.perf_counter()
+                    try:
+                        result = await self.geolocator.geocode(query, timeout=backend.timeout, **kwargs)
+                    except (GeocoderTimedOut, asyncio.TimeoutError):
+                        self.metrics.record(time.perf_counter() - start, error=True)
+                        wait_time = backend.backoff_seconds * 2 ** attempt
+                        if deadline is not None and time.monotonic() + wait_time >= deadline:
+                            logger.warning(f"{self.name} timeout for '{query}', no time budget left for retries")
+                            return None
+                        if attempt < max_retries - 1:
+                            logger.warning(
+                                f"{self.name} timeout for '{query}', retrying in {wait_time}s... "
+                                f"(attempt {attempt + 1}/{max_retries})"
+                            )
+                        else:
+                            logger.error(f"{self.name} failed after {max_retries} attempts for: {query}")
+                            return None
+                    except GeocoderServiceError as e:
+                        self.metrics.record(time.perf_counter() - start, error=True)
+                        logger.error(f"{self.name} service error for '{query}': {e}")
+                        return None
+                    except Exception as e:
+                        self.metrics.record(time.perf_counter() - start, error=True)
+                        logger.error(f"Unexpected {self.name} error for '{query}': {e}")
+                        return None
+                    else:
+                        self.metrics.record(time.perf_counter() - start, hit=bool(result))
+                        span.set_attribute('hit', bool(result))
+                        return result
+                await asyncio.sleep(wait_time)
+            return None
+
+    async def search(self, query: str, max_retries: Optional[int] = None, deadline: Optional[float] = None) -> List[Any]:
+        """Versão assíncrona de GeopyBackend.search."""
+        if self.geolocator is None:
+            return await asyncio.to_thread(self.backend.search, query, max_retries, deadline)
+        if self.is_google:
+            results = await self._call(query, max_retries, deadline, exactly_one=False, bounds=MG_BOUNDS, region='br')
+        else:
+            results = await self._call(query, max_retries, deadline, exactly_one=False, limit=5, addressdetails=True)
+        return list(results or [])
+
+    async def search_unbounded(self, query: str, max_retries: Optional[int] = None, deadline: Optional[float] = None):
+        """Versão assíncrona de GeopyBackend.search_unbounded."""
+        if self.geolocator is None:
+            return await asyncio.to_thread(self.backend.search_unbounded, query, max_retries, deadline)
+        if self.is_google:
+            return await self._call(query, max_retries, deadline, region='br')
+        return await self._call(query, max_retries, deadline, exactly_one=True, addressdetails=True)
+
+
+def backend_metrics(backends: List[GeocoderBackend]) -> Dict[str, Dict[str, float]]:
+    """Métricas de uma lista de backends, indexadas pelo nome."""
+    return {backend.name: backend.metrics.snapshot() for backend in backends}
@@ -2,14 +2,36 @@
 Geocoding service for address to coordinates conversion.
 """
 import re
+import asyncio
 import logging
-from typing import Optional, Tuple
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, List, Optional, Tuple
+from geopy.adapters import AioHTTPAdapter
 from geopy.geocoders import Nominatim, GoogleV3
-from geopy.exc import GeocoderTimedOut, GeocoderServiceError
 import time
 
+from .distance import haversine
+from .gazetteer import Gazetteer
+from . import tracing
+from .geocoding_backends import (
+    COARSE_VARIANTS, AsyncGeopyBackend, GazetteerBackend, GeopyBackend, MemoryCacheBackend, ReverseCityCache,
+    VariantStats, backend_metrics, city_state_from_raw
+)
+from .region_index import RegionIndex, get_region_index
+
 logger = logging.getLogger(__name__)
 
+# Tipo de logradouro ou rodovia no texto (o endereço aponta para uma rua)
+_STREET_PATTERN = re.compile(
+    r'(?i)(?:^|[\s,])(?:rua|r|av|avenida|alameda|al|travessa|tv|rodovia|rod|estrada|'
+    r'pra[çc]a|largo|beco)\.?\s|\b(?:br|mg)-?\d{2,3}\b'
+)
+
+
+def _has_street(text: str) -> bool:
+    return bool(_STREET_PATTERN.search(text or ''))
+
 
 class GeocodingService:
     """
@@ -21,29 +43,122 @@ class GeocodingService:
         self,
         use_google: bool = False,
         google_api_key: Optional[str] = None,
-        timeout: int = 10
+        timeout: int = 10,
+        gazetteer: Optional[Gazetteer] = None,
+        nominatim_domain: Optional[str] = None,
+        nominatim_scheme: Optional[str] = None,
+        nominatim_min_interval: float = 1.0,
+        nominatim_max_concurrency: int = 1,
+        google_max_concurrency: int = 4,
+        region_index: Optional[RegionIndex] = None,
+        address_budget_seconds: float = 8.0,
+        variant_concurrency: int = 2,
+        hedge_delay_seconds: float = 1.0
     ):
         """
         Inicializa o serviço de geocoding.
         
+        A resolução segue a cadeia: cache em memória → gazetteer local →
+        provedor principal → provedor de fallback (Nominatim, quando o
+        principal é o Google).
+        
         Args:
             use_google: Se True, usa Google Maps API (requer chave).
             google_api_key: Chave da API do Google Maps.
             timeout: Timeout para requisições em segundos.
+            gazetteer: Tabela local de locais conhecidos consultada antes da rede
+                (padrão: apenas os locais semente, sem persistência).
+            nominatim_domain: Host do Nominatim (ex: servidor próprio ou stand-in local).
+            nominatim_scheme: 'https' (padrão) ou 'http'.
+            nominatim_min_interval: Segundos entre requisições ao Nominatim
+                (política do serviço público: 1 req/s).
+            nominatim_max_concurrency: Requisições simultâneas ao Nominatim.
+            google_max_concurrency: Requisições simultâneas ao Google Maps.
+            region_index: Polígonos de MG/RMBH e cidades da RMBH (padrão: índice compartilhado).
+            address_budget_seconds: Tempo máximo gasto com um endereço (todas as
+                variantes, backends e retries); 0 = sem limite.
+            variant_concurrency: Variantes consultadas ao mesmo tempo.
+            hedge_delay_seconds: Espera por uma variante antes de disparar a próxima
+                em paralelo.
         """
         self.timeout = timeout
-        self.use_google = use_google
+        self.regions = region_index if region_index is not None else get_region_index()
+        self.gazetteer = gazetteer if gazetteer is not None else Gazetteer()
+        self.use_google = bool(use_google and google_api_key)
+        
+        # Nominatim é gratuito mas tem rate limits
+        nominatim_kwargs = {'user_agent': "taxi_automation_system", 'timeout': timeout}
+        if nominatim_domain:
+            nominatim_kwargs['domain'] = nominatim_domain
+        if nominatim_scheme:
+            nominatim_kwargs['scheme'] = nominatim_scheme
+        # Versões assíncronas (aiohttp) são criadas sob demanda dentro do event loop
+        async_available = AioHTTPAdapter.is_available
+        nominatim = GeopyBackend(
+            'nominatim', Nominatim(**nominatim_kwargs), timeout=timeout,
+            min_interval=nominatim_min_interval, max_concurrency=nominatim_max_concurrency,
+            async_geolocator_factory=(
+                (lambda: Nominatim(adapter_factory=AioHTTPAdapter, **nominatim_kwargs)) if async_available else None
+            )
+        )
         
-        if use_google and google_api_key:
+        if self.use_google:
             self.geolocator = GoogleV3(api_key=google_api_key, timeout=timeout)
-            logger.info("Geocoding service initialized with Google Maps API")
-        else:
-            # Nominatim é gratuito mas tem rate limits
-            self.geolocator = Nominatim(
-                user_agent="taxi_automation_system",
-                timeout=timeout
+            google = GeopyBackend(
+                'google', self.geolocator, timeout=timeout, max_concurrency=google_max_concurrency,
+                async_geolocator_factory=(
+                    (lambda: GoogleV3(api_key=google_api_key, timeout=timeout, adapter_factory=AioHTTPAdapter))
+                    if async_available else None
+                )
             )
+            self.online_backends = [google, nominatim]
+            logger.info("Geocoding service initialized with Google Maps API (fallback: Nominatim)")
+        else:
+            self.geolocator = nominatim.geolocator
+            self.online_backends = [nominatim]
             logger.info("Geocoding service initialized with Nominatim (OpenStreetMap)")
+        
+        self.cache = MemoryCacheBackend()
+        self.gazetteer_backend = GazetteerBackend(self.gazetteer)
+        self.reverse_cache = ReverseCityCache()
+        
+        self.address_budget_seconds = address_budget_seconds
+        self.variant_concurrency = max(1, variant_concurrency)
+        self.hedge_delay_seconds = hedge_delay_seconds
+        self.variant_stats = VariantStats()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+    
+    def get_backend_metrics(self) -> Dict[str, Dict[str, float]]:
+        """
+        Retorna latência e taxa de acerto de cada backend da cadeia.
+        
+        Returns:
+            Dicionário {nome_do_backend: métricas}.
+        """
+        return backend_metrics([self.cache, self.gazetteer_backend, self.reverse_cache] + self.online_backends)
+    
+    def get_variant_stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        Retorna a taxa de sucesso de cada tipo de variante de endereço.
+        
+        Returns:
+            Dicionário {tipo_de_variante: {attempts, successes, success_rate}}.
+        """
+        return self.variant_stats.snapshot()
+    
+    def _deadline(self) -> Optional[float]:
+        if self.address_budget_seconds and self.address_budget_seconds > 0:
+            return time.monotonic() + self.address_budget_seconds
+        return None
+    
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.variant_concurrency * 4, thread_name_prefix='geocode-variant'
+                )
+            return self._executor
     
     def geocode_address(
         self,
@@ -61,79 +176,352 @@ class GeocodingService:
         Returns:
             Tupla (latitude, longitude) ou None se falhar.
         """
+        local = self._lookup_local(address)
+        if local is not MemoryCacheBackend._MISSING:
+            return local
+        
+        deadline = self._deadline()
+        candidates = self._ranked_candidates(address, self.online_backends)
+        tracing.current_span().set_attributes(source='online', candidates=len(candidates))
+        coords, exhausted, kind = self._search_candidates(address, candidates, max_retries, deadline)
+        return self._finish_lookup(address, coords, exhausted, kind)
+    
+    def _lookup_local(self, address: str):
+        """
+        Resolve o endereço sem rede (cache e gazetteer).
+        
+        Returns:
+            Coordenadas, None (endereço vazio ou falha recente em cache) ou
+            MemoryCacheBackend._MISSING quando é preciso consultar os provedores.
+        """
         if not address or address.strip() == "":
             logger.warning("Empty address provided for geocoding")
             return None
         
-        # Normaliza o endereço e gera variantes para fallback
+        span = tracing.current_span()
+        span.set_attribute('address_chars', len(address))
+        cached = self.cache.get(address)
+        if cached is not MemoryCacheBackend._MISSING:
+            logger.debug(f"Geocoding cache hit for '{address}'")
+            span.set_attributes(source='cache', cache_hit=True)
+            return cached
+        
+        # Gazetteer local: locais conhecidos e endereços já geocodificados
+        place = self.gazetteer_backend.lookup(address)
+        if place:
+            logger.info(f"Geocoded '{address}' from gazetteer ({place.name}) -> ({place.lat:.6f}, {place.lng:.6f})")
+            span.set_attributes(source='gazetteer', cache_hit=True)
+            self.cache.put(address, place.coords)
+            return place.coords
+        span.set_attribute('cache_hit', False)
+        return MemoryCacheBackend._MISSING
+    
+    def _ranked_candidates(self, address: str, backends: list) -> List[tuple]:
+        """Normaliza o endereço e gera (backend, tipo, consulta), as variantes mais bem-sucedidas primeiro."""
         normalized_address = self._normalize_address(address)
-        variants = [normalized_address]
-        variants += self._generate_address_variants(normalized_address)
+        variants = self.variant_stats.rank(self._address_variants(normalized_address))
+        return [(backend, kind, query) for backend in backends for kind, query in variants]
+    
+    def _finish_lookup(
+        self,
+        address: str,
+        coords: Optional[Tuple[float, float]],
+        exhausted: bool,
+        kind: Optional[str] = None
+    ) -> Optional[Tuple[float, float]]:
+        """
+        Aprende/cacheia o resultado de uma busca online.
+        
+        Só resultados de variantes com o endereço inteiro vão para o
+        gazetteer: um de COARSE_VARIANTS (centro da cidade) seria servido
+        para sempre como se fosse o endereço exato.
+        """
+        if coords:
+            if kind not in COARSE_VARIANTS:
+                self.gazetteer.learn(address, coords)
+            self.cache.put(address, coords)
+            return coords
 
-        for idx, candidate in enumerate(variants):
-            for attempt in range(max_retries):
-                try:
-                    # Para Google Maps, usar bounds de Minas Gerais
-                    if self.use_google:
-                        location = self.geolocator.geocode(
-                            candidate,
-                            bounds=[(-23.0, -51.0), (-14.0, -39.0)],  # Bounds aproximados de MG
-                            region='br'
-                        )
-                    else:
-                        # Nominatim: buscar múltiplos resultados e filtrar por MG
-                        locations = self.geolocator.geocode(
-                            candidate,
-                            exactly_one=False,
-                            limit=5,
-                            addressdetails=True
-                        )
-                        
-                        if locations:
-                            # Filtrar resultados para Minas Gerais
-                            location = self._filter_by_minas_gerais(locations, candidate)
-                        else:
-                            location = None
+        if exhausted:
+            logger.warning(f"No results found for address after trying variants: {address}")
+            self.cache.put(address, None)
+        else:
+            logger.warning(
+                f"Geocoding budget of {self.address_budget_seconds:.1f}s exhausted for address: {address}"
+            )
+        return None
+    
+    def _search_candidates(
+        self,
+        address: str,
+        candidates: List[tuple],
+        max_retries: int,
+        deadline: Optional[float]
+    ) -> Tuple[Optional[Tuple[float, float]], bool, Optional[str]]:
+        """
+        Consulta as variantes em ordem de prioridade até o primeiro resultado em MG.
+        
+        A próxima variante é disparada quando uma consulta termina sem
+        resultado válido ou quando a mais recente passa de hedge_delay_seconds
+        sem resposta (até variant_concurrency em paralelo).
+        
+        Args:
+            address: Endereço original (para log).
+            candidates: Lista de (backend, tipo_de_variante, consulta).
+            max_retries: Tentativas por consulta em caso de timeout.
+            deadline: Instante limite (time.monotonic) ou None.
+            
+        Returns:
+            Tupla (coordenadas ou None, True se todas as variantes foram
+            consultadas, tipo da variante que resolveu ou None).
+        """
+        pending = list(candidates)
+        if self.variant_concurrency == 1:
+            for backend, kind, query in pending:
+                if deadline is not None and time.monotonic() >= deadline:
+                    return None, False, None
+                coords = self._try_candidate(address, backend, kind, query, max_retries, deadline)
+                if coords:
+                    return coords, True, kind
+            return None, True, None
 
-                    if location:
-                        lat, lng = location.latitude, location.longitude
-                        
-                        # Validação final: verificar se está em Minas Gerais (bounds aproximados)
-                        if not self._is_in_minas_gerais(lat, lng):
-                            logger.warning(f"Location ({lat:.6f}, {lng:.6f}) is outside Minas Gerais, skipping")
-                            break  # tenta próxima variante
-                        
-                        logger.info(f"Geocoded '{address}' using '{candidate}' -> ({lat:.6f}, {lng:.6f})")
-                        return (lat, lng)
-                    else:
-                        logger.debug(f"No results for candidate: '{candidate}'")
-                        break  # tenta próxima variante
+        executor = self._get_executor()
+        running = {}
+        last_launch = 0.0
+        while pending or running:
+            now = time.monotonic()
+            if deadline is not None and now >= deadline:
+                return None, False, None
+            can_launch = pending and len(running) < self.variant_concurrency
+            if can_launch and (not running or now - last_launch >= self.hedge_delay_seconds):
+                backend, kind, query = pending.pop(0)
+                future = executor.submit(
+                    tracing.bind_context(self._try_candidate), address, backend, kind, query, max_retries, deadline
+                )
+                running[future] = (backend.name, kind)
+                last_launch = now
+                continue
 
-                except GeocoderTimedOut:
-                    if attempt < max_retries - 1:
-                        wait_time = 2 ** attempt
-                        logger.warning(
-                            f"Geocoding timeout for '{candidate}', retrying in {wait_time}s... (attempt {attempt + 1}/{max_retries})"
-                        )
-                        time.sleep(wait_time)
-                    else:
-                        logger.error(f"Geocoding failed after {max_retries} attempts for candidate: {candidate}")
-                        break
+            timeout = None if deadline is None else deadline - now
+            if can_launch:
+                hedge_wait = self.hedge_delay_seconds - (now - last_launch)
+                timeout = hedge_wait if timeout is None else min(timeout, hedge_wait)
+            done, _ = wait(list(running), timeout=max(timeout, 0) if timeout is not None else None,
+                           return_when=FIRST_COMPLETED)
+            for future in done:
+                _, kind = running.pop(future)
+                coords = future.result()
+                if coords:
+                    # Consultas ainda em voo terminam em segundo plano (limitadas pelo deadline)
+                    return coords, True, kind
+        return None, True, None
+    
+    def _try_candidate(
+        self,
+        address: str,
+        backend: GeopyBackend,
+        kind: str,
+        query: str,
+        max_retries: int,
+        deadline: Optional[float]
+    ) -> Optional[Tuple[float, float]]:
+        """Consulta uma variante em um backend e valida o resultado (MG)."""
+        try:
+            # Nominatim: múltiplos resultados filtrados por MG; Google: bounds de MG
+            locations = backend.search(query, max_retries, deadline)
+        except Exception as e:
+            logger.error(f"Error geocoding candidate '{query}' ({backend.name}): {e}")
+            locations = []
+        return self._accept_candidate(address, backend.name, kind, query, locations)
+    
+    def _accept_candidate(
+        self,
+        address: str,
+        backend_name: str,
+        kind: str,
+        query: str,
+        locations: list
+    ) -> Optional[Tuple[float, float]]:
+        """Escolhe o melhor resultado em MG e registra o desfecho da variante."""
+        location = self._filter_by_minas_gerais(locations, query)
+        if not location:
+            logger.debug(f"No results for candidate: '{query}' ({backend_name})")
+            self.variant_stats.record(kind, False)
+            return None
 
-                except GeocoderServiceError as e:
-                    logger.error(f"Geocoding service error for '{candidate}': {e}")
-                    break
+        lat, lng = location.latitude, location.longitude
+        
+        # Validação final: verificar se está em Minas Gerais
+        if not self._is_in_minas_gerais(lat, lng):
+            logger.warning(f"Location ({lat:.6f}, {lng:.6f}) is outside Minas Gerais, skipping")
+            self.variant_stats.record(kind, False)
+            return None
+        
+        # Endereço com rua resolvido por uma variante que perdeu a rua: é o
+        # centro da cidade/estado, não o ponto de coleta
+        if kind in COARSE_VARIANTS and _has_street(address) and not _has_street(query):
+            logger.warning(f"Result for '{query}' ({kind}) is too coarse for street address '{address}', skipping")
+            self.variant_stats.record(kind, False)
+            return None
+        
+        self.variant_stats.record(kind, True)
+        logger.info(f"Geocoded '{address}' using '{query}' ({backend_name}, {kind}) -> ({lat:.6f}, {lng:.6f})")
+        
+        # O resultado já traz cidade/UF: alimenta o cache reverso sem custo extra
+        city_state = city_state_from_raw(getattr(location, 'raw', None))
+        if city_state:
+            self.reverse_cache.put(lat, lng, city_state)
+        return (lat, lng)
+    
+    async def geocode_address_async(
+        self,
+        address: str,
+        max_retries: int = 3,
+        backends: Optional[List[AsyncGeopyBackend]] = None
+    ) -> Optional[Tuple[float, float]]:
+        """
+        Versão asyncio de geocode_address (geopy + aiohttp).
+        
+        Mesma cadeia, ranking de variantes, hedge e orçamento de tempo; backoff
+        e rate limit não bloqueiam o event loop.
+        
+        Args:
+            address: Endereço completo em texto.
+            max_retries: Número máximo de tentativas em caso de timeout.
+            backends: Backends assíncronos já abertos (uso interno de
+                geocode_batch_async); None = abre uma sessão só para esta chamada.
+            
+        Returns:
+            Tupla (latitude, longitude) ou None se falhar.
+        """
+        local = self._lookup_local(address)
+        if local is not MemoryCacheBackend._MISSING:
+            return local
+        
+        owned = backends is None
+        if owned:
+            backends = self._open_async_backends()
+        try:
+            deadline = self._deadline()
+            candidates = self._ranked_candidates(address, backends)
+            coords, exhausted, kind = await self._search_candidates_async(address, candidates, max_retries, deadline)
+        finally:
+            if owned:
+                await self._close_async_backends(backends)
+        return self._finish_lookup(address, coords, exhausted, kind)
+    
+    async def geocode_batch_async(
+        self,
+        addresses: List[str],
+        max_concurrency: int = 16
+    ) -> Dict[str, Optional[Tuple[float, float]]]:
+        """
+        Geocodifica vários endereços em paralelo num único event loop.
+        
+        As requisições se sobrepõem até o limite de cada provedor (rate
+        limiter e concorrência por backend); endereços repetidos são
+        resolvidos uma vez.
+        
+        Args:
+            addresses: Lista de endereços.
+            max_concurrency: Endereços em andamento ao mesmo tempo.
+            
+        Returns:
+            Dicionário mapeando endereços para coordenadas.
+        """
+        unique = list(dict.fromkeys(addresses))
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
+        backends = self._open_async_backends()
 
+        async def resolve(address: str):
+            async with semaphore:
+                try:
+                    return await self.geocode_address_async(address, backends=backends)
                 except Exception as e:
-                    logger.error(f"Unexpected error in geocoding '{candidate}': {e}")
-                    break
+                    logger.error(f"Error geocoding '{address}': {e}")
+                    return None
 
-            # small delay between variant attempts for Nominatim
-            if not self.use_google:
-                time.sleep(0.5)
+        try:
+            coords = await asyncio.gather(*(resolve(address) for address in unique))
+        finally:
+            await self._close_async_backends(backends)
 
-        logger.warning(f"No results found for address after trying variants: {address}")
-        return None
+        results = dict(zip(unique, coords))
+        success_count = sum(1 for v in results.values() if v is not None)
+        logger.info(f"Batch geocoding completed: {success_count}/{len(unique)} successful")
+        return results
+    
+    def _open_async_backends(self) -> List[AsyncGeopyBackend]:
+        return [AsyncGeopyBackend(backend) for backend in self.online_backends]
+    
+    async def _close_async_backends(self, backends: List[AsyncGeopyBackend]):
+        for backend in backends:
+            try:
+                await backend.aclose()
+            except Exception as e:
+                logger.debug(f"Error closing {backend.name} session: {e}")
+    
+    async def _search_candidates_async(
+        self,
+        address: str,
+        candidates: List[tuple],
+        max_retries: int,
+        deadline: Optional[float]
+    ) -> Tuple[Optional[Tuple[float, float]], bool, Optional[str]]:
+        """Versão asyncio de _search_candidates (mesma política de hedge)."""
+        pending = list(candidates)
+        running = {}
+        last_launch = 0.0
+        try:
+            while pending or running:
+                now = time.monotonic()
+                if deadline is not None and now >= deadline:
+                    return None, False, None
+                can_launch = pending and len(running) < self.variant_concurrency
+                if can_launch and (not running or now - last_launch >= self.hedge_delay_seconds):
+                    backend, kind, query = pending.pop(0)
+                    task = asyncio.ensure_future(
+                        self._try_candidate_async(address, backend, kind, query, max_retries, deadline)
+                    )
+                    running[task] = (backend.name, kind)
+                    last_launch = now
+                    continue
+
+                timeout = None if deadline is None else deadline - now
+                if can_launch:
+                    hedge_wait = self.hedge_delay_seconds - (now - last_launch)
+                    timeout = hedge_wait if timeout is None else min(timeout, hedge_wait)
+                done, _ = await asyncio.wait(
+                    list(running), timeout=max(timeout, 0) if timeout is not None else None,
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    _, kind = running.pop(task)
+                    coords = task.result()
+                    if coords:
+                        return coords, True, kind
+            return None, True, None
+        finally:
+            # Diferente das threads, tarefas pendentes podem ser canceladas
+            for task in running:
+                task.cancel()
+    
+    async def _try_candidate_async(
+        self,
+        address: str,
+        backend: AsyncGeopyBackend,
+        kind: str,
+        query: str,
+        max_retries: int,
+        deadline: Optional[float]
+    ) -> Optional[Tuple[float, float]]:
+        """Versão asyncio de _try_candidate."""
+        try:
+            locations = await backend.search(query, max_retries, deadline)
+        except Exception as e:
+            logger.error(f"Error geocoding candidate '{query}' ({backend.name}): {e}")
+            locations = []
+        return self._accept_candidate(address, backend.name, kind, query, locations)
     
     def geocode_address_fallback(
         self,
@@ -156,68 +544,68 @@ class GeocodingService:
             logger.warning("Empty address provided for fallback geocoding")
             return None
         
+        place = self.gazetteer_backend.lookup(address)
+        if place:
+            logger.info(f"Fallback geocoded '{address}' from gazetteer ({place.name})")
+            return place.coords
+        
+        deadline = self._deadline()
         normalized_address = self._normalize_address(address)
         
-        for attempt in range(max_retries):
-            try:
-                # Geocoding SEM restrições de bounds
-                if self.use_google:
-                    location = self.geolocator.geocode(normalized_address, region='br')
-                else:
-                    location = self.geolocator.geocode(
-                        normalized_address,
-                        exactly_one=True,
-                        addressdetails=True
-                    )
-
-                if location:
-                    lat, lng = location.latitude, location.longitude
-                    logger.info(f"Fallback geocoded '{address}' -> ({lat:.6f}, {lng:.6f})")
-                    return (lat, lng)
-                else:
-                    logger.debug(f"No results for fallback geocoding: '{address}'")
-                    return None
-
-            except GeocoderTimedOut:
-                if attempt < max_retries - 1:
-                    wait_time = 2 ** attempt
-                    logger.warning(
-                        f"Fallback geocoding timeout, retrying in {wait_time}s... (attempt {attempt + 1}/{max_retries})"
-                    )
-                    time.sleep(wait_time)
-                else:
-                    logger.error(f"Fallback geocoding failed after {max_retries} attempts")
-                    return None
-
-            except Exception as e:
-                logger.error(f"Unexpected error in fallback geocoding '{address}': {e}")
-                return None
+        for backend in self.online_backends:
+            if deadline is not None and time.monotonic() >= deadline:
+                logger.warning(f"Fallback geocoding budget exhausted for address: {address}")
+                break
+            location = backend.search_unbounded(normalized_address, max_retries, deadline)
+            if location:
+                lat, lng = location.latitude, location.longitude
+                logger.info(f"Fallback geocoded '{address}' ({backend.name}) -> ({lat:.6f}, {lng:.6f})")
+                return (lat, lng)
+            logger.debug(f"No results for fallback geocoding: '{address}' ({backend.name})")
 
         return None
     
     def geocode_batch(
         self,
         addresses: list[str],
-        delay: float = 1.0
+        delay: float = 1.0,
+        max_workers: int = 16
     ) -> dict[str, Optional[Tuple[float, float]]]:
         """
         Geocodifica múltiplos endereços em batch.
         
+        Fora de um event loop usa geocode_batch_async: as requisições se
+        sobrepõem até o limite de cada provedor, e o espaçamento exigido
+        (ex: 1 req/s do Nominatim) fica com o rate limiter do backend.
+        
         Args:
             addresses: Lista de endereços.
-            delay: Delay entre requisições em segundos (para respeitar rate limits).
+            delay: Delay entre requisições em segundos; só usado no modo
+                sequencial (max_workers=1 dentro de um event loop em execução).
+            max_workers: Endereços resolvidos em paralelo.
             
         Returns:
             Dicionário mapeando endereços para coordenadas.
         """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self.geocode_batch_async(addresses, max_concurrency=max_workers))
+        
+        # Chamado de dentro de um event loop: threads ou modo sequencial
         results = {}
         
-        for i, address in enumerate(addresses):
-            results[address] = self.geocode_address(address)
-            
-            # Delay entre requisições (importante para Nominatim)
-            if i < len(addresses) - 1 and not self.use_google:
-                time.sleep(delay)
+        if max_workers > 1:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                for address, coords in zip(addresses, executor.map(self.geocode_address, addresses)):
+                    results[address] = coords
+        else:
+            for i, address in enumerate(addresses):
+                results[address] = self.geocode_address(address)
+                
+                # Delay entre requisições (importante para Nominatim)
+                if i < len(addresses) - 1 and not self.use_google:
+                    time.sleep(delay)
         
         success_count = sum(1 for v in results.values() if v is not None)
         logger.info(
@@ -241,20 +629,55 @@ class GeocodingService:
         Returns:
             Endereço em texto ou None se falhar.
         """
-        try:
-            location = self.geolocator.reverse((lat, lng), exactly_one=True)
+        location = self.online_backends[0].reverse(lat, lng)
+        if location:
+            address = location.address
+            logger.info(f"Reverse geocoded ({lat}, {lng}) -> '{address}'")
+            city_state = city_state_from_raw(getattr(location, 'raw', None))
+            if city_state:
+                self.reverse_cache.put(lat, lng, city_state)
+            return address
+        logger.warning(f"No address found for coordinates ({lat}, {lng})")
+        return None
+    
+    def reverse_geocode_city(
+        self,
+        lat: float,
+        lng: float,
+        max_retries: int = 1
+    ) -> Optional[Tuple[str, str]]:
+        """
+        Retorna (cidade, UF) das coordenadas, com cache por célula de ~1 km.
+        
+        Após a primeira consulta de uma célula (ou de um geocoding direto que
+        caiu nela), a resposta sai do cache sem rede.
+        
+        Args:
+            lat: Latitude.
+            lng: Longitude.
+            max_retries: Tentativas em caso de timeout (baixo: usado no despacho).
             
-            if location:
-                address = location.address
-                logger.info(f"Reverse geocoded ({lat}, {lng}) -> '{address}'")
-                return address
-            else:
-                logger.warning(f"No address found for coordinates ({lat}, {lng})")
-                return None
-                
-        except Exception as e:
-            logger.error(f"Error in reverse geocoding ({lat}, {lng}): {e}")
+        Returns:
+            Tupla (cidade, sigla do estado) ou None se não for possível determinar.
+        """
+        if lat is None or lng is None:
             return None
+        cached = self.reverse_cache.get(lat, lng)
+        if cached:
+            return cached
+        
+        deadline = self._deadline()
+        for backend in self.online_backends:
+            location = backend.reverse(lat, lng, max_retries, deadline)
+            city_state = city_state_from_raw(getattr(location, 'raw', None)) if location else None
+            if city_state:
+                logger.info(f"Reverse geocoded ({lat:.5f}, {lng:.5f}) -> {city_state[0]}/{city_state[1]} ({backend.name})")
+                self.reverse_cache.put(lat, lng, city_state)
+                return city_state
+        
+        # Falhas não entram no cache (podem ser erros transitórios de rede)
+        logger.warning(f"Could not determine city/state for ({lat:.5f}, {lng:.5f})")
+        return None
     
     def _normalize_address(self, address: str) -> str:
         """
@@ -285,33 +708,17 @@ class GeocodingService:
         # Se há ' - ' com quebras estranhas, normaliza para vírgula
         normalized = normalized.replace(' - ', ', ')
 
-        # Expansões simples para empresas/locais conhecidos
-        known_mappings = {
-            'Delp Engenharia Vespasiano': 'Av. das Nações, 999, Distrito Industrial, Vespasiano, MG, Brasil',
-            'Delp Engenharia': 'Av. das Nações, 999, Distrito Industrial, Vespasiano, MG, Brasil',
-            'Aeroporto Confins': 'Aeroporto Internacional Tancredo Neves - Confins, MG, Brasil'
-        }
-        for k, v in known_mappings.items():
-            if k.lower() in normalized.lower():
-                return v
+        # Expansões para empresas/locais conhecidos (gazetteer, ver config/known_places.py)
+        site = self.gazetteer.match_site(normalized)
+        if site and site.address:
+            return site.address
 
         # CRÍTICO: Se não menciona estado explicitamente, adiciona Minas Gerais
         lower = normalized.lower()
         has_state = any(x in lower for x in ['mg', 'minas gerais', 'minas-gerais'])
         
-        # Lista de cidades da região metropolitana de BH
-        metro_bh_cities = [
-            'belo horizonte', 'belo-horizonte', 'betim', 'contagem', 'nova lima',
-            'ribeirão das neves', 'sabará', 'santa luzia', 'vespasiano',
-            'ibirité', 'lagoa santa', 'pedro leopoldo', 'sete lagoas', 'brumadinho',
-            'esmeraldas', 'florestal', 'igarapé', 'mateus leme', 'rio acima',
-            'confins', 'matozinhos', 'raposos', 'nova união', 'taquaraçu de minas',
-            'itaguara', 'juatuba', 'mário campos', 'são joaquim de bicas',
-            'itatiaiuçu', 'fortuna de minas', 'prudente de morais', 'funilândia',
-            'capim branco', 'jaboticatubas', 'baldim'
-        ]
-        
-        has_city = any(city in lower for city in metro_bh_cities)
+        # Cidades da região metropolitana de BH (ver config/regions.py)
+        has_city = self.regions.mentions_bh_metro_city(normalized)
         
         if not has_state:
             # Se tem cidade conhecida da região, adiciona apenas MG
@@ -329,7 +736,7 @@ class GeocodingService:
     def _is_in_minas_gerais(self, lat: float, lng: float) -> bool:
         """
         Verifica se coordenadas estão dentro de Minas Gerais.
-        Usa bounding box aproximado do estado.
+        Usa o polígono simplificado da divisa do estado (índice em grade).
         
         Args:
             lat: Latitude.
@@ -338,29 +745,7 @@ class GeocodingService:
         Returns:
             True se está em MG, False caso contrário.
         """
-        # Bounding box de Minas Gerais (aproximado)
-        MG_MIN_LAT = -22.9
-        MG_MAX_LAT = -14.2
-        MG_MIN_LNG = -51.0
-        MG_MAX_LNG = -39.8
-        
-        # Região metropolitana de BH (prioridade)
-        BH_MIN_LAT = -20.2
-        BH_MAX_LAT = -19.4
-        BH_MIN_LNG = -44.2
-        BH_MAX_LNG = -43.7
-        
-        # Verifica se está na região de BH (prioridade máxima)
-        if (BH_MIN_LAT <= lat <= BH_MAX_LAT and 
-            BH_MIN_LNG <= lng <= BH_MAX_LNG):
-            return True
-        
-        # Verifica se está em MG
-        if (MG_MIN_LAT <= lat <= MG_MAX_LAT and 
-            MG_MIN_LNG <= lng <= MG_MAX_LNG):
-            return True
-        
-        return False
+        return self.regions.in_minas_gerais(lat, lng)
     
     def _filter_by_minas_gerais(self, locations: list, query: str):
         """
@@ -417,36 +802,36 @@ class GeocodingService:
             return locations[0] if locations else None
     
     def _is_in_bh_metro(self, lat: float, lng: float) -> bool:
-        """Verifica se está na região metropolitana de BH."""
-        BH_MIN_LAT = -20.2
-        BH_MAX_LAT = -19.4
-        BH_MIN_LNG = -44.2
-        BH_MAX_LNG = -43.7
-        
-        return (BH_MIN_LAT <= lat <= BH_MAX_LAT and 
-                BH_MIN_LNG <= lng <= BH_MAX_LNG)
+        """Verifica se está na região metropolitana de BH (polígono da RMBH)."""
+        return self.regions.in_bh_metro(lat, lng)
 
-    def _generate_address_variants(self, normalized: str) -> list:
+    def _address_variants(self, normalized: str) -> List[Tuple[str, str]]:
         """
-        Gera variantes mais simples do endereço para aumentar chances de geocoding.
-        Estratégias:
-        - Remover conteúdo entre parênteses
-        - Manter somente logradouro + número + cidade
-        - Remover termos como 'Bairro' e 'Nº'
-        - Tentar versão curta com apenas logradouro + cidade
+        Variantes do endereço, cada uma com o tipo usado no ranking de sucesso.
+        
+        Tipos:
+        - full: endereço normalizado completo
+        - no_paren: sem conteúdo entre parênteses
+        - simple: sem termos como 'Bairro' e 'Nº'
+        - street_city: logradouro + número/cidade (duas primeiras partes)
+        - tail: últimas duas partes (geralmente cidade e estado)
+        
+        Args:
+            normalized: Endereço já normalizado.
+            
+        Returns:
+            Lista de (tipo, consulta) sem consultas repetidas, na ordem padrão.
         """
-        variants = []
+        variants = [('full', normalized)]
 
         # Strip parentheses content
         no_paren = re.sub(r"\([^\)]*\)", '', normalized).strip()
-        if no_paren != normalized:
-            variants.append(no_paren)
+        variants.append(('no_paren', no_paren))
 
         # Remove tokens como 'Bairro', 'Nº', 'Número'
         simple = re.sub(r'(?i)\b(Bairro|Bairro:|Nº|Nº:|Número|Número:)\b', '', no_paren)
         simple = re.sub(r'\s{2,}', ' ', simple).strip()
-        if simple and simple not in variants:
-            variants.append(simple)
+        variants.append(('simple', simple))
 
         # Try just street + city (split by comma)
         parts = [p.strip() for p in simple.split(',') if p.strip()]
@@ -454,14 +839,25 @@ class GeocodingService:
             short = ', '.join(parts[:2])
             if 'brasil' not in short.lower():
                 short += ', Brasil'
-            variants.append(short)
+            variants.append(('street_city', short))
 
-        # Last-resort: keep only last two parts (often city and state)
-        if len(parts) >= 2:
-            tail = ', '.join(parts[-2:])
-            variants.append(tail)
+            # Last-resort: keep only last two parts (often city and state)
+            variants.append(('tail', ', '.join(parts[-2:])))
+
+        seen = set()
+        unique = []
+        for kind, query in variants:
+            if query and query not in seen:
+                seen.add(query)
+                unique.append((kind, query))
+        return unique
 
-        return variants
+    def _generate_address_variants(self, normalized: str) -> list:
+        """
+        Gera variantes mais simples do endereço para aumentar chances de geocoding
+        (sem o próprio endereço normalizado; ver _address_variants).
+        """
+        return [query for kind, query in self._address_variants(normalized) if kind != 'full']
     
     def calculate_distance(
         self,
@@ -480,24 +876,4 @@ class GeocodingService:
         Returns:
             Distância em quilômetros.
         """
-        from math import radians, sin, cos, sqrt, atan2
-        
-        # Raio da Terra em km
-        R = 6371.0
-        
-        # Converte para radianos
-        lat1_rad = radians(lat1)
-        lng1_rad = radians(lng1)
-        lat2_rad = radians(lat2)
-        lng2_rad = radians(lng2)
-        
-        # Diferenças
-        dlat = lat2_rad - lat1_rad
-        dlng = lng2_rad - lng1_rad
-        
-        # Fórmula de Haversine
-        a = sin(dlat / 2)**2 + cos(lat1_rad) * cos(lat2_rad) * sin(dlng / 2)**2
-        c = 2 * atan2(sqrt(a), sqrt(1 - a))
-        
-        distance = R * c
-        return distance
+        return haversine(lat1, lng1, lat2, lng2)
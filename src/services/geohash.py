@@ -0,0 +1,125 @@
+"""
+Geohash encoding utilities for spatial bucketing.
+"""
+from typing import List, Tuple
+
+import numpy as np
+
+BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+_BASE32_INDEX = {c: i for i, c in enumerate(BASE32)}
+_BASE32_TABLE = np.array(list(BASE32))
+
+
+def _bit_counts(precision: int) -> Tuple[int, int]:
+    """Retorna (bits de longitude, bits de latitude) para a precisão dada."""
+    total = precision * 5
+    return (total + 1) // 2, total // 2
+
+
+def encode(lat: float, lng: float, precision: int = 6) -> str:
+    """
+    Codifica coordenadas em geohash.
+
+    Args:
+        lat: Latitude.
+        lng: Longitude.
+        precision: Número de caracteres (6 ≈ 1.2km x 0.6km).
+
+    Returns:
+        String geohash.
+    """
+    return str(encode_many(np.array([lat]), np.array([lng]), precision)[0])
+
+
+def encode_many(lats, lngs, precision: int = 6) -> np.ndarray:
+    """
+    Codifica arrays de coordenadas em geohash de forma vetorizada.
+
+    Args:
+        lats: Sequência/array de latitudes.
+        lngs: Sequência/array de longitudes.
+        precision: Número de caracteres do geohash.
+
+    Returns:
+        Array NumPy de strings geohash.
+    """
+    lats = np.asarray(lats, dtype=np.float64)
+    lngs = np.asarray(lngs, dtype=np.float64)
+    lng_bits, lat_bits = _bit_counts(precision)
+
+    # Quantiza cada eixo em 2^bits células (bisseções sucessivas do geohash)
+    lng_cells = np.clip(((lngs + 180.0) / 360.0 * (1 << lng_bits)).astype(np.int64), 0, (1 << lng_bits) - 1)
+    lat_cells = np.clip(((lats + 90.0) / 180.0 * (1 << lat_bits)).astype(np.int64), 0, (1 << lat_bits) - 1)
+
+    # Intercala bits: longitude nas posições pares, latitude nas ímpares (MSB primeiro)
+    code = np.zeros(lats.shape, dtype=np.int64)
+    lng_pos, lat_pos = lng_bits - 1, lat_bits - 1
+    for bit in range(precision * 5):
+        code <<= 1
+        if bit % 2 == 0:
+            code |= (lng_cells >> lng_pos) & 1
+            lng_pos -= 1
+        else:
+            code |= (lat_cells >> lat_pos) & 1
+            lat_pos -= 1
+
+    result = _BASE32_TABLE[(code >> (5 * (precision - 1))) & 31]
+    for i in range(1, precision):
+        result = np.char.add(result, _BASE32_TABLE[(code >> (5 * (precision - 1 - i))) & 31])
+    return result
+
+
+def decode_bbox(geohash: str) -> Tuple[float, float, float, float]:
+    """
+    Decodifica um geohash para sua caixa delimitadora.
+
+    Returns:
+        Tupla (min_lat, min_lng, max_lat, max_lng).
+    """
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    is_lng = True
+    for char in geohash:
+        value = _BASE32_INDEX[char]
+        for shift in range(4, -1, -1):
+            rng = lng_range if is_lng else lat_range
+            mid = (rng[0] + rng[1]) / 2
+            if (value >> shift) & 1:
+                rng[0] = mid
+            else:
+                rng[1] = mid
+            is_lng = not is_lng
+    return lat_range[0], lng_range[0], lat_range[1], lng_range[1]
+
+
+def decode(geohash: str) -> Tuple[float, float]:
+    """Retorna o centro (lat, lng) da célula do geohash."""
+    min_lat, min_lng, max_lat, max_lng = decode_bbox(geohash)
+    return (min_lat + max_lat) / 2, (min_lng + max_lng) / 2
+
+
+def neighbors(geohash: str) -> List[str]:
+    """
+    Retorna as 8 células vizinhas de mesmo tamanho.
+
+    Args:
+        geohash: Célula central.
+
+    Returns:
+        Lista com os geohashes vizinhos (sem a célula central).
+    """
+    min_lat, min_lng, max_lat, max_lng = decode_bbox(geohash)
+    dlat, dlng = max_lat - min_lat, max_lng - min_lng
+    lat, lng = (min_lat + max_lat) / 2, (min_lng + max_lng) / 2
+
+    result = []
+    for i in (-1, 0, 1):
+        for j in (-1, 0, 1):
+            if i == 0 and j == 0:
+                continue
+            n_lat = lat + i * dlat
+            if not -90.0 <= n_lat <= 90.0:
+                continue
+            n_lng = (lng + j * dlng + 180.0) % 360.0 - 180.0
+            result.append(encode(n_lat, n_lng, len(geohash)))
+    return result
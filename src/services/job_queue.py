@@ -0,0 +1,150 @@
+"""
+Fila de trabalho durável do pipeline, na tabela jobs do SQLite.
+
+Os e-mails lidos do IMAP viram jobs antes de qualquer processamento; o
+trabalho deixa de existir só em memória durante o ciclo:
+- enqueue é idempotente por (kind, key), então reler o mesmo e-mail não
+  duplica trabalho;
+- claim reserva jobs com um único UPDATE ... RETURNING e um lease
+  (dono + expiração), então vários processos no mesmo banco dividem a fila
+  sem pegar o mesmo job;
+- um processo que cai deixa seus jobs 'running'; quando o lease expira eles
+  voltam a ser reservados, por ele ou por outro processo;
+- falhas voltam para a fila com backoff exponencial até `max_attempts`,
+  depois ficam em 'dead' para inspeção.
+"""
+import logging
+import os
+import socket
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+JOB_STATES = ('queued', 'running', 'done', 'dead')
+
+
+@dataclass
+class Job:
+    """Job reservado por este processo."""
+    id: int
+    kind: str
+    key: str
+    payload: dict = field(default_factory=dict)
+    attempts: int = 1
+    max_attempts: int = 5
+
+
+def default_owner() -> str:
+    """Identificador do processo para o lease (host:pid:sufixo aleatório)."""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+
+class JobQueue:
+    """Fila durável com claim atômico e lease sobre o DatabaseManager."""
+
+    def __init__(
+        self,
+        db,
+        owner: Optional[str] = None,
+        lease_seconds: float = 300,
+        max_attempts: int = 5,
+        retry_base_seconds: float = 30,
+        retry_max_seconds: float = 3600
+    ):
+        """
+        Args:
+            db: DatabaseManager.
+            owner: Identificador deste processo (padrão: default_owner()).
+            lease_seconds: Tempo sem renovação após o qual um job reservado
+                volta a ser elegível.
+            max_attempts: Tentativas por job antes de 'dead'.
+            retry_base_seconds: Espera antes da 2ª tentativa (dobra a cada falha).
+            retry_max_seconds: Teto da espera entre tentativas.
+        """
+        self.db = db
+        self.owner = owner or default_owner()
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+        self.retry_max_seconds = retry_max_seconds
+
+    @classmethod
+    def from_env(cls, db, env=None, owner: Optional[str] = None) -> 'JobQueue':
+        """Cria a partir das variáveis JOB_* (dict-like, padrão os.environ)."""
+        env = os.environ if env is None else env
+        return cls(
+            db,
+            owner=owner,
+            lease_seconds=float(env.get('JOB_LEASE_SECONDS', 300)),
+            max_attempts=int(env.get('JOB_MAX_ATTEMPTS', 5)),
+            retry_base_seconds=float(env.get('JOB_RETRY_BASE_SECONDS', 30)),
+            retry_max_seconds=float(env.get('JOB_RETRY_MAX_MINUTES', 60)) * 60
+        )
+
+    def enqueue(self, kind: str, key: str, payload: dict, run_at: Optional[float] = None) -> bool:
+        """Enfileira um job; False se (kind, key) já estava na fila (em qualquer estado)."""
+        return self.db.enqueue_job(kind, key, payload, self.max_attempts, run_at=run_at)
+
+    def contains(self, kind: str, key: str) -> bool:
+        return self.db.has_job(kind, key)
+
+    def claim(self, kinds: Sequence[str], limit: int = 0) -> List[Job]:
+        """
+        Reserva os próximos jobs elegíveis dos tipos informados.
+
+        Jobs retomados de um lease expirado que já esgotaram as tentativas
+        (ex: e-mail que derruba o processo) vão para 'dead' em vez de voltar.
+
+        Args:
+            kinds: Tipos de job aceitos.
+            limit: Máximo de jobs (0 = todos os elegíveis).
+
+        Returns:
+            Jobs reservados, em ordem de chegada.
+        """
+        jobs = []
+        for row in self.db.claim_jobs(self.owner, self.lease_seconds, list(kinds), limit):
+            job = Job(**row)
+            if job.attempts > job.max_attempts:
+                logger.error(f"Job {job.kind}:{job.key} exceeded {job.max_attempts} attempts, moving to dead")
+                self.db.finish_job(job.id, self.owner, 'dead', error='Lease expired too many times')
+                continue
+            if job.attempts > 1:
+                logger.info(f"Job {job.kind}:{job.key} claimed again (attempt {job.attempts}/{job.max_attempts})")
+            jobs.append(job)
+        return jobs
+
+    def renew(self) -> int:
+        """Renova o lease de todos os jobs reservados por este processo."""
+        return self.db.renew_job_leases(self.owner, self.lease_seconds)
+
+    def complete(self, job: Job) -> bool:
+        """Marca o job como concluído; False se o lease já era de outro processo."""
+        if not self.db.finish_job(job.id, self.owner, 'done'):
+            logger.warning(f"Job {job.kind}:{job.key} lease was lost before completion")
+            return False
+        return True
+
+    def fail(self, job: Job, error) -> str:
+        """
+        Registra a falha de uma tentativa.
+
+        Returns:
+            'queued' (nova tentativa com backoff) ou 'dead'.
+        """
+        if job.attempts >= job.max_attempts:
+            state, run_at = 'dead', None
+            logger.error(f"Job {job.kind}:{job.key} failed {job.attempts} times, moving to dead: {error}")
+        else:
+            delay = min(self.retry_base_seconds * 2 ** (job.attempts - 1), self.retry_max_seconds)
+            state, run_at = 'queued', time.time() + delay
+            logger.warning(f"Job {job.kind}:{job.key} failed (attempt {job.attempts}), retrying in {delay:.0f}s: {error}")
+        self.db.finish_job(job.id, self.owner, state, error=str(error), run_at=run_at)
+        return state
+
+    def counts(self, kind: Optional[str] = None) -> dict:
+        """Jobs por estado, mais 'ready' (queued prontos para reserva)."""
+        return self.db.get_job_counts(kind)
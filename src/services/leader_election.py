@@ -0,0 +1,69 @@
+"""
+Eleição de líder entre processos do processador via lease no SQLite.
+
+Com PROCESSOR_ROLE=auto vários run_processor.py dividem o mesmo banco:
+- o líder (dono do lease 'imap-poller') lê o IMAP e enfileira os e-mails, e
+  cuida das tarefas que não podem rodar em paralelo (pedidos adiados, ride
+  pooling, limpeza do banco);
+- todos, inclusive o líder, reservam e processam jobs da fila
+  (LLM, geocoding, dispatch).
+
+O líder renova o lease a cada ciclo; se o processo cair, outro assume
+quando o lease expira (ou na hora, se o líder liberar ao encerrar).
+"""
+import logging
+import time
+from typing import Optional
+
+from .job_queue import default_owner
+
+logger = logging.getLogger(__name__)
+
+LEADER_LEASE = 'imap-poller'
+
+
+class LeaderElection:
+    """Disputa e renova o lease de líder de um processo."""
+
+    def __init__(self, db, name: str = LEADER_LEASE, owner: Optional[str] = None, ttl_seconds: float = 120):
+        """
+        Args:
+            db: DatabaseManager.
+            name: Nome do lease.
+            owner: Identificador deste processo (padrão: default_owner()).
+            ttl_seconds: Validade do lease; deve cobrir o intervalo entre
+                renovações (um ciclo ou um pedido).
+        """
+        self.db = db
+        self.name = name
+        self.owner = owner or default_owner()
+        self.ttl_seconds = ttl_seconds
+        self.is_leader = False
+
+    def try_acquire(self) -> bool:
+        """Adquire o lease se estiver livre ou expirado, ou renova se já é deste processo."""
+        try:
+            acquired = self.db.acquire_lease(self.name, self.owner, self.ttl_seconds)
+        except Exception as e:
+            # Sem banco não dá para provar a liderança: age como worker
+            logger.error(f"Leader lease '{self.name}' check failed: {e}")
+            acquired = False
+        if acquired and not self.is_leader:
+            logger.info(f"👑 {self.owner} is now the leader ({self.name})")
+        elif self.is_leader and not acquired:
+            logger.warning(f"{self.owner} lost the leader lease ({self.name})")
+        self.is_leader = acquired
+        return acquired
+
+    def release(self):
+        """Libera o lease (ao encerrar) para que outro processo assuma sem esperar a expiração."""
+        if self.is_leader and self.db.release_lease(self.name, self.owner):
+            logger.info(f"{self.owner} released the leader lease ({self.name})")
+        self.is_leader = False
+
+    def current_leader(self) -> Optional[str]:
+        """Dono do lease se ainda válido (para logs e /health)."""
+        lease = self.db.get_lease(self.name)
+        if lease and lease['expires_at'] >= time.time():
+            return lease['owner']
+        return None
@@ -10,7 +10,7 @@ from dateutil import parser
 from dateutil.relativedelta import relativedelta
 import pytz
 
-from openai import OpenAI
+from . import tracing
 
 logger = logging.getLogger(__name__)
 
@@ -144,15 +144,18 @@ REGRAS CRÍTICAS:
 
 Data/hora de referência: {reference_datetime}"""
     
-    def __init__(self, api_key: str, model: str = "gpt-4o"):
+    def __init__(self, api_key: str, model: str = "gpt-4o", base_url: Optional[str] = None):
         """
         Inicializa o extrator LLM.
         
         Args:
             api_key: Chave da API OpenAI.
             model: Modelo a ser usado (default: gpt-4o).
+            base_url: Endpoint compatível com OpenAI (None = API oficial).
         """
-        self.client = OpenAI(api_key=api_key)
+        # Importado aqui: o SDK da OpenAI leva ~1 s para carregar
+        from openai import OpenAI
+        self.client = OpenAI(api_key=api_key, base_url=base_url)
         self.model = model
         self.timezone = pytz.timezone('America/Sao_Paulo')
     
@@ -177,22 +180,30 @@ Data/hora de referência: {reference_datetime}"""
             
             # Chama a API OpenAI
             logger.info(f"Calling OpenAI API with model {self.model}...")
-            try:
-                response = self.client.chat.completions.create(
-                    model=self.model,
-                    messages=[
-                        {"role": "system", "content": system_prompt},
-                        {"role": "user", "content": f"E-mail do pedido:\n\n{email_body}"}
-                    ],
-                    temperature=0.1,  # Baixa temperatura para mais consistência
-                    max_tokens=500
+            with tracing.span('openai.chat', retryable=True, model=self.model, email_chars=len(email_body),
+                              prompt_chars=len(system_prompt) + len(email_body)) as span:
+                try:
+                    response = self.client.chat.completions.create(
+                        model=self.model,
+                        messages=[
+                            {"role": "system", "content": system_prompt},
+                            {"role": "user", "content": f"E-mail do pedido:\n\n{email_body}"}
+                        ],
+                        temperature=0.1,  # Baixa temperatura para mais consistência
+                        max_tokens=500
+                    )
+                except Exception as api_error:
+                    logger.error(f"OpenAI API call failed: {api_error}")
+                    raise
+                
+                # Extrai o conteúdo da resposta
+                content = response.choices[0].message.content.strip()
+                usage = getattr(response, 'usage', None)
+                span.set_attributes(
+                    response_chars=len(content),
+                    prompt_tokens=getattr(usage, 'prompt_tokens', None),
+                    completion_tokens=getattr(usage, 'completion_tokens', None)
                 )
-            except Exception as api_error:
-                logger.error(f"OpenAI API call failed: {api_error}")
-                raise
-            
-            # Extrai o conteúdo da resposta
-            content = response.choices[0].message.content.strip()
             logger.info(f"LLM raw response: {content[:200]}...")  # Log da resposta
             
             # Remove possíveis markdown code blocks e outros caracteres
@@ -224,6 +235,7 @@ Data/hora de referência: {reference_datetime}"""
                     fallback = self._fallback_parse(email_body)
                     if fallback:
                         logger.info("Fallback regex parser returned data")
+                        tracing.current_span().set_attribute('fallback_parse', True)
                         return fallback
                     raise
             
@@ -253,6 +265,7 @@ Data/hora de referência: {reference_datetime}"""
             # Validação básica
             if not self._validate_extracted_data(data):
                 logger.warning("Extracted data failed validation")
+                tracing.current_span().set_attribute('invalid_extraction', True)
                 return None
             
             # Normaliza o horário se necessário
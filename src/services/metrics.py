@@ -0,0 +1,363 @@
+"""
+Metrics: counters, gauges and histograms exposed in the Prometheus text format.
+"""
+import json
+import logging
+import re
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from time import perf_counter
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Limites (segundos) pensados para IMAP/OpenAI/Nominatim/MinasTaxi: de ms a ~1 min
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    parts = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    """Base de uma família de métricas com rótulos."""
+
+    kind = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        """
+        Args:
+            name: Nome da métrica (ex: 'taxi_orders_total').
+            documentation: Texto do HELP.
+            labels: Nomes dos rótulos.
+        """
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+        self._values: Dict[LabelValues, object] = {}
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.label_names):
+            raise ValueError(f"{self.name} expects labels {self.label_names}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def render(self) -> List[str]:
+        """Linhas no formato texto do Prometheus (HELP, TYPE e amostras)."""
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.extend(self._render_sample(key, value))
+        return lines
+
+    def _render_sample(self, key: LabelValues, value) -> List[str]:
+        return [f'{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}']
+
+
+class Counter(_Metric):
+    """Contador monotônico."""
+
+    kind = 'counter'
+
+    def inc(self, amount: float = 1.0, **labels):
+        """Incrementa o contador dos rótulos informados."""
+        if amount < 0:
+            raise ValueError("Counter can only increase")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        """Valor atual (0 se nunca incrementado)."""
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+
+class Gauge(_Metric):
+    """Valor instantâneo (profundidade de fila, taxa de acerto de cache...)."""
+
+    kind = 'gauge'
+
+    def set(self, value: float, **labels):
+        """Define o valor dos rótulos informados."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels):
+        """Soma `amount` ao valor atual."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        """Subtrai `amount` do valor atual."""
+        self.inc(-amount, **labels)
+
+    def value(self, **labels) -> float:
+        """Valor atual (0 se nunca definido)."""
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+
+class _HistogramValue:
+    __slots__ = ('buckets', 'count', 'sum')
+
+    def __init__(self, size: int):
+        self.buckets = [0] * size
+        self.count = 0
+        self.sum = 0.0
+
+
+class Histogram(_Metric):
+    """Histograma com limites fixos (cumulativos na exportação)."""
+
+    kind = 'histogram'
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        """
+        Args:
+            name: Nome da métrica (ex: 'taxi_stage_duration_seconds').
+            documentation: Texto do HELP.
+            labels: Nomes dos rótulos.
+            buckets: Limites superiores em ordem crescente (+Inf é implícito).
+        """
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+
+    def observe(self, value: float, **labels):
+        """Registra uma observação."""
+        key = self._key(labels)
+        with self._lock:
+            data = self._values.get(key)
+            if data is None:
+                data = self._values[key] = _HistogramValue(len(self.buckets))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    data.buckets[i] += 1
+                    break
+            data.count += 1
+            data.sum += value
+
+    @contextmanager
+    def time(self, **labels):
+        """Context manager que observa a duração do bloco em segundos."""
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(perf_counter() - start, **labels)
+
+    def summary(self, **labels) -> Dict[str, float]:
+        """
+        Resumo de uma série.
+
+        Returns:
+            Dicionário com count, sum, avg e p50/p95/p99 estimados pelos buckets.
+        """
+        with self._lock:
+            data = self._values.get(self._key(labels))
+            if data is None:
+                return {'count': 0, 'sum': 0.0, 'avg': 0.0, 'p50': 0.0, 'p95': 0.0, 'p99': 0.0}
+            buckets, count, total = list(data.buckets), data.count, data.sum
+        return {
+            'count': count,
+            'sum': total,
+            'avg': total / count if count else 0.0,
+            'p50': self._quantile(buckets, count, 0.50),
+            'p95': self._quantile(buckets, count, 0.95),
+            'p99': self._quantile(buckets, count, 0.99),
+        }
+
+    def _quantile(self, buckets: List[int], count: int, q: float) -> float:
+        # Interpolação linear dentro do bucket (mesma regra do histogram_quantile)
+        if not count:
+            return 0.0
+        rank = q * count
+        cumulative = 0
+        lower = 0.0
+        for bound, n in zip(self.buckets, buckets):
+            if cumulative + n >= rank and n:
+                if bound == float('inf'):
+                    return lower
+                return lower + (bound - lower) * (rank - cumulative) / n
+            cumulative += n
+            if bound != float('inf'):
+                lower = bound
+        return lower
+
+    def _render_sample(self, key: LabelValues, data: _HistogramValue) -> List[str]:
+        lines = []
+        cumulative = 0
+        for bound, n in zip(self.buckets, data.buckets):
+            cumulative += n
+            le = f'le="{_format_value(bound)}"'
+            lines.append(f'{self.name}_bucket{_format_labels(self.label_names, key, le)} {cumulative}')
+        labels = _format_labels(self.label_names, key)
+        lines.append(f'{self.name}_sum{labels} {_format_value(data.sum)}')
+        lines.append(f'{self.name}_count{labels} {data.count}')
+        return lines
+
+
+class MetricsRegistry:
+    """Conjunto de métricas de um processo."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], None]] = []
+
+    def _register(self, cls, name: str, documentation: str, labels: Sequence[str], **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, documentation, labels, **kwargs)
+            elif not isinstance(metric, cls) or metric.label_names != tuple(labels):
+                raise ValueError(f"Metric {name} already registered with a different type or labels")
+            return metric
+
+    def counter(self, name: str, documentation: str, labels: Sequence[str] = ()) -> Counter:
+        """Retorna (criando se preciso) um contador."""
+        return self._register(Counter, name, documentation, labels)
+
+    def gauge(self, name: str, documentation: str, labels: Sequence[str] = ()) -> Gauge:
+        """Retorna (criando se preciso) um gauge."""
+        return self._register(Gauge, name, documentation, labels)
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        """Retorna (criando se preciso) um histograma."""
+        return self._register(Histogram, name, documentation, labels, buckets=buckets)
+
+    def add_collector(self, collector: Callable[[], None]):
+        """
+        Registra uma função chamada antes de cada exportação.
+
+        Útil para gauges lidos de outros componentes (ex: taxa de acerto
+        dos caches de geocoding) sem atualizá-los a cada operação.
+        """
+        self._collectors.append(collector)
+
+    def collect(self):
+        """Executa os coletores registrados (falhas só geram log)."""
+        for collector in list(self._collectors):
+            try:
+                collector()
+            except Exception as e:
+                logger.warning(f"Metrics collector failed: {e}")
+
+    def render(self) -> str:
+        """Exporta todas as métricas no formato texto do Prometheus."""
+        self.collect()
+        with self._lock:
+            metrics = [self._metrics[name] for name in sorted(self._metrics)]
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+_SAMPLE_RE = re.compile(r'^([A-Za-z_:][A-Za-z0-9_:]*)(\{.*\})?\s+(\S+)$')
+_LABEL_RE = re.compile(r'([A-Za-z_][A-Za-z0-9_]*)="((?:[^"\\]|\\.)*)"')
+
+
+def parse_prometheus_text(text: str) -> List[Tuple[str, Dict[str, str], float]]:
+    """
+    Lê amostras do formato texto do Prometheus.
+
+    Args:
+        text: Conteúdo de um endpoint /metrics.
+
+    Returns:
+        Lista de (nome, rótulos, valor); linhas de comentário são ignoradas.
+    """
+    samples = []
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        match = _SAMPLE_RE.match(line)
+        if not match:
+            continue
+        name, raw_labels, value = match.groups()
+        labels = {k: v.replace('\\"', '"').replace('\\n', '\n').replace('\\\\', '\\')
+                  for k, v in _LABEL_RE.findall(raw_labels or '')}
+        samples.append((name, labels, float(value)))
+    return samples
+
+
+def start_metrics_server(
+    registry: MetricsRegistry,
+    port: int,
+    host: str = '0.0.0.0',
+    health: Optional[Callable[[], Dict]] = None
+) -> ThreadingHTTPServer:
+    """
+    Sobe um servidor HTTP em thread daemon.
+
+    Rotas: /metrics (texto Prometheus) e /health (JSON).
+
+    Args:
+        registry: Métricas a exportar.
+        port: Porta TCP (0 escolhe uma porta livre).
+        host: Interface de escuta.
+        health: Função opcional com dados extras para /health.
+
+    Returns:
+        Servidor em execução (use server.server_address para a porta e shutdown() para parar).
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            path = self.path.split('?', 1)[0]
+            if path == '/metrics':
+                body = registry.render().encode('utf-8')
+                content_type = 'text/plain; version=0.0.4; charset=utf-8'
+            elif path == '/health':
+                body = json.dumps({'status': 'ok', **(health() if health else {})}).encode('utf-8')
+                content_type = 'application/json'
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            logger.debug(f"metrics {self.address_string()} {format % args}")
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='metrics-server', daemon=True).start()
+    logger.info(f"Metrics endpoint listening on http://{host}:{server.server_address[1]}/metrics")
+    return server
@@ -3,17 +3,19 @@ MinasTaxi API Client - Original Software Integration
 Documentação completa em: docs/API_MINASTAXI.md
 """
 import re
+import json
 import logging
 import requests
 import uuid
 import urllib3
 import ssl
-from typing import Optional, Dict
+from typing import Callable, Dict, Optional, Tuple
 from retry import retry
 from datetime import datetime
 from requests.adapters import HTTPAdapter
 from urllib3.util.ssl_ import create_urllib3_context
 from ..models.order import Order
+from . import tracing
 
 logger = logging.getLogger(__name__)
 
@@ -82,7 +84,8 @@ class MinasTaxiClient:
         auth_header: str = None,
         payment_type: str = "ONLINE_PAYMENT",
         timeout: int = 30,
-        max_retries: int = 3
+        max_retries: int = 3,
+        location_resolver: Optional[Callable[[float, float], Optional[Tuple[str, str]]]] = None
     ):
         """
         Inicializa o cliente da API MinasTaxi.
@@ -95,8 +98,12 @@ class MinasTaxiClient:
             payment_type: Tipo de pagamento (ex: "ONLINE_PAYMENT", "BE", "BOLETO", "VOUCHER").
             timeout: Timeout para requisições em segundos.
             max_retries: Número máximo de tentativas de retry.
+            location_resolver: Função (lat, lng) -> (cidade, UF) usada para preencher
+                city/state do payload (ex: GeocodingService.reverse_geocode_city);
+                None = extrai do texto do endereço.
         """
         self.api_url = api_url.rstrip('/')
+        self.location_resolver = location_resolver
         self.user_id = user_id
         self.password = password
         self.payment_type = payment_type
@@ -323,6 +330,8 @@ class MinasTaxiClient:
                     or ""
                 )
 
+                passenger_address = passenger.get('address', order.pickup_address)
+                passenger_city, passenger_state = self._city_state(passenger_address, passenger_lat, passenger_lng)
                 users.append({
                     "id": idx,
                     "sequence": idx,
@@ -330,9 +339,9 @@ class MinasTaxiClient:
                     "phone": passenger_phone_clean,
                     "passenger_re": passenger_re,
                     "pickup": {
-                        "address": passenger.get('address', order.pickup_address),
-                        "city": self._extract_city(passenger.get('address', order.pickup_address)),
-                        "state": self._extract_state(passenger.get('address', order.pickup_address)),
+                        "address": passenger_address,
+                        "city": passenger_city,
+                        "state": passenger_state,
                         "postal_code": "",
                         "lat": str(passenger_lat),
                         "lng": str(passenger_lng)
@@ -340,10 +349,14 @@ class MinasTaxiClient:
                     # campo oficial da API v1.9 — um centro de custo por passageiro
                     "passenger_cost_center": passenger_cc
                 })
+                # Minutos após pickup_time em que este passageiro será coletado (RoutePlanner)
+                if passenger.get('pickup_offset_minutes') is not None:
+                    users[-1]["pickup_offset_minutes"] = int(round(passenger['pickup_offset_minutes']))
                 if passenger_cc:
                     logger.debug(f"passenger_cost_center user {idx} ({passenger.get('name')}): {passenger_cc}")
         else:
             # Passageiro único (formato antigo)
+            pickup_city, pickup_state = self._city_state(order.pickup_address, order.pickup_lat, order.pickup_lng)
             users.append({
                 "id": 1,
                 "sequence": 1,
@@ -352,8 +365,8 @@ class MinasTaxiClient:
                 "passenger_re": str(order.passenger_re or ""),
                 "pickup": {
                     "address": order.pickup_address,
-                    "city": self._extract_city(order.pickup_address),
-                    "state": self._extract_state(order.pickup_address),
+                    "city": pickup_city,
+                    "state": pickup_state,
                     "postal_code": "",
                     "lat": str(order.pickup_lat),
                     "lng": str(order.pickup_lng)
@@ -431,14 +444,17 @@ class MinasTaxiClient:
         
         # Adiciona destino se fornecido
         if order.dropoff_address and order.dropoff_lat and order.dropoff_lng:
+            dropoff_city, dropoff_state = self._city_state(
+                order.dropoff_address, order.dropoff_lat, order.dropoff_lng
+            )
             payload["destinations"] = [
                 {
                     "passengerId": 1,
                     "sequence": 2,
                     "location": {
                         "address": order.dropoff_address,
-                        "city": self._extract_city(order.dropoff_address),
-                        "state": self._extract_state(order.dropoff_address),
+                        "city": dropoff_city,
+                        "state": dropoff_state,
                         "postal_code": "",
                         "lat": str(order.dropoff_lat),
                         "lng": str(order.dropoff_lng)
@@ -457,13 +473,19 @@ class MinasTaxiClient:
             logger.debug(f"Request ID: {request_id}")
             
             # Usa a sessão com adapter SSL customizado
-            response = self.session.post(
-                endpoint,
-                json=payload,
-                headers=self.headers,
-                timeout=self.timeout,
-                verify=False  # Desabilita verificação SSL
-            )
+            with tracing.span('minastaxi.rideCreate', retryable=True, request_id=request_id,
+                              passengers=passengers_count,
+                              payload_bytes=len(json.dumps(payload, default=str))) as span:
+                response = self.session.post(
+                    endpoint,
+                    json=payload,
+                    headers=self.headers,
+                    timeout=self.timeout,
+                    verify=False  # Desabilita verificação SSL
+                )
+                span.set_attribute('status_code', response.status_code)
+                if response.status_code != 200:
+                    span.set_status('error')
             
             # Log da requisição
             logger.debug(f"Request to {endpoint}")
@@ -530,6 +552,30 @@ class MinasTaxiClient:
             logger.error(f"Request exception: {e}")
             raise
     
+    def _city_state(self, address: str, lat: Optional[float], lng: Optional[float]) -> Tuple[str, str]:
+        """
+        Cidade e UF de um ponto do payload.
+        
+        Usa as coordenadas (location_resolver, com cache) quando disponíveis
+        e cai para a extração pelo texto do endereço.
+        
+        Args:
+            address: Endereço em texto.
+            lat: Latitude (pode ser None).
+            lng: Longitude (pode ser None).
+            
+        Returns:
+            Tupla (cidade, sigla do estado).
+        """
+        if self.location_resolver and lat is not None and lng is not None:
+            try:
+                city_state = self.location_resolver(float(lat), float(lng))
+                if city_state:
+                    return city_state
+            except Exception as e:
+                logger.warning(f"Location resolver failed for ({lat}, {lng}): {e}")
+        return self._extract_city(address), self._extract_state(address)
+    
     def _extract_city(self, address: str) -> str:
         """
         Extrai cidade do endereço.
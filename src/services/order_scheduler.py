@@ -0,0 +1,157 @@
+"""
+Escalonamento dos pedidos extraídos por urgência do horário de coleta.
+
+Depois da extração (LLM) cada pedido ganha uma faixa:
+- expedite: coleta em até `expedite_minutes` (ou já atrasada), vai à frente;
+- normal: demais pedidos dentro do horizonte, e os sem horário;
+- deferred: coleta além de `defer_hours`; fica salvo como EXTRACTED e só é
+  geocodificado/enviado em um ciclo fora do pico ou quando entra no horizonte.
+
+Dentro de cada faixa a ordem é pelo prazo mais cedo (EDF). A folga de cada
+pedido é pickup_time menos a conclusão esperada (fila à frente + duração
+média de conclusão, média móvel exponencial).
+"""
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+LANES = ('expedite', 'normal', 'deferred')
+
+# Limites (s) do histograma de folga: negativos = conclusão prevista após a coleta
+SLACK_BUCKETS = (-3600, -900, -300, 0, 300, 900, 1800, 3600, 7200, 14400, 43200, 86400, 259200, 604800)
+
+
+@dataclass
+class ScheduledOrder:
+    """Pedido extraído aguardando geocoding/dispatch."""
+    email: Any  # EmailMessage de origem (ou reconstruído para pedidos adiados)
+    order: Any  # Order com status EXTRACTED
+    extracted_data: dict
+    arrival_time: Optional[datetime] = None
+    lane: str = 'normal'
+    expected_completion: Optional[float] = None  # epoch
+    slack_seconds: Optional[float] = None
+    span: Any = None  # span raiz 'order' do pedido
+    queue_job: Any = None  # Job da fila durável (None para pedidos adiados retomados)
+
+    @property
+    def deadline(self) -> Optional[float]:
+        """Prazo do pedido (epoch do pickup_time) ou None sem horário."""
+        pickup_time = self.order.pickup_time
+        return pickup_time.timestamp() if pickup_time else None
+
+
+def parse_hour_window(value: str) -> Optional[Tuple[int, int]]:
+    """
+    Converte 'inicio-fim' (horas, ex: '20-6') em tupla; vazio desliga.
+
+    Raises:
+        ValueError: Formato inválido.
+    """
+    value = (value or '').strip()
+    if not value:
+        return None
+    start, end = (int(part) for part in value.split('-'))
+    if not (0 <= start <= 23 and 0 <= end <= 24):
+        raise ValueError(f"Invalid hour window: {value}")
+    return start, end
+
+
+class OrderScheduler:
+    """Faixas de urgência, ordem EDF e estimativa de folga dos pedidos extraídos."""
+
+    def __init__(
+        self,
+        expedite_minutes: float = 120,
+        defer_hours: float = 24,
+        off_peak_hours: Optional[Tuple[int, int]] = (20, 6),
+        completion_estimate_seconds: float = 5.0,
+        smoothing: float = 0.2
+    ):
+        """
+        Args:
+            expedite_minutes: Coletas até este prazo entram na faixa expedite.
+            defer_hours: Coletas além deste prazo são adiadas (0 desliga o adiamento).
+            off_peak_hours: Janela (início, fim) em horas locais em que pedidos
+                adiados são concluídos; pode cruzar a meia-noite. None = nunca.
+            completion_estimate_seconds: Duração inicial esperada da conclusão
+                (geocoding + dispatch + notificação) de um pedido.
+            smoothing: Peso de cada nova medida na média móvel.
+        """
+        self.expedite_seconds = expedite_minutes * 60
+        self.defer_seconds = defer_hours * 3600
+        self.off_peak_hours = off_peak_hours
+        self.completion_seconds = completion_estimate_seconds
+        self.smoothing = smoothing
+
+    def lane_for(self, deadline: Optional[float], now: float) -> str:
+        """Faixa de um pedido com prazo `deadline` (epoch) no instante `now`."""
+        if deadline is None:
+            return 'normal'
+        remaining = deadline - now
+        if remaining <= self.expedite_seconds:
+            return 'expedite'
+        if self.defer_seconds > 0 and remaining > self.defer_seconds:
+            return 'deferred'
+        return 'normal'
+
+    def is_off_peak(self, when: Optional[datetime] = None) -> bool:
+        """Indica se `when` (padrão: agora) está na janela fora do pico."""
+        if not self.off_peak_hours:
+            return False
+        start, end = self.off_peak_hours
+        hour = (when or datetime.now()).hour
+        if start <= end:
+            return start <= hour < end
+        return hour >= start or hour < end
+
+    def plan(
+        self,
+        items: List[ScheduledOrder],
+        now: float,
+        off_peak: bool = False
+    ) -> Tuple[List[ScheduledOrder], List[ScheduledOrder]]:
+        """
+        Separa os pedidos a concluir neste ciclo dos adiados e ordena a fila.
+
+        Fora do pico os pedidos distantes também são concluídos, depois dos
+        demais. Cada item da fila recebe lane, expected_completion e slack_seconds.
+
+        Args:
+            items: Pedidos extraídos.
+            now: Instante atual (epoch).
+            off_peak: Ciclo fora do pico.
+
+        Returns:
+            (fila em ordem de execução, pedidos adiados).
+        """
+        queue, deferred = [], []
+        for item in items:
+            item.lane = self.lane_for(item.deadline, now)
+            if item.lane == 'deferred' and not off_peak:
+                deferred.append(item)
+            else:
+                queue.append(item)
+
+        rank = {lane: i for i, lane in enumerate(LANES)}
+        queue.sort(key=lambda item: (
+            rank[item.lane], item.deadline if item.deadline is not None else float('inf')
+        ))
+
+        expected = now
+        for item in queue:
+            expected += self.completion_seconds
+            item.expected_completion = expected
+            item.slack_seconds = item.deadline - expected if item.deadline is not None else None
+        for item in deferred:
+            item.expected_completion = None
+            item.slack_seconds = item.deadline - now
+
+        return queue, deferred
+
+    def record_completion(self, seconds: float):
+        """Atualiza a duração média de conclusão com uma nova medida."""
+        self.completion_seconds += self.smoothing * (seconds - self.completion_seconds)
@@ -0,0 +1,112 @@
+"""
+Intervalo adaptativo entre ciclos do processador contínuo (run_processor.py).
+
+Regras, na ordem:
+1. Ciclo com erro: backoff exponencial (intervalo base x 2^(erros seguidos - 1),
+   limitado a `max_backoff_seconds`).
+2. Ciclo que atingiu o limite de e-mails (EMAIL_FETCH_LIMIT): próximo ciclo
+   imediato, ainda há fila no IMAP. O mesmo vale quando sobram jobs prontos
+   na fila durável (lote JOB_CLAIM_BATCH cheio).
+3. Rajada (>= `burst_emails` e-mails): `burst_cycles` ciclos no intervalo mínimo.
+4. Horário comercial: intervalo comercial; fora dele, o intervalo base.
+"""
+from datetime import datetime
+from typing import Optional, Tuple
+
+from .order_scheduler import parse_hour_window
+
+
+class PollInterval:
+    """Calcula a espera até o próximo ciclo a partir do resultado do anterior."""
+
+    def __init__(
+        self,
+        base_seconds: float = 60,
+        business_seconds: Optional[float] = None,
+        min_seconds: float = 10,
+        max_backoff_seconds: float = 900,
+        business_hours: Optional[Tuple[int, int]] = (7, 19),
+        business_weekdays: int = 5,
+        burst_emails: int = 5,
+        burst_cycles: int = 3
+    ):
+        """
+        Args:
+            base_seconds: Intervalo fora do horário comercial (PROCESSOR_INTERVAL_MINUTES).
+            business_seconds: Intervalo no horário comercial (padrão: metade do base).
+            min_seconds: Intervalo após rajadas.
+            max_backoff_seconds: Teto do backoff em erros seguidos.
+            business_hours: Janela (início, fim) em horas locais; None desliga.
+            business_weekdays: Dias úteis a partir de segunda (5 = seg-sex, 7 = todos).
+            burst_emails: E-mails em um ciclo que caracterizam rajada (0 desliga).
+            burst_cycles: Ciclos seguintes no intervalo mínimo após uma rajada.
+        """
+        self.base_seconds = base_seconds
+        self.business_seconds = business_seconds if business_seconds is not None else base_seconds / 2
+        self.min_seconds = min(min_seconds, self.business_seconds, base_seconds)
+        self.max_backoff_seconds = max(max_backoff_seconds, base_seconds)
+        self.business_hours = business_hours
+        self.business_weekdays = business_weekdays
+        self.burst_emails = burst_emails
+        self.burst_cycles = burst_cycles
+        self.consecutive_errors = 0
+        self._burst_remaining = 0
+
+    @classmethod
+    def from_env(cls, env) -> 'PollInterval':
+        """Cria a partir das variáveis PROCESSOR_INTERVAL_MINUTES e POLL_* (dict-like)."""
+        business = env.get('POLL_BUSINESS_INTERVAL_SECONDS')
+        return cls(
+            base_seconds=float(env.get('PROCESSOR_INTERVAL_MINUTES', 1)) * 60,
+            business_seconds=float(business) if business else None,
+            min_seconds=float(env.get('POLL_MIN_INTERVAL_SECONDS', 10)),
+            max_backoff_seconds=float(env.get('POLL_MAX_BACKOFF_MINUTES', 15)) * 60,
+            business_hours=parse_hour_window(env.get('POLL_BUSINESS_HOURS', '7-19')),
+            business_weekdays=int(env.get('POLL_BUSINESS_WEEKDAYS', 5)),
+            burst_emails=int(env.get('POLL_BURST_EMAILS', 5)),
+            burst_cycles=int(env.get('POLL_BURST_CYCLES', 3))
+        )
+
+    def is_business_hours(self, when: datetime) -> bool:
+        if not self.business_hours or when.weekday() >= self.business_weekdays:
+            return False
+        start, end = self.business_hours
+        if start <= end:
+            return start <= when.hour < end
+        return when.hour >= start or when.hour < end
+
+    def next_delay(self, stats: Optional[dict] = None, error: bool = False,
+                   when: Optional[datetime] = None) -> Tuple[float, str]:
+        """
+        Espera até o próximo ciclo.
+
+        Args:
+            stats: Estatísticas do ciclo (process_new_orders); usa emails_fetched,
+                fetch_limit_hit, queue_backlog e error.
+            error: O ciclo falhou (exceção fora de process_new_orders).
+            when: Instante local do fim do ciclo (padrão: agora).
+
+        Returns:
+            (segundos, motivo) com motivo em backoff, fetch_limit, backlog, burst, business, base.
+        """
+        stats = stats or {}
+        if error or stats.get('error'):
+            self.consecutive_errors += 1
+            delay = self.base_seconds * 2 ** (self.consecutive_errors - 1)
+            return min(delay, self.max_backoff_seconds), 'backoff'
+        self.consecutive_errors = 0
+
+        if stats.get('fetch_limit_hit'):
+            return 0.0, 'fetch_limit'
+        if stats.get('queue_backlog'):
+            return 0.0, 'backlog'
+
+        if self.burst_emails and stats.get('emails_fetched', 0) >= self.burst_emails:
+            self._burst_remaining = self.burst_cycles
+        if self._burst_remaining > 0:
+            self._burst_remaining -= 1
+            return self.min_seconds, 'burst'
+
+        if self.is_business_hours(when or datetime.now()):
+            return self.business_seconds, 'business'
+        return self.base_seconds, 'base'
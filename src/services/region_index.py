@@ -0,0 +1,253 @@
+"""
+Region index: point-in-polygon tests for Minas Gerais / BH metro and city-name matching.
+"""
+import logging
+import re
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ..config.regions import BH_METRO_CITIES, BH_METRO_POLYGON, MINAS_GERAIS_POLYGON
+from .gazetteer import fold
+
+logger = logging.getLogger(__name__)
+
+Polygon = Sequence[Tuple[float, float]]
+
+OUTSIDE, INSIDE, BOUNDARY = 0, 1, 2
+
+
+def points_in_polygon(lats, lngs, polygon: Polygon) -> np.ndarray:
+    """
+    Teste ponto-em-polígono (crossing number) vetorizado.
+
+    Args:
+        lats: Latitudes (array-like).
+        lngs: Longitudes (array-like).
+        polygon: Vértices (lat, lng) do polígono.
+
+    Returns:
+        Array booleano, True para pontos dentro do polígono.
+    """
+    y = np.asarray(lats, dtype=float)
+    x = np.asarray(lngs, dtype=float)
+    vertices = np.asarray(polygon, dtype=float)
+    inside = np.zeros(np.broadcast(y, x).shape, dtype=bool)
+    y1, x1 = vertices[:, 0], vertices[:, 1]
+    y2, x2 = np.roll(y1, -1), np.roll(x1, -1)
+    for ay, ax, by, bx in zip(y1, x1, y2, x2):
+        if ay == by:
+            continue
+        crosses = (ay > y) != (by > y)
+        x_cross = ax + (y - ay) * (bx - ax) / (by - ay)
+        inside ^= crosses & (x < x_cross)
+    return inside
+
+
+def point_in_polygon(lat: float, lng: float, polygon: Polygon) -> bool:
+    """Teste ponto-em-polígono para um único ponto (sem numpy)."""
+    inside = False
+    n = len(polygon)
+    for i in range(n):
+        ay, ax = polygon[i]
+        by, bx = polygon[(i + 1) % n]
+        if (ay > lat) != (by > lat) and lng < ax + (lat - ay) * (bx - ax) / (by - ay):
+            inside = not inside
+    return inside
+
+
+class PolygonGridIndex:
+    """
+    Polígono pré-rasterizado em uma grade regular.
+
+    Cada célula é marcada como fora, dentro ou borda. Consultas em células
+    fora/dentro são O(1); só as células de borda fazem o teste exato.
+    """
+
+    def __init__(self, polygon: Polygon, cell_deg: float = 0.05):
+        """
+        Args:
+            polygon: Vértices (lat, lng) do polígono.
+            cell_deg: Tamanho da célula em graus.
+        """
+        self.polygon = [tuple(p) for p in polygon]
+        self.cell_deg = cell_deg
+        vertices = np.asarray(self.polygon, dtype=float)
+        self.min_lat, self.min_lng = (float(v) for v in vertices.min(axis=0))
+        self.max_lat, self.max_lng = (float(v) for v in vertices.max(axis=0))
+        self.rows = int(np.ceil((self.max_lat - self.min_lat) / cell_deg)) + 1
+        self.cols = int(np.ceil((self.max_lng - self.min_lng) / cell_deg)) + 1
+
+        # Classificação inicial pelo centro da célula
+        center_lats = self.min_lat + (np.arange(self.rows) + 0.5) * cell_deg
+        center_lngs = self.min_lng + (np.arange(self.cols) + 0.5) * cell_deg
+        grid_lats, grid_lngs = np.meshgrid(center_lats, center_lngs, indexing='ij')
+        cells = np.where(points_in_polygon(grid_lats, grid_lngs, self.polygon), INSIDE, OUTSIDE).astype(np.int8)
+
+        # Células tocadas pelas arestas (e vizinhas) exigem teste exato
+        step = cell_deg / 4
+        for (ay, ax), (by, bx) in zip(self.polygon, self.polygon[1:] + self.polygon[:1]):
+            samples = max(2, int(np.hypot(by - ay, bx - ax) / step) + 1)
+            t = np.linspace(0.0, 1.0, samples)
+            rows = ((ay + t * (by - ay) - self.min_lat) / cell_deg).astype(int)
+            cols = ((ax + t * (bx - ax) - self.min_lng) / cell_deg).astype(int)
+            for dr in (-1, 0, 1):
+                for dc in (-1, 0, 1):
+                    r = np.clip(rows + dr, 0, self.rows - 1)
+                    c = np.clip(cols + dc, 0, self.cols - 1)
+                    cells[r, c] = BOUNDARY
+        self.cells = cells
+        # Cópia em listas: indexação escalar bem mais rápida que em ndarray
+        self._rows = cells.tolist()
+
+        # O raio horizontal só cruza arestas que cobrem a latitude do ponto:
+        # cada linha da grade guarda apenas as arestas que atravessam sua faixa
+        edges = list(zip(self.polygon, self.polygon[1:] + self.polygon[:1]))
+        self._row_edges = []
+        for r in range(self.rows):
+            band_lo = self.min_lat + r * cell_deg
+            band_hi = band_lo + cell_deg
+            self._row_edges.append([
+                (ay, ax, by, bx) for (ay, ax), (by, bx) in edges
+                if ay != by and min(ay, by) <= band_hi and max(ay, by) >= band_lo
+            ])
+
+    def contains(self, lat: float, lng: float) -> bool:
+        """Retorna True se o ponto está dentro do polígono."""
+        if not (self.min_lat <= lat <= self.max_lat and self.min_lng <= lng <= self.max_lng):
+            return False
+        row = int((lat - self.min_lat) / self.cell_deg)
+        state = self._rows[row][int((lng - self.min_lng) / self.cell_deg)]
+        if state != BOUNDARY:
+            return state == INSIDE
+        inside = False
+        for ay, ax, by, bx in self._row_edges[row]:
+            if (ay > lat) != (by > lat) and lng < ax + (lat - ay) * (bx - ax) / (by - ay):
+                inside = not inside
+        return inside
+
+    def contains_many(self, lats, lngs) -> np.ndarray:
+        """Versão vetorizada de contains."""
+        lats = np.asarray(lats, dtype=float)
+        lngs = np.asarray(lngs, dtype=float)
+        in_bbox = (
+            (lats >= self.min_lat) & (lats <= self.max_lat) &
+            (lngs >= self.min_lng) & (lngs <= self.max_lng)
+        )
+        result = np.zeros(lats.shape, dtype=bool)
+        idx = np.nonzero(in_bbox)
+        rows = ((lats[idx] - self.min_lat) / self.cell_deg).astype(int)
+        cols = ((lngs[idx] - self.min_lng) / self.cell_deg).astype(int)
+        states = self.cells[rows, cols]
+        result[idx] = states == INSIDE
+        boundary = states == BOUNDARY
+        if boundary.any():
+            sub = tuple(i[boundary] for i in idx)
+            result[sub] = points_in_polygon(lats[sub], lngs[sub], self.polygon)
+        return result
+
+
+class CityMatcher:
+    """
+    Trie de nomes de cidades compilada em uma única expressão regular.
+
+    Os prefixos comuns são fatorados (ex: 'santa (?:luzia|...)'), então o
+    texto é percorrido uma vez pelo motor de regex, sem varrer a lista de
+    nomes. Cada nome entra com e sem acentos, então basta passar o texto
+    para minúsculas; só vale ocorrência com fronteira de palavra dos dois lados.
+    """
+
+    def __init__(self, names: Iterable[str]):
+        """
+        Args:
+            names: Nomes a reconhecer (ex: cidades da RMBH).
+        """
+        trie: Dict[str, dict] = {}
+        for name in names:
+            for variant in {name.lower(), fold(name)}:
+                node = trie
+                for char in variant:
+                    node = node.setdefault(char, {})
+                node[''] = {}
+        body = self._trie_pattern(trie) if trie else '(?!)'
+        self._search = re.compile(rf'(?<!\w)(?:{body})(?!\w)')
+        # Lookahead para reportar ocorrências sobrepostas (ex: 'nova lima' e 'lima')
+        self._finditer = re.compile(rf'(?<!\w)(?=({body})(?!\w))')
+
+    @classmethod
+    def _trie_pattern(cls, node: Dict[str, dict]) -> str:
+        end = '' in node
+        branches = [re.escape(char) + cls._trie_pattern(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        if end:
+            # Opcional guloso: prefere o nome mais longo (ex: 'santa luzia' antes de 'santa')
+            return '(?:' + '|'.join(branches) + ')?'
+        if len(branches) == 1:
+            return branches[0]
+        return '(?:' + '|'.join(branches) + ')'
+
+    def find_all(self, text: str) -> List[Tuple[int, str]]:
+        """
+        Encontra todas as ocorrências no texto.
+
+        Args:
+            text: Texto livre (endereço).
+
+        Returns:
+            Lista de (posição inicial, nome normalizado) na ordem do texto.
+        """
+        return [(m.start(), fold(m.group(1))) for m in self._finditer.finditer(text.lower())]
+
+    def contains_any(self, text: str) -> bool:
+        """Retorna True se algum nome ocorre no texto."""
+        return self._search.search(text.lower()) is not None
+
+
+class RegionIndex:
+    """Índices de Minas Gerais, da RMBH e das cidades da RMBH."""
+
+    def __init__(
+        self,
+        state_polygon: Polygon = MINAS_GERAIS_POLYGON,
+        metro_polygon: Polygon = BH_METRO_POLYGON,
+        metro_cities: Iterable[str] = BH_METRO_CITIES,
+        cell_deg: float = 0.05
+    ):
+        """
+        Args:
+            state_polygon: Divisa do estado.
+            metro_polygon: Contorno da região metropolitana.
+            metro_cities: Cidades da região metropolitana.
+            cell_deg: Tamanho da célula da grade em graus.
+        """
+        self.state = PolygonGridIndex(state_polygon, cell_deg)
+        self.metro = PolygonGridIndex(metro_polygon, cell_deg)
+        self.metro_cities = CityMatcher(metro_cities)
+
+    def in_minas_gerais(self, lat: float, lng: float) -> bool:
+        """Retorna True se as coordenadas estão em Minas Gerais."""
+        return self.metro.contains(lat, lng) or self.state.contains(lat, lng)
+
+    def in_bh_metro(self, lat: float, lng: float) -> bool:
+        """Retorna True se as coordenadas estão na região metropolitana de BH."""
+        return self.metro.contains(lat, lng)
+
+    def mentions_bh_metro_city(self, text: str) -> bool:
+        """Retorna True se o texto cita alguma cidade da região metropolitana."""
+        return self.metro_cities.contains_any(text)
+
+
+_default_index: Optional[RegionIndex] = None
+
+
+def get_region_index() -> RegionIndex:
+    """Índice padrão (construído na primeira chamada e compartilhado)."""
+    global _default_index
+    if _default_index is None:
+        _default_index = RegionIndex()
+        logger.debug(
+            f"Region index built: state grid {_default_index.state.rows}x{_default_index.state.cols}, "
+            f"metro grid {_default_index.metro.rows}x{_default_index.metro.cols}"
+        )
+    return _default_index
@@ -0,0 +1,324 @@
+"""
+Reprocessamento em lote de pedidos FAILED (dashboard, reprocess_failed_orders.py
+e TaxiOrderProcessor.reprocess_failed_orders).
+
+Um job guarda no banco a lista de pedidos e o resultado de cada um
+(reprocess_jobs / reprocess_job_items):
+- até `concurrency` pedidos são reenviados em paralelo;
+- cada pedido é reservado no banco antes do envio (claim atômico com lease,
+  como a fila de jobs), então dois processos no mesmo job (dashboard e
+  reprocess_failed_orders.py) nunca reenviam o mesmo pedido;
+- cada resultado é gravado assim que sai, então um job interrompido retoma
+  só os pendentes;
+- falhas que não vão passar num novo envio (sem coordenadas, coleta já
+  passou, payload inválido, pedido recusado pela API) são puladas;
+- após `max_consecutive_failures` falhas transitórias seguidas (API fora do
+  ar) o job é pausado em vez de esgotar o retry de cada pedido restante.
+"""
+import logging
+import os
+import re
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timedelta
+from typing import Callable, List, Optional, Tuple
+
+from ..models import Order, OrderStatus
+from .job_queue import default_owner
+
+logger = logging.getLogger(__name__)
+
+ITEM_STATES = ('pending', 'in_flight', 'succeeded', 'failed', 'skipped')
+
+# Trechos de error_message que indicam falha que um reenvio não resolve
+_PERMANENT_ERRORS = (
+    ('duplicate', 'pedido duplicado'),
+    ('invalid_payload', 'Missing required field'),
+    ('invalid_payload', 'must contain at least one passenger'),
+    ('invalid_payload', 'must have pickup location'),
+    ('rejected', 'Order not accepted'),
+)
+
+# 4xx são recusas definitivas, exceto timeout (408) e rate limit (429)
+_REJECTED_STATUS = re.compile(r'Unexpected response: 4(?!08|29)\d\d')
+
+
+def classify_error(error_message: Optional[str]) -> Optional[str]:
+    """
+    Classifica a mensagem de erro de um pedido.
+
+    Returns:
+        Motivo (duplicate, invalid_payload, rejected) se a falha não for
+        recuperável com um novo envio; None se for transitória.
+    """
+    if not error_message:
+        return None
+    for reason, fragment in _PERMANENT_ERRORS:
+        if fragment in error_message:
+            return reason
+    if _REJECTED_STATUS.search(error_message):
+        return 'rejected'
+    return None
+
+
+def classify_failure(order: Order, now: Optional[datetime] = None,
+                     pickup_grace_minutes: float = 30) -> Optional[str]:
+    """
+    Decide se um pedido FAILED deve ser pulado no reprocessamento.
+
+    Args:
+        order: Pedido com status FAILED.
+        now: Instante de referência (padrão: agora).
+        pickup_grace_minutes: Tolerância após o horário de coleta.
+
+    Returns:
+        Motivo do skip (no_coordinates, pickup_passed ou o de classify_error),
+        ou None se o pedido deve ser reenviado.
+    """
+    if not (order.pickup_lat and order.pickup_lng):
+        return 'no_coordinates'
+    now = now or datetime.now()
+    pickup_time = order.pickup_time
+    if pickup_time is not None:
+        if pickup_time.tzinfo is not None:
+            pickup_time = pickup_time.astimezone().replace(tzinfo=None)
+        if pickup_time < now - timedelta(minutes=pickup_grace_minutes):
+            return 'pickup_passed'
+    return classify_error(order.error_message)
+
+
+class ReprocessingEngine:
+    """Executa jobs de reprocessamento com paralelismo limitado e checkpoint no banco."""
+
+    # Jobs em execução neste processo (o dashboard recria objetos a cada rerun)
+    _running = set()
+    _running_lock = threading.Lock()
+
+    def __init__(
+        self,
+        db,
+        dispatch: Callable[[Order], dict],
+        notify: Optional[Callable[[Order], None]] = None,
+        concurrency: int = 4,
+        max_consecutive_failures: int = 10,
+        pickup_grace_minutes: float = 30,
+        stale_after_seconds: float = 600
+    ):
+        """
+        Args:
+            db: DatabaseManager.
+            dispatch: Envia o pedido à MinasTaxi e retorna a resposta de dispatch_order.
+            notify: Chamado após cada sucesso (ex: WhatsApp); erros são só registrados.
+            concurrency: Máximo de pedidos em paralelo.
+            max_consecutive_failures: Falhas transitórias seguidas que pausam o job (0 desliga).
+            pickup_grace_minutes: Tolerância após a coleta antes de pular o pedido.
+            stale_after_seconds: Sem checkpoint por esse tempo, um job não
+                concluído que não roda neste processo é considerado
+                interrompido; é também o lease de cada pedido em envio.
+        """
+        self.db = db
+        self.dispatch = dispatch
+        self.notify = notify
+        self.concurrency = max(1, concurrency)
+        self.max_consecutive_failures = max_consecutive_failures
+        self.pickup_grace_minutes = pickup_grace_minutes
+        self.stale_after_seconds = stale_after_seconds
+        self.owner = default_owner()
+
+    @classmethod
+    def from_env(cls, db, dispatch, notify=None, env=None) -> 'ReprocessingEngine':
+        """Cria a partir das variáveis REPROCESS_* (dict-like, padrão os.environ)."""
+        env = os.environ if env is None else env
+        return cls(
+            db,
+            dispatch,
+            notify=notify,
+            concurrency=int(env.get('REPROCESS_CONCURRENCY', 4)),
+            max_consecutive_failures=int(env.get('REPROCESS_MAX_CONSECUTIVE_FAILURES', 10)),
+            pickup_grace_minutes=float(env.get('REPROCESS_PICKUP_GRACE_MINUTES', 30))
+        )
+
+    def create_job(self, order_ids: Optional[List[int]] = None) -> Optional[int]:
+        """
+        Cria um job com os pedidos informados (padrão: todos os FAILED).
+
+        Se o último job ainda tem pedidos pendentes (em execução, pausado ou
+        interrompido), retorna esse job em vez de criar outro, para que o mesmo
+        pedido não seja reenviado por dois jobs.
+
+        Returns:
+            ID do job, ou None se não houver pedidos.
+        """
+        job = self.db.get_reprocess_job()
+        if job and job['status'] != 'completed' and job['counts']['pending']:
+            return job['id']
+
+        if order_ids is None:
+            order_ids = [order.id for order in self.db.get_orders_by_status(OrderStatus.FAILED)]
+        if not order_ids:
+            return None
+        return self.db.create_reprocess_job(sorted(order_ids), self.concurrency)
+
+    def is_running(self, job_id: int) -> bool:
+        """True se o job está em execução neste processo."""
+        with self._running_lock:
+            return job_id in self._running
+
+    def is_stale(self, job: dict, now: Optional[datetime] = None) -> bool:
+        """True se o job ficou sem checkpoint recente, não concluído, e não roda neste processo."""
+        if job['status'] not in ('pending', 'running') or self.is_running(job['id']):
+            return False
+        updated_at = datetime.fromisoformat(job['updated_at'])
+        return (now or datetime.now()) - updated_at > timedelta(seconds=self.stale_after_seconds)
+
+    def start(self, job_id: int) -> bool:
+        """
+        Executa o job em uma thread de fundo.
+
+        Returns:
+            False se o job já está em execução neste processo.
+        """
+        with self._running_lock:
+            if job_id in self._running:
+                return False
+            self._running.add(job_id)
+        thread = threading.Thread(
+            target=self._run_claimed, args=(job_id,), name=f'reprocess-job-{job_id}', daemon=True
+        )
+        thread.start()
+        return True
+
+    def run(self, job_id: int) -> dict:
+        """
+        Executa (ou retoma) o job na thread atual até concluir ou pausar.
+
+        Se outro processo está rodando o job (status running com checkpoint
+        recente), não envia nada e só retorna o progresso atual.
+
+        Returns:
+            Job atualizado (ver DatabaseManager.get_reprocess_job).
+        """
+        with self._running_lock:
+            if job_id in self._running:
+                raise RuntimeError(f"Reprocess job {job_id} is already running")
+            self._running.add(job_id)
+        return self._run_claimed(job_id)
+
+    def _run_claimed(self, job_id: int) -> dict:
+        try:
+            return self._run(job_id)
+        except Exception as e:
+            logger.error(f"Reprocess job {job_id} aborted: {e}")
+            self.db.set_reprocess_job_status(job_id, 'paused', f"Erro interno: {e}")
+            raise
+        finally:
+            with self._running_lock:
+                self._running.discard(job_id)
+
+    def _running_elsewhere(self, job: dict) -> bool:
+        """True se o job está 'running' com checkpoint recente (outro processo o executa)."""
+        if job['status'] != 'running':
+            return False
+        updated_at = datetime.fromisoformat(job['updated_at'])
+        return datetime.now() - updated_at <= timedelta(seconds=self.stale_after_seconds)
+
+    def _run(self, job_id: int) -> dict:
+        job = self.db.get_reprocess_job(job_id)
+        if self._running_elsewhere(job):
+            logger.warning(f"Reprocess job {job_id} is already running in another process: {job['counts']}")
+            return job
+        logger.info(
+            f"🔄 Reprocess job {job_id}: {job['counts']['pending']} pending orders (concurrency {self.concurrency})"
+        )
+        self.db.set_reprocess_job_status(job_id, 'running')
+
+        consecutive_failures = 0
+        pause_message = None
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix=f'reprocess-{job_id}') as pool:
+            in_flight = set()
+            while True:
+                # Submete só até o limite, para poder parar de enviar ao pausar
+                while pause_message is None and len(in_flight) < self.concurrency:
+                    order_id = self.db.claim_reprocess_item(job_id, self.owner, self.stale_after_seconds)
+                    if order_id is None:
+                        break
+                    in_flight.add(pool.submit(self._process_item, job_id, order_id))
+                if not in_flight:
+                    break
+
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    state, reason = future.result()
+                    if state == 'succeeded':
+                        consecutive_failures = 0
+                    elif state == 'failed' and classify_error(reason) is None:
+                        consecutive_failures += 1
+                    if (pause_message is None and self.max_consecutive_failures
+                            and consecutive_failures >= self.max_consecutive_failures):
+                        pause_message = f"{consecutive_failures} falhas seguidas (última: {reason})"
+                        logger.warning(f"⏸️ Reprocess job {job_id} paused: {pause_message}")
+
+        if pause_message:
+            status = 'paused'
+        elif self.db.get_reprocess_job(job_id)['counts']['pending']:
+            # Pedidos ainda reservados por outro processo: ele conclui o job
+            status = 'running'
+        else:
+            status = 'completed'
+        self.db.set_reprocess_job_status(job_id, status, pause_message)
+        job = self.db.get_reprocess_job(job_id)
+        logger.info(f"Reprocess job {job_id} {status}: {job['counts']}")
+        return job
+
+    def _process_item(self, job_id: int, order_id: int) -> Tuple[str, Optional[str]]:
+        """Reprocessa um pedido do job e grava o resultado (checkpoint)."""
+        try:
+            state, reason = self.reprocess_order(self.db.get_order_by_id(order_id))
+        except Exception as e:
+            logger.error(f"❌ Erro reprocessando order {order_id}: {e}")
+            state, reason = 'failed', str(e)
+        if not self.db.finish_reprocess_item(job_id, order_id, state, reason,
+                                             owner=self.owner, lease_seconds=self.stale_after_seconds):
+            logger.warning(f"Reprocess item {order_id} of job {job_id} was reclaimed by another process")
+        return state, reason
+
+    def reprocess_order(self, order: Optional[Order]) -> Tuple[str, Optional[str]]:
+        """
+        Reenvia um pedido FAILED à MinasTaxi.
+
+        Returns:
+            (estado, motivo): ('succeeded', ride id), ('failed', erro) ou
+            ('skipped', motivo do skip).
+        """
+        if order is None:
+            return 'skipped', 'not_found'
+        if order.status != OrderStatus.FAILED:
+            # Já reenviado por outro caminho desde a criação do job
+            return 'skipped', f"status_{order.status.value}"
+        skip_reason = classify_failure(order, pickup_grace_minutes=self.pickup_grace_minutes)
+        if skip_reason:
+            logger.info(f"⏭️ Order {order.id} skipped: {skip_reason}")
+            return 'skipped', skip_reason
+
+        # Corpo do e-mail fica em email_blobs; carrega só para o dispatch
+        self.db.load_raw_email_body(order)
+        try:
+            response = self.dispatch(order)
+        except Exception as e:
+            logger.error(f"❌ Falha ao reprocessar order {order.id}: {e}")
+            order.error_message = f"Reprocessamento falhou: {str(e)}"
+            self.db.update_order(order)
+            return 'failed', str(e)
+
+        order.status = OrderStatus.DISPATCHED
+        order.minastaxi_order_id = response.get('order_id')
+        order.error_message = None
+        self.db.update_order(order)
+        logger.info(f"✅ Order {order.id} reprocessada com sucesso! Ride ID: {response.get('order_id')}")
+
+        if self.notify:
+            try:
+                self.notify(order)
+            except Exception as e:
+                logger.warning(f"Falha ao notificar order {order.id}: {e}")
+        return 'succeeded', response.get('order_id')
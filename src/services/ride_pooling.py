@@ -0,0 +1,238 @@
+"""
+Ride pooling: agrupa pedidos compatíveis em uma mesma corrida.
+"""
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from ..models.order import Order
+from . import geohash
+from .distance import haversine
+from .route_optimizer import RouteOptimizer
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _Pool:
+    """Grupo em formação; o primeiro pedido (âncora) define as restrições."""
+    anchor: Order
+    orders: List[Order] = field(default_factory=list)
+    seats: int = 0
+
+
+def _seats(order: Order) -> int:
+    return len(order.passengers) if order.passengers else 1
+
+
+def _precision_for_radius(radius_km: float) -> int:
+    """Maior precisão de geohash cuja célula ainda cobre o raio nos dois eixos."""
+    for precision in range(9, 0, -1):
+        lng_bits, lat_bits = geohash._bit_counts(precision)
+        lat_km = 180.0 / (1 << lat_bits) * 111.0
+        # Longitude encolhe com cos(lat); ~0.93 na latitude de MG
+        lng_km = 360.0 / (1 << lng_bits) * 111.0 * 0.93
+        if min(lat_km, lng_km) >= radius_km:
+            return precision
+    return 1
+
+
+class RidePoolingEngine:
+    """
+    Agrupa pedidos pendentes por janela de horário, destino e proximidade da coleta.
+
+    Usa um índice por (janela, célula do destino, célula da coleta) com geohash,
+    consultando apenas as células vizinhas - sem comparar todos os pares.
+    """
+
+    def __init__(
+        self,
+        window_minutes: int = 30,
+        pickup_radius_km: float = 2.0,
+        destination_radius_km: float = 1.0,
+        max_seats: int = 4
+    ):
+        """
+        Inicializa o motor de agrupamento.
+
+        Args:
+            window_minutes: Diferença máxima entre horários de coleta do grupo.
+            pickup_radius_km: Distância máxima entre a coleta e a do pedido âncora.
+            destination_radius_km: Distância máxima entre os destinos.
+            max_seats: Número máximo de passageiros por corrida.
+        """
+        self.window_seconds = window_minutes * 60
+        self.pickup_radius_km = pickup_radius_km
+        self.destination_radius_km = destination_radius_km
+        self.max_seats = max_seats
+        self.pickup_precision = _precision_for_radius(pickup_radius_km)
+        self.destination_precision = _precision_for_radius(destination_radius_km)
+
+    def is_poolable(self, order: Order) -> bool:
+        """Pedido tem horário e coordenadas de coleta e destino."""
+        return all(value is not None for value in (
+            order.pickup_time, order.pickup_lat, order.pickup_lng,
+            order.dropoff_lat, order.dropoff_lng
+        ))
+
+    def _compatible(self, pool: _Pool, order: Order) -> bool:
+        anchor = pool.anchor
+        if pool.seats + _seats(order) > self.max_seats:
+            return False
+        # Mesma empresa e forma de pagamento: a corrida é faturada uma única vez
+        if (anchor.company_code, anchor.payment_type) != (order.company_code, order.payment_type):
+            return False
+        if abs((order.pickup_time - anchor.pickup_time).total_seconds()) > self.window_seconds:
+            return False
+        if haversine(anchor.dropoff_lat, anchor.dropoff_lng,
+                     order.dropoff_lat, order.dropoff_lng) > self.destination_radius_km:
+            return False
+        return haversine(anchor.pickup_lat, anchor.pickup_lng,
+                         order.pickup_lat, order.pickup_lng) <= self.pickup_radius_km
+
+    def cluster(self, orders: List[Order]) -> List[List[Order]]:
+        """
+        Agrupa pedidos e atribui `cluster_id` aos grupos com mais de um pedido.
+
+        O agrupamento é guloso em ordem de horário: cada pedido entra no
+        primeiro grupo compatível encontrado nas células vizinhas ou abre um
+        novo grupo como âncora.
+
+        Args:
+            orders: Pedidos pendentes.
+
+        Returns:
+            Lista de grupos (pedidos sem dados suficientes ficam sozinhos).
+        """
+        poolable = sorted((o for o in orders if self.is_poolable(o)), key=lambda o: o.pickup_time)
+        groups: List[List[Order]] = [[o] for o in orders if not self.is_poolable(o)]
+
+        # Células calculadas de uma vez (vetorizado); vizinhanças memoizadas
+        dest_keys = geohash.encode_many(
+            [o.dropoff_lat for o in poolable], [o.dropoff_lng for o in poolable], self.destination_precision
+        ).tolist()
+        pickup_keys = geohash.encode_many(
+            [o.pickup_lat for o in poolable], [o.pickup_lng for o in poolable], self.pickup_precision
+        ).tolist()
+        around: Dict[str, List[str]] = {}
+
+        def with_neighbors(cell: str) -> List[str]:
+            if cell not in around:
+                around[cell] = [cell] + geohash.neighbors(cell)
+            return around[cell]
+
+        index: Dict[Tuple[int, str, str], List[_Pool]] = {}
+        pools: List[_Pool] = []
+        for order, dest_cell, pickup_cell in zip(poolable, dest_keys, pickup_keys):
+            window = int(order.pickup_time.timestamp() // self.window_seconds)
+            dest_cells = with_neighbors(dest_cell)
+            pickup_cells = with_neighbors(pickup_cell)
+
+            target: Optional[_Pool] = None
+            for w in (window - 1, window, window + 1):
+                for d in dest_cells:
+                    for p in pickup_cells:
+                        for pool in index.get((w, d, p), ()):
+                            if self._compatible(pool, order):
+                                target = pool
+                                break
+                        if target:
+                            break
+                    if target:
+                        break
+                if target:
+                    break
+
+            if target is None:
+                target = _Pool(anchor=order)
+                pools.append(target)
+                index.setdefault((window, dest_cell, pickup_cell), []).append(target)
+            target.orders.append(order)
+            target.seats += _seats(order)
+
+        next_id = max((o.cluster_id or 0 for o in orders), default=0) + 1
+        for pool in pools:
+            if len(pool.orders) > 1:
+                ids = [o.id for o in pool.orders if o.id is not None]
+                cluster_id = min(ids) if ids else next_id
+                next_id = max(next_id, cluster_id) + 1
+                for order in pool.orders:
+                    order.cluster_id = cluster_id
+            groups.append(pool.orders)
+
+        pooled = sum(len(p.orders) for p in pools if len(p.orders) > 1)
+        logger.info(f"Ride pooling: {len(orders)} orders -> {len(groups)} rides ({pooled} pooled)")
+        return groups
+
+    @staticmethod
+    def merge_orders(orders: List[Order]) -> Order:
+        """
+        Combina pedidos de um grupo em um único pedido multi-passageiro.
+
+        Cada passageiro mantém seu telefone, RE e centro de custo. A ordem de
+        coleta é recalculada pelo RouteOptimizer.
+
+        Args:
+            orders: Pedidos do mesmo grupo (o primeiro é a âncora).
+
+        Returns:
+            Novo Order (não persistido) para dispatch.
+        """
+        anchor = orders[0]
+        passengers = []
+        for order in orders:
+            if order.passengers:
+                for passenger in order.passengers:
+                    merged = dict(passenger)
+                    if not merged.get('cost_center'):
+                        merged['cost_center'] = order.cost_center
+                    passengers.append(merged)
+            else:
+                passenger = {
+                    'name': order.passenger_name,
+                    'phone': order.phone,
+                    'address': order.pickup_address,
+                    'passenger_re': order.passenger_re,
+                    'cost_center': order.cost_center,
+                }
+                if order.pickup_lat is not None and order.pickup_lng is not None:
+                    passenger['lat'] = order.pickup_lat
+                    passenger['lng'] = order.pickup_lng
+                passengers.append(passenger)
+
+        destination = (anchor.dropoff_lat, anchor.dropoff_lng) if anchor.dropoff_lat is not None else None
+        passengers, _ = RouteOptimizer.solve_pickup_route(passengers, destination)
+
+        notes = []
+        for order in orders:
+            if order.notes and order.notes not in notes:
+                notes.append(order.notes)
+
+        merged_order = Order(
+            passenger_name=anchor.passenger_name,
+            phone=anchor.phone,
+            passenger_re=anchor.passenger_re,
+            pickup_address=anchor.pickup_address,
+            dropoff_address=anchor.dropoff_address,
+            pickup_lat=anchor.pickup_lat,
+            pickup_lng=anchor.pickup_lng,
+            dropoff_lat=anchor.dropoff_lat,
+            dropoff_lng=anchor.dropoff_lng,
+            pickup_time=min(o.pickup_time for o in orders),
+            passengers=passengers,
+            notes=' | '.join(notes) or None,
+            cost_center=anchor.cost_center,
+            company_code=anchor.company_code,
+            company_cnpj=anchor.company_cnpj,
+            payment_type=anchor.payment_type,
+            status=anchor.status,
+            cluster_id=anchor.cluster_id,
+        )
+        if passengers and 'lat' in passengers[0]:
+            merged_order.pickup_lat = passengers[0]['lat']
+            merged_order.pickup_lng = passengers[0]['lng']
+            addresses = [p['address'] for p in passengers[:2]]
+            merged_order.pickup_address = (
+                f"Múltiplas paradas: {' → '.join(addresses)}" + ("..." if len(passengers) > 2 else "")
+            )
+        return merged_order
@@ -1,82 +1,259 @@
 """
 Otimizador de rota para múltiplos passageiros
 """
-import math
 from typing import List, Dict, Tuple, Optional, Any
 
-try:
-    from geopy.distance import geodesic
-    HAS_GEOPY = True
-except ImportError:
-    HAS_GEOPY = False
+import numpy as np
+
+from .distance import haversine, distance_matrix
+
+# Até este número de paradas a ordem ótima é calculada (Held-Karp);
+# acima disso usa heurística (vizinho mais próximo + 2-opt + Or-opt)
+HELD_KARP_MAX_STOPS = 12
+
 
 class RouteOptimizer:
     """Otimiza ordem de coleta dos passageiros"""
-    
+
     @staticmethod
     def calculate_distance(coord1: Tuple[float, float], coord2: Tuple[float, float]) -> float:
         """Calcula distância entre duas coordenadas em km"""
-        try:
-            if HAS_GEOPY:
-                return geodesic(coord1, coord2).kilometers
-            else:
-                # Fallback: distância euclidiana simples
-                lat1, lng1 = coord1
-                lat2, lng2 = coord2
-                return math.sqrt((lat2 - lat1)**2 + (lng2 - lng1)**2) * 111  # ~111km por grau
-        except:
-            # Fallback: distância euclidiana simples
-            lat1, lng1 = coord1
-            lat2, lng2 = coord2
-            return math.sqrt((lat2 - lat1)**2 + (lng2 - lng1)**2) * 111  # ~111km por grau
-    
+        return haversine(coord1[0], coord1[1], coord2[0], coord2[1])
+
+    @staticmethod
+    def build_distance_matrix(points: List[Tuple[float, float]]) -> np.ndarray:
+        """
+        Calcula a matriz de distâncias (km) entre todos os pontos.
+
+        Args:
+            points: Lista de coordenadas (lat, lng).
+
+        Returns:
+            Matriz NumPy n x n.
+        """
+        return distance_matrix(points)
+
+    @staticmethod
+    def solve_open_path(matrix: np.ndarray) -> Tuple[List[int], float]:
+        """
+        Resolve o caminho aberto de menor custo que visita todas as paradas
+        e termina no destino fixo (último índice da matriz).
+
+        O ponto de partida é livre: a primeira coleta é escolhida pelo solver.
+
+        Args:
+            matrix: Matriz (n+1) x (n+1) com as n paradas e o destino no fim.
+
+        Returns:
+            Tupla (ordem das paradas, distância total em km até o destino).
+        """
+        n = len(matrix) - 1
+        if n <= 0:
+            return [], 0.0
+        if n == 1:
+            return [0], float(matrix[0, 1])
+        if n <= HELD_KARP_MAX_STOPS:
+            order = RouteOptimizer._held_karp(matrix)
+        else:
+            order = RouteOptimizer._heuristic_path(matrix)
+        return order, RouteOptimizer.path_length(matrix, order)
+
+    @staticmethod
+    def path_length(matrix: np.ndarray, order: List[int]) -> float:
+        """Distância da sequência de paradas até o destino (último índice)."""
+        destination = len(matrix) - 1
+        stops = list(order) + [destination]
+        return float(sum(matrix[a, b] for a, b in zip(stops, stops[1:])))
+
+    @staticmethod
+    def _held_karp(matrix: np.ndarray) -> List[int]:
+        """
+        Programação dinâmica exata (Held-Karp), vetorizada por camada.
+
+        cost[mask, j] = menor caminho que visita exatamente as paradas de
+        `mask`, começando em qualquer uma delas e terminando em j.
+        """
+        n = len(matrix) - 1
+        dist = matrix[:n, :n]
+        size = 1 << n
+        cost = np.full((size, n), np.inf)
+        parent = np.full((size, n), -1, dtype=np.int8)
+        for j in range(n):
+            cost[1 << j, j] = 0.0
+
+        masks = np.arange(size)
+        popcount = np.zeros(size, dtype=np.int8)
+        for j in range(n):
+            popcount += ((masks >> j) & 1).astype(np.int8)
+
+        for layer in range(2, n + 1):
+            layer_masks = masks[popcount == layer]
+            for j in range(n):
+                with_j = layer_masks[((layer_masks >> j) & 1) == 1]
+                previous = with_j ^ (1 << j)
+                # cost[previous, k] é inf para k fora de previous
+                candidates = cost[previous] + dist[:, j]
+                best = np.argmin(candidates, axis=1)
+                cost[with_j, j] = candidates[np.arange(len(with_j)), best]
+                parent[with_j, j] = best
+
+        full = size - 1
+        last = int(np.argmin(cost[full] + matrix[:n, n]))
+
+        order = []
+        mask = full
+        while last != -1:
+            order.append(last)
+            previous = int(parent[mask, last])
+            mask ^= 1 << last
+            last = previous
+        order.reverse()
+        return order
+
+    @staticmethod
+    def _heuristic_path(matrix: np.ndarray) -> List[int]:
+        """
+        Caminho aproximado para muitas paradas.
+
+        Constrói de trás para frente a partir do destino (vizinho mais
+        próximo) e melhora com 2-opt e Or-opt até não haver ganho.
+        """
+        n = len(matrix) - 1
+        # Listas Python são bem mais rápidas que indexação escalar no NumPy
+        dist = matrix.tolist()
+        remaining = set(range(n))
+        current = n
+        reversed_order = []
+        while remaining:
+            nearest = min(remaining, key=lambda k: dist[k][current])
+            reversed_order.append(nearest)
+            remaining.remove(nearest)
+            current = nearest
+        order = reversed_order[::-1]
+
+        improved = True
+        while improved:
+            improved = RouteOptimizer._two_opt(dist, order)
+            improved = RouteOptimizer._or_opt(dist, order) or improved
+        return order
+
+    @staticmethod
+    def _two_opt(dist: List[List[float]], order: List[int]) -> bool:
+        """Inverte segmentos enquanto houver ganho (início livre, fim no destino)."""
+        destination = len(dist) - 1
+        n = len(order)
+        improved = False
+        changed = True
+        while changed:
+            changed = False
+            for i in range(n - 1):
+                for k in range(i + 1, n):
+                    after = order[k + 1] if k + 1 < n else destination
+                    # Sem aresta antes da primeira parada (caminho aberto)
+                    if i > 0:
+                        before = order[i - 1]
+                        old = dist[before][order[i]] + dist[order[k]][after]
+                        new = dist[before][order[k]] + dist[order[i]][after]
+                    else:
+                        old = dist[order[k]][after]
+                        new = dist[order[i]][after]
+                    if new < old - 1e-9:
+                        order[i:k + 1] = order[i:k + 1][::-1]
+                        changed = improved = True
+        return improved
+
+    @staticmethod
+    def _or_opt(dist: List[List[float]], order: List[int]) -> bool:
+        """Move segmentos de 1 a 3 paradas (em qualquer sentido) para a melhor posição."""
+        destination = len(dist) - 1
+
+        def edge(a: Optional[int], b: int) -> float:
+            return 0.0 if a is None else dist[a][b]
+
+        improved = False
+        for segment_len in (1, 2, 3):
+            i = 0
+            while i + segment_len <= len(order):
+                segment = order[i:i + segment_len]
+                prev = order[i - 1] if i > 0 else None
+                nxt = order[i + segment_len] if i + segment_len < len(order) else destination
+                removal_gain = edge(prev, segment[0]) + dist[segment[-1]][nxt] - edge(prev, nxt)
+
+                rest = order[:i] + order[i + segment_len:]
+                best_delta, best_path = -1e-9, None
+                for pos in range(len(rest) + 1):
+                    a = rest[pos - 1] if pos > 0 else None
+                    b = rest[pos] if pos < len(rest) else destination
+                    for candidate in (segment, segment[::-1]):
+                        if pos == i and candidate is segment:
+                            continue
+                        insert_cost = edge(a, candidate[0]) + dist[candidate[-1]][b] - edge(a, b)
+                        delta = insert_cost - removal_gain
+                        if delta < best_delta:
+                            best_delta = delta
+                            best_path = rest[:pos] + candidate + rest[pos:]
+                if best_path is not None:
+                    order[:] = best_path
+                    improved = True
+                i += 1
+        return improved
+
+    @staticmethod
+    def solve_pickup_route(
+        passengers: List[Dict[str, Any]],
+        destination_coords: Optional[Tuple[float, float]] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[float]]:
+        """
+        Calcula a sequência de coleta de menor distância até o destino.
+
+        Args:
+            passengers: Lista de passageiros com lat/lng
+            destination_coords: Coordenadas do destino final
+
+        Returns:
+            Tupla (passageiros na ordem de coleta, distância total em km).
+            Sem destino, mantém a ordem original e a distância é None.
+        """
+        if not destination_coords or not passengers:
+            return passengers, None
+
+        located = [p for p in passengers if 'lat' in p and 'lng' in p]
+        # Passageiros sem coordenadas ficam no início, como na ordenação anterior
+        unlocated = [p for p in passengers if not ('lat' in p and 'lng' in p)]
+
+        points = [(p['lat'], p['lng']) for p in located] + [tuple(destination_coords)]
+        matrix = RouteOptimizer.build_distance_matrix(points)
+        order, total_km = RouteOptimizer.solve_open_path(matrix)
+
+        return unlocated + [located[i] for i in order], total_km
+
     @staticmethod
     def optimize_pickup_sequence(
-        passengers: List[Dict[str, Any]], 
+        passengers: List[Dict[str, Any]],
         destination_coords: Optional[Tuple[float, float]] = None
     ) -> List[Dict[str, Any]]:
         """
         Otimiza sequência de coleta dos passageiros.
-        Último passageiro deve ser mais próximo do destino.
-        
+        Minimiza a distância total da primeira coleta até o destino.
+
         Args:
             passengers: Lista de passageiros com lat/lng
             destination_coords: Coordenadas do destino final
-            
+
         Returns:
             Lista otimizada de passageiros
         """
         if len(passengers) <= 1:
             return passengers
-        
-        # Se temos coordenadas do destino, otimiza por proximidade
-        if destination_coords:
-            # Calcula distância de cada passageiro ao destino
-            for passenger in passengers:
-                if 'lat' in passenger and 'lng' in passenger:
-                    passenger_coords = (passenger['lat'], passenger['lng'])
-                    distance = RouteOptimizer.calculate_distance(passenger_coords, destination_coords)
-                    passenger['_distance_to_destination'] = distance
-                else:
-                    passenger['_distance_to_destination'] = float('inf')
-            
-            # Ordena: primeiro os mais longe, último o mais próximo do destino
-            optimized = sorted(passengers, key=lambda p: p.get('_distance_to_destination', float('inf')), reverse=True)
-            
-            # Remove campo temporário
-            for passenger in optimized:
-                passenger.pop('_distance_to_destination', None)
-            
-            return optimized
-        
-        # Se não temos destino, mantém ordem original
-        return passengers
-    
+
+        optimized, _ = RouteOptimizer.solve_pickup_route(passengers, destination_coords)
+        return optimized
+
     @staticmethod
     def generate_route_summary(passengers: List[Dict[str, Any]]) -> str:
         """Gera resumo da rota otimizada"""
         if len(passengers) <= 1:
             return passengers[0]['address'] if passengers else "Sem passageiros"
-        
+
         addresses = [f"{i+1}. {p['address']}" for i, p in enumerate(passengers)]
-        return f"Rota otimizada:\n" + "\n".join(addresses)
\ No newline at end of file
+        return f"Rota otimizada:\n" + "\n".join(addresses)
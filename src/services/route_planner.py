@@ -0,0 +1,183 @@
+"""
+Planejamento de horários de coleta com prazo de chegada.
+"""
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .distance import leg_distances
+
+logger = logging.getLogger(__name__)
+
+
+class SpeedModel:
+    """
+    Estimativa de tempo de deslocamento a partir da distância em linha reta.
+
+    A distância é convertida em distância viária por um fator de desvio e a
+    velocidade média cresce com o tamanho do trecho (urbano → rodovia).
+    """
+
+    # (distância viária máxima em km, velocidade média em km/h)
+    DEFAULT_BANDS: Tuple[Tuple[float, float], ...] = ((5.0, 22.0), (20.0, 38.0), (float('inf'), 62.0))
+
+    def __init__(
+        self,
+        detour_factor: float = 1.3,
+        bands: Sequence[Tuple[float, float]] = DEFAULT_BANDS,
+        dwell_minutes: float = 2.0
+    ):
+        """
+        Inicializa o modelo de velocidade.
+
+        Args:
+            detour_factor: Razão distância viária / distância em linha reta.
+            bands: Faixas (distância máxima, velocidade km/h) em ordem crescente.
+            dwell_minutes: Tempo parado em cada coleta (embarque).
+        """
+        self.detour_factor = detour_factor
+        self.band_limits = np.array([limit for limit, _ in bands])
+        self.band_speeds = np.array([speed for _, speed in bands])
+        self.dwell_minutes = dwell_minutes
+
+    def leg_minutes(self, distances_km: np.ndarray) -> np.ndarray:
+        """
+        Converte distâncias em linha reta (km) em minutos de viagem.
+
+        Args:
+            distances_km: Array de distâncias.
+
+        Returns:
+            Array de minutos, mesmo formato da entrada.
+        """
+        road_km = np.asarray(distances_km, dtype=np.float64) * self.detour_factor
+        band = np.minimum(np.searchsorted(self.band_limits, road_km), len(self.band_speeds) - 1)
+        return road_km / self.band_speeds[band] * 60.0
+
+
+@dataclass
+class RoutePlan:
+    """Horários planejados para uma rota de coleta."""
+    offsets_minutes: List[float] = field(default_factory=list)  # por parada, a partir da 1ª coleta
+    leg_km: List[float] = field(default_factory=list)  # trecho saindo de cada parada (último → destino)
+    total_km: float = 0.0
+    total_minutes: float = 0.0  # da 1ª coleta até a chegada ao destino
+    first_pickup_time: Optional[datetime] = None
+    arrival_time: Optional[datetime] = None
+
+    def pickup_times(self) -> List[Optional[datetime]]:
+        """Horário de cada coleta (None se a rota não tem horário de referência)."""
+        if self.first_pickup_time is None:
+            return [None] * len(self.offsets_minutes)
+        return [self.first_pickup_time + timedelta(minutes=m) for m in self.offsets_minutes]
+
+
+class RoutePlanner:
+    """
+    Calcula horários de coleta por parada para uma sequência já ordenada.
+
+    Com prazo de chegada, agenda de trás para frente: a primeira coleta é
+    antecipada pela soma dos trechos e embarques. Sem prazo, agenda a partir
+    do horário de saída informado.
+    """
+
+    def __init__(self, speed_model: Optional[SpeedModel] = None, arrival_buffer_minutes: float = 5.0):
+        """
+        Inicializa o planejador.
+
+        Args:
+            speed_model: Modelo de tempo de deslocamento.
+            arrival_buffer_minutes: Folga antes do prazo de chegada.
+        """
+        self.speed_model = speed_model or SpeedModel()
+        self.arrival_buffer_minutes = arrival_buffer_minutes
+
+    def plan(
+        self,
+        stops: Sequence[Tuple[float, float]],
+        destination: Tuple[float, float],
+        deadline: Optional[datetime] = None,
+        start_time: Optional[datetime] = None,
+        travel_minutes: Optional[np.ndarray] = None
+    ) -> RoutePlan:
+        """
+        Planeja os horários de uma rota.
+
+        Args:
+            stops: Coordenadas das coletas na ordem de visita.
+            destination: Coordenadas do destino final.
+            deadline: Horário em que o passageiro deve chegar ao destino.
+            start_time: Horário da primeira coleta (usado se não houver prazo).
+            travel_minutes: Matriz de tempos (minutos) já conhecida para
+                stops + destino, na mesma ordem; substitui o modelo de velocidade.
+
+        Returns:
+            RoutePlan com deslocamentos por parada.
+        """
+        if not stops:
+            return RoutePlan(first_pickup_time=start_time, arrival_time=deadline)
+
+        points = list(stops) + [destination]
+        legs_km = leg_distances(points)
+        if travel_minutes is not None:
+            idx = np.arange(len(stops))
+            legs_min = np.asarray(travel_minutes)[idx, idx + 1]
+        else:
+            legs_min = self.speed_model.leg_minutes(legs_km)
+
+        # Cada parada: embarque + trecho até a próxima
+        step = legs_min + self.speed_model.dwell_minutes
+        offsets = np.concatenate(([0.0], np.cumsum(step[:-1])))
+        total_minutes = float(offsets[-1] + step[-1])
+
+        if deadline is not None:
+            arrival = deadline - timedelta(minutes=self.arrival_buffer_minutes)
+            first_pickup = arrival - timedelta(minutes=total_minutes)
+        elif start_time is not None:
+            first_pickup = start_time
+            arrival = start_time + timedelta(minutes=total_minutes)
+        else:
+            first_pickup = arrival = None
+
+        return RoutePlan(
+            offsets_minutes=offsets.tolist(),
+            leg_km=legs_km.tolist(),
+            total_km=float(legs_km.sum()),
+            total_minutes=total_minutes,
+            first_pickup_time=first_pickup,
+            arrival_time=arrival,
+        )
+
+    def plan_passengers(
+        self,
+        passengers: List[Dict[str, Any]],
+        destination: Tuple[float, float],
+        deadline: Optional[datetime] = None,
+        start_time: Optional[datetime] = None
+    ) -> RoutePlan:
+        """
+        Planeja a rota de uma lista de passageiros e anota cada um.
+
+        Passageiros com coordenadas recebem `pickup_offset_minutes` e
+        `pickup_time` (ISO 8601); os demais ficam sem horário.
+
+        Args:
+            passengers: Passageiros já na ordem de coleta.
+            destination: Coordenadas do destino final.
+            deadline: Horário limite de chegada.
+            start_time: Horário da primeira coleta (sem prazo).
+
+        Returns:
+            RoutePlan das paradas com coordenadas.
+        """
+        located = [p for p in passengers if 'lat' in p and 'lng' in p]
+        plan = self.plan([(p['lat'], p['lng']) for p in located], destination, deadline, start_time)
+
+        for passenger, offset, when in zip(located, plan.offsets_minutes, plan.pickup_times()):
+            passenger['pickup_offset_minutes'] = round(offset, 1)
+            if when is not None:
+                passenger['pickup_time'] = when.isoformat()
+        return plan
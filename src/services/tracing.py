@@ -0,0 +1,332 @@
+"""
+Tracing estruturado (estilo OpenTelemetry) sem dependências externas.
+
+Cada pedido vira um trace (span raiz 'order' com o UID do e-mail) e cada
+estágio/chamada externa um span filho, com atributos como tamanhos,
+tentativas e acertos de cache. O span corrente é propagado por contextvars
+(threads do pool de geocoding recebem o contexto via bind_context) e os spans
+finalizados são gravados como JSON, um por linha, no arquivo de TRACE_FILE.
+
+Sem exportador configurado todas as chamadas viram no-op.
+
+Uso:
+    tracing.configure('data/traces.jsonl')
+    with tracing.start_trace('order', email_uid=uid):
+        with tracing.span('openai.chat', model='gpt-4o') as span:
+            span.set_attribute('response_chars', 1234)
+
+    python trace_report.py <email_uid>     # árvore e caminho crítico do pedido
+"""
+import contextvars
+import json
+import logging
+import os
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_current_span: contextvars.ContextVar = contextvars.ContextVar('current_span', default=None)
+
+# Tolerância (s) entre relógios de spans irmãos ao montar o caminho crítico
+_CLOCK_SLACK = 1e-4
+
+
+class Span:
+    """Operação com início, fim, atributos e status, ligada ao trace e ao span pai."""
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.attributes = dict(attributes)
+        self.status = 'ok'
+        self.start = time.time()
+        self.end: Optional[float] = None
+        self._perf_start = time.perf_counter()
+        self._child_counts: Dict[str, int] = {}
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def set_attributes(self, **attributes):
+        self.attributes.update(attributes)
+
+    def set_status(self, status: str):
+        self.status = status
+
+    def record_error(self, error: BaseException):
+        self.status = 'error'
+        self.attributes['error'] = f"{type(error).__name__}: {error}"
+
+    def finish(self):
+        self.end = self.start + (time.perf_counter() - self._perf_start)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'name': self.name,
+            'start': self.start,
+            'end': self.end,
+            'duration_ms': ((self.end or self.start) - self.start) * 1000,
+            'status': self.status,
+            'attributes': self.attributes,
+        }
+
+
+class _NoopSpan:
+    """Span descartado quando o tracing está desligado."""
+    attributes: Dict[str, Any] = {}
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+    def set_attributes(self, **attributes):
+        pass
+
+    def set_status(self, status: str):
+        pass
+
+    def record_error(self, error: BaseException):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class JsonlExporter:
+    """Grava cada span finalizado como uma linha JSON (thread-safe)."""
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def export(self, span: Span):
+        line = json.dumps(span.to_dict(), ensure_ascii=False, default=str)
+        with self._lock:
+            self._file.write(line + '\n')
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+class Tracer:
+    """Cria spans aninhados pelo contexto atual e os entrega ao exportador."""
+
+    def __init__(self, exporter: Optional[JsonlExporter] = None):
+        self.exporter = exporter
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    def start_span(self, name: str, new_trace: bool = False, retryable: bool = False, **attributes):
+        """
+        Cria um span filho do span corrente (ou raiz de um novo trace) sem torná-lo corrente.
+
+        Para operações que não cabem em um único bloco `with` (ex: pedido extraído
+        em uma fase do ciclo e concluído em outra): ative com use_span e feche
+        com end_span.
+
+        Args:
+            name: Nome da operação (ex: 'extract', 'minastaxi.rideCreate').
+            new_trace: Ignora o span corrente e inicia um novo trace.
+            retryable: Conta as chamadas com o mesmo nome sob o mesmo pai
+                (decorator @retry) no atributo attempt (1, 2, ...).
+            **attributes: Atributos iniciais.
+        """
+        if self.exporter is None:
+            return NOOP_SPAN
+
+        parent = None if new_trace else _current_span.get()
+        span = Span(
+            name,
+            trace_id=parent.trace_id if parent else secrets.token_hex(16),
+            parent_id=parent.span_id if parent else None,
+            attributes=attributes
+        )
+        if retryable and parent is not None:
+            attempt = parent._child_counts.get(name, 0) + 1
+            parent._child_counts[name] = attempt
+            span.attributes['attempt'] = attempt
+        return span
+
+    def end_span(self, span):
+        """Finaliza o span e o entrega ao exportador."""
+        if self.exporter is None or not isinstance(span, Span):
+            return
+        span.finish()
+        try:
+            self.exporter.export(span)
+        except Exception as e:
+            logger.debug(f"Failed to export span {span.name}: {e}")
+
+    @contextmanager
+    def use_span(self, span) -> Iterator[Span]:
+        """Torna `span` o corrente dentro do bloco; exceções o marcam com erro (não o finaliza)."""
+        if not isinstance(span, Span):
+            yield span
+            return
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.record_error(e)
+            raise
+        finally:
+            _current_span.reset(token)
+
+    @contextmanager
+    def span(self, name: str, new_trace: bool = False, retryable: bool = False, **attributes) -> Iterator[Span]:
+        """
+        Abre um span filho do span corrente (ou raiz de um novo trace).
+
+        Exceções marcam o span com erro e são propagadas. Argumentos como em start_span.
+        """
+        span = self.start_span(name, new_trace=new_trace, retryable=retryable, **attributes)
+        try:
+            with self.use_span(span):
+                yield span
+        finally:
+            self.end_span(span)
+
+
+_tracer = Tracer()
+
+
+def configure(path: Optional[str]) -> Tracer:
+    """
+    Liga o tracing gravando em `path` (JSONL) ou desliga com None/''.
+
+    Args:
+        path: Arquivo de saída.
+
+    Returns:
+        Tracer global.
+    """
+    global _tracer
+    if _tracer.exporter is not None:
+        _tracer.exporter.close()
+    _tracer = Tracer(JsonlExporter(path) if path else None)
+    if path:
+        logger.info(f"Tracing enabled: {path}")
+    return _tracer
+
+
+def get_tracer() -> Tracer:
+    return _tracer
+
+
+def span(name: str, **attributes):
+    """Span filho do corrente no tracer global (ver Tracer.span)."""
+    return _tracer.span(name, **attributes)
+
+
+def start_trace(name: str, **attributes):
+    """Span raiz de um novo trace no tracer global (ex: um pedido)."""
+    return _tracer.span(name, new_trace=True, **attributes)
+
+
+def start_span(name: str, **attributes):
+    """Span não ativado no tracer global (ver Tracer.start_span)."""
+    return _tracer.start_span(name, **attributes)
+
+
+def end_span(span):
+    """Finaliza um span criado por start_span."""
+    _tracer.end_span(span)
+
+
+def use_span(span):
+    """Ativa um span criado por start_span dentro de um bloco `with`."""
+    return _tracer.use_span(span)
+
+
+def current_span():
+    """Span corrente ou um no-op (para anotar atributos sem abrir span)."""
+    return _current_span.get() or NOOP_SPAN
+
+
+def bind_context(fn: Callable) -> Callable:
+    """Amarra `fn` ao contexto atual para rodar em outra thread sem perder o span pai."""
+    ctx = contextvars.copy_context()
+    return lambda *args, **kwargs: ctx.run(fn, *args, **kwargs)
+
+
+def load_spans(path: str) -> List[Dict[str, Any]]:
+    """Lê os spans de um arquivo JSONL (linhas inválidas são ignoradas)."""
+    spans = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                spans.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return spans
+
+
+def build_tree(spans: List[Dict[str, Any]]) -> Dict[Optional[str], List[Dict[str, Any]]]:
+    """Agrupa os spans de um trace por parent_id, filhos em ordem de início."""
+    children: Dict[Optional[str], List[Dict[str, Any]]] = {}
+    for item in sorted(spans, key=lambda s: s['start']):
+        children.setdefault(item['parent_id'], []).append(item)
+    return children
+
+
+def critical_path(spans: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Caminho crítico de um trace: spans que determinaram a duração total.
+
+    Em cada span, anda para trás a partir do fim: o filho que terminou por
+    último está no caminho, depois o último filho que terminou antes do início
+    dele, e assim por diante; cada um é expandido da mesma forma. Filhos
+    sobrepostos a um span do caminho (ex: consultas hedged perdedoras) ficam fora.
+
+    Args:
+        spans: Spans de um único trace.
+
+    Returns:
+        Spans do caminho em ordem de início (pais antes dos filhos).
+    """
+    children = build_tree(spans)
+    roots = children.get(None) or []
+    if not roots:
+        return []
+    path = []
+
+    def visit(item):
+        path.append(item)
+        cursor = item['end'] or item['start']
+        chain = []
+        for child in sorted(children.get(item['span_id'], []), key=lambda s: s['end'] or s['start'], reverse=True):
+            if (child['end'] or child['start']) <= cursor + _CLOCK_SLACK:
+                chain.append(child)
+                cursor = child['start']
+        for child in reversed(chain):
+            visit(child)
+
+    visit(max(roots, key=lambda s: s['duration_ms']))
+    return path
+
+
+def self_time_ms(item: Dict[str, Any], children: Dict[Optional[str], List[Dict[str, Any]]]) -> float:
+    """Tempo do span fora dos filhos (intervalos sobrepostos contados uma vez)."""
+    covered, cursor = 0.0, item['start']
+    for child in children.get(item['span_id'], []):
+        start, end = max(child['start'], cursor), min(child['end'] or child['start'], item['end'] or item['start'])
+        if end > start:
+            covered += end - start
+            cursor = end
+    return max(item['duration_ms'] - covered * 1000, 0.0)
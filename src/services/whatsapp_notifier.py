@@ -8,6 +8,8 @@ import requests
 from typing import Dict, Optional
 from retry import retry
 
+from . import tracing
+
 logger = logging.getLogger(__name__)
 
 
@@ -171,12 +173,14 @@ class WhatsAppNotifier:
         endpoint = f"{self.api_url}/chat/whatsappNumbers/{self.instance_name}"
         
         try:
-            response = requests.post(
-                endpoint,
-                json={"numbers": [phone]},
-                headers=self.headers,
-                timeout=10
-            )
+            with tracing.span('whatsapp.whatsappNumbers', instance=self.instance_name) as span:
+                response = requests.post(
+                    endpoint,
+                    json={"numbers": [phone]},
+                    headers=self.headers,
+                    timeout=10
+                )
+                span.set_attribute('status_code', response.status_code)
             
             if response.status_code == 200:
                 data = response.json()
@@ -250,12 +254,17 @@ class WhatsAppNotifier:
         try:
             logger.info(f"Sending WhatsApp to {payload['number']}: {name}")
             
-            response = requests.post(
-                endpoint,
-                json=payload,
-                headers=self.headers,
-                timeout=self.timeout
-            )
+            with tracing.span('whatsapp.sendText', retryable=True, instance=self.instance_name,
+                              message_chars=len(message)) as span:
+                response = requests.post(
+                    endpoint,
+                    json=payload,
+                    headers=self.headers,
+                    timeout=self.timeout
+                )
+                span.set_attribute('status_code', response.status_code)
+                if response.status_code not in [200, 201]:
+                    span.set_status('error')
             
             # Log da resposta
             logger.debug(f"Request to {endpoint}: {payload}")
@@ -0,0 +1,62 @@
+import os
+import sys
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from benchmarks.bench_extraction import build_parser, run, score
+from benchmarks.corpus import BRT, csn_corpus, load_corpus, write_corpus
+
+
+def test_csn_corpus_matches_documented_formats():
+    reference = datetime(2026, 1, 3, 19, 0, tzinfo=BRT)
+    corpus = csn_corpus(60, seed=5, reference=reference)
+
+    assert {mail.style for mail in corpus} == {'csn_tabela', 'csn_enderecos', 'csn_texto'}
+    for mail in corpus:
+        passengers = mail.truth['passengers'] or [mail.truth]
+        assert 1 <= len(passengers) <= 20
+        assert f"{mail.truth['cost_center']}" in mail.body
+        if mail.truth['company_code']:
+            assert mail.truth['company_code'] in mail.body
+        if mail.style != 'csn_texto':
+            assert '┌' in mail.body and mail.body.count('│ ') >= len(passengers)
+        if 'amanhã' in mail.subject:
+            assert mail.truth['pickup_time'].startswith((reference + timedelta(days=1)).strftime('%Y-%m-%d'))
+        if mail.truth['has_return']:
+            assert 'etorno' in mail.body or 'RETORNO' in mail.body
+    # Os formatos tabulados usam matrícula MIN/MIO/MIP/MNC
+    assert corpus[0].truth['passenger_re'][:3] in ('MIN', 'MIO', 'MIP', 'MNC')
+
+
+def test_corpus_round_trips_through_eml_files(tmp_path):
+    corpus = csn_corpus(5, seed=2)
+    paths = write_corpus(corpus, str(tmp_path))
+
+    assert len(paths) == 5 and all(os.path.exists(p[:-4] + '.json') for p in paths)
+    loaded = load_corpus(str(tmp_path))
+    assert [m.truth for m in loaded] == [m.truth for m in corpus]
+    assert [' '.join(m.body.split()) for m in loaded] == [' '.join(m.body.split()) for m in corpus]
+    assert loaded[0].date == corpus[0].date
+
+
+def test_score_tolerates_formatting_differences():
+    truth = csn_corpus(1, seed=4)[0].truth
+    extracted = dict(truth, passenger_name=truth['passenger_name'].title() + ', OUTRO',
+                     phone='+55 ' + truth['phone'], pickup_address=truth['pickup_address'].upper())
+
+    assert all(score(truth, extracted).values())
+    assert not score(truth, dict(truth, cost_center='99999'))['cost_center']
+    assert not any(score(truth, None).values())
+
+
+def test_extraction_benchmark_scores_every_extractor():
+    args = build_parser().parse_args(['--emails', '6', '--seed', '3'])
+    results = run(args)
+
+    by_name = {r['extractor']: r for r in results['extractors']}
+    assert set(by_name) == {'fallback', 'llm'}
+    # O stand-in devolve a extração esperada: o pós-processamento não pode estragá-la
+    assert by_name['llm']['complete_rate'] == 1.0
+    assert by_name['llm']['failures'] == 0
+    assert by_name['fallback']['latency']['count'] == 6
@@ -0,0 +1,49 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from benchmarks.bench_pipeline import build_parser, compare, run
+from benchmarks.corpus import pipeline_corpus
+from benchmarks.fakes.fake_imap import start_server as start_imap
+from src.services.email_reader import EmailReader
+
+
+def test_fake_imap_serves_corpus_to_email_reader():
+    server, (host, port) = start_imap()
+    try:
+        corpus = pipeline_corpus(3, seed=7)
+        for mail in corpus:
+            server.mailbox.add(mail.to_bytes())
+        reader = EmailReader(host, port, 'u', 'p', subject_filter='PROGRAMAÇÃO', use_ssl=False)
+        emails = reader.fetch_new_orders()
+        assert [e.uid for e in emails] == ['1', '2', '3']
+        assert ' '.join(emails[0].body.split()) == ' '.join(corpus[0].body.split())
+        # BODY.PEEK não marca como lido
+        assert len(reader.fetch_new_orders()) == 3
+    finally:
+        server.shutdown()
+
+
+def test_pipeline_benchmark_dispatches_every_order():
+    saved = dict(os.environ)
+    try:
+        args = build_parser().parse_args([
+            '--emails', '4', '--llm-latency-ms', '0', '--llm-jitter-ms', '0', '--geo-latency-ms', '0',
+            '--minastaxi-latency-ms', '0', '--evolution-latency-ms', '0', '--imap-latency-ms', '0',
+            '--max-passengers', '2',
+        ])
+        results = run(args)
+    finally:
+        os.environ.clear()
+        os.environ.update(saved)
+
+    assert results['stats']['orders_dispatched'] == 4
+    assert results['stages']['extract']['count'] == 4
+    assert results['stages']['dispatch']['count'] == 4
+    assert results['fakes']['minastaxi']['rideCreate'] == 4
+    assert results['emails_per_second'] > 0
+
+    slower = dict(results, emails_per_second=results['emails_per_second'] / 2)
+    assert compare(results, results, tolerance=0.2) == []
+    assert compare(slower, results, tolerance=0.2)
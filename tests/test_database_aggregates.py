@@ -0,0 +1,68 @@
+import os
+import sqlite3
+import sys
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.models.order import Order, OrderStatus
+from src.services.database import DatabaseManager
+
+
+def _group_by_status(db_path):
+    with sqlite3.connect(db_path) as conn:
+        return dict(conn.execute("SELECT status, COUNT(*) FROM orders GROUP BY status").fetchall())
+
+
+def test_counters_follow_inserts_updates_and_deletes(tmp_path):
+    db = DatabaseManager(str(tmp_path / 'orders.db'))
+
+    ids = []
+    for i in range(6):
+        order = Order(
+            email_id=f'uid-{i}',
+            passenger_name=f'P{i}',
+            status=OrderStatus.GEOCODED,
+            company_code='284' if i % 2 else '225',
+            cost_center='20086',
+            created_at=datetime(2026, 1, 4, 8 + i),
+        )
+        order.id = db.create_order(order)
+        ids.append(order)
+
+    ids[0].status = OrderStatus.DISPATCHED
+    db.update_order(ids[0])
+    ids[1].status = OrderStatus.FAILED
+    db.update_order(ids[1])
+    db.update_order(ids[2])  # sem mudança de status
+    db.delete_order(ids[3].id)
+
+    stats = db.get_statistics()
+    expected = _group_by_status(db.db_path)
+    for status, count in expected.items():
+        assert stats[status] == count
+    assert stats['total'] == 5
+
+    by_company = db.get_rollups(grain='day', dimension='company_code')
+    totals = {}
+    for row in by_company:
+        totals[row['dim_value']] = totals.get(row['dim_value'], 0) + row['count']
+    assert totals == {'225': 3, '284': 2}
+
+    hourly = db.get_rollups(grain='hour', since='2026-01-04T10')
+    assert sum(row['count'] for row in hourly) == 3
+
+
+def test_aggregates_are_backfilled_for_existing_databases(tmp_path):
+    db_path = str(tmp_path / 'orders.db')
+    db = DatabaseManager(db_path)
+    for i in range(3):
+        db.create_order(Order(email_id=f'uid-{i}', status=OrderStatus.DISPATCHED))
+
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("DROP TABLE order_status_counts")
+        conn.execute("DELETE FROM order_rollups")
+
+    db = DatabaseManager(db_path)
+    assert db.get_statistics()[OrderStatus.DISPATCHED.value] == 3
+    assert sum(row['count'] for row in db.get_rollups()) == 3
@@ -0,0 +1,63 @@
+import gzip
+import json
+import os
+import sqlite3
+import sys
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.models.order import Order, OrderStatus
+from src.services.database import DatabaseManager
+
+
+def test_cleanup_deletes_in_batches_and_archives_by_month(tmp_path):
+    db = DatabaseManager(str(tmp_path / 'orders.db'))
+    old = datetime.now() - timedelta(days=90)
+    for i in range(7):
+        db.create_order(Order(
+            email_id=f'old-{i}',
+            status=OrderStatus.DISPATCHED,
+            created_at=old + timedelta(days=i),
+        ))
+    db.create_order(Order(email_id='recent', status=OrderStatus.DISPATCHED))
+
+    archive_dir = tmp_path / 'archive'
+    deleted = db.cleanup_old_orders(
+        days_to_keep=30,
+        batch_size=3,
+        pause_seconds=0,
+        archive_dir=str(archive_dir),
+    )
+
+    assert deleted == 7
+    assert [o.email_id for o in db.get_all_orders()] == ['recent']
+    assert db.get_statistics()['total'] == 1
+
+    archived = []
+    for path in archive_dir.glob('orders-*.jsonl.gz'):
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            archived.extend(json.loads(line)['email_id'] for line in f)
+    assert sorted(archived) == [f'old-{i}' for i in range(7)]
+
+
+def test_database_uses_incremental_auto_vacuum_and_wal(tmp_path):
+    db = DatabaseManager(str(tmp_path / 'orders.db'))
+    with sqlite3.connect(db.db_path) as conn:
+        assert conn.execute('PRAGMA auto_vacuum').fetchone()[0] == 2
+        assert conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+
+
+def test_existing_database_is_only_converted_by_the_explicit_migration(tmp_path):
+    path = str(tmp_path / 'legacy.db')
+    with sqlite3.connect(path) as conn:
+        conn.execute('CREATE TABLE legacy (id INTEGER PRIMARY KEY)')
+
+    db = DatabaseManager(path)
+    with sqlite3.connect(path) as conn:
+        assert conn.execute('PRAGMA auto_vacuum').fetchone()[0] == 0
+
+    assert db.convert_to_incremental_vacuum()
+    assert not db.convert_to_incremental_vacuum()
+    with sqlite3.connect(path) as conn:
+        assert conn.execute('PRAGMA auto_vacuum').fetchone()[0] == 2
@@ -14,6 +14,7 @@ def test_disable_geocoding_flag(tmp_path, monkeypatch):
     # use temp database to avoid collisions
     db_path = tmp_path / 'test.db'
     monkeypatch.setenv('DATABASE_PATH', str(db_path))
+    monkeypatch.setenv('MINASTAXI_USER_ID', 'test')
 
     processor = TaxiOrderProcessor()
     # craft fake email object with minimal fields
@@ -0,0 +1,54 @@
+import os
+import random
+import sys
+
+import numpy as np
+import pytest
+from geopy.distance import geodesic
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.services.distance import distance_matrix, haversine
+
+
+def random_points(n, seed, spread=3.0):
+    rng = random.Random(seed)
+    return [(-19.9 + rng.uniform(-spread, spread), -43.9 + rng.uniform(-spread, spread)) for _ in range(n)]
+
+
+def geodesic_matrix(points):
+    return np.array([[geodesic(a, b).kilometers for b in points] for a in points])
+
+
+def test_haversine_matrix_matches_geodesic():
+    points = random_points(40, seed=1)
+    reference = geodesic_matrix(points)
+    matrix = distance_matrix(points)
+    off_diagonal = ~np.eye(len(points), dtype=bool)
+    relative = np.abs(matrix - reference)[off_diagonal] / reference[off_diagonal]
+    assert relative.max() < 0.005
+    assert np.allclose(np.diag(matrix), 0.0)
+
+
+def test_equirectangular_is_accurate_at_city_scale():
+    points = random_points(40, seed=2, spread=0.3)
+    reference = geodesic_matrix(points)
+    matrix = distance_matrix(points, method='equirectangular')
+    off_diagonal = ~np.eye(len(points), dtype=bool)
+    relative = np.abs(matrix - reference)[off_diagonal] / reference[off_diagonal]
+    assert relative.max() < 0.01
+
+
+def test_rectangular_matrix_and_scalar_agree():
+    points = random_points(5, seed=3)
+    others = random_points(3, seed=4)
+    matrix = distance_matrix(points, others)
+    assert matrix.shape == (5, 3)
+    for i, a in enumerate(points):
+        for j, b in enumerate(others):
+            assert matrix[i, j] == pytest.approx(haversine(a[0], a[1], b[0], b[1]))
+
+
+def test_unknown_method_raises():
+    with pytest.raises(ValueError):
+        distance_matrix([(0.0, 0.0)], method='manhattan')
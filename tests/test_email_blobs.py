@@ -0,0 +1,64 @@
+import os
+import sqlite3
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.models.order import Order, OrderStatus
+from src.services.database import DatabaseManager
+
+
+def test_raw_body_is_stored_compressed_and_loaded_lazily(tmp_path):
+    db = DatabaseManager(str(tmp_path / 'orders.db'))
+    body = "<html>" + "Empresa: 284 | CC: 20086 " * 200 + "</html>"
+    first = db.create_order(Order(email_id='a', raw_email_body=body, status=OrderStatus.FAILED))
+    second = db.create_order(Order(email_id='b', raw_email_body=body, status=OrderStatus.FAILED))
+
+    with sqlite3.connect(db.db_path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM orders WHERE raw_email_body IS NOT NULL").fetchone()[0] == 0
+        blobs = conn.execute("SELECT size, length(data) FROM email_blobs").fetchall()
+    assert len(blobs) == 1  # conteúdo idêntico é deduplicado
+    assert blobs[0][1] < blobs[0][0]
+
+    order = db.get_order_by_id(first)
+    assert order.raw_email_body is None
+    assert db.load_raw_email_body(order) == body
+    assert db.get_raw_email_body(second) == body
+
+
+def test_legacy_inline_bodies_are_migrated(tmp_path):
+    db_path = str(tmp_path / 'orders.db')
+    db = DatabaseManager(db_path)
+    order_id = db.create_order(Order(email_id='legacy', status=OrderStatus.DISPATCHED))
+    with sqlite3.connect(db_path) as conn:
+        conn.execute(
+            "UPDATE orders SET raw_email_body = ?, raw_email_hash = NULL WHERE id = ?",
+            ("corpo antigo", order_id)
+        )
+
+    db = DatabaseManager(db_path)
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute("SELECT raw_email_body FROM orders").fetchone()[0] == "corpo antigo"
+    assert db.get_raw_email_body(order_id) == "corpo antigo"  # legível antes da migração
+
+    assert db.move_inline_email_bodies() == 1
+    assert db.move_inline_email_bodies() == 0
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute("SELECT raw_email_body FROM orders").fetchone()[0] is None
+    assert db.get_raw_email_body(order_id) == "corpo antigo"
+
+
+def test_cleanup_removes_orphan_blobs(tmp_path):
+    from datetime import datetime, timedelta
+
+    db = DatabaseManager(str(tmp_path / 'orders.db'))
+    db.create_order(Order(
+        email_id='old',
+        raw_email_body='corpo velho',
+        created_at=datetime.now() - timedelta(days=60),
+    ))
+    db.create_order(Order(email_id='new', raw_email_body='corpo novo'))
+
+    assert db.cleanup_old_orders(days_to_keep=30, pause_seconds=0) == 1
+    with sqlite3.connect(db.db_path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM email_blobs").fetchone()[0] == 1
@@ -0,0 +1,83 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.services.gazetteer import Gazetteer, tokenize
+from src.services.geocoding_service import GeocodingService
+
+
+def test_tokenize_folds_accents_and_drops_state_tokens():
+    assert tokenize("CSN Mineração, Congonhas - MG, Brasil") == {'csn', 'mineracao', 'congonhas'}
+
+
+def test_site_matches_inside_longer_address():
+    gazetteer = Gazetteer()
+    assert gazetteer.lookup("CSN Mineração, Congonhas, MG").name == "CSN Mineração"
+    assert gazetteer.lookup("CSN, Congonhas, MG").name == "CSN Mineração"
+    assert gazetteer.lookup("Portaria principal CSN Mineração").name == "CSN Mineração"
+    assert gazetteer.lookup("DELP ENGENHARIA - Vespasiano").name == "Delp Engenharia"
+    assert gazetteer.lookup("aeroporto de confins").name == "Aeroporto Internacional de Confins"
+
+
+def test_acronym_alias_does_not_capture_unrelated_addresses():
+    gazetteer = Gazetteer()
+    assert gazetteer.lookup("CSN").name == "CSN Mineração"
+    assert gazetteer.lookup("CNF").name == "Aeroporto Internacional de Confins"
+    assert gazetteer.lookup("Rua das Flores 100, Vila CSN, Congonhas") is None
+    assert gazetteer.lookup("CSN Volta Redonda RJ") is None
+    assert gazetteer.lookup("Rua CNF, 20, Contagem") is None
+
+
+def test_city_only_matches_when_address_is_just_the_city():
+    gazetteer = Gazetteer()
+    assert gazetteer.lookup("BH").name == "Belo Horizonte"
+    assert gazetteer.lookup("Conselheiro Lafaiete, MG").name == "Conselheiro Lafaiete"
+    assert gazetteer.lookup("Rua da Bahia, 1000, Centro, Belo Horizonte") is None
+
+
+def test_learned_addresses_persist(tmp_path):
+    path = str(tmp_path / 'gazetteer.json')
+    gazetteer = Gazetteer(path=path)
+    gazetteer.learn("Rua Piauí, 1056, Funcionários, Belo Horizonte", (-19.93, -43.93))
+    # Gravação agrupada: nada no disco até o intervalo passar ou flush()
+    assert not os.path.exists(path)
+    gazetteer.flush()
+
+    reloaded = Gazetteer(path=path)
+    place = reloaded.lookup("rua piaui 1056 funcionarios belo horizonte mg")
+    assert place is not None and place.coords == (-19.93, -43.93)
+
+
+def test_processes_sharing_the_file_keep_each_others_entries(tmp_path):
+    path = str(tmp_path / 'gazetteer.json')
+    first = Gazetteer(path=path, save_interval_seconds=0)
+    second = Gazetteer(path=path, save_interval_seconds=0)
+    first.learn("Rua A, 10, Contagem", (-19.9, -44.0))
+    second.learn("Rua B, 20, Betim", (-19.96, -44.19))
+    first.learn("Rua C, 30, Sabará", (-19.88, -43.8))
+
+    reloaded = Gazetteer(path=path)
+    for address in ("Rua A, 10, Contagem", "Rua B, 20, Betim", "Rua C, 30, Sabará"):
+        assert reloaded.lookup(address) is not None
+    assert os.listdir(tmp_path) == ['gazetteer.json']
+
+
+def test_lookup_is_fast():
+    gazetteer = Gazetteer()
+    start = time.perf_counter()
+    for _ in range(10000):
+        gazetteer.lookup("CSN Mineração, Congonhas, MG")
+    assert (time.perf_counter() - start) / 10000 < 50e-6
+
+
+def test_geocoder_skips_network_for_known_places():
+    class NoNetwork:
+        def geocode(self, *args, **kwargs):
+            raise AssertionError("network geocoder should not be called")
+
+    geocoder = GeocodingService()
+    geocoder.geolocator = NoNetwork()
+    assert geocoder.geocode_address("CSN Mineração, Congonhas, MG") == (-20.5033, -43.8569)
+    assert geocoder.geocode_address_fallback("Mariana, MG") == (-20.3778, -43.4167)
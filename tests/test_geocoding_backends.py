@@ -0,0 +1,214 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from benchmarks.fakes.fake_nominatim import start_server
+from src.services.geocoding_backends import GeopyBackend, MemoryCacheBackend, RateLimiter, VariantStats
+from src.services.geocoding_service import GeocodingService
+
+
+def test_rate_limiter_spaces_calls():
+    limiter = RateLimiter(min_interval=0.05)
+    start = time.monotonic()
+    for _ in range(4):
+        limiter.acquire()
+    assert time.monotonic() - start >= 0.15
+
+
+def test_cache_keeps_failures_for_shorter_ttl():
+    cache = MemoryCacheBackend(ttl_seconds=60, negative_ttl_seconds=0)
+    cache.put("Rua A, 1", (-19.9, -43.9))
+    cache.put("Rua B, 2", None)
+    assert cache.get("rua a 1") == (-19.9, -43.9)
+    assert cache.get("Rua B, 2") is MemoryCacheBackend._MISSING
+    assert cache.metrics.snapshot()['hits'] == 1
+
+
+def test_chain_against_local_nominatim_stand_in():
+    server, domain = start_server()
+    try:
+        service = GeocodingService(nominatim_domain=domain, nominatim_scheme='http', nominatim_min_interval=0)
+        coords = service.geocode_address("Rua da Bahia, 1000, Belo Horizonte")
+        assert coords is not None and service._is_in_minas_gerais(*coords)
+        assert service.geocode_address("Rua da Bahia, 1000, Belo Horizonte") == coords
+
+        metrics = service.get_backend_metrics()
+        assert metrics['nominatim']['calls'] == 1
+        assert metrics['cache']['hits'] == 1
+        assert metrics['gazetteer']['calls'] == 1
+    finally:
+        server.shutdown()
+
+
+def test_fallback_backend_used_when_primary_finds_nothing():
+    class Empty:
+        def geocode(self, *args, **kwargs):
+            return []
+
+    class Found:
+        def geocode(self, *args, **kwargs):
+            location = type('Location', (), {})()
+            location.latitude, location.longitude, location.raw = -19.95, -43.95, {}
+            return [location]
+
+    service = GeocodingService()
+    service.online_backends = [GeopyBackend('google', Empty()), GeopyBackend('nominatim', Found())]
+    assert service.geocode_address("Rua Qualquer, 10, Contagem") == (-19.95, -43.95)
+    assert service.get_backend_metrics()['google']['misses'] > 0
+
+
+class ScriptedGeolocator:
+    """Responde por consulta: coordenadas, atraso ou nada."""
+
+    def __init__(self, answers=None, delay=0.0, timeout_queries=()):
+        self.answers = answers or {}
+        self.delay = delay
+        self.timeout_queries = timeout_queries
+        self.queries = []
+
+    def geocode(self, query, *args, **kwargs):
+        from geopy.exc import GeocoderTimedOut
+
+        self.queries.append(query)
+        if self.delay:
+            time.sleep(self.delay)
+        if query in self.timeout_queries:
+            raise GeocoderTimedOut()
+        coords = self.answers.get(query)
+        if not coords:
+            return []
+        location = type('Location', (), {})()
+        location.latitude, location.longitude, location.raw = coords[0], coords[1], {}
+        return [location]
+
+
+def test_learned_variant_order_tries_successful_kind_first():
+    service = GeocodingService(variant_concurrency=1)
+    geolocator = ScriptedGeolocator()
+    service.online_backends = [GeopyBackend('nominatim', geolocator)]
+    for i in range(3):
+        normalized = service._normalize_address(f"Rua Alfa {i}, 10, Bairro Eldorado, Contagem")
+        simple = dict(service._address_variants(normalized))['simple']
+        geolocator.answers[simple] = (-19.93, -44.05)
+        assert service.geocode_address(f"Rua Alfa {i}, 10, Bairro Eldorado, Contagem") == (-19.93, -44.05)
+
+    geolocator.queries.clear()
+    normalized = service._normalize_address("Rua Beta, 20, Bairro Eldorado, Contagem")
+    simple = dict(service._address_variants(normalized))['simple']
+    geolocator.answers[simple] = (-19.94, -44.06)
+    assert service.geocode_address("Rua Beta, 20, Bairro Eldorado, Contagem") == (-19.94, -44.06)
+    assert geolocator.queries == [simple]
+    assert service.get_variant_stats()['simple']['successes'] == 4
+
+
+def test_coarse_variants_stay_last_and_never_answer_a_street_address():
+    service = GeocodingService(variant_concurrency=1)
+    normalized = service._normalize_address("Rua Alfa, 10, Contagem")
+    variants = service._address_variants(normalized)
+    stats = VariantStats()
+    for success in (True, True, True, False, False):
+        stats.record('full', success)
+    for _ in range(20):
+        stats.record('tail', True)
+        stats.record('street_city', True)
+    ranked = stats.rank(variants)
+    assert [kind for kind, _ in ranked[-2:]] == ['street_city', 'tail']
+    assert ranked[0][0] == 'full'
+
+    # 'tail' (cidade/UF) resolve para um centroide: não vale como ponto da rua
+    tail = dict(variants)['tail']
+    service.online_backends = [GeopyBackend('nominatim', ScriptedGeolocator(answers={tail: (-18.5, -44.5)}))]
+    assert service.geocode_address("Rua Alfa, 10, Contagem") is None
+    assert service.get_variant_stats()['tail']['successes'] == 0
+
+
+def test_address_budget_bounds_slow_backend():
+    service = GeocodingService(address_budget_seconds=0.3, variant_concurrency=2, hedge_delay_seconds=0.05)
+    service.online_backends = [GeopyBackend('nominatim', ScriptedGeolocator(delay=0.2))]
+    start = time.monotonic()
+    assert service.geocode_address("Rua Gama, 30, Betim") is None
+    assert time.monotonic() - start < 0.5
+    # Estouro de orçamento não entra no cache negativo
+    assert service.cache.get("Rua Gama, 30, Betim") is MemoryCacheBackend._MISSING
+
+
+def test_timeout_retries_stop_at_deadline():
+    geolocator = ScriptedGeolocator(timeout_queries={"Rua Delta"})
+    backend = GeopyBackend('nominatim', geolocator, max_retries=5, backoff_seconds=1.0)
+    start = time.monotonic()
+    assert backend.search("Rua Delta", deadline=time.monotonic() + 0.5) == []
+    assert time.monotonic() - start < 0.5
+    assert len(geolocator.queries) == 1
+
+
+def test_hedged_variant_wins_when_first_is_slow():
+    class SlowFull(ScriptedGeolocator):
+        def geocode(self, query, *args, **kwargs):
+            if query == self.slow_query:
+                time.sleep(0.5)
+            return super().geocode(query, *args, **kwargs)
+
+    service = GeocodingService(variant_concurrency=2, hedge_delay_seconds=0.05)
+    normalized = service._normalize_address("Rua Épsilon (portaria 2), 40, Betim")
+    variants = dict(service._address_variants(normalized))
+    geolocator = SlowFull(answers={variants['full']: (-19.9, -44.1), variants['no_paren']: (-19.95, -44.15)})
+    geolocator.slow_query = variants['full']
+    service.online_backends = [GeopyBackend('nominatim', geolocator, max_concurrency=2)]
+
+    start = time.monotonic()
+    assert service.geocode_address("Rua Épsilon (portaria 2), 40, Betim") == (-19.95, -44.15)
+    assert time.monotonic() - start < 0.4
+
+
+def test_async_batch_overlaps_requests_against_local_nominatim():
+    import asyncio
+
+    server, domain = start_server(latency=0.1)
+    try:
+        service = GeocodingService(
+            nominatim_domain=domain, nominatim_scheme='http',
+            nominatim_min_interval=0, nominatim_max_concurrency=8
+        )
+        addresses = [f"Rua Ômega, {i}, Belo Horizonte" for i in range(16)]
+        start = time.monotonic()
+        results = service.geocode_batch(addresses)
+        elapsed = time.monotonic() - start
+        assert all(results[a] and service._is_in_minas_gerais(*results[a]) for a in addresses)
+        # 16 endereços x 100 ms em série levariam 1,6 s
+        assert elapsed < 1.2
+
+        coords = asyncio.run(service.geocode_address_async("Rua Ômega, 99, Belo Horizonte"))
+        assert coords is not None
+        assert service.get_backend_metrics()['nominatim']['calls'] >= 17
+    finally:
+        server.shutdown()
+
+
+def test_async_rate_limiter_shares_slots_with_sync_calls():
+    import asyncio
+
+    limiter = RateLimiter(min_interval=0.05)
+    limiter.acquire()
+
+    async def burst():
+        await asyncio.gather(*(limiter.acquire_async() for _ in range(3)))
+
+    start = time.monotonic()
+    asyncio.run(burst())
+    assert time.monotonic() - start >= 0.14
+
+
+def test_only_whole_address_results_are_learned_by_the_gazetteer():
+    service = GeocodingService(variant_concurrency=1)
+    variants = dict(service._address_variants(service._normalize_address("Rua Zeta, 5, Contagem")))
+    exact = dict(service._address_variants(service._normalize_address("Rua Eta, 7, Contagem")))['full']
+    service.online_backends = [GeopyBackend('nominatim', ScriptedGeolocator(answers={
+        variants['street_city']: (-19.93, -44.05), exact: (-19.94, -44.06),
+    }))]
+
+    assert service.geocode_address("Rua Zeta, 5, Contagem") == (-19.93, -44.05)
+    assert service.geocode_address("Rua Eta, 7, Contagem") == (-19.94, -44.06)
+    assert service.gazetteer.lookup("Rua Zeta, 5, Contagem") is None
+    assert service.gazetteer.lookup("Rua Eta, 7, Contagem").coords == (-19.94, -44.06)
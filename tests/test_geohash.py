@@ -0,0 +1,29 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.services import geohash
+
+
+def test_encode_matches_reference_vector():
+    assert geohash.encode(57.64911, 10.40744, 11) == "u4pruydqqvj"
+
+
+def test_encode_many_matches_scalar_encode():
+    lats = [-19.9191, -20.5033, -19.6336]
+    lngs = [-43.9386, -43.8569, -43.9686]
+    encoded = geohash.encode_many(lats, lngs, 6)
+    assert list(encoded) == [geohash.encode(lat, lng, 6) for lat, lng in zip(lats, lngs)]
+
+
+def test_decode_bbox_contains_point_and_neighbors_are_adjacent():
+    cell = geohash.encode(-19.9191, -43.9386, 6)
+    min_lat, min_lng, max_lat, max_lng = geohash.decode_bbox(cell)
+    assert min_lat <= -19.9191 <= max_lat
+    assert min_lng <= -43.9386 <= max_lng
+
+    around = geohash.neighbors(cell)
+    assert len(around) == 8
+    assert cell not in around
+    assert all(len(n) == 6 for n in around)
@@ -0,0 +1,117 @@
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.models.order import OrderStatus
+from src.services.database import DatabaseManager
+from src.services.email_reader import EmailMessage
+from src.services.job_queue import JobQueue
+
+
+def test_concurrent_claims_never_hand_out_the_same_job(tmp_path):
+    db = DatabaseManager(str(tmp_path / 'orders.db'))
+    producer = JobQueue(db)
+    for i in range(60):
+        assert producer.enqueue('email', f'uid-{i}', {'n': i})
+    assert not producer.enqueue('email', 'uid-0', {'n': 0})
+
+    claimed = []
+    lock = threading.Lock()
+
+    def worker(name):
+        queue = JobQueue(db, owner=name)
+        while True:
+            jobs = queue.claim(['email'], limit=4)
+            if not jobs:
+                return
+            for job in jobs:
+                queue.complete(job)
+            with lock:
+                claimed.extend((name, job.key) for job in jobs)
+
+    threads = [threading.Thread(target=worker, args=(f'w{i}',)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    keys = [key for _, key in claimed]
+    assert sorted(keys) == sorted(f'uid-{i}' for i in range(60))
+    assert producer.counts('email') == {'queued': 0, 'running': 0, 'done': 60, 'dead': 0, 'ready': 0}
+
+
+def test_expired_lease_is_reclaimed_and_failures_back_off_until_dead(tmp_path):
+    db = DatabaseManager(str(tmp_path / 'orders.db'))
+    crashed = JobQueue(db, owner='crashed', lease_seconds=0.05, max_attempts=3)
+    survivor = JobQueue(db, owner='survivor', retry_base_seconds=0, max_attempts=3)
+    crashed.enqueue('email', 'uid-1', {'body': 'x'})
+
+    [job] = crashed.claim(['email'])
+    assert survivor.claim(['email']) == []
+    time.sleep(0.1)
+
+    [job] = survivor.claim(['email'])
+    assert job.attempts == 2 and job.payload == {'body': 'x'}
+    # O processo antigo voltou, mas o lease já é de outro
+    assert not crashed.complete(job)
+
+    assert survivor.fail(job, RuntimeError('LLM indisponível')) == 'queued'
+    [job] = survivor.claim(['email'])
+    assert survivor.fail(job, RuntimeError('LLM indisponível')) == 'dead'
+    assert survivor.counts()['dead'] == 1
+    assert survivor.claim(['email']) == []
+    # Reler o e-mail não recria o job morto
+    assert not survivor.enqueue('email', 'uid-1', {'body': 'x'})
+
+    backoff = JobQueue(db, owner='b', retry_base_seconds=60)
+    backoff.enqueue('email', 'uid-2', {})
+    [job] = backoff.claim(['email'])
+    backoff.fail(job, 'timeout')
+    counts = backoff.counts('email')
+    assert counts['queued'] == 1 and counts['ready'] == 0
+
+
+def test_processor_resumes_jobs_left_by_a_crashed_process(tmp_path, monkeypatch):
+    monkeypatch.setenv('DATABASE_PATH', str(tmp_path / 'db.sqlite'))
+    monkeypatch.setenv('MINASTAXI_USER_ID', 'test')
+    monkeypatch.setenv('ENABLE_RIDE_POOLING', 'false')
+    monkeypatch.setenv('ENABLE_WHATSAPP_NOTIFICATIONS', 'false')
+    monkeypatch.setenv('JOB_CLAIM_BATCH', '2')
+    from src.processor import TaxiOrderProcessor
+
+    processor = TaxiOrderProcessor()
+    now = datetime.now()
+    emails = [
+        EmailMessage(uid=f'm{i}', subject='Novo Agendamento', from_='csn@example.com', date=now, body=f'Passageiro {i}')
+        for i in range(3)
+    ]
+    # Outro processo leu os e-mails, reservou um e caiu antes de concluir
+    crashed = JobQueue(processor.db, owner='crashed', lease_seconds=0)
+    for email in emails:
+        crashed.enqueue('email', email.uid, processor._email_payload(email))
+    crashed.claim(['email'], limit=1)
+
+    monkeypatch.setattr(processor.email_reader, 'fetch_new_orders', lambda days_back: emails)
+    monkeypatch.setattr(processor.llm_extractor, 'extract_with_fallback', lambda body: {
+        'passenger_name': body, 'phone': '31999999999', 'pickup_address': 'Rua A, 10, Contagem, MG',
+        'dropoff_address': 'CSN, Congonhas, MG', 'pickup_time': (now + timedelta(hours=2)).isoformat(),
+    })
+    monkeypatch.setattr(processor.geocoder, 'geocode_address', lambda address: (-19.93, -44.05))
+    dispatched = []
+    monkeypatch.setattr(processor.minastaxi_client, 'dispatch_order',
+                        lambda order: dispatched.append(order.email_id) or {'order_id': 'R1'})
+
+    stats = processor.process_new_orders(days_back=1)
+    assert stats['jobs_claimed'] == 2 and stats['queue_backlog'] == 1
+    assert dispatched == ['m0', 'm1']
+
+    stats = processor.process_new_orders(days_back=1)
+    assert stats['jobs_claimed'] == 1 and stats['queue_backlog'] == 0
+    assert dispatched == ['m0', 'm1', 'm2']
+    assert processor.db.get_order_by_email_id('m0').status == OrderStatus.DISPATCHED
+    assert processor.job_queue.counts('email')['done'] == 3
+    assert processor.queue_depth.value(queue='jobs') == 0
@@ -0,0 +1,126 @@
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.models.order import Order, OrderStatus
+from src.services.database import DatabaseManager
+from src.services.email_reader import EmailMessage
+from src.services.leader_election import LeaderElection
+
+
+def test_single_leader_with_failover_on_expiry_and_release(tmp_path):
+    db = DatabaseManager(str(tmp_path / 'orders.db'))
+    first = LeaderElection(db, owner='a', ttl_seconds=0.1)
+    second = LeaderElection(db, owner='b', ttl_seconds=0.1)
+
+    assert first.try_acquire() and not second.try_acquire()
+    assert first.try_acquire()  # renovação
+    assert second.current_leader() == 'a'
+
+    time.sleep(0.15)
+    assert second.try_acquire() and second.is_leader
+    assert not first.try_acquire() and not first.is_leader
+
+    second.release()
+    assert second.current_leader() is None
+    assert first.try_acquire()
+
+
+def test_claim_email_order_turns_unique_conflict_into_a_claim(tmp_path):
+    db = DatabaseManager(str(tmp_path / 'orders.db'))
+
+    first = db.claim_email_order(Order(email_id='uid-1', raw_email_body='corpo'))
+    assert first is not None
+    assert db.claim_email_order(Order(email_id='uid-1', raw_email_body='corpo')) is None
+    assert db.get_order_by_id(first).status == OrderStatus.RECEIVED
+
+
+def _processor(monkeypatch, db_path, role, emails, dispatched):
+    monkeypatch.setenv('DATABASE_PATH', db_path)
+    monkeypatch.setenv('MINASTAXI_USER_ID', 'test')
+    monkeypatch.setenv('ENABLE_RIDE_POOLING', 'false')
+    monkeypatch.setenv('ENABLE_WHATSAPP_NOTIFICATIONS', 'false')
+    monkeypatch.setenv('JOB_CLAIM_BATCH', '2')
+    monkeypatch.setenv('PROCESSOR_ROLE', role)
+    from src.processor import TaxiOrderProcessor
+
+    processor = TaxiOrderProcessor()
+    monkeypatch.setattr(processor.email_reader, 'fetch_new_orders', lambda days_back: emails)
+    monkeypatch.setattr(processor.llm_extractor, 'extract_with_fallback', lambda body: {
+        'passenger_name': body, 'phone': '31999999999', 'pickup_address': 'Rua A, 10, Contagem, MG',
+        'dropoff_address': 'CSN, Congonhas, MG', 'pickup_time': (datetime.now() + timedelta(hours=2)).isoformat(),
+    })
+    monkeypatch.setattr(processor.geocoder, 'geocode_address', lambda address: (-19.93, -44.05))
+    monkeypatch.setattr(processor.minastaxi_client, 'dispatch_order',
+                        lambda order: dispatched.append((role, order.email_id)) or {'order_id': 'R1'})
+    return processor
+
+
+def test_only_the_leader_polls_imap_and_workers_share_the_queue(tmp_path, monkeypatch):
+    db_path = str(tmp_path / 'db.sqlite')
+    emails = [
+        EmailMessage(uid=f'm{i}', subject='Novo Agendamento', from_='csn@example.com',
+                     date=datetime.now(), body=f'Passageiro {i}')
+        for i in range(4)
+    ]
+    dispatched = []
+
+    def no_imap(days_back):
+        raise AssertionError('only the leader reads IMAP')
+
+    leader = _processor(monkeypatch, db_path, 'auto', emails, dispatched)
+    follower = _processor(monkeypatch, db_path, 'auto', emails, dispatched)
+    worker = _processor(monkeypatch, db_path, 'worker', emails, dispatched)
+    monkeypatch.setattr(follower.email_reader, 'fetch_new_orders', no_imap)
+    monkeypatch.setattr(worker.email_reader, 'fetch_new_orders', no_imap)
+
+    stats = leader.process_new_orders(days_back=1)
+    assert stats['role'] == 'leader' and stats['emails_fetched'] == 4 and stats['queue_backlog'] == 2
+
+    stats = follower.process_new_orders(days_back=1)
+    assert stats['role'] == 'worker' and stats['jobs_claimed'] == 2
+    assert worker.process_new_orders(days_back=1)['jobs_claimed'] == 0
+
+    assert sorted(uid for _, uid in dispatched) == ['m0', 'm1', 'm2', 'm3']
+    assert [role for role, _ in dispatched] == ['auto'] * 4
+    assert leader.db.get_statistics()[OrderStatus.DISPATCHED.value] == 4
+
+    # Líder encerrou: o próximo ciclo de outro processo assume o IMAP
+    leader.leader.release()
+    assert follower._check_leadership()
+    assert not worker._check_leadership()
+
+
+def test_order_row_is_only_written_after_extraction(tmp_path, monkeypatch):
+    dispatched = []
+    email = EmailMessage(uid='m1', subject='Novo Agendamento', from_='csn@example.com',
+                         date=datetime.now(), body='Passageiro 1')
+    processor = _processor(monkeypatch, str(tmp_path / 'db.sqlite'), 'single', [email], dispatched)
+    extract = processor.llm_extractor.extract_with_fallback
+    seen_during_llm = []
+
+    def slow_llm(body):
+        # Durante o LLM o e-mail não aparece em estatísticas nem na timeline
+        seen_during_llm.append((processor.db.get_statistics()['total'], processor.db.get_order_by_email_id('m1')))
+        # ...e outro processo (lease do job vencido) grava o pedido antes deste
+        if body == 'Passageiro 1':
+            other = processor.db.claim_email_order(Order(email_id='m1', raw_email_body=body))
+            processor.db.update_order(Order(id=other, email_id='m1', status=OrderStatus.DISPATCHED))
+        return extract(body)
+
+    monkeypatch.setattr(processor.llm_extractor, 'extract_with_fallback', slow_llm)
+
+    assert processor._process_single_email(email) is None
+    assert seen_during_llm == [(0, None)]
+    assert dispatched == []
+    assert processor.db.get_order_by_email_id('m1').status == OrderStatus.DISPATCHED
+
+    # Reserva RECEIVED gravada por versões anteriores (tentativa que caiu) é retomada
+    legacy = processor.db.claim_email_order(Order(email_id='m2', raw_email_body='Passageiro 2'))
+    email.uid, email.body = 'm2', 'Passageiro 2'
+    order = processor._process_single_email(email)
+    assert order.id == legacy and order.status == OrderStatus.DISPATCHED
+    assert processor.db.get_statistics()['total'] == 2
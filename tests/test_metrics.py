@@ -0,0 +1,107 @@
+import os
+import sys
+from datetime import datetime, timedelta
+from urllib.request import urlopen
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.services.email_reader import EmailMessage
+from src.services.metrics import MetricsRegistry, parse_prometheus_text, start_metrics_server
+
+
+def test_render_and_parse_round_trip():
+    registry = MetricsRegistry()
+    orders = registry.counter('taxi_orders_total', 'Pedidos', labels=('outcome',))
+    depth = registry.gauge('taxi_queue_depth', 'Fila', labels=('queue',))
+    latency = registry.histogram('taxi_stage_duration_seconds', 'Estágios', labels=('stage',), buckets=(0.1, 1.0))
+    orders.inc(outcome='dispatched')
+    orders.inc(2, outcome='failed')
+    depth.set(3, queue='emails')
+    for value in (0.05, 0.5, 0.7, 5.0):
+        latency.observe(value, stage='geocode')
+
+    text = registry.render()
+    assert '# TYPE taxi_stage_duration_seconds histogram' in text
+    samples = {(n, tuple(sorted(l.items()))): v for n, l, v in parse_prometheus_text(text)}
+    assert samples[('taxi_orders_total', (('outcome', 'failed'),))] == 2
+    assert samples[('taxi_queue_depth', (('queue', 'emails'),))] == 3
+    # Buckets cumulativos, +Inf igual ao total
+    assert samples[('taxi_stage_duration_seconds_bucket', (('le', '1'), ('stage', 'geocode')))] == 3
+    assert samples[('taxi_stage_duration_seconds_bucket', (('le', '+Inf'), ('stage', 'geocode')))] == 4
+    assert samples[('taxi_stage_duration_seconds_sum', (('stage', 'geocode'),))] == pytest.approx(6.25)
+
+    summary = latency.summary(stage='geocode')
+    assert summary['count'] == 4
+    assert 0.1 <= summary['p50'] <= 1.0
+
+
+def test_registry_rejects_conflicting_labels():
+    registry = MetricsRegistry()
+    registry.counter('taxi_orders_total', 'Pedidos', labels=('outcome',))
+    with pytest.raises(ValueError):
+        registry.gauge('taxi_orders_total', 'Pedidos', labels=('outcome',))
+    with pytest.raises(ValueError):
+        registry.counter('taxi_orders_total', 'Pedidos', labels=('outcome',)).inc(stage='x')
+
+
+def test_http_endpoint_serves_metrics_and_health():
+    registry = MetricsRegistry()
+    registry.counter('taxi_emails_fetched_total', 'E-mails').inc(5)
+    server = start_metrics_server(registry, port=0, host='127.0.0.1', health=lambda: {'cycle': 7})
+    try:
+        port = server.server_address[1]
+        with urlopen(f"http://127.0.0.1:{port}/metrics", timeout=5) as response:
+            assert response.headers['Content-Type'].startswith('text/plain')
+            assert ('taxi_emails_fetched_total', {}, 5.0) in parse_prometheus_text(response.read().decode())
+        with urlopen(f"http://127.0.0.1:{port}/health", timeout=5) as response:
+            assert b'"cycle": 7' in response.read()
+    finally:
+        server.shutdown()
+
+
+def test_processor_records_each_stage(tmp_path, monkeypatch):
+    monkeypatch.setenv('DATABASE_PATH', str(tmp_path / 'db.sqlite'))
+    monkeypatch.setenv('MINASTAXI_USER_ID', 'test')
+    monkeypatch.setenv('ENABLE_RIDE_POOLING', 'false')
+    monkeypatch.setenv('ENABLE_WHATSAPP_NOTIFICATIONS', 'false')
+    from src.processor import TaxiOrderProcessor
+
+    processor = TaxiOrderProcessor()
+    emails = [
+        EmailMessage(uid=f'm{i}', subject='Novo Agendamento', from_='csn@example.com',
+                     date=datetime.now(), body=f'Passageiro {i}')
+        for i in range(2)
+    ]
+    monkeypatch.setattr(processor.email_reader, 'fetch_new_orders', lambda days_back: emails)
+    monkeypatch.setattr(processor.llm_extractor, 'extract_with_fallback', lambda body: {
+        'passenger_name': body,
+        'phone': '31999999999',
+        'pickup_address': 'Rua A, 10, Contagem, MG',
+        'dropoff_address': 'CSN, Congonhas, MG',
+        'pickup_time': (datetime.now() + timedelta(hours=2)).isoformat(),
+    })
+    monkeypatch.setattr(processor.geocoder, 'geocode_address', lambda address: (-19.93, -44.05))
+
+    calls = []
+
+    def fake_dispatch(order):
+        calls.append(order)
+        if len(calls) == 2:
+            from src.services.minastaxi_client import MinasTaxiAPIError
+            raise MinasTaxiAPIError("recusado")
+        return {'order_id': 'R1'}
+
+    monkeypatch.setattr(processor.minastaxi_client, 'dispatch_order', fake_dispatch)
+    processor.process_new_orders(days_back=1)
+
+    assert processor.stage_seconds.summary(stage='fetch')['count'] == 1
+    assert processor.stage_seconds.summary(stage='extract')['count'] == 2
+    assert processor.stage_seconds.summary(stage='geocode')['count'] == 4
+    assert processor.stage_seconds.summary(stage='dispatch')['count'] == 2
+    assert processor.stage_errors.value(stage='dispatch') == 1
+    assert processor.order_outcomes.value(outcome='dispatched') == 1
+    assert processor.order_outcomes.value(outcome='failed') == 1
+    assert processor.queue_depth.value(queue='emails') == 0
+    assert 'taxi_geocoding_hit_ratio{backend="cache"}' in processor.metrics.render()
@@ -0,0 +1,104 @@
+import os
+import sys
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.models import Order, OrderStatus
+from src.services.email_reader import EmailMessage
+from src.services.order_scheduler import OrderScheduler, ScheduledOrder, parse_hour_window
+
+
+def _job(uid, pickup_time):
+    return ScheduledOrder(email=None, order=Order(email_id=uid, pickup_time=pickup_time), extracted_data={})
+
+
+def test_plan_orders_lanes_by_deadline_and_defers_far_pickups():
+    now = datetime(2026, 1, 5, 10, 0)
+    scheduler = OrderScheduler(expedite_minutes=60, defer_hours=24, completion_estimate_seconds=60)
+    jobs = [
+        _job('next-week', now + timedelta(days=6)),
+        _job('afternoon', now + timedelta(hours=5)),
+        _job('no-time', None),
+        _job('soon', now + timedelta(minutes=20)),
+        _job('late', now - timedelta(minutes=5)),
+    ]
+
+    queue, deferred = scheduler.plan(jobs, now.timestamp())
+
+    assert [j.order.email_id for j in queue] == ['late', 'soon', 'afternoon', 'no-time']
+    assert [j.lane for j in queue] == ['expedite', 'expedite', 'normal', 'normal']
+    assert [j.order.email_id for j in deferred] == ['next-week']
+    # Folga = coleta - conclusão esperada (posição na fila x duração média)
+    assert queue[0].slack_seconds == -5 * 60 - 60
+    assert queue[1].slack_seconds == 20 * 60 - 120
+    assert queue[3].slack_seconds is None
+
+    queue, deferred = scheduler.plan(jobs, now.timestamp(), off_peak=True)
+    assert deferred == [] and queue[-1].order.email_id == 'next-week' and queue[-1].lane == 'deferred'
+
+
+def test_off_peak_window_and_completion_average():
+    scheduler = OrderScheduler(off_peak_hours=parse_hour_window('20-6'), completion_estimate_seconds=10, smoothing=0.5)
+
+    assert scheduler.is_off_peak(datetime(2026, 1, 5, 23, 0))
+    assert scheduler.is_off_peak(datetime(2026, 1, 5, 5, 59))
+    assert not scheduler.is_off_peak(datetime(2026, 1, 5, 12, 0))
+    assert not OrderScheduler(off_peak_hours=parse_hour_window('')).is_off_peak()
+
+    scheduler.record_completion(20)
+    assert scheduler.completion_seconds == 15
+
+
+def test_processor_completes_urgent_first_and_resumes_deferred_off_peak(tmp_path, monkeypatch):
+    monkeypatch.setenv('DATABASE_PATH', str(tmp_path / 'db.sqlite'))
+    monkeypatch.setenv('MINASTAXI_USER_ID', 'test')
+    monkeypatch.setenv('ENABLE_RIDE_POOLING', 'false')
+    monkeypatch.setenv('ENABLE_WHATSAPP_NOTIFICATIONS', 'false')
+    from src.processor import TaxiOrderProcessor
+
+    processor = TaxiOrderProcessor()
+    processor.scheduler.off_peak_hours = None
+    now = datetime.now()
+    pickups = {'far': now + timedelta(days=3), 'later': now + timedelta(hours=6), 'urgent': now + timedelta(minutes=30)}
+    emails = [
+        EmailMessage(uid=uid, subject='Novo Agendamento', from_='csn@example.com', date=now, body=f'Passageiro {uid}')
+        for uid in pickups
+    ]
+    monkeypatch.setattr(processor.email_reader, 'fetch_new_orders', lambda days_back: emails)
+    extracted = []
+
+    def fake_extract(body):
+        uid = body.split()[-1]
+        extracted.append(uid)
+        return {
+            'passenger_name': body, 'phone': '31999999999', 'pickup_address': f'Rua {uid}, 10, Contagem, MG',
+            'dropoff_address': 'CSN, Congonhas, MG', 'pickup_time': pickups[uid].isoformat(),
+        }
+
+    monkeypatch.setattr(processor.llm_extractor, 'extract_with_fallback', fake_extract)
+    monkeypatch.setattr(processor.geocoder, 'geocode_address', lambda address: (-19.93, -44.05))
+    dispatched = []
+    monkeypatch.setattr(processor.minastaxi_client, 'dispatch_order',
+                        lambda order: dispatched.append(order.email_id) or {'order_id': 'R1'})
+
+    stats = processor.process_new_orders(days_back=1)
+
+    assert dispatched == ['urgent', 'later']
+    assert stats['orders_dispatched'] == 2 and stats['orders_deferred'] == 1
+    far = processor.db.get_order_by_email_id('far')
+    assert far.status == OrderStatus.EXTRACTED
+    assert processor.db.get_extracted_data(far.id)['pickup_time'] == pickups['far'].isoformat()
+    assert processor.order_slack.summary(lane='expedite')['count'] == 1
+    assert processor.queue_depth.value(queue='deferred') == 1
+
+    # Ciclo fora do pico sem e-mails novos: retoma o pedido adiado sem chamar o LLM
+    monkeypatch.setattr(processor.email_reader, 'fetch_new_orders', lambda days_back: [])
+    processor.scheduler.off_peak_hours = (0, 24)
+    stats = processor.process_new_orders(days_back=1)
+
+    assert dispatched == ['urgent', 'later', 'far'] and extracted == ['far', 'later', 'urgent']
+    assert stats['orders_dispatched'] == 1
+    resumed = processor.db.get_order_by_id(far.id)
+    assert resumed.status == OrderStatus.DISPATCHED and resumed.pickup_lat == -19.93
+    assert processor.queue_depth.value(queue='deferred') == 0
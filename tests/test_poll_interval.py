@@ -0,0 +1,67 @@
+import os
+import sys
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from benchmarks.corpus import pipeline_corpus
+from benchmarks.fakes.fake_imap import start_server as start_imap
+from src.services.email_reader import EmailReader
+from src.services.poll_interval import PollInterval
+
+MONDAY_NOON = datetime(2026, 1, 5, 12, 0)
+MONDAY_NIGHT = datetime(2026, 1, 5, 22, 0)
+SATURDAY_NOON = datetime(2026, 1, 10, 12, 0)
+
+
+def test_interval_by_business_hours_and_bursts():
+    poll = PollInterval(base_seconds=60, business_seconds=30, min_seconds=10, burst_emails=5, burst_cycles=2)
+
+    assert poll.next_delay({'emails_fetched': 1}, when=MONDAY_NOON) == (30, 'business')
+    assert poll.next_delay({'emails_fetched': 1}, when=MONDAY_NIGHT) == (60, 'base')
+    assert poll.next_delay({}, when=SATURDAY_NOON) == (60, 'base')
+
+    assert poll.next_delay({'emails_fetched': 8}, when=MONDAY_NIGHT) == (10, 'burst')
+    assert poll.next_delay({'emails_fetched': 0}, when=MONDAY_NIGHT) == (10, 'burst')
+    assert poll.next_delay({'emails_fetched': 0}, when=MONDAY_NIGHT) == (60, 'base')
+
+    assert poll.next_delay({'emails_fetched': 20, 'fetch_limit_hit': True}) == (0.0, 'fetch_limit')
+
+
+def test_errors_back_off_exponentially_and_reset():
+    poll = PollInterval(base_seconds=60, max_backoff_seconds=300)
+
+    delays = [poll.next_delay(error=True)[0] for _ in range(3)]
+    delays.append(poll.next_delay({'error': 'IMAP down'})[0])
+    assert delays == [60, 120, 240, 300]
+    assert poll.consecutive_errors == 4
+
+    assert poll.next_delay({'emails_fetched': 0}, when=MONDAY_NIGHT) == (60, 'base')
+    assert poll.next_delay(error=True) == (60, 'backoff')
+
+
+def test_from_env_defaults_and_overrides():
+    poll = PollInterval.from_env({'PROCESSOR_INTERVAL_MINUTES': '2', 'POLL_BUSINESS_HOURS': ''})
+
+    assert poll.base_seconds == 120 and poll.business_seconds == 60
+    assert not poll.is_business_hours(MONDAY_NOON)
+
+
+def test_fetch_limit_skips_known_emails_and_leaves_rest_for_next_cycle():
+    server, (host, port) = start_imap()
+    try:
+        for mail in pipeline_corpus(5, seed=3):
+            server.mailbox.add(mail.to_bytes())
+        reader = EmailReader(host, port, 'u', 'p', subject_filter='PROGRAMAÇÃO', use_ssl=False)
+        known = set()
+
+        first = reader.fetch_new_orders(limit=2, is_known=known.__contains__)
+        known.update(e.uid for e in first)
+        second = reader.fetch_new_orders(limit=2, is_known=known.__contains__)
+        known.update(e.uid for e in second)
+        last = reader.fetch_new_orders(limit=2, is_known=known.__contains__)
+
+        assert [e.uid for e in first + second + last] == ['1', '2', '3', '4', '5']
+        assert len(reader.fetch_new_orders()) == 5
+    finally:
+        server.shutdown()
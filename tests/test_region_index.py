@@ -0,0 +1,84 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.config.regions import MINAS_GERAIS_POLYGON
+from src.services.region_index import CityMatcher, get_region_index, point_in_polygon
+
+# Cidades mineiras perto das divisas
+INSIDE_MG = {
+    'Uberlândia': (-18.92, -48.28),
+    'Montes Claros': (-16.73, -43.86),
+    'Juiz de Fora': (-21.76, -43.35),
+    'Nanuque': (-17.84, -40.35),
+    'Uberaba': (-19.75, -47.93),
+    'Paracatu': (-17.22, -46.87),
+    'Unaí': (-16.36, -46.91),
+    'Poços de Caldas': (-21.79, -46.56),
+    'Extrema': (-22.85, -46.32),
+    'Espinosa': (-14.93, -42.82),
+    'Salto da Divisa': (-16.00, -39.94),
+    'Claraval': (-20.40, -47.28),
+    'Iturama': (-19.73, -50.20),
+}
+
+# Cidades de outros estados que caem no bounding box antigo de MG
+OUTSIDE_MG = {
+    'Goiânia': (-16.68, -49.25),
+    'Brasília': (-15.79, -47.88),
+    'Vitória': (-20.32, -40.34),
+    'Franca': (-20.54, -47.40),
+    'Catalão': (-18.17, -47.95),
+    'Cristalina': (-16.77, -47.61),
+    'Colatina': (-19.54, -40.63),
+    'Campos dos Goytacazes': (-21.75, -41.32),
+    'Resende': (-22.47, -44.45),
+    'Barretos': (-20.56, -48.57),
+    'Vitória da Conquista': (-14.86, -40.84),
+}
+
+
+def test_state_polygon_separates_border_cities():
+    index = get_region_index()
+    for name, (lat, lng) in INSIDE_MG.items():
+        assert index.in_minas_gerais(lat, lng), name
+    for name, (lat, lng) in OUTSIDE_MG.items():
+        assert not index.in_minas_gerais(lat, lng), name
+
+
+def test_grid_index_agrees_with_exact_test():
+    index = get_region_index()
+    rng = np.random.default_rng(7)
+    lats = rng.uniform(-23.5, -13.5, 5000)
+    lngs = rng.uniform(-51.5, -39.0, 5000)
+    exact = [point_in_polygon(lat, lng, MINAS_GERAIS_POLYGON) for lat, lng in zip(lats, lngs)]
+    assert [index.state.contains(lat, lng) for lat, lng in zip(lats, lngs)] == exact
+    assert index.state.contains_many(lats, lngs).tolist() == exact
+
+
+def test_bh_metro_polygon():
+    index = get_region_index()
+    assert index.in_bh_metro(-19.92, -43.94)  # Belo Horizonte
+    assert index.in_bh_metro(-19.97, -44.20)  # Betim
+    assert index.in_bh_metro(-19.63, -43.89)  # Confins
+    assert not index.in_bh_metro(-20.66, -43.79)  # Congonhas
+    assert not index.in_bh_metro(-18.92, -48.28)  # Uberlândia
+
+
+def test_city_matcher_respects_word_boundaries_and_accents():
+    matcher = CityMatcher(['betim', 'sabará', 'nova lima', 'lima'])
+    assert matcher.find_all("Rua X, 10, Sabara - MG") == [(11, 'sabara')]
+    assert matcher.find_all("Av. Nova Lima, Betim") == [(4, 'nova lima'), (9, 'lima'), (15, 'betim')]
+    assert not matcher.contains_any("Rua Betimzinho, 20")
+    assert not matcher.contains_any("Palimadores")
+
+
+def test_normalize_address_uses_city_matcher():
+    from src.services.geocoding_service import GeocodingService
+
+    service = GeocodingService()
+    assert service._normalize_address("Rua A, 10, Sabara") == "Rua A, 10, Sabara, MG, Brasil"
+    assert service._normalize_address("Rua A, 10") == "Rua A, 10, Belo Horizonte, MG, Brasil"
@@ -0,0 +1,175 @@
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.models.order import Order, OrderStatus
+from src.services.database import DatabaseManager
+from src.services.minastaxi_client import MinasTaxiAPIError
+from src.services.reprocessing import ReprocessingEngine, classify_failure
+
+
+def _failed_order(db, i, error='MinasTaxi API error: Request timeout', **fields):
+    values = dict(
+        email_id=f'uid-{i}', passenger_name=f'P{i}', status=OrderStatus.FAILED,
+        pickup_lat=-19.93, pickup_lng=-44.05, pickup_time=datetime.now() + timedelta(hours=2),
+        error_message=error,
+    )
+    values.update(fields)
+    order = Order(**values)
+    order.id = db.create_order(order)
+    return order.id
+
+
+def test_classify_failure_skips_non_retryable_orders():
+    now = datetime(2026, 1, 5, 12, 0)
+    ok = dict(pickup_lat=-19.9, pickup_lng=-44.0, pickup_time=now + timedelta(hours=1))
+
+    assert classify_failure(Order(error_message='Request timeout', **ok), now) is None
+    assert classify_failure(Order(error_message='Unexpected response: 429', **ok), now) is None
+    assert classify_failure(Order(error_message='Reprocessamento falhou: Unexpected response: 403', **ok), now) == 'rejected'
+    assert classify_failure(Order(error_message='Missing required field: passenger_name', **ok), now) == 'invalid_payload'
+    assert classify_failure(Order(error_message='Failed to geocode pickup address'), now) == 'no_coordinates'
+    late = dict(ok, pickup_time=now - timedelta(minutes=45))
+    assert classify_failure(Order(**late), now) == 'pickup_passed'
+    assert classify_failure(Order(**late), now, pickup_grace_minutes=60) is None
+
+
+def test_job_dispatches_in_parallel_up_to_the_cap_and_skips(tmp_path):
+    db = DatabaseManager(str(tmp_path / 'orders.db'))
+    retryable = [_failed_order(db, i) for i in range(6)]
+    duplicate = _failed_order(db, 6, error='Possível pedido duplicado (mesmo passageiro, endereço e horário similar)')
+    no_coords = _failed_order(db, 7, pickup_lat=None, pickup_lng=None)
+
+    lock = threading.Lock()
+    active, peak, notified = [0], [0], []
+
+    def dispatch(order):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.05)
+        with lock:
+            active[0] -= 1
+        return {'order_id': f'R{order.id}'}
+
+    engine = ReprocessingEngine(db, dispatch, notify=notified.append, concurrency=3)
+    job = engine.run(engine.create_job())
+
+    assert job['status'] == 'completed' and job['finished_at']
+    assert job['counts'] == {'pending': 0, 'succeeded': 6, 'failed': 0, 'skipped': 2}
+    assert peak[0] == 3
+    assert sorted(o.id for o in notified) == retryable
+    assert db.get_order_by_id(retryable[0]).minastaxi_order_id == f'R{retryable[0]}'
+    assert db.get_order_by_id(duplicate).status == OrderStatus.FAILED
+    assert db.get_reprocess_items(job['id'], 'skipped') == [duplicate, no_coords]
+    # Pulados continuam FAILED: um novo job só os reavalia
+    assert db.get_reprocess_items(engine.create_job()) == [duplicate, no_coords]
+
+
+def test_consecutive_failures_pause_the_job_and_resume_skips_done_orders(tmp_path):
+    db = DatabaseManager(str(tmp_path / 'orders.db'))
+    ids = [_failed_order(db, i) for i in range(8)]
+    calls = []
+
+    def outage(order):
+        calls.append(order.id)
+        if order.id == ids[0]:
+            return {'order_id': 'R1'}
+        raise MinasTaxiAPIError('Connection error: refused')
+
+    engine = ReprocessingEngine(db, outage, concurrency=1, max_consecutive_failures=3)
+    job_id = engine.create_job()
+    job = engine.run(job_id)
+
+    assert job['status'] == 'paused' and '3 falhas seguidas' in job['message']
+    assert job['counts'] == {'pending': 4, 'succeeded': 1, 'failed': 3, 'skipped': 0}
+    assert db.get_order_by_id(ids[1]).error_message == 'Reprocessamento falhou: Connection error: refused'
+
+    # API de volta: o mesmo job é retomado e só os pendentes são reenviados
+    calls.clear()
+    engine.dispatch = lambda order: calls.append(order.id) or {'order_id': 'R2'}
+    assert engine.create_job() == job_id
+    job = engine.run(job_id)
+
+    assert calls == ids[4:]
+    assert job['status'] == 'completed' and job['message'] is None
+    assert job['counts'] == {'pending': 0, 'succeeded': 5, 'failed': 3, 'skipped': 0}
+
+
+def test_background_job_reports_progress_and_detects_stale_jobs(tmp_path):
+    db = DatabaseManager(str(tmp_path / 'orders.db'))
+    for i in range(4):
+        _failed_order(db, i)
+    release = threading.Event()
+
+    def dispatch(order):
+        release.wait(5)
+        return {'order_id': 'R'}
+
+    engine = ReprocessingEngine(db, dispatch, concurrency=2)
+    job_id = engine.create_job()
+    assert engine.start(job_id) and not engine.start(job_id)
+
+    job = db.get_reprocess_job()
+    assert job['id'] == job_id and job['counts']['pending'] == 4
+    assert engine.is_running(job_id)
+    assert not engine.is_stale(job, now=datetime.now() + timedelta(hours=1))
+
+    release.set()
+    deadline = time.time() + 5
+    while engine.is_running(job_id) and time.time() < deadline:
+        time.sleep(0.01)
+    assert db.get_reprocess_job(job_id)['counts']['succeeded'] == 4
+
+    # Job 'running' sem checkpoint e fora deste processo (ex: dashboard reiniciado)
+    abandoned = db.create_reprocess_job([1], concurrency=2)
+    db.set_reprocess_job_status(abandoned, 'running')
+    job = db.get_reprocess_job(abandoned)
+    assert not engine.is_stale(job)
+    assert engine.is_stale(job, now=datetime.now() + timedelta(minutes=11))
+
+
+def test_second_process_never_resends_an_order_of_a_running_job(tmp_path):
+    db = DatabaseManager(str(tmp_path / 'orders.db'))
+    ids = [_failed_order(db, i) for i in range(4)]
+    release = threading.Event()
+    sent = []
+
+    def dispatch(order):
+        sent.append(order.id)
+        release.wait(5)
+        return {'order_id': 'R'}
+
+    class OtherProcess(ReprocessingEngine):
+        _running = set()  # o registro de jobs em execução é por processo
+
+    dashboard = ReprocessingEngine(db, dispatch, concurrency=2)
+    cli = OtherProcess(db, dispatch, concurrency=2)
+    job_id = dashboard.create_job()
+    assert dashboard.start(job_id)
+    deadline = time.time() + 5
+    while len(sent) < 2 and time.time() < deadline:
+        time.sleep(0.01)
+
+    # Mesmo job pela linha de comando: só reporta o progresso
+    assert cli.create_job() == job_id
+    assert cli.run(job_id)['counts']['pending'] == 4
+    assert len(sent) == 2
+
+    # Reservas: um pedido em envio nunca é entregue a outro dono até o lease vencer
+    claimed = [db.claim_reprocess_item(job_id, 'cli', 0.05) for _ in range(3)]
+    assert claimed == [ids[2], ids[3], None]
+    time.sleep(0.1)
+    assert db.claim_reprocess_item(job_id, 'other', 60) == ids[2]
+    assert not db.finish_reprocess_item(job_id, ids[2], 'succeeded', owner='cli')
+
+    release.set()
+    while dashboard.is_running(job_id) and time.time() < deadline:
+        time.sleep(0.01)
+    assert sorted(sent) == ids[:2] + [ids[3]]
+    job = db.get_reprocess_job(job_id)
+    assert job['status'] == 'running' and job['counts']['pending'] == 1
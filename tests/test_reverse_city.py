@@ -0,0 +1,89 @@
+import os
+import sys
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from benchmarks.fakes.fake_nominatim import start_server
+from src.models.order import Order
+from src.services.geocoding_backends import ReverseCityCache, city_state_from_raw
+from src.services.geocoding_service import GeocodingService
+from src.services.minastaxi_client import MinasTaxiClient
+
+
+def test_city_state_from_nominatim_and_google_raw():
+    nominatim = {'address': {'town': 'Congonhas', 'state': 'Minas Gerais', 'ISO3166-2-lvl4': 'BR-MG'}}
+    assert city_state_from_raw(nominatim) == ('Congonhas', 'MG')
+    assert city_state_from_raw({'address': {'city': 'Vitória', 'state': 'Espírito Santo'}}) == ('Vitória', 'ES')
+
+    google = {'address_components': [
+        {'long_name': 'Betim', 'short_name': 'Betim', 'types': ['administrative_area_level_2', 'political']},
+        {'long_name': 'Minas Gerais', 'short_name': 'MG', 'types': ['administrative_area_level_1', 'political']},
+    ]}
+    assert city_state_from_raw(google) == ('Betim', 'MG')
+    assert city_state_from_raw({'address': {'state': 'Minas Gerais'}}) is None
+
+
+def test_reverse_cache_groups_nearby_points():
+    cache = ReverseCityCache(cell_deg=0.01)
+    cache.put(-19.9312, -43.9381, ('Belo Horizonte', 'MG'))
+    assert cache.get(-19.9355, -43.9333) == ('Belo Horizonte', 'MG')
+    assert cache.get(-19.9512, -43.9381) is None
+
+
+def test_reverse_geocode_city_calls_provider_once_per_cell():
+    server, domain = start_server()
+    try:
+        service = GeocodingService(nominatim_domain=domain, nominatim_scheme='http', nominatim_min_interval=0)
+        assert service.reverse_geocode_city(-19.9312, -43.9381) == ('Belo Horizonte', 'MG')
+        assert service.reverse_geocode_city(-19.9315, -43.9384) == ('Belo Horizonte', 'MG')
+        assert server.RequestHandlerClass.stats['reverse'] == 1
+
+        # Geocoding direto já alimenta o cache: nenhuma consulta reversa extra
+        coords = service.geocode_address("Rua da Bahia, 1000, Belo Horizonte")
+        assert service.reverse_geocode_city(*coords) == ('Belo Horizonte', 'MG')
+        assert server.RequestHandlerClass.stats['reverse'] == 1
+    finally:
+        server.shutdown()
+
+
+def test_payload_city_state_from_coordinates(monkeypatch):
+    resolved = {(-20.66, -43.79): ('Congonhas', 'MG')}
+    client = MinasTaxiClient(
+        api_url="https://example.com", user_id="02572696000156", password="0104",
+        location_resolver=lambda lat, lng: resolved.get((lat, lng)),
+    )
+    captured = {}
+
+    class Response:
+        status_code = 200
+        headers = {}
+        text = '{"accepted_and_looking_for_driver": true, "ride_id": "RIDE1"}'
+
+        @staticmethod
+        def json():
+            return {"accepted_and_looking_for_driver": True, "ride_id": "RIDE1"}
+
+    def fake_post(endpoint, json, headers, timeout, verify):
+        captured["payload"] = json
+        return Response()
+
+    monkeypatch.setattr(client.session, "post", fake_post)
+    order = Order(
+        passenger_name="Joao Silva",
+        phone="31999999999",
+        pickup_address="Rua A, 10, Contagem, MG",
+        dropoff_address="CSN Mineração, Congonhas",
+        pickup_time=datetime.now() + timedelta(hours=1),
+        pickup_lat=-19.9,
+        pickup_lng=-43.9,
+        dropoff_lat=-20.66,
+        dropoff_lng=-43.79,
+    )
+    assert client.dispatch_order(order)["success"] is True
+
+    payload = captured["payload"]
+    location = payload["destinations"][0]["location"]
+    assert (location["city"], location["state"]) == ('Congonhas', 'MG')
+    # Sem resposta do resolver: volta para a extração pelo texto
+    assert payload["users"][0]["pickup"]["city"] == "Contagem"
@@ -0,0 +1,207 @@
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.models.order import Order
+from src.services.ride_pooling import RidePoolingEngine
+
+CSN = (-20.5033, -43.8569)
+BASE_TIME = datetime(2026, 3, 2, 6, 0)
+
+
+def make_order(order_id, lat, lng, minutes=0, dest=CSN, company='284', **kwargs):
+    return Order(
+        id=order_id,
+        passenger_name=f"P{order_id}",
+        phone=f"3199999{order_id:04d}",
+        pickup_address=f"Rua {order_id}",
+        dropoff_address="CSN",
+        pickup_lat=lat,
+        pickup_lng=lng,
+        dropoff_lat=dest[0],
+        dropoff_lng=dest[1],
+        pickup_time=BASE_TIME + timedelta(minutes=minutes),
+        company_code=company,
+        cost_center=f"CC{order_id}",
+        **kwargs
+    )
+
+
+def test_groups_nearby_orders_in_same_window_and_destination():
+    orders = [
+        make_order(1, -19.9191, -43.9386),
+        make_order(2, -19.9250, -43.9400, minutes=20),
+        make_order(3, -19.9191, -43.9386, minutes=90),           # outra janela
+        make_order(4, -19.9191, -43.9386, dest=(-19.85, -43.95)),  # outro destino
+        make_order(5, -19.9191, -43.9386, company='999'),         # outra empresa
+        make_order(6, -20.30, -43.80),                            # longe
+    ]
+    groups = RidePoolingEngine().cluster(orders)
+
+    pooled = [sorted(o.id for o in g) for g in groups if len(g) > 1]
+    assert pooled == [[1, 2]]
+    assert orders[0].cluster_id == orders[1].cluster_id == 1
+    assert all(o.cluster_id is None for o in orders[2:])
+    assert sum(len(g) for g in groups) == len(orders)
+
+
+def test_respects_seat_limit_and_unpoolable_orders():
+    orders = [make_order(i, -19.9191, -43.9386) for i in range(1, 7)]
+    orders.append(Order(id=99, passenger_name="sem coordenadas"))
+    groups = RidePoolingEngine(max_seats=4).cluster(orders)
+    assert sorted(len(g) for g in groups) == [1, 2, 4]
+
+
+def test_scales_to_thousands_of_orders():
+    rng = random.Random(7)
+    orders = [
+        make_order(i, -19.92 + rng.uniform(-0.2, 0.2), -43.94 + rng.uniform(-0.2, 0.2), minutes=rng.randint(0, 240))
+        for i in range(1, 5001)
+    ]
+    start = time.perf_counter()
+    groups = RidePoolingEngine().cluster(orders)
+    assert time.perf_counter() - start < 5
+    assert sum(len(g) for g in groups) == len(orders)
+    assert any(len(g) > 1 for g in groups)
+
+
+def test_merge_orders_keeps_each_passenger_cost_center():
+    first = make_order(1, -19.9191, -43.9386, cluster_id=1)
+    second = make_order(2, -19.9250, -43.9400, minutes=10, cluster_id=1, passengers=[
+        {'name': 'Ana', 'phone': '31988887777', 'address': 'Rua A', 'lat': -19.9260, 'lng': -43.9410},
+    ])
+    merged = RidePoolingEngine.merge_orders([first, second])
+
+    assert merged.id is None
+    assert merged.cluster_id == 1
+    assert merged.pickup_time == BASE_TIME
+    assert sorted(p['name'] for p in merged.passengers) == ['Ana', 'P1']
+    assert {p['name']: p['cost_center'] for p in merged.passengers} == {'P1': 'CC1', 'Ana': 'CC2'}
+    assert merged.pickup_address.startswith("Múltiplas paradas")
+
+
+def test_processor_dispatches_one_ride_per_cluster(tmp_path, monkeypatch, caplog):
+    monkeypatch.setenv('DATABASE_PATH', str(tmp_path / 'test.db'))
+    monkeypatch.setenv('MINASTAXI_USER_ID', 'test')
+    monkeypatch.setenv('ENABLE_RIDE_POOLING', 'true')
+    monkeypatch.setenv('ENABLE_WHATSAPP_NOTIFICATIONS', 'false')
+    from src.models.order import OrderStatus
+    from src.processor import TaxiOrderProcessor
+
+    processor = TaxiOrderProcessor()
+    for i, (lat, lng) in enumerate([(-19.9191, -43.9386), (-19.9250, -43.9400), (-20.30, -43.80)], 1):
+        order = make_order(i, lat, lng, minutes=i, email_id=f"uid-{i}", status=OrderStatus.GEOCODED)
+        order.id = None
+        order.pickup_time = datetime.now() + timedelta(hours=2, minutes=i)
+        processor.db.hold_for_pooling(processor.db.create_order(order))
+
+    payloads = []
+
+    def fake_dispatch(order):
+        payloads.append(order)
+        return {'order_id': f"ride-{len(payloads)}"}
+
+    monkeypatch.setattr(processor.minastaxi_client, 'dispatch_order', fake_dispatch)
+    caplog.set_level('INFO', logger='src.processor')
+    stats = {'orders_dispatched': 0, 'orders_failed': 0}
+    assert processor.dispatch_pooled_orders(stats) == 2
+    assert stats['orders_dispatched'] == 3
+
+    merged = [p for p in payloads if len(p.passengers) == 2]
+    assert len(merged) == 1
+    stored = processor.db.get_orders_by_status(OrderStatus.DISPATCHED)
+    pooled = [o for o in stored if o.cluster_id is not None]
+    assert len(pooled) == 2
+    assert len({o.minastaxi_order_id for o in pooled}) == 1
+    assert "Order None" not in caplog.text
+    assert f"Order {merged[0].cluster_id} successfully dispatched" in caplog.text
+
+
+def test_held_order_keeps_payment_type_and_re_in_the_dispatch_payload(tmp_path, monkeypatch):
+    monkeypatch.setenv('DATABASE_PATH', str(tmp_path / 'test.db'))
+    monkeypatch.setenv('ENABLE_RIDE_POOLING', 'true')
+    monkeypatch.setenv('ENABLE_WHATSAPP_NOTIFICATIONS', 'false')
+    monkeypatch.setenv('MINASTAXI_PAYMENT_TYPE', 'ONLINE_PAYMENT')
+    monkeypatch.setenv('MINASTAXI_USER_ID', '02572696000156')
+    monkeypatch.setenv('MINASTAXI_PASSWORD', '0104')
+    from src.models.order import OrderStatus
+    from src.processor import TaxiOrderProcessor
+    from src.services.email_reader import EmailMessage
+
+    processor = TaxiOrderProcessor()
+    monkeypatch.setattr(processor.llm_extractor, 'extract_with_fallback', lambda body: {
+        'passenger_name': 'Joao Silva', 'phone': '31999999999', 'passenger_re': '222222',
+        'pickup_address': 'Rua A, 10, Belo Horizonte, MG', 'dropoff_address': 'Rua B, 20, Belo Horizonte, MG',
+        'pickup_time': (datetime.now() + timedelta(hours=2)).isoformat(), 'payment_type': 'VOUCHER',
+    })
+    monkeypatch.setattr(processor.geocoder, 'geocode_address', lambda address: (-19.93, -43.94))
+    email = EmailMessage(uid='m1', subject='Novo Agendamento', from_='csn@example.com',
+                         date=datetime.now(), body='Pedido')
+
+    held = processor._process_single_email(email)
+    assert held.status == OrderStatus.GEOCODED
+
+    client = processor.minastaxi_client
+    monkeypatch.setattr(client, 'location_resolver', None)
+    payloads = []
+
+    class _Response:
+        status_code = 200
+        headers = {}
+        text = '{"accepted_and_looking_for_driver": true, "ride_id": "RIDE1"}'
+
+        @staticmethod
+        def json():
+            return {'accepted_and_looking_for_driver': True, 'ride_id': 'RIDE1'}
+
+    monkeypatch.setattr(client.session, 'post', lambda endpoint, json, **kwargs: payloads.append(json) or _Response())
+    assert processor.dispatch_pooled_orders() == 1
+
+    [payload] = payloads
+    assert payload['payment_type'] == 'VOUCHER'
+    assert payload['users'][0]['passenger_re'] == '222222'
+    assert processor.db.get_order_by_id(held.id).status == OrderStatus.DISPATCHED
+
+
+def test_only_future_orders_held_by_the_pooling_stage_are_dispatched(tmp_path, monkeypatch):
+    monkeypatch.setenv('DATABASE_PATH', str(tmp_path / 'test.db'))
+    monkeypatch.setenv('MINASTAXI_USER_ID', 'test')
+    monkeypatch.setenv('ENABLE_RIDE_POOLING', 'true')
+    monkeypatch.setenv('ENABLE_WHATSAPP_NOTIFICATIONS', 'false')
+    from src.models.order import OrderStatus
+    from src.processor import TaxiOrderProcessor
+
+    processor = TaxiOrderProcessor()
+    ids = {}
+    for name, pickup, held in [('held', timedelta(hours=2), True),
+                               ('legacy', timedelta(hours=2), False),
+                               ('stale', -timedelta(hours=1), True)]:
+        order = make_order(len(ids) + 1, -19.9191, -43.9386, email_id=f"uid-{name}", status=OrderStatus.GEOCODED)
+        order.id = None
+        order.pickup_time = datetime.now() + pickup
+        ids[name] = processor.db.create_order(order)
+        if held:
+            processor.db.hold_for_pooling(ids[name])
+
+    payloads = []
+    monkeypatch.setattr(processor.minastaxi_client, 'dispatch_order',
+                        lambda order: payloads.append(order) or {'order_id': 'ride-1'})
+    assert processor.dispatch_pooled_orders() == 1
+
+    assert [p.id for p in payloads] == [ids['held']]
+    assert processor.db.get_order_by_id(ids['legacy']).status == OrderStatus.GEOCODED
+    assert processor.db.get_order_by_id(ids['stale']).status == OrderStatus.MANUAL_REVIEW
+
+
+def test_legacy_clustering_flag_does_not_enable_pooling(tmp_path, monkeypatch):
+    monkeypatch.setenv('DATABASE_PATH', str(tmp_path / 'test.db'))
+    monkeypatch.setenv('MINASTAXI_USER_ID', 'test')
+    monkeypatch.delenv('ENABLE_RIDE_POOLING', raising=False)
+    monkeypatch.setenv('ENABLE_CLUSTERING', 'true')
+    from src.processor import TaxiOrderProcessor
+
+    assert TaxiOrderProcessor().pooling_enabled is False
@@ -0,0 +1,63 @@
+import itertools
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.services.route_optimizer import RouteOptimizer
+
+DESTINATION = (-20.5033, -43.8569)
+
+
+def random_matrix(n, seed):
+    rng = random.Random(seed)
+    points = [(-20.0 + rng.uniform(-0.5, 0.5), -43.9 + rng.uniform(-0.5, 0.5)) for _ in range(n)]
+    return RouteOptimizer.build_distance_matrix(points + [DESTINATION])
+
+
+def brute_force(matrix):
+    n = len(matrix) - 1
+    return min(RouteOptimizer.path_length(matrix, perm) for perm in itertools.permutations(range(n)))
+
+
+def test_held_karp_matches_brute_force():
+    for n in range(2, 8):
+        matrix = random_matrix(n, seed=n)
+        order, total = RouteOptimizer.solve_open_path(matrix)
+        assert sorted(order) == list(range(n))
+        assert total == pytest.approx(brute_force(matrix))
+
+
+def test_heuristic_is_valid_and_beats_farthest_first():
+    matrix = random_matrix(30, seed=42)
+    order, total = RouteOptimizer.solve_open_path(matrix)
+    assert sorted(order) == list(range(30))
+
+    farthest_first = sorted(range(30), key=lambda k: -matrix[k, 30])
+    assert total <= RouteOptimizer.path_length(matrix, farthest_first)
+
+
+def test_heuristic_close_to_optimal_on_small_instances():
+    for seed in range(5):
+        matrix = random_matrix(8, seed=100 + seed)
+        order = RouteOptimizer._heuristic_path(matrix)
+        assert RouteOptimizer.path_length(matrix, order) <= brute_force(matrix) * 1.1
+
+
+def test_solve_pickup_route_keeps_unlocated_first_and_returns_distance():
+    passengers = [
+        {'name': 'A', 'address': 'a', 'lat': -19.92, 'lng': -43.94},
+        {'name': 'B', 'address': 'b'},
+        {'name': 'C', 'address': 'c', 'lat': -20.40, 'lng': -43.85},
+    ]
+    ordered, total_km = RouteOptimizer.solve_pickup_route(passengers, DESTINATION)
+    assert [p['name'] for p in ordered] == ['B', 'A', 'C']
+    assert total_km > 0
+
+    same, no_distance = RouteOptimizer.solve_pickup_route(passengers, None)
+    assert same == passengers
+    assert no_distance is None
+
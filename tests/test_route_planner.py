@@ -0,0 +1,56 @@
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.services.route_planner import RoutePlanner, SpeedModel
+
+CSN = (-20.5033, -43.8569)
+STOPS = [(-19.9191, -43.9386), (-19.9700, -43.9600), (-20.1500, -43.9000)]
+
+
+def test_deadline_schedules_backwards_from_arrival():
+    deadline = datetime(2026, 3, 2, 7, 0)
+    plan = RoutePlanner(arrival_buffer_minutes=5).plan(STOPS, CSN, deadline=deadline)
+
+    assert plan.offsets_minutes[0] == 0
+    assert plan.offsets_minutes == sorted(plan.offsets_minutes)
+    assert plan.arrival_time == deadline - timedelta(minutes=5)
+    assert plan.first_pickup_time + timedelta(minutes=plan.total_minutes) == plan.arrival_time
+    # ~70 km em linha reta: mais de uma hora de rota
+    assert plan.total_minutes > 60
+
+
+def test_travel_time_matrix_overrides_speed_model():
+    n = len(STOPS) + 1
+    matrix = np.full((n, n), 10.0)
+    plan = RoutePlanner(SpeedModel(dwell_minutes=1)).plan(
+        STOPS, CSN, start_time=datetime(2026, 3, 2, 6, 0), travel_minutes=matrix
+    )
+    assert plan.offsets_minutes == [0.0, 11.0, 22.0]
+    assert plan.total_minutes == pytest.approx(33.0)
+    assert plan.arrival_time == datetime(2026, 3, 2, 6, 33)
+
+
+def test_plan_passengers_annotates_only_located_passengers():
+    passengers = [{'name': 'sem coords'}] + [{'name': str(i), 'lat': lat, 'lng': lng} for i, (lat, lng) in enumerate(STOPS)]
+    RoutePlanner().plan_passengers(passengers, CSN, start_time=datetime(2026, 3, 2, 6, 0))
+
+    assert 'pickup_time' not in passengers[0]
+    assert passengers[1]['pickup_time'] == '2026-03-02T06:00:00'
+    assert passengers[1]['pickup_offset_minutes'] == 0
+    assert passengers[3]['pickup_offset_minutes'] > passengers[2]['pickup_offset_minutes'] > 0
+
+
+def test_fast_enough_to_run_inline():
+    planner = RoutePlanner()
+    deadline = datetime(2026, 3, 2, 7, 0)
+    start = time.perf_counter()
+    for _ in range(1000):
+        planner.plan(STOPS, CSN, deadline=deadline)
+    assert (time.perf_counter() - start) / 1000 < 0.002
@@ -11,6 +11,7 @@ from src.models.order import OrderStatus
 def test_solicitante_name_override(tmp_path, monkeypatch):
     # create minimal environment
     monkeypatch.setenv('DATABASE_PATH', str(tmp_path / 'db.sqlite'))
+    monkeypatch.setenv('MINASTAXI_USER_ID', 'test')
     processor = TaxiOrderProcessor()
 
     class DummyEmail:
@@ -0,0 +1,64 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from benchmarks.bench_startup import HEAVY_MODULES, ROOT, parse_importtime
+
+
+def _loaded_after(code, tmp_path):
+    env = dict(os.environ, OPENAI_API_KEY='sk-fake', MINASTAXI_USER_ID='test', DATABASE_PATH=str(tmp_path / 'orders.db'),
+               LOG_FILE=str(tmp_path / 'startup.log'), TRACE_FILE='', ENABLE_WHATSAPP_NOTIFICATIONS='true')
+    proc = subprocess.run(
+        [sys.executable, '-c', f"import sys\n{code}\nprint(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"],
+        cwd=ROOT, env=env, capture_output=True, text=True, timeout=120
+    )
+    assert proc.returncode == 0, proc.stderr
+    return [m for m in proc.stdout.strip().rsplit('\n', 1)[-1].split(',') if m]
+
+
+def test_processor_startup_does_not_load_heavy_sdks(tmp_path):
+    assert _loaded_after("import src.processor, src.services.database", tmp_path) == []
+    assert _loaded_after("from src.processor import TaxiOrderProcessor\nTaxiOrderProcessor()", tmp_path) == []
+
+
+def test_lazy_services_resolve_on_first_use(tmp_path):
+    loaded = _loaded_after(
+        "from src.processor import TaxiOrderProcessor\n"
+        "from src.services import LLMExtractor\n"
+        "p = TaxiOrderProcessor()\n"
+        "assert isinstance(p.llm_extractor, LLMExtractor) and p.llm_extractor is p.llm_extractor",
+        tmp_path
+    )
+    assert 'openai' in loaded
+
+
+def test_parse_importtime():
+    stderr = (
+        "import time: self [us] | cumulative | imported package\n"
+        "import time:       120 |        120 |   _io\n"
+        "import time:       300 |        900 | src.processor\n"
+        "import time:        50 |         50 | json\n"
+    )
+    modules, total = parse_importtime(stderr)
+
+    assert [m['module'] for m in modules] == ['_io', 'src.processor', 'json']
+    assert modules[0]['depth'] == 1 and modules[1]['depth'] == 0
+    assert total == 950
+
+
+def test_processor_fails_fast_without_required_credentials(tmp_path, monkeypatch):
+    monkeypatch.setenv('DATABASE_PATH', str(tmp_path / 'orders.db'))
+    monkeypatch.setenv('OPENAI_API_KEY', 'sk-fake')
+    monkeypatch.delenv('MINASTAXI_USER_ID', raising=False)
+    from src.processor import TaxiOrderProcessor
+
+    with pytest.raises(ValueError, match='MINASTAXI_USER_ID'):
+        TaxiOrderProcessor()
+    monkeypatch.setenv('MINASTAXI_USER_ID', 'test')
+    monkeypatch.setenv('OPENAI_API_KEY', '')
+    with pytest.raises(ValueError, match='OPENAI_API_KEY'):
+        TaxiOrderProcessor()
@@ -0,0 +1,85 @@
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.services import tracing
+
+
+@pytest.fixture
+def trace_file(tmp_path):
+    path = str(tmp_path / 'traces.jsonl')
+    tracing.configure(path)
+    yield path
+    tracing.configure(None)
+
+
+def _span(name, span_id, parent_id, start, end):
+    return {'trace_id': 't', 'span_id': span_id, 'parent_id': parent_id, 'name': name, 'start': start,
+            'end': end, 'duration_ms': (end - start) * 1000, 'status': 'ok', 'attributes': {}}
+
+
+def test_spans_nest_and_export_as_jsonl(trace_file):
+    with tracing.start_trace('order', email_uid='42') as root:
+        with tracing.span('extract') as extract:
+            with tracing.span('openai.chat', retryable=True):
+                pass
+            with tracing.span('openai.chat', retryable=True) as retry:
+                retry.set_attribute('response_chars', 10)
+        with pytest.raises(ValueError):
+            with tracing.span('dispatch'):
+                raise ValueError('boom')
+
+    spans = {s['span_id']: s for s in tracing.load_spans(trace_file)}
+    assert len(spans) == 5 and len({s['trace_id'] for s in spans.values()}) == 1
+    assert spans[extract.span_id]['parent_id'] == root.span_id
+    chats = [s for s in spans.values() if s['name'] == 'openai.chat']
+    assert [c['attributes']['attempt'] for c in chats] == [1, 2]
+    assert all(c['parent_id'] == extract.span_id for c in chats)
+    dispatch = next(s for s in spans.values() if s['name'] == 'dispatch')
+    assert dispatch['status'] == 'error' and 'boom' in dispatch['attributes']['error']
+    assert spans[root.span_id]['attributes']['email_uid'] == '42'
+
+
+def test_new_trace_ignores_current_span_and_threads_need_bind(trace_file):
+    seen = {}
+    with tracing.start_trace('order') as root:
+        bound = tracing.bind_context(lambda: tracing.current_span())
+        worker = threading.Thread(target=lambda: seen.update(bound=bound(), plain=tracing.current_span()))
+        worker.start()
+        worker.join()
+        with tracing.start_trace('pool_dispatch') as other:
+            pass
+
+    assert seen['bound'] is root
+    assert seen['plain'] is tracing.NOOP_SPAN
+    assert other.trace_id != root.trace_id and other.parent_id is None
+
+
+def test_disabled_tracer_is_noop(tmp_path):
+    tracing.configure(None)
+    with tracing.start_trace('order') as span:
+        span.set_attributes(email_uid='1')
+        assert tracing.current_span() is tracing.NOOP_SPAN
+    assert not list(tmp_path.iterdir())
+
+
+def test_critical_path_follows_sequential_chain_and_skips_overlapped():
+    spans = [
+        _span('order', 'r', None, 0.0, 10.0),
+        _span('extract', 'e', 'r', 0.0, 6.0),
+        _span('openai.chat', 'c', 'e', 0.5, 5.5),
+        _span('geocode', 'g', 'r', 6.0, 9.0),
+        _span('nominatim.geocode', 'h1', 'g', 6.1, 7.0),   # variante hedged que perdeu
+        _span('nominatim.geocode', 'h2', 'g', 6.5, 8.9),
+    ]
+
+    path = [s['span_id'] for s in tracing.critical_path(spans)]
+    assert path == ['r', 'e', 'c', 'g', 'h2']
+
+    children = tracing.build_tree(spans)
+    assert tracing.self_time_ms(spans[0], children) == pytest.approx(1000.0)
+    assert tracing.self_time_ms(spans[3], children) == pytest.approx(3000 - 2800.0)
@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+"""
+Mostra a linha do tempo e o caminho crítico de um pedido a partir dos spans
+gravados pelo processador (TRACE_FILE, JSONL).
+
+Uso:
+    python trace_report.py <email_uid>            # traces do e-mail (pedido + despacho agrupado)
+    python trace_report.py --slowest 10           # pedidos mais lentos
+    python trace_report.py 1234 --file data/traces.jsonl
+"""
+import argparse
+import os
+import sys
+from collections import defaultdict
+from datetime import datetime
+
+# Adiciona o diretório raiz ao path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from src.services.tracing import build_tree, critical_path, load_spans, self_time_ms
+
+_HIDDEN_ATTRIBUTES = {'email_uids'}
+
+
+def group_traces(spans):
+    """Agrupa spans por trace_id e devolve {trace_id: (raiz, spans)}."""
+    traces = defaultdict(list)
+    for item in spans:
+        traces[item['trace_id']].append(item)
+    result = {}
+    for trace_id, items in traces.items():
+        roots = [s for s in items if s['parent_id'] is None]
+        if roots:
+            result[trace_id] = (roots[0], items)
+    return result
+
+
+def traces_for_email(traces, email_uid, include_all=False):
+    """Traces do e-mail: o pedido mais recente (ou todos) e os despachos agrupados que o incluem."""
+    orders, pooled = [], []
+    for root, items in traces.values():
+        attributes = root.get('attributes', {})
+        if str(attributes.get('email_uid')) == email_uid:
+            orders.append((root, items))
+        elif email_uid in [str(uid) for uid in attributes.get('email_uids') or []]:
+            pooled.append((root, items))
+    orders.sort(key=lambda t: t[0]['start'])
+    if orders and not include_all:
+        orders = orders[-1:]
+        pooled = [t for t in pooled if t[0]['start'] >= orders[0][0]['start']]
+    return sorted(orders + pooled, key=lambda t: t[0]['start'])
+
+
+def _format_attributes(attributes):
+    return ' '.join(f"{k}={v}" for k, v in attributes.items() if v is not None and k not in _HIDDEN_ATTRIBUTES)
+
+
+def render_trace(root, items):
+    """Árvore do trace com início relativo, duração e tempo próprio; '*' marca o caminho crítico."""
+    children = build_tree(items)
+    on_path = {s['span_id'] for s in critical_path(items)}
+    lines = [f"trace {root['trace_id']}  {root['name']}  {root['duration_ms']:.1f} ms  "
+             f"{_format_attributes(root.get('attributes', {}))}"]
+
+    def walk(item, depth):
+        mark = '*' if item['span_id'] in on_path else ' '
+        status = ' ERROR' if item['status'] != 'ok' else ''
+        lines.append(
+            f"{mark} {(item['start'] - root['start']) * 1000:>9.1f} ms {item['duration_ms']:>9.1f} ms "
+            f"(self {self_time_ms(item, children):>8.1f}) {'  ' * depth}{item['name']}{status}  "
+            f"{_format_attributes(item.get('attributes', {}))}"
+        )
+        for child in children.get(item['span_id'], []):
+            walk(child, depth + 1)
+
+    walk(root, 0)
+    total = root['duration_ms'] or 1.0
+    hotspots = sorted(((self_time_ms(s, children), s) for s in critical_path(items)),
+                      key=lambda pair: pair[0], reverse=True)
+    lines.append("critical path (self time): " + ', '.join(
+        f"{s['name']} {ms:.1f} ms ({ms / total:.0%})" for ms, s in hotspots[:5] if ms > 0
+    ))
+    return '\n'.join(lines)
+
+
+def render_slowest(traces, limit):
+    orders = sorted((root for root, _ in traces.values() if root['name'] == 'order'),
+                    key=lambda r: r['duration_ms'], reverse=True)[:limit]
+    lines = [f"{'email_uid':>10} {'duration':>12}  {'outcome':<14} started"]
+    for root in orders:
+        attributes = root.get('attributes', {})
+        lines.append(f"{str(attributes.get('email_uid')):>10} {root['duration_ms']:>9.1f} ms  "
+                     f"{str(attributes.get('outcome')):<14} {datetime.fromtimestamp(root['start']):%Y-%m-%d %H:%M:%S}")
+    return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Linha do tempo e caminho crítico de pedidos (TRACE_FILE)")
+    parser.add_argument('email_uid', nargs='?', help="UID do e-mail do pedido")
+    parser.add_argument('--file', default=os.getenv('TRACE_FILE') or 'data/traces.jsonl')
+    parser.add_argument('--slowest', type=int, metavar='N', help="Lista os N pedidos mais lentos")
+    parser.add_argument('--all', action='store_true', help="Todos os traces do e-mail, não só o mais recente")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.file):
+        print(f"Trace file not found: {args.file} (configure TRACE_FILE)")
+        sys.exit(1)
+    traces = group_traces(load_spans(args.file))
+
+    if args.slowest or not args.email_uid:
+        print(render_slowest(traces, args.slowest or 10))
+        return
+
+    selected = traces_for_email(traces, args.email_uid, include_all=args.all)
+    if not selected:
+        print(f"No traces for email UID {args.email_uid} in {args.file}")
+        sys.exit(1)
+    print('\n\n'.join(render_trace(root, items) for root, items in selected))
+
+
+if __name__ == '__main__':
+    main()